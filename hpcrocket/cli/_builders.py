@@ -4,12 +4,24 @@ import os
 from typing import Any, Dict, List, Optional, Protocol, Tuple, Union, cast
 
 from hpcrocket.core.filesystem import Filesystem
-from hpcrocket.core.filesystem.progressive import CopyInstruction
+from hpcrocket.core.filesystem.progressive import (
+    ARCHIVE_COMPRESSIONS,
+    REMOTE_COPY_METHODS,
+    CopyInstruction,
+    OverwriteMode,
+)
 from hpcrocket.core.launchoptions import (
+    ContentStoreOptions,
+    EarlySubmitOptions,
     FinalizeOptions,
     ImmediateCommandOptions,
+    IncrementalCollectOptions,
     LaunchOptions,
     Options,
+    OutputTailOptions,
+    ResumableTransferOptions,
+    SFTPOptions,
+    SharedPathOptions,
     WatchOptions,
 )
 from hpcrocket.ssh.connectiondata import ConnectionData
@@ -56,18 +68,45 @@ def build_launch_options(
     if sbatch_copy_instruction:
         files_to_copy.append(sbatch_copy_instruction)
 
+    files_to_copy.extend(remote_copy_instructions(yaml_config.get("remote_copy", [])))
+
     return LaunchOptions(
         sbatch=os.path.expandvars(sbatch),
+        sbatch_candidates=sbatch_candidates(yaml_config.get("candidates", [])),
         watch=watch,
         copy_files=files_to_copy,
         clean_files=clean_instructions(yaml_config.get("clean", [])),
         collect_files=copy_instructions(yaml_config.get("collect", [])),
+        transfer_workers=int(yaml_config.get("transfer_workers", 1)),
+        collect_archive=bool(yaml_config.get("collect_archive", False)),
+        collect_compression=archive_compression(yaml_config.get("collect_compression")),
+        clean_in_background=bool(yaml_config.get("clean_in_background", False)),
+        collect_while_running=incremental_collect_options(yaml_config.get("collect_while_running")),
+        resumable_transfers=resumable_transfer_options(yaml_config.get("resumable_transfers")),
+        sftp=sftp_options(yaml_config.get("sftp")),
+        content_store=content_store_options(yaml_config.get("content_store")),
         continue_if_job_fails=yaml_config.get("continue_if_job_fails", False),
         job_id_file=config.jobid_file,
+        estimates_file=config.estimates_file or "",
+        transfers_file=config.transfers_file or "",
+        tail_output=output_tail_options(yaml_config.get("tail_output")),
+        shared_paths=shared_path_options(yaml_config.get("shared_paths", [])),
+        submit_early=early_submit_options(yaml_config.get("submit_early")),
+        state_file=config.state_file or "",
+        resume=resume_flag(config),
+        dry_run=config.dry_run,
         **connection_dict(yaml_config),  # type: ignore
     )
 
 
+def resume_flag(config: argparse.Namespace) -> bool:
+    resume = cast(bool, config.resume)
+    if resume and not config.state_file:
+        raise ValueError("--resume needs the --state-file of the launch to resume")
+
+    return resume
+
+
 def parse_sbatch(yaml_config: Dict[str, Any]) -> Tuple[str, Optional[CopyInstruction]]:
     sbatch: Union[str, Dict[str, str]] = yaml_config["sbatch"]
     if isinstance(sbatch, str):
@@ -79,6 +118,120 @@ def parse_sbatch(yaml_config: Dict[str, Any]) -> Tuple[str, Optional[CopyInstruc
     return script, copy
 
 
+def sbatch_candidates(candidates: List[Dict[str, Any]]) -> List[List[str]]:
+    return [sbatch_args_from_dict(candidate) for candidate in candidates]
+
+
+def sbatch_args_from_dict(candidate: Dict[str, Any]) -> List[str]:
+    return [
+        f"--{option}={os.path.expandvars(str(value))}"
+        for option, value in candidate.items()
+    ]
+
+
+def content_store_options(
+    config: Optional[Dict[str, Any]]
+) -> Optional[ContentStoreOptions]:
+    if not config or not config.get("enabled", True):
+        return None
+
+    defaults = ContentStoreOptions()
+    return ContentStoreOptions(
+        directory=os.path.expandvars(config.get("dir", defaults.directory)),
+        max_size=parse_size(config.get("max_size", defaults.max_size)),
+    )
+
+
+def resumable_transfer_options(
+    config: Optional[Dict[str, Any]]
+) -> Optional[ResumableTransferOptions]:
+    if not config or not config.get("enabled", True):
+        return None
+
+    defaults = ResumableTransferOptions()
+    state_dir = os.path.expandvars(config.get("state_dir", defaults.state_dir))
+    return ResumableTransferOptions(
+        state_dir=os.path.expanduser(state_dir),
+        min_size=parse_size(config.get("min_size", defaults.min_size)),
+        chunk_size=parse_size(config.get("chunk_size", defaults.chunk_size)),
+    )
+
+
+def incremental_collect_options(
+    config: Optional[Dict[str, Any]]
+) -> Optional[IncrementalCollectOptions]:
+    if not config or not config.get("enabled", True):
+        return None
+
+    defaults = IncrementalCollectOptions()
+    return IncrementalCollectOptions(
+        stable_time=int(config.get("stable_time", defaults.stable_time)),
+        interval=int(config.get("interval", defaults.interval)),
+    )
+
+
+def early_submit_options(config: Union[bool, Dict[str, Any], None]) -> Optional[EarlySubmitOptions]:
+    if config is True:
+        config = {}
+
+    if not isinstance(config, dict) or not config.get("enabled", True):
+        return None
+
+    defaults = EarlySubmitOptions()
+    return EarlySubmitOptions(
+        poll_interval=int(config.get("poll_interval", defaults.poll_interval)),
+        timeout=int(config.get("timeout", defaults.timeout)),
+    )
+
+
+def output_tail_options(config: Optional[Dict[str, Any]]) -> Optional[OutputTailOptions]:
+    if not config or not config.get("enabled", True):
+        return None
+
+    defaults = OutputTailOptions()
+    local_file = os.path.expandvars(config.get("file", defaults.file))
+    return OutputTailOptions(
+        lines=int(config.get("lines", defaults.lines)),
+        file=os.path.expanduser(local_file),
+    )
+
+
+def sftp_options(config: Optional[Dict[str, Any]]) -> SFTPOptions:
+    defaults = SFTPOptions()
+    if not config:
+        return defaults
+
+    return SFTPOptions(
+        request_size=parse_size(config.get("request_size", defaults.request_size)),
+        max_requests=int(config.get("max_requests", defaults.max_requests)),
+    )
+
+
+_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def shared_path_options(config: List[Union[str, Dict[str, str]]]) -> List[SharedPathOptions]:
+    """
+    A plain path is mounted at the same path on both machines
+    """
+    return [
+        SharedPathOptions(os.path.expandvars(entry))
+        if isinstance(entry, str)
+        else SharedPathOptions(os.path.expandvars(entry["remote"]), os.path.expandvars(entry.get("local", "")))
+        for entry in config
+    ]
+
+
+def parse_size(size: Union[int, str]) -> int:
+    if isinstance(size, int):
+        return size
+
+    size = size.strip().upper().rstrip("B")
+    unit = _SIZE_UNITS.get(size[-1:], 1)
+    number = size[:-1] if size[-1:] in _SIZE_UNITS else size
+    return int(float(number) * unit)
+
+
 def build_simple_job_options(
     config: argparse.Namespace, yaml_config: Dict[str, Any], filesystem: Filesystem
 ) -> Options:
@@ -96,7 +249,11 @@ def build_watch_options(
     config: argparse.Namespace, yaml_config: Dict[str, Any], filesystem: Filesystem
 ) -> Options:
     jobid = cast(str, config.jobid) or read_jobid_from_file(config, filesystem)
-    return WatchOptions(jobid=jobid, **connection_dict(yaml_config))  # type: ignore
+    return WatchOptions(
+        jobid=jobid,
+        tail_output=output_tail_options(yaml_config.get("tail_output")),
+        **connection_dict(yaml_config),  # type: ignore
+    )
 
 
 def build_finalize_options(
@@ -105,6 +262,15 @@ def build_finalize_options(
     return FinalizeOptions(
         clean_files=clean_instructions(yaml_config.get("clean", [])),
         collect_files=copy_instructions(yaml_config.get("collect", [])),
+        transfer_workers=int(yaml_config.get("transfer_workers", 1)),
+        collect_archive=bool(yaml_config.get("collect_archive", False)),
+        collect_compression=archive_compression(yaml_config.get("collect_compression")),
+        clean_in_background=bool(yaml_config.get("clean_in_background", False)),
+        resumable_transfers=resumable_transfer_options(yaml_config.get("resumable_transfers")),
+        sftp=sftp_options(yaml_config.get("sftp")),
+        shared_paths=shared_path_options(yaml_config.get("shared_paths", [])),
+        transfers_file=config.transfers_file or "",
+        dry_run=config.dry_run,
         **connection_dict(yaml_config),  # type: ignore
     )
 
@@ -119,10 +285,67 @@ def copy_instruction_from_dict(
     return CopyInstruction(
         os.path.expandvars(cp["from"]),
         os.path.expandvars(cp[dest_keyname]),
-        bool(cp.get("overwrite", False)),
+        overwrite_mode(cp.get("overwrite", False)),
+        bool(cp.get("checksum", False)),
+        bool(cp.get("archive", False)),
+        archive_compression(cp.get("compression")),
+        file_mode(cp.get("mode")),
+        verify=bool(cp.get("verify", False)),
     )
 
 
+def remote_copy_instructions(copy_list: List[Dict[str, Any]]) -> List[CopyInstruction]:
+    return [
+        copy_instruction_from_dict(cp)._replace(remote_method=remote_copy_method(cp.get("method", "copy")))
+        for cp in copy_list
+    ]
+
+
+def remote_copy_method(method: str) -> str:
+    if method in REMOTE_COPY_METHODS:
+        return method
+
+    valid = ", ".join(REMOTE_COPY_METHODS)
+    raise ValueError(f"Invalid remote copy method '{method}'. Use one of: {valid}")
+
+
+def overwrite_mode(overwrite: Union[bool, str]) -> OverwriteMode:
+    if isinstance(overwrite, bool):
+        return OverwriteMode(overwrite)
+
+    try:
+        return OverwriteMode[overwrite.replace("-", "_")]
+    except KeyError:
+        valid = ", ".join(mode.name.replace("_", "-") for mode in OverwriteMode)
+        raise ValueError(f"Invalid overwrite value '{overwrite}'. Use true, false or one of: {valid}")
+
+
+def archive_compression(compression: Optional[str]) -> Optional[str]:
+    if compression is None or compression in ARCHIVE_COMPRESSIONS:
+        return compression
+
+    valid = ", ".join(ARCHIVE_COMPRESSIONS)
+    raise ValueError(f"Invalid compression '{compression}'. Use one of: {valid}")
+
+
+def file_mode(mode: Union[int, str, None]) -> Optional[int]:
+    """
+    Strings are read as octal numbers, e.g. "755". Integers, e.g. from an unquoted YAML `0755`, are used as they are.
+    """
+    if mode is None:
+        return None
+
+    try:
+        value = int(mode, 8) if isinstance(mode, str) else int(mode)
+    except ValueError:
+        value = -1
+
+    if not 0 <= value <= 0o7777:
+        raise ValueError(f"Invalid mode '{mode}'. Use an octal number like \"644\" or \"755\"")
+
+    return value
+
+
 def clean_instructions(clean_instructions: List[str]) -> List[str]:
     return [os.path.expandvars(ci) for ci in clean_instructions]
 
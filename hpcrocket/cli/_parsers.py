@@ -33,6 +33,27 @@ def _setup_launch_parser(
     _add_configfile_arg(parser)
     parser.add_argument("--watch", default=False, dest="watch", action="store_true")
     parser.add_argument("--save-jobid", dest="jobid_file", type=str)
+    parser.add_argument(
+        "--save-estimates",
+        dest="estimates_file",
+        type=str,
+        help="Write the estimated start of every sbatch candidate to this file",
+    )
+    _add_save_transfers_arg(parser)
+    parser.add_argument(
+        "--state-file",
+        dest="state_file",
+        type=str,
+        help="Save the progress of the launch to this file, so an interrupted launch can be resumed",
+    )
+    parser.add_argument(
+        "--resume",
+        default=False,
+        dest="resume",
+        action="store_true",
+        help="Continue the launch saved in the state file instead of starting over",
+    )
+    _add_dry_run_flag(parser)
 
 
 def _setup_finalize_parser(
@@ -42,6 +63,8 @@ def _setup_finalize_parser(
         "finalize", help="Run collect and clean instructions"
     )
     _add_configfile_arg(parser)
+    _add_save_transfers_arg(parser)
+    _add_dry_run_flag(parser)
 
 
 def _setup_status_parser(
@@ -78,6 +101,25 @@ def _add_configfile_arg(parser: argparse.ArgumentParser) -> None:
     )
 
 
+def _add_dry_run_flag(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--dry-run",
+        default=False,
+        dest="dry_run",
+        action="store_true",
+        help="Print the planned file transfers without copying anything or submitting a job",
+    )
+
+
+def _add_save_transfers_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--save-transfers",
+        dest="transfers_file",
+        type=str,
+        help="Append a JSON summary of the file transfers of every stage to this file",
+    )
+
+
 def _add_read_jobid_arg(parser: argparse.ArgumentParser) -> None:
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--jobid", type=str, help="The ID of the job to be monitored")
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Type
+from typing import Iterator, List, Type
 
 
 class RunningCommand(ABC):
@@ -20,6 +20,19 @@ class RunningCommand(ABC):
     def stderr(self) -> List[str]:
         pass
 
+    def iter_stdout(self) -> Iterator[str]:
+        """
+        Yields the lines of stdout as soon as they are written.
+        Commands that cannot stream their output yield the lines once they exited.
+        """
+        self.wait_until_exit()
+        return iter(self.stdout())
+
+    def stop(self) -> None:
+        """
+        Stops the command if it is still running
+        """
+
 
 class CommandExecutor(ABC):
     def __enter__(self) -> "CommandExecutor":
@@ -1,3 +1,3 @@
-from ._filesystem import Filesystem, FilesystemFactory
+from ._filesystem import FileStat, Filesystem, FilesystemFactory, VerificationError
 
-__all__ = ["Filesystem", "FilesystemFactory"]
+__all__ = ["FileStat", "Filesystem", "FilesystemFactory", "VerificationError"]
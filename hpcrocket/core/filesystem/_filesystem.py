@@ -1,6 +1,22 @@
 from abc import ABC, abstractmethod
 from io import TextIOWrapper
-from typing import List, Optional
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class FileStat(NamedTuple):
+    """
+    Metadata of a file or directory
+    """
+
+    size: int
+    modified: float
+    is_dir: bool = False
+
+
+class VerificationError(OSError):
+    """
+    A copied file does not have the content of its source, e.g. because the transfer was cut short
+    """
 
 
 class FilesystemFactory(ABC):
@@ -30,6 +46,19 @@ class Filesystem(ABC):
             list[str]: A list of file paths matching the pattern.
         """
 
+    def iglob(self, pattern: str) -> Iterator[str]:
+        """
+        Matches file names against the provided pattern like `glob`, but yields the paths while still searching.
+        Filesystems that cannot search lazily return the result of `glob`.
+
+        Args:
+            pattern (str): The pattern to match file names against.
+
+        Returns:
+            Iterator[str]: The file paths matching the pattern.
+        """
+        return iter(self.glob(pattern))
+
     @abstractmethod
     def copy(
         self,
@@ -37,6 +66,7 @@ class Filesystem(ABC):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         """Copies the `source` file to the `target` location.
         Can transfer between filesystems if `filesystem` argument is specified.
@@ -45,23 +75,137 @@ class Filesystem(ABC):
             source (str): The path to the file to be copied
             target (str): The path to the copy destination
             filesystem (Filesystem): An optional different filesystem to copy to
+            literal (bool): The source is a path and not a glob pattern, even if it contains wildcard characters
+
+        Raises:
+            FileNotFoundError: The `source` file does not exist
+            FileExistsError: The `target` file already exists and overwrite is False
+        """
+
+    def copy_verified(
+        self,
+        source: str,
+        target: str,
+        overwrite: bool = False,
+        filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
+    ) -> None:
+        """Copies like `copy` and checks that every transferred file has the content of its source.
+        Filesystems that transfer files over a network hash the files while they are transferred
+        and compare the hashes with the files on the other side afterwards.
+        Other filesystems copy the files like `copy`.
+
+        Args:
+            source (str): The path to the file to be copied
+            target (str): The path to the copy destination
+            filesystem (Filesystem): An optional different filesystem to copy to
+            literal (bool): The source is a path and not a glob pattern, even if it contains wildcard characters
 
         Raises:
             FileNotFoundError: The `source` file does not exist
             FileExistsError: The `target` file already exists and overwrite is False
+            VerificationError: A file was copied, but its content differs from its source
+        """
+        self.copy(source, target, overwrite, filesystem, literal)
+
+    def copy_archive(
+        self,
+        files: Sequence[Tuple[str, str]],
+        overwrite: bool = False,
+        filesystem: Optional["Filesystem"] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        """Copies many files at once by streaming them as a single tar archive.
+        Filesystems that can not stream archives copy the files one by one.
+        All files are checked before the first one is copied, so either all or none are copied.
+
+        Args:
+            files (Sequence[tuple[str, str]]): Pairs of source and target paths
+            filesystem (Filesystem): An optional different filesystem to copy to
+            compression (str): An optional compression for the archive, e.g. "gzip"
+
+        Raises:
+            FileNotFoundError: A `source` file does not exist
+            FileExistsError: A `target` file already exists and overwrite is False
+        """
+        target_fs = filesystem or self
+        for source, target in files:
+            if not self.exists(source):
+                raise FileNotFoundError(source)
+
+            if not overwrite and target_fs.exists(target) and not target_fs.stat(target).is_dir:
+                raise FileExistsError(target)
+
+        for source, target in files:
+            self.copy(source, target, overwrite, filesystem, literal=True)
+
+    def copy_within(self, files: Sequence[Tuple[str, str]], overwrite: bool = False, method: str = "copy") -> List[str]:
+        """Copies files and directories to other paths on this filesystem.
+        Filesystems on another machine copy them on that machine, so their contents are never transferred.
+        Other filesystems copy the files one by one.
+
+        Args:
+            files (Sequence[tuple[str, str]]): Pairs of source and target paths. Sources may contain glob patterns.
+            method (str): "copy" clones the files where the filesystem supports it, "link" creates hard links
+                and "rsync" only copies files that changed
+
+        Returns:
+            list[str]: The paths that were copied to
+
+        Raises:
+            FileNotFoundError: A `source` file does not exist
+            FileExistsError: A `target` file already exists and overwrite is False
+        """
+        for source, target in files:
+            self.copy(source, target, overwrite)
+
+        return [target for _, target in files]
+
+    def set_permissions(self, paths: Sequence[str], mode: int) -> None:
+        """Sets the permissions of many files at once.
+        Filesystems without Unix permissions ignore the call.
+
+        Args:
+            paths (Sequence[str]): The paths to the files
+            mode (int): The permission bits, e.g. 0o755
+
+        Raises:
+            FileNotFoundError: A file does not exist
         """
 
     @abstractmethod
-    def delete(self, path: str) -> None:
+    def delete(self, path: str, literal: bool = False) -> None:
         """Deletes a file from the Filesystem
 
         Args:
             path (str): The path to the file to be deleted
+            literal (bool): The path is not a glob pattern, even if it contains wildcard characters
 
         Raises:
             FileNotFoundError: The file does not exist
         """
 
+    def delete_many(self, paths: Sequence[str], detach: bool = False, literal: bool = False) -> List[FileNotFoundError]:
+        """Deletes many files and directories at once. Paths may contain glob patterns, unless they are `literal`.
+        Filesystems that can not delete in bulk delete the paths one by one.
+
+        Args:
+            paths (Sequence[str]): The paths to delete
+            detach (bool): Return before the files are deleted, if the filesystem supports it
+            literal (bool): The paths are not glob patterns, even if they contain wildcard characters
+
+        Returns:
+            list[FileNotFoundError]: An error for every path that does not exist
+        """
+        errors: List[FileNotFoundError] = []
+        for path in paths:
+            try:
+                self.delete(path, literal)
+            except FileNotFoundError as err:
+                errors.append(err)
+
+        return errors
+
     @abstractmethod
     def exists(self, path: str) -> bool:
         """Checks if a file exists on the Filesystem
@@ -73,6 +217,82 @@ class Filesystem(ABC):
             bool: True if the file exists
         """
 
+    @abstractmethod
+    def stat(self, path: str) -> FileStat:
+        """Returns the size and modification time of a file
+
+        Args:
+            path (str): The path to a file
+
+        Returns:
+            FileStat: The file's metadata. Directories have a size of 0.
+
+        Raises:
+            FileNotFoundError: The file does not exist
+        """
+
+    @abstractmethod
+    def checksum(self, path: str) -> str:
+        """Computes the BLAKE2b checksum of a file's content
+
+        Args:
+            path (str): The path to a file
+
+        Returns:
+            str: The hex digest of the file's content
+
+        Raises:
+            FileNotFoundError: The file does not exist
+        """
+
+    def size(self, path: str) -> int:
+        """Returns the size of a file in bytes
+
+        Args:
+            path (str): The path to a file
+
+        Returns:
+            int: The size of the file. Directories have a size of 0.
+
+        Raises:
+            FileNotFoundError: The file does not exist
+        """
+        return self.stat(path).size
+
+    def fork(self) -> "Filesystem":
+        """Returns a Filesystem that can be used from another thread at the same time as this one.
+        Filesystems that can safely be shared between threads return themselves.
+
+        Returns:
+            Filesystem: A Filesystem operating on the same files
+        """
+        return self
+
+    def close(self) -> None:
+        """Releases the resources of a filesystem returned by `fork`, e.g. its connection channel.
+        Only forks are closed, never the filesystem they were forked from.
+        Filesystems without resources of their own do nothing.
+        """
+
+    def flush(self) -> None:
+        """Writes what the filesystem deferred while files were copied to it, e.g. the index of a content store.
+        Filesystems that write everything right away do nothing.
+        """
+
+    def refresh(self) -> None:
+        """Forgets cached metadata, so files that were changed by others since are seen as they are now.
+        Filesystems without a cache do nothing.
+        """
+
+    def request_count(self) -> int:
+        """Returns the number of requests this filesystem and its forks sent to another machine so far.
+        Filesystems on the local machine send no requests and return 0.
+
+        Returns:
+            int: The number of requests
+        """
+        return 0
+
     @abstractmethod
     def openread(self, path: str) -> TextIOWrapper:
         """Opens a file in read mode
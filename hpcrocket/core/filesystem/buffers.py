@@ -0,0 +1,22 @@
+import os
+from typing import BinaryIO
+
+
+def preallocate(file: BinaryIO, size: int) -> bool:
+    """
+    Reserves `size` bytes on disk for a local file from its current position, so writing it does not fragment it.
+    Files that are not on a local disk and filesystems without support are left unchanged.
+
+    Returns:
+        bool: True if the file was extended to the reserved size and must be truncated if less data is written
+    """
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return False
+
+    try:
+        os.posix_fallocate(file.fileno(), file.tell(), size)
+        return True
+    except (AttributeError, OSError, ValueError):
+        # NOTE:
+        # io.UnsupportedOperation is an OSError and a ValueError
+        return False
@@ -1,5 +1,18 @@
+import fnmatch
+import functools
 import os
-from typing import Callable, Tuple
+import re
+from typing import Callable, FrozenSet, Iterable, Iterator, List, Optional, Pattern, Set, Tuple, Union
+
+_WILDCARDS = "*?[{"
+
+_RECURSIVE = "**"
+
+ListDirectory = Callable[[str], Iterable[Tuple[str, bool]]]
+"""Lists the entries of a directory as their names and whether they are directories"""
+
+Component = Union[str, Pattern[str]]
+"""A literal name, a compiled wildcard or `**`"""
 
 
 def removeprefix(string: str, prefix: str) -> str:
@@ -18,7 +31,8 @@ def removeprefix(string: str, prefix: str) -> str:
 
 def is_glob(path: str) -> bool:
     """
-    Checks if a wildcard operator is used in the path
+    Checks if a wildcard operator is used in the path.
+    Wildcards are `*`, `?`, character sets like `[a-z]` and alternatives like `{a,b}`.
 
     Args:
         path (str): The filepath
@@ -27,7 +41,7 @@ def is_glob(path: str) -> bool:
         bool
     """
 
-    return "*" in path
+    return any(wildcard in path for wildcard in _WILDCARDS)
 
 
 def path_after_wildcard(glob_pattern: str, full_filepath: str) -> str:
@@ -37,13 +51,196 @@ def path_after_wildcard(glob_pattern: str, full_filepath: str) -> str:
 
 
 def split_at_first_wildcard(pattern: str) -> Tuple[str, str]:
+    """
+    Splits the pattern into the directory before the first wildcard and the pattern below it
+    """
     first_wildcard = _first_wildcard(pattern)
     return pattern[:first_wildcard], pattern[first_wildcard:]
 
 
 def _first_wildcard(pattern: str) -> int:
-    first_star = pattern.find("*")
-    if first_star == -1:
-        first_star = 0
+    wildcards = [index for index in map(pattern.find, _WILDCARDS) if index != -1]
+    if not wildcards:
+        return 0
+
+    # The whole name containing the wildcard belongs to the pattern
+    return pattern.rfind(os.path.sep, 0, min(wildcards)) + 1
+
+
+def outermost(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Skips the paths that lie inside an earlier path, because copying or deleting a directory includes its contents.
+    Globs yield directories before their contents.
+    """
+    seen: Set[str] = set()
+    for path in paths:
+        normalized = os.path.normpath(path)
+        if not any(parent in seen for parent in _parents(normalized)):
+            yield path
+
+        seen.add(normalized)
 
-    return first_star
+
+def _parents(path: str) -> Iterator[str]:
+    parent = os.path.dirname(path)
+    while parent and parent != os.path.dirname(parent):
+        yield parent
+        parent = os.path.dirname(parent)
+
+
+class GlobMatcher:
+    """
+    A compiled glob pattern relative to a directory.
+    `*`, `?` and `[...]` match within a single name, `**` matches any number of directories
+    and `{a,b}` matches either alternative. A pattern ending with a separator only matches directories.
+    Use `compile_glob` to reuse matchers of the same pattern.
+    """
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self._dirs_only = pattern.endswith(os.path.sep)
+        self._alternatives = [_compile_components(alternative) for alternative in expand_braces(pattern)]
+
+    @property
+    def max_depth(self) -> Optional[int]:
+        """The deepest level of the directory that can contain matches, or None if the pattern is recursive"""
+        if any(_RECURSIVE in components for components in self._alternatives):
+            return None
+
+        return max(len(components) for components in self._alternatives)
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Checks if the path relative to the glob directory matches the pattern
+        """
+        if self._dirs_only and not is_dir:
+            return False
+
+        names = [name for name in path.split(os.path.sep) if name]
+        states = self._initial_states()
+        for name in names:
+            states = self._advance(states, name)
+            if not states:
+                return False
+
+        return self._accepts(states)
+
+    def walk(self, list_directory: ListDirectory) -> Iterator[str]:
+        """
+        Lists only the directories that can contain matches and yields the matching paths relative to the
+        glob directory. Every directory is listed once and before its contents are yielded.
+
+        Args:
+            list_directory (ListDirectory): Lists a directory by its path relative to the glob directory
+        """
+        yield from self._walk("", self._initial_states(), list_directory)
+
+    def _walk(self, directory: str, states: FrozenSet[Tuple[int, int]], list_directory: ListDirectory) -> Iterator[str]:
+        for name, is_dir in list_directory(directory):
+            path = os.path.join(directory, name)
+            next_states = self._advance(states, name)
+            if not next_states:
+                continue
+
+            if self._accepts(next_states) and (is_dir or not self._dirs_only):
+                yield path
+
+            if is_dir and self._continues(next_states):
+                yield from self._walk(path, next_states, list_directory)
+
+    def _initial_states(self) -> FrozenSet[Tuple[int, int]]:
+        return self._closure((alternative, 0) for alternative in range(len(self._alternatives)))
+
+    def _closure(self, states: Iterable[Tuple[int, int]]) -> FrozenSet[Tuple[int, int]]:
+        # `**` also matches no directory at all
+        closure: Set[Tuple[int, int]] = set()
+        for alternative, index in states:
+            components = self._alternatives[alternative]
+            closure.add((alternative, index))
+            while index < len(components) and components[index] == _RECURSIVE:
+                index += 1
+                closure.add((alternative, index))
+
+        return frozenset(closure)
+
+    def _advance(self, states: FrozenSet[Tuple[int, int]], name: str) -> FrozenSet[Tuple[int, int]]:
+        advanced: List[Tuple[int, int]] = []
+        for alternative, index in states:
+            components = self._alternatives[alternative]
+            if index == len(components):
+                continue
+
+            component = components[index]
+            if component == _RECURSIVE:
+                advanced.append((alternative, index))
+            elif _matches(component, name):
+                advanced.append((alternative, index + 1))
+
+        return self._closure(advanced)
+
+    def _accepts(self, states: FrozenSet[Tuple[int, int]]) -> bool:
+        return any(index == len(self._alternatives[alternative]) for alternative, index in states)
+
+    def _continues(self, states: FrozenSet[Tuple[int, int]]) -> bool:
+        return any(index < len(self._alternatives[alternative]) for alternative, index in states)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_glob(pattern: str) -> GlobMatcher:
+    """
+    Compiles a glob pattern once and returns the same matcher for repeated patterns
+    """
+    return GlobMatcher(pattern)
+
+
+def expand_braces(pattern: str) -> List[str]:
+    """
+    Expands alternatives like `{a,b}` into one pattern per alternative. Alternatives may be nested.
+    Braces without a comma are kept as they are.
+    """
+    start = -1
+    depth = 0
+    commas: List[int] = []
+    for index, char in enumerate(pattern):
+        if char == "{":
+            if depth == 0:
+                start = index
+                commas = []
+
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0 and commas:
+                bounds = [start, *commas, index]
+                prefix, suffix = pattern[:start], pattern[index + 1 :]
+                alternatives = [pattern[begin + 1 : end] for begin, end in zip(bounds, bounds[1:])]
+                return [
+                    expanded
+                    for alternative in alternatives
+                    for expanded in expand_braces(prefix + alternative + suffix)
+                ]
+        elif char == "," and depth == 1:
+            commas.append(index)
+
+    return [pattern]
+
+
+def _compile_components(pattern: str) -> List[Component]:
+    components: List[Component] = []
+    for name in pattern.split(os.path.sep):
+        if not name or (name == _RECURSIVE and components and components[-1] == _RECURSIVE):
+            continue
+
+        if name == _RECURSIVE or not is_glob(name):
+            components.append(name)
+        else:
+            components.append(re.compile(fnmatch.translate(name)))
+
+    return components
+
+
+def _matches(component: Component, name: str) -> bool:
+    if isinstance(component, str):
+        return component == name
+
+    return component.match(name) is not None
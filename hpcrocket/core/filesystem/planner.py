@@ -0,0 +1,142 @@
+import heapq
+import os
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Tuple
+
+
+class TransferStrategy(Enum):
+    """
+    How the files of a group are transferred.
+    `files` transfers every file on its own, spread over all workers.
+    `archive` transfers all files of the group as a single tar stream on one worker.
+    """
+
+    files = "files"
+    archive = "archive"
+
+
+@dataclass(frozen=True)
+class PlannedFile:
+    """
+    A single file that a transfer will copy.
+    `destination` is the final path of the file, inside the destination directory if the destination is one.
+    Unchanged files that will be skipped are part of the plan as well.
+    """
+
+    source: str
+    destination: str
+    size: int
+    skipped: bool = False
+
+
+@dataclass
+class TransferGroup:
+    """
+    The files matched by a copy instruction, or by all instructions that are transferred as one archive
+    """
+
+    source: str
+    destination: str
+    strategy: TransferStrategy
+    files: List[PlannedFile] = field(default_factory=list)
+
+    @property
+    def transferred(self) -> List[PlannedFile]:
+        return [file for file in self.files if not file.skipped]
+
+    @property
+    def size(self) -> int:
+        """The number of bytes that will be transferred"""
+        return sum(file.size for file in self.transferred)
+
+
+@dataclass
+class TransferPlan:
+    """
+    All files of a transfer, found before anything is copied.
+    `errors` holds the problems that would make the copy fail, e.g. missing sources.
+    """
+
+    groups: List[TransferGroup] = field(default_factory=list)
+    errors: List[Exception] = field(default_factory=list)
+
+    @property
+    def files(self) -> List[PlannedFile]:
+        return [file for group in self.groups for file in group.files]
+
+    @property
+    def file_count(self) -> int:
+        """The number of files that will be transferred"""
+        return sum(len(group.transferred) for group in self.groups)
+
+    @property
+    def skipped_count(self) -> int:
+        return len(self.files) - self.file_count
+
+    @property
+    def size(self) -> int:
+        """The number of bytes that will be transferred"""
+        return sum(group.size for group in self.groups)
+
+    def conflicts(self) -> List[str]:
+        """
+        Finds destinations that more than one file is copied to,
+        and destinations that are copied to as a file and as a directory containing other files.
+
+        Returns:
+            List[str]: A description of every conflict
+        """
+        sources: Dict[str, List[str]] = {}
+        for file in self.files:
+            sources.setdefault(os.path.normpath(file.destination), []).append(file.source)
+
+        conflicts = [
+            f"{destination} is copied from {', '.join(files)}"
+            for destination, files in sources.items()
+            if len(files) > 1
+        ]
+
+        for destination in sources:
+            parent = os.path.dirname(destination)
+            while parent and parent != os.path.dirname(parent):
+                if parent in sources:
+                    conflicts.append(f"{parent} is copied as a file and as the directory of {destination}")
+
+                parent = os.path.dirname(parent)
+
+        return conflicts
+
+    def work_units(self) -> List[Tuple[str, int]]:
+        """
+        Orders the transfers for the shortest completion time with parallel workers.
+        An archive is a single unit of work. Larger units come first, so no worker finishes with a large
+        transfer while the others are idle.
+
+        Returns:
+            List[Tuple[str, int]]: The description and size in bytes of every unit of work, largest first
+        """
+        units: List[Tuple[str, int]] = []
+        for group in self.groups:
+            if group.strategy == TransferStrategy.archive:
+                if group.transferred:
+                    units.append((f"archive of {group.source}", group.size))
+
+                continue
+
+            units.extend((file.source, file.size) for file in group.transferred)
+
+        return sorted(units, key=lambda unit: unit[1], reverse=True)
+
+    def worker_loads(self, workers: int) -> List[int]:
+        """
+        Assigns the ordered units of work to the worker that becomes free first.
+
+        Returns:
+            List[int]: The number of bytes every worker transfers, largest first
+        """
+        loads = [0] * max(workers, 1)
+        for _, size in self.work_units():
+            heapq.heapreplace(loads, loads[0] + size)
+
+        return sorted(loads, reverse=True)
@@ -1,44 +1,119 @@
-import functools
+import itertools
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from dataclasses import dataclass, field
-from typing import Generator, List, NamedTuple, Optional
+from enum import IntEnum
+from typing import Callable, Dict, Generator, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
 
-from hpcrocket.core.filesystem import Filesystem
-from hpcrocket.core.filesystem.glob import is_glob, path_after_wildcard
+from hpcrocket.core.filesystem import Filesystem, VerificationError
+from hpcrocket.core.filesystem.glob import is_glob, outermost, path_after_wildcard
+from hpcrocket.core.filesystem.planner import PlannedFile, TransferGroup, TransferPlan, TransferStrategy
+from hpcrocket.core.filesystem.transfermonitor import FileTransfer, TransferMonitor
+
+
+class OverwriteMode(IntEnum):
+    """
+    How to treat files that already exist at the copy destination.
+    `never` and `always` compare equal to False and True.
+    """
+
+    never = 0
+    always = 1
+    if_changed = 2
+
+
+ARCHIVE_COMPRESSIONS = ("gzip", "zstd")
+
+REMOTE_COPY_METHODS = ("copy", "link", "rsync")
+
+_SCHEDULING_WINDOW = 256
+"""The number of globbed files that are ordered by size before they are scheduled"""
+
+_PENDING_PER_WORKER = 2
+"""The number of files per worker that are scheduled ahead of time"""
+
+FileCallback = Callable[[str], None]
 
 
 class CopyInstruction(NamedTuple):
     """
     Copy instruction for a file.
+    With `OverwriteMode.if_changed` existing files are only replaced if their size or modification time differs.
+    If `checksum` is set, the files' contents are compared instead of their modification times.
+    With `archive` all matched files are transferred together as a single tar stream, optionally compressed.
+    `mode` sets the permissions of the copied files, once all files of the instruction are copied.
+    With `remote_method` the source is on the target filesystem as well and is copied by the machine that holds it,
+    with one of REMOTE_COPY_METHODS (see remote_copy).
+    With `verify` the copied files are checked against their sources, see `Filesystem.copy_verified`.
+    Archives are not verified.
+    A `literal` source is a path and not a glob pattern, e.g. a file that was matched by a glob pattern already.
     """
 
     source: str
     destination: str
-    overwrite: bool = False
+    overwrite: Union[bool, OverwriteMode] = False
+    checksum: bool = False
+    archive: bool = False
+    compression: Optional[str] = None
+    mode: Optional[int] = None
+    remote_method: Optional[str] = None
+    verify: bool = False
+    literal: bool = False
 
     def unglob(self, filesystem: Filesystem) -> List["CopyInstruction"]:
-        if is_glob(self.source):
-            files = filesystem.glob(self.source)
-            return [self._unglobbed_sub_instruction(file) for file in files]
+        return list(self.iunglob(filesystem))
 
-        return [self]
+    def iunglob(self, filesystem: Filesystem) -> Iterator["CopyInstruction"]:
+        """
+        Yields an instruction per file matched by the source, while the filesystem is still searching.
+        A matched directory is a single instruction that includes its contents.
+        """
+        if is_glob(self.source) and not self.literal:
+            files = outermost(filesystem.iglob(self.source))
+            return (self._unglobbed_sub_instruction(file) for file in files)
+
+        return iter([self])
 
     def _unglobbed_sub_instruction(self, file: str) -> "CopyInstruction":
         filename = path_after_wildcard(self.source, file)
         final_dest = os.path.join(self.destination, filename)
-        return CopyInstruction(file, final_dest, self.overwrite)
+        return self._replace(source=file, destination=final_dest, literal=True)
 
 
 @dataclass
 class CopyResult:
     copied_files: List[str]
     errors: List[Exception] = field(default_factory=list)
+    skipped_files: List[str] = field(default_factory=list)
 
     @classmethod
     def empty(cls, errors: Optional[List[Exception]] = None) -> "CopyResult":
         return cls([], errors or [])
 
 
+class _Permissions:
+    """
+    Collects the copied files that need different permissions, so they can be set in one batch per mode
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._paths: Dict[int, List[str]] = {}
+
+    def add(self, mode: int, path: str) -> None:
+        with self._lock:
+            self._paths.setdefault(mode, []).append(path)
+
+    def apply(self, filesystem: Filesystem) -> None:
+        with self._lock:
+            paths, self._paths = self._paths, {}
+
+        for mode, files in paths.items():
+            filesystem.set_permissions(files, mode)
+
+
 class _Copier:
     def __init__(
         self,
@@ -46,43 +121,466 @@ class _Copier:
         target_fs: Filesystem,
         *,
         abort_on_error: bool = True,
+        permissions: Optional[_Permissions] = None,
+        monitor: Optional[TransferMonitor] = None,
+        reports_found: bool = True,
+        on_copied: Optional[FileCallback] = None,
     ) -> None:
+        """
+        Args:
+            permissions (_Permissions): Collects the files to change permissions for instead of changing them
+                after every instruction. The caller is responsible for applying them.
+            monitor (TransferMonitor): Receives the measurements of every copied file
+            reports_found (bool): Report files to the monitor before copying them.
+                Disabled if the caller already reported them when scheduling.
+            on_copied (FileCallback): Is called with the destination of every file as soon as it is copied
+        """
         self._src_fs = src_fs
         self._target_fs = target_fs
         self._abort_on_error = abort_on_error
+        self._permissions = permissions or _Permissions()
+        self._applies_permissions = permissions is None
+        self._monitor = monitor or TransferMonitor("Copying files")
+        self._reports_found = reports_found
+        self._on_copied = on_copied or _ignore_file
 
     def __call__(self, copy_instruction: CopyInstruction) -> CopyResult:
         try:
-            unpacked_instructions = copy_instruction.unglob(self._src_fs)
-            return functools.reduce(
-                self._accumulate_copy_result, unpacked_instructions, CopyResult([])
-            )
+            if copy_instruction.archive:
+                return self.copy_as_archive([copy_instruction], copy_instruction.compression)
+
+            result = CopyResult([])
+            for instruction in copy_instruction.iunglob(self._src_fs):
+                self._accumulate_copy_result(result, instruction)
+                if result.errors and self._abort_on_error:
+                    break
+
+            self._apply_permissions(result)
+            return result
         except FileNotFoundError as err:
             return CopyResult.empty([err])
 
+    def _apply_permissions(self, result: CopyResult) -> None:
+        if not self._applies_permissions:
+            return
+
+        try:
+            self._permissions.apply(self._target_fs)
+        except OSError as err:
+            result.errors.append(err)
+
+    def _add_permissions(self, instruction: CopyInstruction) -> None:
+        if instruction.mode is None or self._src_fs.stat(instruction.source).is_dir:
+            return
+
+        target = instruction.destination
+        if self._target_fs.stat(target).is_dir:
+            target = os.path.join(target, os.path.basename(instruction.source))
+
+        self._permissions.add(instruction.mode, target)
+
     def _accumulate_copy_result(
         self, current_result: CopyResult, instruction: CopyInstruction
+    ) -> None:
+        try:
+            self._copy_or_skip(instruction, current_result)
+        except (FileNotFoundError, FileExistsError, VerificationError) as err:
+            current_result.errors.append(err)
+
+    def copy_as_archive(
+        self, copy_instructions: List[CopyInstruction], compression: Optional[str] = None
+    ) -> CopyResult:
+        """
+        Copies the files of all instructions as a single archive.
+        Files that are missing or must not be overwritten are checked before anything is copied.
+        The archive is reported to the monitor as a single file.
+        """
+        result = CopyResult([])
+        changed = self._changed_files(copy_instructions, result)
+        if result.errors and self._abort_on_error:
+            return result
+
+        try:
+            size = sum(self._src_fs.size(instruction.source) for instruction in changed)
+            self._monitor.found(size)
+            start = time.monotonic()
+            self._src_fs.copy_archive(
+                [(instruction.source, instruction.destination) for instruction in changed],
+                overwrite=True,
+                filesystem=self._target_fs,
+                compression=compression,
+            )
+            duration = time.monotonic() - start
+            result.copied_files.extend(instruction.destination for instruction in changed)
+            for instruction in changed:
+                self._on_copied(instruction.destination)
+        except (OSError, RuntimeError) as err:
+            # E.g. `tar` failed on the remote machine or the zstd compression is not installed.
+            # FileNotFoundError and FileExistsError are OSErrors as well
+            result.errors.append(err)
+            return result
+
+        self._monitor.finished(FileTransfer("archive", size, duration))
+
+        for instruction in changed:
+            self._add_permissions(instruction)
+
+        self._apply_permissions(result)
+        return result
+
+    def _changed_files(
+        self, copy_instructions: List[CopyInstruction], result: CopyResult
+    ) -> List[CopyInstruction]:
+        changed: List[CopyInstruction] = []
+        for copy_instruction in copy_instructions:
+            try:
+                instructions = copy_instruction.unglob(self._src_fs)
+            except FileNotFoundError as err:
+                instructions = []
+                result.errors.append(err)
+
+            for instruction in instructions:
+                if result.errors and self._abort_on_error:
+                    return changed
+
+                try:
+                    self._raise_if_not_copyable(instruction)
+                except (FileNotFoundError, FileExistsError) as err:
+                    result.errors.append(err)
+                    continue
+
+                if self._is_unchanged(instruction):
+                    result.skipped_files.append(instruction.destination)
+                else:
+                    changed.append(instruction)
+
+        return changed
+
+    def _raise_if_not_copyable(self, instruction: CopyInstruction) -> None:
+        if not self._src_fs.exists(instruction.source):
+            raise FileNotFoundError(instruction.source)
+
+        target = instruction.destination
+        if instruction.overwrite or not self._target_fs.exists(target):
+            return
+
+        if not self._target_fs.stat(target).is_dir:
+            raise FileExistsError(target)
+
+    def _copy_or_skip(self, instruction: CopyInstruction, result: CopyResult) -> None:
+        size = self._src_fs.size(instruction.source)
+        if self._reports_found:
+            self._monitor.found(size)
+
+        if self._is_unchanged(instruction):
+            result.skipped_files.append(instruction.destination)
+            self._monitor.skipped(size)
+            return
+
+        start = time.monotonic()
+        copy = self._src_fs.copy_verified if instruction.verify else self._src_fs.copy
+        try:
+            copy(
+                instruction.source,
+                instruction.destination,
+                bool(instruction.overwrite),
+                filesystem=self._target_fs,
+                literal=instruction.literal,
+            )
+        except VerificationError:
+            # The differing copy is removed together with the other copied files on a rollback
+            result.copied_files.append(instruction.destination)
+            raise
+
+        duration = time.monotonic() - start
+        result.copied_files.append(instruction.destination)
+        self._on_copied(instruction.destination)
+        self._add_permissions(instruction)
+        self._monitor.finished(FileTransfer(instruction.destination, size, duration))
+
+    def _is_unchanged(self, instruction: CopyInstruction) -> bool:
+        if instruction.overwrite != OverwriteMode.if_changed:
+            return False
+
+        target = self._target_file(instruction)
+        if target is None:
+            return False
+
+        source_stat = self._src_fs.stat(instruction.source)
+        target_stat = self._target_fs.stat(target)
+        if source_stat.is_dir or source_stat.size != target_stat.size:
+            return False
+
+        if instruction.checksum:
+            return self._src_fs.checksum(instruction.source) == self._target_fs.checksum(target)
+
+        return target_stat.modified >= source_stat.modified
+
+    def _target_file(self, instruction: CopyInstruction) -> Optional[str]:
+        target = instruction.destination
+        if not self._target_fs.exists(target):
+            return None
+
+        if self._target_fs.stat(target).is_dir:
+            target = os.path.join(target, os.path.basename(instruction.source))
+            return target if self._target_fs.exists(target) else None
+
+        return target
+
+
+class _ParallelCopier:
+    """
+    Copies files with a pool of workers. Each worker transfers through its own fork of the filesystems.
+    Globs are searched while the workers are copying, and only a few files per worker are scheduled ahead of time.
+    Within each window of globbed files large files are scheduled first,
+    so the pool does not end up waiting on a single large transfer.
+    """
+
+    def __init__(
+        self,
+        src_fs: Filesystem,
+        target_fs: Filesystem,
+        workers: int,
+        *,
+        abort_on_error: bool = True,
+        monitor: Optional[TransferMonitor] = None,
+        on_copied: Optional[FileCallback] = None,
+    ) -> None:
+        self._src_fs = src_fs
+        self._target_fs = target_fs
+        self._workers = workers
+        self._on_copied = on_copied
+        self._abort_on_error = abort_on_error
+        self._thread_local = threading.local()
+        self._forks: List[Filesystem] = []
+        self._forks_lock = threading.Lock()
+        self._permissions = _Permissions()
+        self._monitor = monitor or TransferMonitor("Copying files")
+
+    def __call__(
+        self, copy_instructions: List[CopyInstruction]
+    ) -> Generator[CopyResult, None, None]:
+        instructions, errors = self._unglob_all(copy_instructions)
+        if errors:
+            yield CopyResult.empty(errors)
+            if self._abort_on_error:
+                return
+
+        yield from self._copy_all(self._largest_first(instructions))
+
+    def _unglob_all(
+        self, copy_instructions: List[CopyInstruction]
+    ) -> Tuple[Iterator[CopyInstruction], List[Exception]]:
+        instructions: List[Iterator[CopyInstruction]] = []
+        errors: List[Exception] = []
+        for copy_instruction in copy_instructions:
+            if copy_instruction.archive:
+                # Archives are transferred as a whole by a single worker
+                instructions.append(iter([copy_instruction]))
+                continue
+
+            try:
+                instructions.append(_started(copy_instruction.iunglob(self._src_fs)))
+            except FileNotFoundError as err:
+                errors.append(err)
+                if self._abort_on_error:
+                    break
+
+        return itertools.chain.from_iterable(instructions), errors
+
+    def _largest_first(
+        self, instructions: Iterator[CopyInstruction]
+    ) -> Iterator[CopyInstruction]:
+        while window := list(itertools.islice(instructions, _SCHEDULING_WINDOW)):
+            sized = [(self._size_or_zero(instruction), instruction) for instruction in window]
+            for size, instruction in sized:
+                if not instruction.archive:
+                    # Archives report their size once all their files are found
+                    self._monitor.found(size)
+
+            sized.sort(key=lambda entry: entry[0], reverse=True)
+            yield from (instruction for _, instruction in sized)
+
+    def _size_or_zero(self, instruction: CopyInstruction) -> int:
+        try:
+            return self._src_fs.size(instruction.source)
+        except FileNotFoundError:
+            return 0
+
+    def _copy_all(
+        self, instructions: Iterator[CopyInstruction]
+    ) -> Generator[CopyResult, None, None]:
+        pool = ThreadPoolExecutor(
+            max_workers=self._workers, initializer=self._open_channels
+        )
+        pending: Set["Future[CopyResult]"] = set()
+        try:
+            for future in self._completed(pool, instructions, pending):
+                pending.remove(future)
+                self._monitor.queued(len(pending))
+                result = future.result()
+                if result.errors and self._abort_on_error:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    yield self._merge_finished(result, pending)
+                    return
+
+                yield result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._close_channels()
+
+        try:
+            self._permissions.apply(self._target_fs)
+        except OSError as err:
+            yield CopyResult.empty([err])
+
+    def _completed(
+        self,
+        pool: ThreadPoolExecutor,
+        instructions: Iterator[CopyInstruction],
+        pending: Set["Future[CopyResult]"],
+    ) -> Iterator["Future[CopyResult]"]:
+        """
+        Submits the instructions to the pool as workers become free and yields the futures as they complete.
+        The submitted futures that are not yet yielded are kept in `pending`.
+        """
+        for instruction in instructions:
+            pending.add(pool.submit(self._copy, instruction))
+            self._monitor.queued(len(pending))
+            if len(pending) >= self._workers * _PENDING_PER_WORKER:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from done
+
+        yield from as_completed(set(pending))
+
+    def _merge_finished(
+        self, result: CopyResult, futures: Set["Future[CopyResult]"]
     ) -> CopyResult:
-        if current_result.errors and self._abort_on_error:
-            return current_result
+        # Files copied by workers that were still running when the error occurred
+        # must be reported as well, so they can be rolled back
+        for future in futures:
+            if future.cancelled():
+                continue
+
+            finished = future.result()
+            result.copied_files.extend(finished.copied_files)
+            result.skipped_files.extend(finished.skipped_files)
+            result.errors.extend(finished.errors)
+
+        return result
+
+    def _open_channels(self) -> None:
+        src_fs = self._src_fs.fork()
+        target_fs = self._target_fs.fork()
+        with self._forks_lock:
+            self._forks.extend([src_fs, target_fs])
+
+        self._thread_local.copier = _Copier(
+            src_fs,
+            target_fs,
+            abort_on_error=self._abort_on_error,
+            permissions=self._permissions,
+            monitor=self._monitor,
+            reports_found=False,
+            on_copied=self._on_copied,
+        )
+
+    def _close_channels(self) -> None:
+        with self._forks_lock:
+            forks, self._forks = self._forks, []
+
+        for fork in forks:
+            # Filesystems that can be shared between threads are their own fork
+            if fork is not self._src_fs and fork is not self._target_fs:
+                fork.close()
+
+    def _copy(self, instruction: CopyInstruction) -> CopyResult:
+        copier: _Copier = self._thread_local.copier
+        return copier(instruction)
+
+
+class _Planner:
+    """
+    Finds all files that a copy would transfer and checks them the same way, without copying anything.
+    Filesystems with a metadata cache answer most checks from the listings made while globbing.
+    """
 
-        error = self._try_copy(instruction)
+    def __init__(self, src_fs: Filesystem, target_fs: Filesystem) -> None:
+        self._src_fs = src_fs
+        self._target_fs = target_fs
+        self._copier = _Copier(src_fs, target_fs, abort_on_error=False)
+
+    def __call__(self, copy_instructions: List[CopyInstruction], archive: bool) -> TransferPlan:
+        plan = TransferPlan()
+        if archive and copy_instructions:
+            group = TransferGroup(
+                ", ".join(instruction.source for instruction in copy_instructions),
+                ", ".join(sorted({instruction.destination for instruction in copy_instructions})),
+                TransferStrategy.archive,
+            )
+            plan.groups.append(group)
+            for copy_instruction in copy_instructions:
+                self._plan_instruction(copy_instruction, group, plan)
+
+            return plan
 
-        errors = current_result.errors
-        if error is None:
-            current_result.copied_files.append(instruction.destination)
-        else:
-            errors.append(error)
+        for copy_instruction in copy_instructions:
+            strategy = TransferStrategy.archive if copy_instruction.archive else TransferStrategy.files
+            group = TransferGroup(copy_instruction.source, copy_instruction.destination, strategy)
+            plan.groups.append(group)
+            self._plan_instruction(copy_instruction, group, plan)
 
-        return CopyResult(current_result.copied_files, errors)
+        return plan
 
-    def _try_copy(self, instruction: CopyInstruction) -> Optional[Exception]:
+    def _plan_instruction(self, copy_instruction: CopyInstruction, group: TransferGroup, plan: TransferPlan) -> None:
         try:
-            self._src_fs.copy(*instruction, filesystem=self._target_fs)
+            instructions = copy_instruction.iunglob(self._src_fs)
+            for instruction in instructions:
+                self._plan_file(instruction, group, plan)
+        except FileNotFoundError as err:
+            plan.errors.append(err)
+
+    def _plan_file(self, instruction: CopyInstruction, group: TransferGroup, plan: TransferPlan) -> None:
+        try:
+            self._copier._raise_if_not_copyable(instruction)
         except (FileNotFoundError, FileExistsError) as err:
-            return err
+            plan.errors.append(err)
+            return
+
+        if self._src_fs.stat(instruction.source).is_dir:
+            self._plan_directory(instruction, group)
+            return
+
+        destination = instruction.destination
+        if self._target_fs.exists(destination) and self._target_fs.stat(destination).is_dir:
+            destination = os.path.join(destination, os.path.basename(instruction.source))
+
+        size = self._src_fs.size(instruction.source)
+        group.files.append(PlannedFile(instruction.source, destination, size, self._copier._is_unchanged(instruction)))
 
-        return None
+    def _plan_directory(self, instruction: CopyInstruction, group: TransferGroup) -> None:
+        # The contents of a directory are copied into the destination
+        for file in self._src_fs.iglob(os.path.join(instruction.source, "**", "*")):
+            stat = self._src_fs.stat(file)
+            if not stat.is_dir:
+                destination = os.path.join(instruction.destination, os.path.relpath(file, instruction.source))
+                group.files.append(PlannedFile(file, destination, stat.size))
+
+
+def _ignore_file(file: str) -> None:
+    pass
+
+
+def _started(instructions: Iterator[CopyInstruction]) -> Iterator[CopyInstruction]:
+    """
+    Starts searching for the files of an instruction, so a missing glob directory is reported before anything is copied
+    """
+    try:
+        first = next(instructions)
+    except StopIteration:
+        return iter([])
+
+    return itertools.chain([first], instructions)
 
 
 def progressive_copy(
@@ -91,6 +589,9 @@ def progressive_copy(
     files: List[CopyInstruction],
     *,
     abort_on_error: bool = True,
+    workers: int = 1,
+    monitor: Optional[TransferMonitor] = None,
+    on_copied: Optional[FileCallback] = None,
 ) -> Generator[CopyResult, None, None]:
     """
     Copies the files to the target filesystem.
@@ -99,22 +600,124 @@ def progressive_copy(
         source_filesystem (Filesystem): The filesystem to copy FROM
         target_filesystem (Filesystem): The filesystem to copy TO
         files (list[CopyInstruction]): A list of CopyInstructions
+        abort_on_error (bool): Stop copying after the first error
+        workers (int): The number of files that are transferred at the same time
+        monitor (TransferMonitor): Receives the measurements of every copied file
+        on_copied (FileCallback): Is called with the destination of every file as soon as it is copied,
+            while the results are only yielded once all files of an instruction are copied
 
     Returns:
         Generator[CopyResult]: A generator yielding individual copy results
     """
-    copier = _Copier(
-        source_filesystem, target_filesystem, abort_on_error=abort_on_error
-    )
-    for copy_instruction in files:
-        tmp_result = copier(copy_instruction)
-        yield tmp_result
-        if tmp_result.errors and abort_on_error:
+    try:
+        if workers > 1:
+            yield from _ParallelCopier(
+                source_filesystem,
+                target_filesystem,
+                workers,
+                abort_on_error=abort_on_error,
+                monitor=monitor,
+                on_copied=on_copied,
+            )(files)
+            return
+
+        copier = _Copier(
+            source_filesystem, target_filesystem, abort_on_error=abort_on_error, monitor=monitor, on_copied=on_copied
+        )
+        for copy_instruction in files:
+            tmp_result = copier(copy_instruction)
+            yield tmp_result
+            if tmp_result.errors and abort_on_error:
+                break
+    finally:
+        target_filesystem.flush()
+
+
+def archive_copy(
+    source_filesystem: Filesystem,
+    target_filesystem: Filesystem,
+    files: List[CopyInstruction],
+    compression: Optional[str] = None,
+    *,
+    abort_on_error: bool = True,
+    monitor: Optional[TransferMonitor] = None,
+) -> CopyResult:
+    """
+    Copies the files of all instructions to the target filesystem as a single archive stream.
+
+    Args:
+        source_filesystem (Filesystem): The filesystem to copy FROM
+        target_filesystem (Filesystem): The filesystem to copy TO
+        files (list[CopyInstruction]): A list of CopyInstructions
+        compression (str): An optional compression for the archive, one of ARCHIVE_COMPRESSIONS
+        abort_on_error (bool): Do not copy anything if an error occurs
+        monitor (TransferMonitor): Receives the measurements of the archive
+
+    Returns:
+        CopyResult: The result of the copy
+    """
+    copier = _Copier(source_filesystem, target_filesystem, abort_on_error=abort_on_error, monitor=monitor)
+    return copier.copy_as_archive(files, compression)
+
+
+def plan_copy(
+    source_filesystem: Filesystem,
+    target_filesystem: Filesystem,
+    files: List[CopyInstruction],
+    *,
+    archive: bool = False,
+) -> TransferPlan:
+    """
+    Finds all files the copy instructions match and checks them like a copy would, without copying anything.
+
+    Args:
+        source_filesystem (Filesystem): The filesystem to copy FROM
+        target_filesystem (Filesystem): The filesystem to copy TO
+        files (list[CopyInstruction]): A list of CopyInstructions
+        archive (bool): All instructions are copied together as a single archive (see archive_copy)
+
+    Returns:
+        TransferPlan: The files that would be transferred and the problems that would occur
+    """
+    return _Planner(source_filesystem, target_filesystem)(files, archive)
+
+
+def remote_copy(filesystem: Filesystem, files: List[CopyInstruction]) -> CopyResult:
+    """
+    Copies files whose source and destination are both on the filesystem, without transferring their contents.
+    Instructions with the same method, overwrite setting and mode are copied together.
+    The mode of hard links is left unchanged, because it is shared with their source.
+    Stops at the first error.
+
+    Args:
+        filesystem (Filesystem): The filesystem to copy on
+        files (list[CopyInstruction]): CopyInstructions with a `remote_method`
+
+    Returns:
+        CopyResult: The result of the copy
+    """
+    groups: Dict[Tuple[str, bool, Optional[int]], List[Tuple[str, str]]] = {}
+    for instruction in files:
+        key = (instruction.remote_method or "copy", bool(instruction.overwrite), instruction.mode)
+        groups.setdefault(key, []).append((instruction.source, instruction.destination))
+
+    result = CopyResult([])
+    for (method, overwrite, mode), pairs in groups.items():
+        try:
+            copied = filesystem.copy_within(pairs, overwrite, method)
+            result.copied_files.extend(copied)
+            if mode is not None and method != "link":
+                filesystem.set_permissions([path for path in copied if not filesystem.stat(path).is_dir], mode)
+        except OSError as err:
+            # FileNotFoundError and FileExistsError are OSErrors as well
+            result.errors.append(err)
             break
 
+    return result
+
 
 def progressive_clean(
-    filesystem: Filesystem, files: List[str]
+    filesystem: Filesystem, files: List[str], detach: bool = False, literal: bool = False
 ) -> Generator[Exception, None, None]:
     """
     Deletes the files from the target filesystem. Files that are not found are ignored.
@@ -122,12 +725,10 @@ def progressive_clean(
     Args:
         filesystem (Filesystem): The filesystem to delete files from
         files (list[str]): A list of paths to delete
+        detach (bool): Do not wait until the files are deleted, if the filesystem supports it
+        literal (bool): The paths are not glob patterns, e.g. because they are the paths of copied files
 
     Returns:
         Generator[Exception]: A generator yielding exceptions that occured during cleaning
     """
-    for file in files:
-        try:
-            filesystem.delete(file)
-        except FileNotFoundError as err:
-            yield err
+    yield from filesystem.delete_many(files, detach, literal)
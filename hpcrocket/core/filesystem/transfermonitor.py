@@ -0,0 +1,162 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Optional, Union
+
+
+@dataclass(frozen=True)
+class FileTransfer:
+    """
+    Measurements of a single copied file
+    """
+
+    path: str
+    size: int
+    duration: float
+
+    @property
+    def throughput(self) -> float:
+        """The transferred bytes per second"""
+        return self.size / self.duration if self.duration > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class TransferProgress:
+    """
+    A snapshot of all transfers of a stage.
+    Files are found while globs are searched, so the number of found files and bytes grows during the transfer.
+    `file` is the transfer that finished last, if this snapshot was taken because a file finished.
+    `operations` are the requests sent to the remote machine since the transfer started, including lookups and
+    comparisons of files that were skipped.
+    """
+
+    description: str
+    files_found: int = 0
+    files_done: int = 0
+    bytes_found: int = 0
+    bytes_done: int = 0
+    queue_depth: int = 0
+    operations: int = 0
+    elapsed: float = 0.0
+    file: Optional[FileTransfer] = None
+
+    @property
+    def throughput(self) -> float:
+        """The transferred bytes per second since the transfer started"""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def operations_per_file(self) -> float:
+        """The requests sent to the remote machine per transferred file"""
+        return self.operations / self.files_done if self.files_done else 0.0
+
+    def as_dict(self) -> Dict[str, Union[str, int, float]]:
+        """
+        Returns:
+            Dict[str, Union[str, int, float]]: A machine-readable summary of the transfers
+        """
+        return {
+            "description": self.description,
+            "files": self.files_done,
+            "bytes": self.bytes_done,
+            "seconds": round(self.elapsed, 3),
+            "bytes_per_second": round(self.throughput, 1),
+            "operations": self.operations,
+            "operations_per_file": round(self.operations_per_file, 1),
+        }
+
+
+ProgressListener = Callable[[TransferProgress], None]
+
+
+class TransferMonitor:
+    """
+    Collects the measurements of all workers of a transfer and reports the progress to a listener after every change.
+    Only the totals are kept, so the memory used does not grow with the number of files.
+    The monitor is thread safe.
+    """
+
+    def __init__(
+        self,
+        description: str,
+        listener: Optional[ProgressListener] = None,
+        clock: Callable[[], float] = time.monotonic,
+        operations: Callable[[], int] = lambda: 0,
+    ) -> None:
+        """
+        Args:
+            description (str): The description of the transfer
+            listener (Optional[ProgressListener]): Called with a snapshot of the progress after every change
+            clock (Callable[[], float]): Returns the current time in seconds
+            operations (Callable[[], int]): Returns the number of requests sent to the remote machine so far,
+                e.g. `Filesystem.request_count`
+        """
+        self._lock = threading.Lock()
+        self._listener = listener
+        self._clock = clock
+        self._start = clock()
+        self._operations = operations
+        self._start_operations = operations()
+        self._progress = TransferProgress(description)
+
+    @property
+    def progress(self) -> TransferProgress:
+        with self._lock:
+            return self._update()
+
+    def found(self, size: int) -> None:
+        """
+        Records that a file will be transferred
+        """
+        with self._lock:
+            progress = self._update(
+                files_found=self._progress.files_found + 1,
+                bytes_found=self._progress.bytes_found + size,
+            )
+
+        self._notify(progress)
+
+    def skipped(self, size: int) -> None:
+        """
+        Records that a found file does not need to be transferred
+        """
+        with self._lock:
+            progress = self._update(
+                files_found=self._progress.files_found - 1,
+                bytes_found=self._progress.bytes_found - size,
+            )
+
+        self._notify(progress)
+
+    def queued(self, depth: int) -> None:
+        """
+        Records the number of files that are scheduled but not yet transferred
+        """
+        with self._lock:
+            progress = self._update(queue_depth=depth)
+
+        self._notify(progress)
+
+    def finished(self, transfer: FileTransfer) -> None:
+        with self._lock:
+            progress = self._update(
+                files_done=self._progress.files_done + 1,
+                bytes_done=self._progress.bytes_done + transfer.size,
+                file=transfer,
+            )
+
+        self._notify(progress)
+
+    def _update(self, **changes: Any) -> TransferProgress:
+        changes = {
+            "file": None,
+            "elapsed": self._clock() - self._start,
+            "operations": self._operations() - self._start_operations,
+            **changes,
+        }
+        self._progress = replace(self._progress, **changes)
+        return self._progress
+
+    def _notify(self, progress: TransferProgress) -> None:
+        if self._listener:
+            self._listener(progress)
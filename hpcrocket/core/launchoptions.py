@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import List, Union
+from typing import List, Optional, Union
 
 from hpcrocket.core.filesystem.progressive import CopyInstruction
 from hpcrocket.ssh.connectiondata import ConnectionData
@@ -12,6 +12,49 @@ Options = Union[
 JobBasedOptions = Union["ImmediateCommandOptions", "WatchOptions"]
 
 
+@dataclass
+class ContentStoreOptions:
+    directory: str = "~/.hpc-rocket/cas"
+    max_size: int = 0
+
+
+@dataclass
+class ResumableTransferOptions:
+    state_dir: str = "~/.hpc-rocket/transfers"
+    min_size: int = 1024**3
+    chunk_size: int = 64 * 1024**2
+
+
+@dataclass
+class IncrementalCollectOptions:
+    stable_time: int = 60
+    interval: int = 30
+
+
+@dataclass
+class OutputTailOptions:
+    lines: int = 20
+    file: str = ""
+
+
+@dataclass
+class SFTPOptions:
+    request_size: int = 32 * 1024
+    max_requests: int = 64
+
+
+@dataclass
+class SharedPathOptions:
+    remote: str
+    local: str = ""
+
+
+@dataclass
+class EarlySubmitOptions:
+    poll_interval: int = 10
+    timeout: int = 0
+
+
 @dataclass
 class ImmediateCommandOptions:
     class Action(Enum):
@@ -29,13 +72,30 @@ class LaunchOptions:
     sbatch: str
     connection: ConnectionData
     proxyjumps: List[ConnectionData] = field(default_factory=lambda: [])
+    sbatch_candidates: List[List[str]] = field(default_factory=lambda: [])
     copy_files: List[CopyInstruction] = field(default_factory=lambda: [])
     clean_files: List[str] = field(default_factory=lambda: [])
     collect_files: List[CopyInstruction] = field(default_factory=lambda: [])
     poll_interval: int = 5
+    transfer_workers: int = 1
+    collect_archive: bool = False
+    collect_compression: Optional[str] = None
+    clean_in_background: bool = False
+    collect_while_running: Optional[IncrementalCollectOptions] = None
+    resumable_transfers: Optional[ResumableTransferOptions] = None
+    sftp: SFTPOptions = field(default_factory=SFTPOptions)
+    content_store: Optional[ContentStoreOptions] = None
     watch: bool = False
     continue_if_job_fails: bool = False
     job_id_file: str = ""
+    estimates_file: str = ""
+    transfers_file: str = ""
+    tail_output: Optional[OutputTailOptions] = None
+    shared_paths: List[SharedPathOptions] = field(default_factory=lambda: [])
+    submit_early: Optional[EarlySubmitOptions] = None
+    state_file: str = ""
+    resume: bool = False
+    dry_run: bool = False
 
 
 @dataclass
@@ -44,6 +104,7 @@ class WatchOptions:
     connection: ConnectionData
     proxyjumps: List[ConnectionData] = field(default_factory=lambda: [])
     poll_interval: int = 5
+    tail_output: Optional[OutputTailOptions] = None
 
 
 @dataclass
@@ -52,3 +113,12 @@ class FinalizeOptions:
     proxyjumps: List[ConnectionData] = field(default_factory=lambda: [])
     collect_files: List[CopyInstruction] = field(default_factory=lambda: [])
     clean_files: List[str] = field(default_factory=lambda: [])
+    transfer_workers: int = 1
+    collect_archive: bool = False
+    collect_compression: Optional[str] = None
+    clean_in_background: bool = False
+    resumable_transfers: Optional[ResumableTransferOptions] = None
+    sftp: SFTPOptions = field(default_factory=SFTPOptions)
+    shared_paths: List[SharedPathOptions] = field(default_factory=lambda: [])
+    transfers_file: str = ""
+    dry_run: bool = False
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, List, Optional
 from hpcrocket.watcher.jobwatcher import JobWatcherFactory, JobWatcher, JobWatcherImpl
 
 if TYPE_CHECKING:
+    from hpcrocket.core.executor import RunningCommand
     from hpcrocket.core.slurmcontroller import SlurmController
 
 
@@ -76,5 +77,8 @@ class SlurmBatchJob:
     def poll_status(self) -> SlurmJobStatus:
         return self._controller.poll_status(self.jobid)
 
+    def tail_output(self) -> "RunningCommand":
+        return self._controller.tail_output(self.jobid)
+
     def get_watcher(self) -> JobWatcher:
         return self._watcher_factory(self)
@@ -1,4 +1,9 @@
-from typing import Optional
+import posixpath
+import re
+import shlex
+from datetime import datetime
+from typing import List, Optional, Sequence
+
 from hpcrocket.core.executor import CommandExecutor, RunningCommand
 from hpcrocket.core.slurmbatchjob import SlurmBatchJob, SlurmError, SlurmJobStatus
 from hpcrocket.watcher.jobwatcher import JobWatcherFactory, JobWatcherImpl
@@ -13,12 +18,88 @@ class SlurmController:
         self._executor = executor
         self._watcher_factory = watcher_factory or JobWatcherImpl
 
-    def submit(self, jobfile: str) -> SlurmBatchJob:
-        cmd = self._execute_and_wait_or_raise_on_error(f"sbatch {jobfile}")
+    def submit(self, jobfile: str, sbatch_args: Sequence[str] = ()) -> SlurmBatchJob:
+        cmd = self._execute_and_wait_or_raise_on_error(
+            _sbatch_command(jobfile, sbatch_args)
+        )
         jobid = _parse_jobid(cmd)
 
         return SlurmBatchJob(self, jobid, self._watcher_factory)
 
+    def batch_job(self, jobid: str) -> SlurmBatchJob:
+        """
+        Returns a job that was submitted before, e.g. by a run that was interrupted
+        """
+        return SlurmBatchJob(self, jobid, self._watcher_factory)
+
+    def submit_waiting(
+        self,
+        jobfile: str,
+        marker: str,
+        sbatch_args: Sequence[str] = (),
+        poll_interval: int = 10,
+        timeout: int = 0,
+    ) -> SlurmBatchJob:
+        """
+        Submits a copy of the batch script that waits until the `marker` file exists before it runs its commands,
+        so the job can wait in the queue while its input files are still being uploaded (see `mark_ready`).
+        The copy has the name of the batch script and is removed once it is submitted.
+
+        Args:
+            jobfile (str): The batch script. It must be a shell script.
+            marker (str): The file that allows the job to start. Relative paths start at the submission directory.
+            sbatch_args (Sequence[str]): Additional arguments passed to sbatch
+            poll_interval (int): The seconds the job waits between checks for the marker
+            timeout (int): The seconds after which the job fails if the marker does not exist. 0 waits forever.
+
+        Raises:
+            SlurmError: The copy could not be written, e.g. because the script is not a shell script, or sbatch failed
+        """
+        preamble = _waiting_preamble(marker, poll_interval, timeout)
+        command = (
+            f"dir=$(mktemp -d) && HPC_ROCKET_PREAMBLE={shlex.quote(preamble)} "
+            f"awk {shlex.quote(_INSERT_PREAMBLE_PROGRAM)} {_quote_remote_path(jobfile)} "
+            f"> \"$dir\"/{shlex.quote(posixpath.basename(jobfile))} && echo \"$dir\" "
+            "|| { rm -rf -- \"$dir\"; exit 1; }"
+        )
+        cmd = self._executor.exec_command(command)
+        if cmd.wait_until_exit() != 0 or not cmd.stdout():
+            raise SlurmError(f"Cannot submit {jobfile} early: {' '.join(cmd.stderr())}")
+
+        directory = cmd.stdout()[-1].strip()
+        try:
+            return self.submit(shlex.quote(posixpath.join(directory, posixpath.basename(jobfile))), sbatch_args)
+        finally:
+            self._executor.exec_command(f"rm -rf -- {shlex.quote(directory)}").wait_until_exit()
+
+    def mark_ready(self, marker: str) -> None:
+        """
+        Creates the marker file a job submitted with `submit_waiting` waits for, so the job can start.
+
+        Raises:
+            SlurmError: The marker could not be created
+        """
+        self._execute_and_wait_or_raise_on_error(f"touch -- {shlex.quote(marker)}")
+
+    def estimate_start(self, jobfile: str, sbatch_args: Sequence[str] = ()) -> datetime:
+        """
+        Asks Slurm when the job would start without submitting it (sbatch --test-only).
+
+        Args:
+            jobfile (str): The batch script
+            sbatch_args (Sequence[str]): Additional arguments passed to sbatch
+
+        Returns:
+            datetime: The estimated start time
+
+        Raises:
+            SlurmError: sbatch failed or did not report a start time
+        """
+        command = _sbatch_command(jobfile, ["--test-only", *sbatch_args])
+        cmd = self._execute_and_wait_or_raise_on_error(command)
+
+        return _parse_start_time(cmd, command)
+
     def poll_status(self, jobid: str) -> SlurmJobStatus:
         cmd = self._execute_and_wait_or_raise_on_error(
             f"sacct -j {jobid} -o jobid,jobname%30,state --noheader"
@@ -28,6 +109,32 @@ class SlurmController:
     def cancel(self, jobid: str) -> None:
         self._execute_and_wait_or_raise_on_error(f"scancel {jobid}")
 
+    def output_files(self, jobid: str) -> List[str]:
+        """
+        Asks Slurm which files the job writes its stdout and stderr to (scontrol show job).
+
+        Returns:
+            List[str]: The remote paths of the stdout file and, if it differs, the stderr file
+
+        Raises:
+            SlurmError: scontrol failed or did not report the files
+        """
+        command = f"scontrol show job {jobid}"
+        cmd = self._execute_and_wait_or_raise_on_error(command)
+
+        return _parse_output_files(cmd, command)
+
+    def tail_output(self, jobid: str) -> RunningCommand:
+        """
+        Starts following the output files of the job with `tail -F`, including output written before.
+        The command runs until it is stopped.
+
+        Raises:
+            SlurmError: The output files could not be resolved
+        """
+        files = " ".join(shlex.quote(file) for file in self.output_files(jobid))
+        return self._executor.exec_command(f"tail -n +1 -F -- {files}")
+
     def _execute_and_wait_or_raise_on_error(self, command: str) -> RunningCommand:
         cmd = self._executor.exec_command(command)
         exit_code = cmd.wait_until_exit()
@@ -37,9 +144,93 @@ class SlurmController:
         return cmd
 
 
+def _sbatch_command(jobfile: str, sbatch_args: Sequence[str]) -> str:
+    return " ".join(["sbatch", *map(shlex.quote, sbatch_args), jobfile])
+
+
+# NOTE:
+# sbatch only reads #SBATCH directives before the first command, so the preamble is inserted right before it.
+# Character classes like [:space:] are avoided, because mawk does not support them.
+_INSERT_PREAMBLE_PROGRAM = r"""
+NR == 1 && /^#!/ && !/(^#!|\/| )(ba|z|k|da)?sh([ \t]|$)/ {
+    print "The batch script is not a shell script" > "/dev/stderr"
+    failed = 1
+    exit 1
+}
+!inserted && !/^[ \t]*(#|$)/ { printf "%s", ENVIRON["HPC_ROCKET_PREAMBLE"]; inserted = 1 }
+{ print }
+END { if (!failed && !inserted) printf "%s", ENVIRON["HPC_ROCKET_PREAMBLE"] }
+"""
+
+_WAITING_PREAMBLE = """
+# Inserted by hpc-rocket: wait until all input files are uploaded
+hpc_rocket_waited=0
+while [ ! -e {marker} ]; do
+    if [ {timeout} -gt 0 ] && [ "$hpc_rocket_waited" -ge {timeout} ]; then
+        echo "hpc-rocket: the input files were not uploaded within {timeout} seconds" >&2
+        exit 1
+    fi
+    sleep {poll_interval}
+    hpc_rocket_waited=$((hpc_rocket_waited + {poll_interval}))
+done
+rm -f {marker}
+
+"""
+
+
+def _waiting_preamble(marker: str, poll_interval: int, timeout: int) -> str:
+    # The job may run in another directory, so relative markers are resolved against the submission directory
+    quoted = shlex.quote(marker) if posixpath.isabs(marker) else f'"$SLURM_SUBMIT_DIR"/{shlex.quote(marker)}'
+    return _WAITING_PREAMBLE.format(marker=quoted, poll_interval=max(poll_interval, 1), timeout=max(timeout, 0))
+
+
+def _quote_remote_path(path: str) -> str:
+    # A leading ~ must stay unquoted, so the remote shell expands it
+    if path.startswith("~/"):
+        return "~/" + shlex.quote(path[2:])
+
+    return shlex.quote(path)
+
+
 def _parse_jobid(cmd: RunningCommand) -> str:
     first_line = cmd.stdout()[0]
     split_line = first_line.split()
     jobid = split_line[-1]
 
     return jobid
+
+
+_START_TIME_PATTERN = re.compile(r"to start at (\S+)")
+# scontrol prints the output files on lines of their own, so the paths may contain spaces
+_OUTPUT_FILE_PATTERN = re.compile(r"^\s*(StdOut|StdErr)=(.+?)\s*$")
+
+
+def _parse_output_files(cmd: RunningCommand, command: str) -> List[str]:
+    files = {}
+    for line in cmd.stdout():
+        match = _OUTPUT_FILE_PATTERN.match(line)
+        if match:
+            files[match.group(1)] = match.group(2)
+
+    if "StdOut" not in files:
+        raise SlurmError(command)
+
+    return list(dict.fromkeys([files["StdOut"], files.get("StdErr", files["StdOut"])]))
+
+
+def _parse_start_time(cmd: RunningCommand, command: str) -> datetime:
+    # sbatch --test-only reports on stderr, but some versions print to stdout
+    lines: List[str] = [*cmd.stderr(), *cmd.stdout()]
+    for line in lines:
+        match = _START_TIME_PATTERN.search(line)
+        if match:
+            return _parse_isoformat_or_raise(match.group(1), command)
+
+    raise SlurmError(command)
+
+
+def _parse_isoformat_or_raise(timestamp: str, command: str) -> datetime:
+    try:
+        return datetime.fromisoformat(timestamp)
+    except ValueError as err:
+        raise SlurmError(command) from err
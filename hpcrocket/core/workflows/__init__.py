@@ -1,7 +1,11 @@
+import dataclasses
+import hashlib
+import posixpath
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 from hpcrocket.core.filesystem import FilesystemFactory
+from hpcrocket.core.filesystem.progressive import CopyInstruction
 from hpcrocket.core.launchoptions import (
     FinalizeOptions,
     ImmediateCommandOptions,
@@ -10,13 +14,18 @@ from hpcrocket.core.launchoptions import (
 )
 from hpcrocket.core.slurmbatchjob import SlurmBatchJob
 from hpcrocket.core.slurmcontroller import SlurmController
+from hpcrocket.core.workflows.incremental import IncrementalCollector
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.core.workflows.workflow import Stage, Workflow
 from hpcrocket.core.workflows.stages import (
     CancelStage,
+    DryRunLaunchStage,
     FinalizeStage,
     JobLoggingStage,
+    PlanStage,
     PrepareStage,
     LaunchStage,
+    QueuedPrepareStage,
     StatusStage,
     WatchStage,
 )
@@ -28,28 +37,131 @@ def launchworkflow(
     controller: SlurmController,
     options: LaunchOptions,
 ) -> Workflow:
-    launch_stage = LaunchStage(controller, options.sbatch)
-    stages: List[Stage] = [
-        PrepareStage(filesystem_factory, options.copy_files),
-        launch_stage,
-    ]
+    if options.dry_run:
+        return Workflow(
+            [
+                PlanStage(filesystem_factory, options.copy_files, options.transfer_workers),
+                DryRunLaunchStage(options.sbatch, options.sbatch_candidates),
+            ]
+        )
+
+    state = _workflow_state(options)
+    launch_stage = LaunchStage(
+        controller,
+        options.sbatch,
+        options.sbatch_candidates,
+        options.submit_early,
+        state,
+        Path(options.estimates_file) if options.estimates_file else None,
+    )
+    stages = _prepare_and_launch_stages(filesystem_factory, launch_stage, options, state)
 
     if options.job_id_file:
         stages.append(JobLoggingStage(launch_stage, Path(options.job_id_file)))
 
     if options.watch:
+        collector = _incremental_collector(filesystem_factory, options)
         stages.append(
             WatchStage(
-                launch_stage, options.poll_interval, options.continue_if_job_fails
+                launch_stage,
+                options.poll_interval,
+                options.continue_if_job_fails,
+                collector,
+                options.tail_output,
+                state,
             )
         )
         stages.append(
             FinalizeStage(
-                filesystem_factory, options.collect_files, options.clean_files
+                filesystem_factory,
+                options.collect_files,
+                options.clean_files,
+                options.transfer_workers,
+                options.collect_archive,
+                options.collect_compression,
+                options.clean_in_background,
+                collector,
+                _transfers_file(options.transfers_file),
             )
         )
 
-    return Workflow(stages)
+    return Workflow(stages, state)
+
+
+def _workflow_state(options: LaunchOptions) -> Optional[WorkflowState]:
+    if not options.state_file:
+        return None
+
+    # NOTE:
+    # A run with a different configuration must not resume the stages and job of another one
+    fingerprint = hashlib.sha256(repr(dataclasses.replace(options, resume=False)).encode()).hexdigest()
+    path = Path(options.state_file)
+    if options.resume:
+        return WorkflowState.resume(path, fingerprint)
+
+    return WorkflowState(path, fingerprint)
+
+
+def _prepare_and_launch_stages(
+    filesystem_factory: FilesystemFactory,
+    launch_stage: LaunchStage,
+    options: LaunchOptions,
+    state: Optional[WorkflowState] = None,
+) -> List[Stage]:
+    transfers_file = _transfers_file(options.transfers_file)
+    if not options.submit_early:
+        return [
+            PrepareStage(filesystem_factory, options.copy_files, options.transfer_workers, state, transfers_file),
+            launch_stage,
+        ]
+
+    # Only the batch script is copied before the job is submitted, the other files are copied while it is queued
+    script_files, input_files = _split_batch_script(options.copy_files, options.sbatch)
+    stages: List[Stage] = []
+    if script_files:
+        stages.append(PrepareStage(filesystem_factory, script_files, options.transfer_workers, state, transfers_file))
+
+    stages.append(launch_stage)
+    stages.append(
+        QueuedPrepareStage(
+            PrepareStage(filesystem_factory, input_files, options.transfer_workers, state, transfers_file),
+            launch_stage,
+        )
+    )
+
+    return stages
+
+
+def _transfers_file(transfers_file: str) -> Optional[Path]:
+    return Path(transfers_file) if transfers_file else None
+
+
+def _split_batch_script(
+    copy_instructions: List[CopyInstruction], batch_script: str
+) -> Tuple[List[CopyInstruction], List[CopyInstruction]]:
+    script = posixpath.normpath(batch_script)
+    script_files: List[CopyInstruction] = []
+    input_files: List[CopyInstruction] = []
+    for instruction in copy_instructions:
+        is_script = not instruction.remote_method and posixpath.normpath(instruction.destination) == script
+        (script_files if is_script else input_files).append(instruction)
+
+    return script_files, input_files
+
+
+def _incremental_collector(
+    filesystem_factory: FilesystemFactory, options: LaunchOptions
+) -> Optional[IncrementalCollector]:
+    if not options.collect_while_running or not options.collect_files:
+        return None
+
+    return IncrementalCollector(
+        filesystem_factory,
+        options.collect_files,
+        options.collect_while_running.stable_time,
+        options.collect_while_running.interval,
+        options.transfer_workers,
+    )
 
 
 def statusworkflow(
@@ -72,13 +184,45 @@ def watchworkflow(controller: SlurmController, options: WatchOptions) -> Workflo
         def cancel(self, ui: UI) -> None:
             pass
 
-    return Workflow([WatchStage(SimpleBatchJobProvider(), options.poll_interval)])
+    return Workflow(
+        [
+            WatchStage(
+                SimpleBatchJobProvider(),
+                options.poll_interval,
+                tail_options=options.tail_output,
+            )
+        ]
+    )
 
 
 def finalizeworkflow(
     filesystem_factory: FilesystemFactory,
     options: FinalizeOptions,
 ) -> Workflow:
+    if options.dry_run:
+        return Workflow(
+            [
+                PlanStage(
+                    filesystem_factory,
+                    options.collect_files,
+                    options.transfer_workers,
+                    collect=True,
+                    archive=options.collect_archive,
+                )
+            ]
+        )
+
     return Workflow(
-        [FinalizeStage(filesystem_factory, options.collect_files, options.clean_files)]
+        [
+            FinalizeStage(
+                filesystem_factory,
+                options.collect_files,
+                options.clean_files,
+                options.transfer_workers,
+                options.collect_archive,
+                options.collect_compression,
+                options.clean_in_background,
+                transfers_file=_transfers_file(options.transfers_file),
+            )
+        ]
     )
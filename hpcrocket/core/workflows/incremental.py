@@ -0,0 +1,163 @@
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from hpcrocket.core.errors import get_error_message
+from hpcrocket.core.filesystem import FileStat, FilesystemFactory
+from hpcrocket.core.filesystem.progressive import CopyInstruction, OverwriteMode, progressive_copy
+from hpcrocket.ui import UI
+
+
+class IncrementalCollector:
+    """
+    Collects the files matching the collect instructions in the background while a job is running.
+    A file is collected once its size and modification time did not change for `stable_time` seconds.
+    Files that change again after they were collected are collected again.
+    Directories matched by the instructions are only collected by FinalizeStage.
+    """
+
+    def __init__(
+        self,
+        filesystem_factory: FilesystemFactory,
+        collect_instructions: List[CopyInstruction],
+        stable_time: float,
+        interval: float,
+        workers: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._local_fs = filesystem_factory.create_local_filesystem()
+        self._remote_fs = filesystem_factory.create_ssh_filesystem()
+        self._files = collect_instructions
+        self._stable_time = stable_time
+        self._interval = interval
+        self._workers = workers
+        self._clock = clock
+        self._seen: Dict[str, Tuple[FileStat, float]] = {}
+        self._collected: Dict[str, FileStat] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, ui: UI) -> None:
+        """
+        Starts collecting in the background every `interval` seconds
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(ui,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops collecting and waits until a running collection is finished
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, ui: UI) -> None:
+        while not self._stop_event.wait(self._interval):
+            self.collect_stable_files(ui)
+
+    def collect_stable_files(self, ui: UI) -> None:
+        """
+        Collects all files that did not change for `stable_time` seconds and were not collected yet
+        """
+        self._remote_fs.refresh()
+        stable = list(self._stable_files())
+        if not stable:
+            return
+
+        copied: List[str] = []
+        for result in progressive_copy(
+            self._remote_fs,
+            self._local_fs,
+            [instruction for instruction, _ in stable],
+            abort_on_error=False,
+            workers=self._workers,
+        ):
+            copied.extend(result.copied_files)
+            for error in result.errors:
+                ui.error(get_error_message(error))
+
+        copied_destinations = set(copied)
+        for instruction, stat in stable:
+            if instruction.destination in copied_destinations:
+                self._collected[instruction.source] = stat
+
+        if copied:
+            ui.info(f"Collected {len(copied)} files while the job is running")
+
+    def _stable_files(self) -> Iterator[Tuple[CopyInstruction, FileStat]]:
+        now = self._clock()
+        for instruction in self._unglobbed_files():
+            try:
+                stat = self._remote_fs.stat(instruction.source)
+            except FileNotFoundError:
+                continue
+
+            if stat.is_dir or self._collected.get(instruction.source) == stat:
+                continue
+
+            seen_stat, since = self._seen.get(instruction.source, (None, now))
+            if seen_stat != stat:
+                self._seen[instruction.source] = (stat, now)
+                continue
+
+            if now - since >= self._stable_time:
+                yield self._overwriting_if_collected(instruction), stat
+
+    def _unglobbed_files(self) -> Iterator[CopyInstruction]:
+        for copy_instruction in self._files:
+            try:
+                yield from copy_instruction.iunglob(self._remote_fs)
+            except FileNotFoundError:
+                # The job has not created the directory yet
+                continue
+
+    def _overwriting_if_collected(self, instruction: CopyInstruction) -> CopyInstruction:
+        # Local files that were collected before must be replaced, even if the instruction does not overwrite
+        if instruction.source in self._collected:
+            return instruction._replace(overwrite=OverwriteMode.always)
+
+        return instruction
+
+    def remaining(self, collect_instructions: List[CopyInstruction]) -> List[CopyInstruction]:
+        """
+        Returns instructions for the files that were not collected yet or changed after they were collected.
+
+        Args:
+            collect_instructions (List[CopyInstruction]): The instructions to collect after the job completed
+
+        Returns:
+            List[CopyInstruction]: The remaining instructions, with globs resolved if files of them were collected
+        """
+        if not self._collected:
+            return collect_instructions
+
+        self._remote_fs.refresh()
+        remaining: List[CopyInstruction] = []
+        for copy_instruction in collect_instructions:
+            try:
+                instructions = copy_instruction.unglob(self._remote_fs)
+            except FileNotFoundError:
+                # Reported by FinalizeStage
+                remaining.append(copy_instruction)
+                continue
+
+            remaining.extend(
+                self._overwriting_if_collected(instruction)
+                for instruction in instructions
+                if not self._is_collected(instruction)
+            )
+
+        return remaining
+
+    def _is_collected(self, instruction: CopyInstruction) -> bool:
+        collected = self._collected.get(instruction.source)
+        if collected is None:
+            return False
+
+        try:
+            return self._remote_fs.stat(instruction.source) == collected
+        except FileNotFoundError:
+            return False
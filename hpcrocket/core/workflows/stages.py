@@ -1,14 +1,29 @@
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple, cast
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
 
 from hpcrocket.core.errors import get_error_message
 from hpcrocket.core.filesystem import FilesystemFactory
 from hpcrocket.core.filesystem.progressive import (
     CopyInstruction,
+    CopyResult,
+    OverwriteMode,
+    archive_copy,
+    plan_copy,
     progressive_clean,
     progressive_copy,
+    remote_copy,
 )
-from hpcrocket.core.slurmbatchjob import SlurmBatchJob, SlurmJobStatus
+from hpcrocket.core.filesystem.planner import TransferPlan
+from hpcrocket.core.filesystem.transfermonitor import TransferMonitor, TransferProgress
+from hpcrocket.core.launchoptions import EarlySubmitOptions, OutputTailOptions
+from hpcrocket.core.slurmbatchjob import SlurmBatchJob, SlurmError, SlurmJobStatus
+from hpcrocket.core.workflows.incremental import IncrementalCollector
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.core.slurmcontroller import SlurmController
 from hpcrocket.typesafety import get_or_raise
 from hpcrocket.ui import UI
@@ -17,6 +32,7 @@ from hpcrocket.watcher.jobwatcher import (
     NotWatchingError,
     SlurmJobStatusCallback,
 )
+from hpcrocket.watcher.outputtail import OutputTail
 
 try:
     from typing import Protocol
@@ -53,26 +69,173 @@ def _log_errors(errors: List[Exception], ui: UI) -> None:
         ui.error(get_error_message(error))
 
 
+@dataclass
+class CandidateEstimate:
+    """
+    The outcome of probing a set of sbatch arguments with sbatch --test-only
+    """
+
+    sbatch_args: List[str]
+    start: Optional[datetime] = None
+    error: Optional[Exception] = None
+
+    @property
+    def description(self) -> str:
+        return " ".join(self.sbatch_args) or "<no arguments>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: A machine-readable record of the estimate
+        """
+        return {
+            "sbatch_args": self.sbatch_args,
+            "start": self.start.isoformat() if self.start else None,
+            "error": get_error_message(self.error) if self.error else None,
+        }
+
+
+def _log_skipped(skipped_files: List[str], ui: UI) -> None:
+    if skipped_files:
+        ui.info(f"Skipped {len(skipped_files)} unchanged files")
+
+
+def _log_transfers(progress: TransferProgress, ui: UI) -> None:
+    if not progress.files_done:
+        return
+
+    requests = f", {progress.operations_per_file:.1f} requests per file" if progress.operations else ""
+    ui.info(
+        f"Transferred {progress.files_done} files ({progress.bytes_done / 1e6:.1f} MB) in {progress.elapsed:.1f}s, "
+        f"{progress.throughput / 1e6:.1f} MB/s{requests}"
+    )
+
+
+def _save_transfers(progress: TransferProgress, transfers_file: Optional[Path]) -> None:
+    """
+    Appends the summary of the transfers to the file as a single JSON line,
+    so the stages of a run and of earlier runs can be read one by one.
+    """
+    if not transfers_file:
+        return
+
+    with transfers_file.open("a", encoding="utf-8") as file:
+        file.write(json.dumps(progress.as_dict()) + "\n")
+
+
 class LaunchStage:
     """
     Launches a batch job.
+    If sbatch candidates are given, submits with the candidate that has the earliest estimated start.
+    The estimates of all candidates are written to `estimates_file` if it is given.
+    With `wait_for_inputs` the job waits in the queue until `start_waiting_job` is called,
+    so the input files can be uploaded after it was submitted.
+    The submitted job is saved to the state, and a job that was submitted by an interrupted run is provided again.
     Implements the BatchJobProvider protocol to work with WatchStage.
     """
 
-    def __init__(self, controller: SlurmController, batch_script: str) -> None:
+    def __init__(
+        self,
+        controller: SlurmController,
+        batch_script: str,
+        candidates: Optional[List[List[str]]] = None,
+        wait_for_inputs: Optional[EarlySubmitOptions] = None,
+        state: Optional[WorkflowState] = None,
+        estimates_file: Optional[Path] = None,
+    ) -> None:
         self._controller = controller
         self._batch_script = batch_script
+        self._candidates = candidates or []
+        self._wait_for_inputs = wait_for_inputs
+        self._state = state
+        self._estimates_file = estimates_file
+        self._ready_marker = f".hpc-rocket-ready-{uuid.uuid4().hex}"
         self._batch_job: Optional[SlurmBatchJob] = None
+        self.estimates: List[CandidateEstimate] = []
+        if state and state.jobid:
+            self._ready_marker = state.ready_marker or self._ready_marker
+            self._batch_job = controller.batch_job(state.jobid)
 
     def allowed_to_fail(self) -> bool:
         return False
 
     def __call__(self, ui: UI) -> bool:
-        self._batch_job = self._controller.submit(self._batch_script)
+        if self._batch_job:
+            ui.info(f"Job {self._batch_job.jobid} was launched before the run was interrupted")
+            return True
+
+        sbatch_args: List[str] = []
+        if self._candidates:
+            chosen = self._choose_candidate(ui)
+            if chosen is None:
+                return False
+
+            sbatch_args = chosen.sbatch_args
+
+        if self._wait_for_inputs:
+            self._batch_job = self._controller.submit_waiting(
+                self._batch_script,
+                self._ready_marker,
+                sbatch_args,
+                self._wait_for_inputs.poll_interval,
+                self._wait_for_inputs.timeout,
+            )
+            self._save_job()
+            ui.launch(f"Launched job {self._batch_job.jobid}, it waits until all input files are uploaded")
+            return True
+
+        self._batch_job = self._controller.submit(self._batch_script, sbatch_args)
+        self._save_job()
         ui.launch(f"Launched job {self._batch_job.jobid}")
 
         return True
 
+    def _save_job(self) -> None:
+        if self._state and self._batch_job:
+            self._state.set_job(self._batch_job.jobid, self._ready_marker if self._wait_for_inputs else "")
+
+    def start_waiting_job(self) -> None:
+        """
+        Allows a job that was submitted with `wait_for_inputs` to start
+
+        Raises:
+            SlurmError: The job could not be signaled
+        """
+        self._controller.mark_ready(self._ready_marker)
+
+    def _choose_candidate(self, ui: UI) -> Optional[CandidateEstimate]:
+        ui.info(f"Probing {len(self._candidates)} sbatch candidates...")
+        self.estimates = self._estimate_candidates()
+        self._save_estimates(ui)
+        schedulable = [estimate for estimate in self.estimates if estimate.start]
+        chosen = min(schedulable, key=lambda estimate: cast(datetime, estimate.start)) if schedulable else None
+        for estimate in self.estimates:
+            _log_estimate(estimate, estimate is chosen, ui)
+
+        if chosen is None:
+            _log_errors([SlurmError("None of the sbatch candidates can be scheduled")], ui)
+
+        return chosen
+
+    def _save_estimates(self, ui: UI) -> None:
+        if not self._estimates_file:
+            return
+
+        records = [estimate.as_dict() for estimate in self.estimates]
+        self._estimates_file.write_text(json.dumps(records, indent=2))
+        ui.success(f"Wrote estimates of {len(records)} sbatch candidates to file {self._estimates_file}")
+
+    def _estimate_candidates(self) -> List[CandidateEstimate]:
+        with ThreadPoolExecutor(max_workers=len(self._candidates)) as pool:
+            return list(pool.map(self._estimate, self._candidates))
+
+    def _estimate(self, sbatch_args: List[str]) -> CandidateEstimate:
+        try:
+            start = self._controller.estimate_start(self._batch_script, sbatch_args)
+            return CandidateEstimate(sbatch_args, start=start)
+        except SlurmError as err:
+            return CandidateEstimate(sbatch_args, error=err)
+
     def cancel(self, ui: UI) -> None:
         batch_job = get_or_raise(self._batch_job, self._no_job_launched())
 
@@ -87,6 +250,15 @@ class LaunchStage:
         return cast(SlurmBatchJob, self._batch_job)
 
 
+def _log_estimate(estimate: CandidateEstimate, chosen: bool, ui: UI) -> None:
+    if estimate.error:
+        ui.error(f"Rejected candidate {estimate.description}: {get_error_message(estimate.error)}")
+    elif chosen:
+        ui.success(f"Chose candidate {estimate.description}: estimated start {estimate.start}")
+    else:
+        ui.info(f"Rejected candidate {estimate.description}: estimated start {estimate.start}")
+
+
 class JobLoggingStage:
     """
     Logs the Slurm Job ID into a file
@@ -113,7 +285,10 @@ class JobLoggingStage:
 
 class WatchStage:
     """
-    Watches a batch job until it completes
+    Watches a batch job until it completes.
+    If a collector is given, it collects result files in the background while the job is running.
+    With tail options the latest output of the job is shown while it is running.
+    Every new status of the job is saved to the state.
     """
 
     def __init__(
@@ -121,11 +296,17 @@ class WatchStage:
         batch_job_provider: BatchJobProvider,
         poll_interval: int,
         allowed_to_fail: bool = False,
+        collector: Optional[IncrementalCollector] = None,
+        tail_options: Optional[OutputTailOptions] = None,
+        state: Optional[WorkflowState] = None,
     ) -> None:
         self._poll_interval = poll_interval
         self._provider = batch_job_provider
         self._watcher: Optional[JobWatcher] = None
         self._job_status: Optional[SlurmJobStatus] = None
+        self._collector = collector
+        self._tail_options = tail_options
+        self._state = state
 
         self._allowed_to_fail = allowed_to_fail
 
@@ -134,15 +315,49 @@ class WatchStage:
 
     def __call__(self, ui: UI) -> bool:
         batch_job = self._provider.get_batch_job()
+        if self._state and self._state.job_status:
+            ui.info(
+                f"Watching job {batch_job.jobid} again, "
+                f"it was {self._state.job_status} when the run was interrupted"
+            )
+
         self._watcher = batch_job.get_watcher()
-        self._watcher.watch(self._get_callback(ui), self._poll_interval)
-        self._watcher.wait_until_done()
+        output_tail = self._start_output_tail(batch_job, ui)
+        if self._collector:
+            self._collector.start(ui)
+
+        try:
+            self._watcher.watch(self._get_callback(ui), self._poll_interval)
+            self._watcher.wait_until_done()
+        finally:
+            if self._collector:
+                self._collector.stop()
+
+            if output_tail:
+                output_tail.stop()
 
         return self._job_status is not None and self._job_status.success
 
+    def _start_output_tail(self, batch_job: SlurmBatchJob, ui: UI) -> Optional[OutputTail]:
+        if not self._tail_options:
+            return None
+
+        local_file = Path(self._tail_options.file) if self._tail_options.file else None
+        output_tail = OutputTail(batch_job, self._tail_options.lines, ui.output, local_file)
+        try:
+            output_tail.start()
+        except SlurmError as err:
+            ui.error(f"Cannot show the job output: {get_error_message(err)}")
+            return None
+
+        return output_tail
+
     def _get_callback(self, ui: UI) -> SlurmJobStatusCallback:
         def callback(new_status: SlurmJobStatus) -> None:
             self._job_status = new_status
+            if self._state:
+                self._state.set_job_status(new_status.state)
+
             ui.update(new_status)
 
         return callback
@@ -155,56 +370,162 @@ class WatchStage:
 class PrepareStage:
     """
     Copies the given files to the target filesystem.
+    Instructions with a remote method are copied on the remote machine once all other files are copied.
+    Every copied file is saved to the state as soon as it is copied. Files that an interrupted run already copied
+    are not copied again, but are removed as well on a rollback. Files it left at their destination without saving
+    them are compared with their source and copied again if they differ.
+    The measurements of the transfers are available as `transfers` once the stage ran
+    and are appended to `transfers_file` if it is given.
     """
 
     def __init__(
         self,
         filesystem_factory: FilesystemFactory,
         copy_instructions: List[CopyInstruction],
+        workers: int = 1,
+        state: Optional[WorkflowState] = None,
+        transfers_file: Optional[Path] = None,
     ) -> None:
         self._local_fs = filesystem_factory.create_local_filesystem()
         self._remote_fs = filesystem_factory.create_ssh_filesystem()
-        self._files = copy_instructions
+        self._files = [instruction for instruction in copy_instructions if not instruction.remote_method]
+        self._remote_files = [instruction for instruction in copy_instructions if instruction.remote_method]
+        self._workers = workers
+        self._state = state
+        self._transfers_file = transfers_file
+        self._skipped_files: List[str] = []
+        self.transfers = TransferProgress("Copying files")
 
     def allowed_to_fail(self) -> bool:
         return False
 
     def __call__(self, ui: UI) -> bool:
         ui.info("Copying files...")
-        copied_files, errors = self._try_copy_files()
+        monitor = TransferMonitor("Copying files", ui.transfer, operations=self._remote_fs.request_count)
+        copied_files, errors = self._try_copy_files(monitor)
+        self.transfers = monitor.progress
+        _log_transfers(self.transfers, ui)
+        _save_transfers(self.transfers, self._transfers_file)
 
         if errors:
             _log_errors(errors, ui)
             self._do_rollback(copied_files, ui)
             return False
 
+        _log_skipped(self._skipped_files, ui)
         ui.success("Done")
         return True
 
     def cancel(self, ui: UI) -> None:
         pass
 
-    def _try_copy_files(self) -> Tuple[List[str], List[Exception]]:
-        copied_files: List[str] = []
+    def _try_copy_files(self, monitor: TransferMonitor) -> Tuple[List[str], List[Exception]]:
+        copied_files = list(self._state.copied_files) if self._state else []
         errors: List[Exception] = []
-        for cr in progressive_copy(self._local_fs, self._remote_fs, self._files):
+        files, remote_files = self._remaining_files(copied_files)
+        for cr in progressive_copy(
+            self._local_fs,
+            self._remote_fs,
+            files,
+            workers=self._workers,
+            monitor=monitor,
+            on_copied=self._save_copied_file,
+        ):
+            # The files were saved to the state one by one while they were copied
             copied_files.extend(cr.copied_files)
+            self._skipped_files.extend(cr.skipped_files)
             if cr.errors:
                 errors.extend(cr.errors)
                 break
 
+        if remote_files and not errors:
+            result = remote_copy(self._remote_fs, remote_files)
+            self._add_copied_files(copied_files, result.copied_files)
+            errors.extend(result.errors)
+
         return copied_files, errors
 
+    def _remaining_files(self, copied_files: List[str]) -> Tuple[List[CopyInstruction], List[CopyInstruction]]:
+        if not self._state or not self._state.resumed:
+            return self._files, self._remote_files
+
+        copied = set(copied_files)
+        remaining: List[CopyInstruction] = []
+        for instruction in self._files:
+            files = instruction.unglob(self._local_fs)
+            uncopied = [file for file in files if file.destination not in copied]
+            # Instructions without copied files are kept whole, e.g. to transfer them as a single archive
+            remaining.extend([instruction] if len(uncopied) == len(files) else uncopied)
+
+        remote_files = [instruction for instruction in self._remote_files if instruction.destination not in copied]
+        return [_resumed(instruction) for instruction in remaining], remote_files
+
+    def _save_copied_file(self, file: str) -> None:
+        if self._state:
+            self._state.add_copied_files([file])
+
+    def _add_copied_files(self, copied_files: List[str], files: List[str]) -> None:
+        copied_files.extend(files)
+        if self._state:
+            self._state.add_copied_files(files)
+
     def _do_rollback(self, files: List[str], ui: UI) -> None:
         ui.info("Performing rollback")
-        errors = list(progressive_clean(self._remote_fs, files))
+        errors = list(progressive_clean(self._remote_fs, files, literal=True))
         _log_errors(errors, ui)
         ui.success("Done")
 
 
+def _resumed(instruction: CopyInstruction) -> CopyInstruction:
+    """
+    Returns an instruction that accepts files an interrupted run left at the destination without recording them,
+    e.g. because it was interrupted while copying them. They are kept if their content equals the source,
+    and copied again otherwise.
+    """
+    if instruction.overwrite:
+        return instruction
+
+    return instruction._replace(overwrite=OverwriteMode.if_changed, checksum=True)
+
+
+class QueuedPrepareStage:
+    """
+    Copies the remaining input files while the job of a LaunchStage with `wait_for_inputs` waits in the queue.
+    The job is allowed to start once all files are copied, and is canceled if they cannot be copied.
+    """
+
+    def __init__(self, prepare_stage: PrepareStage, launch_stage: LaunchStage) -> None:
+        self._prepare_stage = prepare_stage
+        self._launch_stage = launch_stage
+
+    def allowed_to_fail(self) -> bool:
+        return False
+
+    def __call__(self, ui: UI) -> bool:
+        if not self._prepare_stage(ui):
+            self._launch_stage.cancel(ui)
+            return False
+
+        try:
+            self._launch_stage.start_waiting_job()
+        except SlurmError as err:
+            _log_errors([err], ui)
+            self._launch_stage.cancel(ui)
+            return False
+
+        ui.success("All input files are uploaded, the job can start")
+        return True
+
+    def cancel(self, ui: UI) -> None:
+        self._launch_stage.cancel(ui)
+
+
 class FinalizeStage:
     """
     Collects result files from the remote filesystem and cleans it according to the given instructions.
+    Files that a collector already collected while the job was running are only collected again if they changed.
+    The measurements of the transfers are available as `transfers` once the stage ran
+    and are appended to `transfers_file` if it is given.
     """
 
     def __init__(
@@ -212,11 +533,24 @@ class FinalizeStage:
         filesystem_factory: FilesystemFactory,
         collect_instructions: List[CopyInstruction],
         clean_instructions: List[str],
+        workers: int = 1,
+        archive: bool = False,
+        compression: Optional[str] = None,
+        clean_in_background: bool = False,
+        collector: Optional[IncrementalCollector] = None,
+        transfers_file: Optional[Path] = None,
     ) -> None:
         self._local_fs = filesystem_factory.create_local_filesystem()
         self._remote_fs = filesystem_factory.create_ssh_filesystem()
         self._files = collect_instructions
         self._clean = clean_instructions
+        self._workers = workers
+        self._archive = archive
+        self._compression = compression
+        self._clean_in_background = clean_in_background
+        self._collector = collector
+        self._transfers_file = transfers_file
+        self.transfers = TransferProgress("Collecting files")
 
     def allowed_to_fail(self) -> bool:
         return False
@@ -229,16 +563,43 @@ class FinalizeStage:
 
     def _collect_files(self, ui: UI) -> None:
         ui.info("Collecting files...")
-        for cr in progressive_copy(
-            self._remote_fs, self._local_fs, self._files, abort_on_error=False
-        ):
+        monitor = TransferMonitor("Collecting files", ui.transfer, operations=self._remote_fs.request_count)
+        skipped_files: List[str] = []
+        for cr in self._copy_results(monitor):
+            skipped_files.extend(cr.skipped_files)
             _log_errors(cr.errors, ui)
 
+        self.transfers = monitor.progress
+        _log_transfers(self.transfers, ui)
+        _save_transfers(self.transfers, self._transfers_file)
+        _log_skipped(skipped_files, ui)
         ui.success("Done")
 
+    def _copy_results(self, monitor: TransferMonitor) -> Iterable[CopyResult]:
+        files = self._collector.remaining(self._files) if self._collector else self._files
+        if self._archive:
+            result = archive_copy(
+                self._remote_fs,
+                self._local_fs,
+                files,
+                self._compression,
+                abort_on_error=False,
+                monitor=monitor,
+            )
+            return [result]
+
+        return progressive_copy(
+            self._remote_fs,
+            self._local_fs,
+            files,
+            abort_on_error=False,
+            workers=self._workers,
+            monitor=monitor,
+        )
+
     def _clean_files(self, ui: UI) -> None:
         ui.info("Cleaning files...")
-        errors = list(progressive_clean(self._remote_fs, self._clean))
+        errors = list(progressive_clean(self._remote_fs, self._clean, detach=self._clean_in_background))
         _log_errors(errors, ui)
         ui.success("Done")
 
@@ -246,6 +607,87 @@ class FinalizeStage:
         pass
 
 
+class PlanStage:
+    """
+    Finds all files a PrepareStage or FinalizeStage would transfer and prints the plan without copying anything.
+    Fails if the transfer would fail or copy more than one file to the same destination.
+    The plan is available as `plan` once the stage ran.
+    """
+
+    def __init__(
+        self,
+        filesystem_factory: FilesystemFactory,
+        copy_instructions: List[CopyInstruction],
+        workers: int = 1,
+        collect: bool = False,
+        archive: bool = False,
+    ) -> None:
+        local_fs = filesystem_factory.create_local_filesystem()
+        remote_fs = filesystem_factory.create_ssh_filesystem()
+        self._source_fs, self._target_fs = (remote_fs, local_fs) if collect else (local_fs, remote_fs)
+        self._description = "Collecting files" if collect else "Copying files"
+        self._files = [instruction for instruction in copy_instructions if not instruction.remote_method]
+        self._remote_files = [instruction for instruction in copy_instructions if instruction.remote_method]
+        self._workers = workers
+        self._archive = archive
+        self.plan = TransferPlan()
+
+    def allowed_to_fail(self) -> bool:
+        return True
+
+    def __call__(self, ui: UI) -> bool:
+        ui.info(f"Planning: {self._description}...")
+        self.plan = plan_copy(self._source_fs, self._target_fs, self._files, archive=self._archive)
+        _log_plan(self.plan, self._workers, ui)
+        for instruction in self._remote_files:
+            ui.info(f"{instruction.remote_method} on remote: {instruction.source} -> {instruction.destination}")
+
+        conflicts = self.plan.conflicts()
+        for conflict in conflicts:
+            ui.error(f"Conflicting destination: {conflict}")
+
+        _log_errors(self.plan.errors, ui)
+        return not (conflicts or self.plan.errors)
+
+    def cancel(self, ui: UI) -> None:
+        pass
+
+
+def _log_plan(plan: TransferPlan, workers: int, ui: UI) -> None:
+    for group in plan.groups:
+        ui.info(
+            f"{group.strategy.value}: {group.source} -> {group.destination}, "
+            f"{len(group.transferred)} files ({group.size / 1e6:.1f} MB)"
+        )
+
+    ui.info(f"Total: {plan.file_count} files ({plan.size / 1e6:.1f} MB), {plan.skipped_count} unchanged files skipped")
+    if workers > 1 and plan.file_count:
+        ui.info(f"Largest load of {workers} workers: {plan.worker_loads(workers)[0] / 1e6:.1f} MB")
+
+
+class DryRunLaunchStage:
+    """
+    Prints the batch script a LaunchStage would submit without submitting it
+    """
+
+    def __init__(self, batch_script: str, candidates: Optional[List[List[str]]] = None) -> None:
+        self._batch_script = batch_script
+        self._candidates = candidates or []
+
+    def allowed_to_fail(self) -> bool:
+        return False
+
+    def __call__(self, ui: UI) -> bool:
+        ui.info(f"Would submit {self._batch_script}")
+        for candidate in self._candidates:
+            ui.info(f"Candidate: {CandidateEstimate(candidate).description}")
+
+        return True
+
+    def cancel(self, ui: UI) -> None:
+        pass
+
+
 class StatusStage:
     """
     Checks a job's status.
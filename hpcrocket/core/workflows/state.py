@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+class WorkflowState:
+    """
+    The progress of a workflow, kept in a local file so a run that was interrupted can be resumed.
+    It records how many stages completed, the files the running stage copied so far,
+    the submitted job and the last status the job was seen in.
+
+    The file is a log with one JSON record per line. Every change appends a record, so recording
+    a copied file does not rewrite the whole state. A state that was saved for a different
+    `fingerprint`, e.g. by a changed configuration, is not resumed.
+    """
+
+    def __init__(self, path: Path, fingerprint: str) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.completed_stages = 0
+        self.copied_files: List[str] = []
+        self.jobid = ""
+        self.ready_marker = ""
+        self.job_status = ""
+        self._lock = threading.Lock()
+
+    @classmethod
+    def resume(cls, path: Path, fingerprint: str) -> "WorkflowState":
+        """
+        Reads the state a previous run saved to the file.
+        A missing file, or a file saved for a different fingerprint, results in an empty state.
+        """
+        state = cls(path, fingerprint)
+        records = _read_records(path)
+        header = next(records, {})
+        if header.get("fingerprint") != fingerprint:
+            return state
+
+        for record in records:
+            state._apply(record)
+
+        return state
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.completed_stages or self.copied_files or self.jobid)
+
+    def save(self) -> None:
+        """
+        Writes the complete state to the file, replacing what it contained before
+        """
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_name(self.path.name + ".tmp")
+            with tmp_file.open("w") as file:
+                for record in self._snapshot():
+                    file.write(json.dumps(record) + "\n")
+
+            os.replace(tmp_file, self.path)
+
+    def complete_stage(self, completed_stages: int) -> None:
+        self._record({"stages": completed_stages})
+
+    def add_copied_files(self, files: List[str]) -> None:
+        if files:
+            self._record({"copied": files})
+
+    def set_job(self, jobid: str, ready_marker: str = "") -> None:
+        self._record({"job": jobid, "marker": ready_marker})
+
+    def set_job_status(self, status: str) -> None:
+        if status != self.job_status:
+            self._record({"status": status})
+
+    def remove(self) -> None:
+        with self._lock:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._apply(record)
+            with self.path.open("a") as file:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if "stages" in record:
+            # The copied files only matter until the stage that copied them completed
+            self.completed_stages = int(record["stages"])
+            self.copied_files = []
+
+        self.copied_files.extend(record.get("copied", []))
+        if "job" in record:
+            self.jobid = str(record["job"])
+            self.ready_marker = str(record.get("marker", ""))
+
+        self.job_status = str(record.get("status", self.job_status))
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = [{"fingerprint": self.fingerprint}, {"stages": self.completed_stages}]
+        if self.copied_files:
+            records.append({"copied": self.copied_files})
+
+        if self.jobid:
+            records.append({"job": self.jobid, "marker": self.ready_marker})
+
+        if self.job_status:
+            records.append({"status": self.job_status})
+
+        return records
+
+
+def _read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    try:
+        with path.open() as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # NOTE:
+                    # The last record is incomplete if the run was interrupted while writing it
+                    return
+
+                if isinstance(record, dict):
+                    yield record
+    except OSError:
+        return
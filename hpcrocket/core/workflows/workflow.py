@@ -1,5 +1,6 @@
 from typing import List, Optional
 
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.typesafety import get_or_raise
 from hpcrocket.ui import UI
 
@@ -44,11 +45,14 @@ class Stage(Protocol):
 
 class Workflow:
     """
-    Represents a series of isolated steps that are executed in order
+    Represents a series of isolated steps that are executed in order.
+    With a state the progress is saved after every stage, and stages that completed in an interrupted run
+    are skipped. The state is removed once the workflow finished, failed or was canceled.
     """
 
-    def __init__(self, stages: List[Stage]) -> None:
+    def __init__(self, stages: List[Stage], state: Optional[WorkflowState] = None) -> None:
         self._stages = stages
+        self._state = state
         self._active_stage: Optional[Stage] = None
         self._canceled = False
 
@@ -62,20 +66,43 @@ class Workflow:
         Returns:
             bool
         """
+        completed_stages = self._start_state(ui)
         results: List[bool] = []
-        for stage in self._stages:
+        for index, stage in enumerate(self._stages):
             self._active_stage = stage
 
             if self._canceled:
                 break
 
+            if index < completed_stages:
+                continue
+
             result = stage(ui)
             results.append(result)
             if self._workflow_failed(stage, result):
+                self._remove_state()
                 return False
 
+            if self._state:
+                self._state.complete_stage(index + 1)
+
+        self._remove_state()
         return all(results)
 
+    def _start_state(self, ui: UI) -> int:
+        if not self._state:
+            return 0
+
+        if self._state.resumed:
+            ui.info(f"Resuming after {self._state.completed_stages} of {len(self._stages)} completed stages")
+
+        self._state.save()
+        return self._state.completed_stages
+
+    def _remove_state(self) -> None:
+        if self._state:
+            self._state.remove()
+
     def _workflow_failed(self, stage: Stage, result: bool) -> bool:
         return not (result or stage.allowed_to_fail())
 
@@ -92,6 +119,7 @@ class Workflow:
         active_stage = get_or_raise(self._active_stage, WorkflowNotStartedError)
         active_stage.cancel(ui)
         self._canceled = True
+        self._remove_state()
 
 
 class WorkflowNotStartedError(Exception):
@@ -0,0 +1,183 @@
+import tarfile
+from contextlib import contextmanager
+from typing import BinaryIO, ContextManager, Dict, Iterator, List, Optional, Tuple, cast
+
+import fs.base
+import fs.path
+
+try:
+    from typing import Protocol, runtime_checkable
+except ImportError:  # pragma: no cover
+    from typing_extensions import Protocol, runtime_checkable  # type: ignore
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+
+# NOTE:
+# tarfile only supports zstd from Python 3.14 on, so zstd streams are (de)compressed with zstandard
+_MODE_SUFFIXES = {None: "", "gzip": "gz", "zstd": ""}
+
+
+@runtime_checkable
+class ArchivingFS(Protocol):
+    """
+    A PyFilesystem that can pack and unpack tar streams by itself, e.g. by running `tar` on a remote machine
+    """
+
+    def extract_archive(self, compression: Optional[str] = None) -> ContextManager[BinaryIO]:
+        """
+        Returns a writable stream. A tar archive written to it is extracted relative to the filesystem's root.
+        """
+        ...
+
+    def create_archive(self, paths: List[str], compression: Optional[str] = None) -> ContextManager[BinaryIO]:
+        """
+        Returns a readable stream of a tar archive containing the given absolute paths,
+        with member names relative to the filesystem's root.
+        """
+        ...
+
+
+def upload_archive(
+    source_fs: fs.base.FS,
+    archive_fs: ArchivingFS,
+    files: List[Tuple[str, str]],
+    compression: Optional[str] = None,
+) -> None:
+    """
+    Streams the files as a tar archive into `archive_fs`.
+    The contents of a source directory are extracted into its target directory.
+
+    Args:
+        source_fs (fs.base.FS): The filesystem to read the files from
+        archive_fs (ArchivingFS): The filesystem that extracts the archive
+        files (list[tuple[str, str]]): Pairs of source paths and absolute target paths in `archive_fs`
+        compression (str): An optional compression, e.g. "gzip"
+    """
+    with archive_fs.extract_archive(compression) as stream, _compressed(stream, compression) as tar_stream:
+        mode = f"w|{_MODE_SUFFIXES[compression]}"
+        with tarfile.open(fileobj=tar_stream, mode=mode) as tar:  # type: ignore[call-overload]
+            for source, target in files:
+                if source_fs.isdir(source):
+                    _add_directory(tar, source_fs, source, target)
+                else:
+                    _add_file(tar, source_fs, source, target)
+
+
+def download_archive(
+    archive_fs: ArchivingFS,
+    target_fs: fs.base.FS,
+    files: List[Tuple[str, str]],
+    compression: Optional[str] = None,
+) -> None:
+    """
+    Streams the files as a tar archive out of `archive_fs` and unpacks them on the fly.
+    The contents of a source directory are unpacked into its target directory.
+
+    Args:
+        archive_fs (ArchivingFS): The filesystem that creates the archive
+        target_fs (fs.base.FS): The filesystem to write the files to
+        files (list[tuple[str, str]]): Pairs of absolute source paths in `archive_fs` and target paths
+        compression (str): An optional compression, e.g. "gzip"
+    """
+    targets: Dict[str, str] = {_member_name(source): target for source, target in files}
+    sources = list(dict.fromkeys(source for source, _ in files))
+    with archive_fs.create_archive(sources, compression) as stream, _decompressed(stream, compression) as tar_stream:
+        mode = f"r|{_MODE_SUFFIXES[compression]}"
+        with tarfile.open(fileobj=tar_stream, mode=mode) as tar:  # type: ignore[call-overload]
+            for member in tar:
+                target = _member_target(member.name, targets)
+                if target is None:
+                    continue
+
+                if member.isdir():
+                    target_fs.makedirs(target, recreate=True)
+                    continue
+
+                content = tar.extractfile(member) if member.isfile() else None
+                if content is None:
+                    # E.g. a symbolic link, which a stream cannot resolve
+                    continue
+
+                target_fs.makedirs(fs.path.dirname(target), recreate=True)
+                target_fs.upload(target, content)
+
+
+@contextmanager
+def _compressed(stream: BinaryIO, compression: Optional[str]) -> Iterator[BinaryIO]:
+    if compression != "zstd":
+        yield stream
+        return
+
+    _raise_if_zstandard_missing()
+    with zstandard.ZstdCompressor().stream_writer(stream, closefd=False) as writer:
+        yield cast(BinaryIO, writer)
+
+
+@contextmanager
+def _decompressed(stream: BinaryIO, compression: Optional[str]) -> Iterator[BinaryIO]:
+    if compression != "zstd":
+        yield stream
+        return
+
+    _raise_if_zstandard_missing()
+    with zstandard.ZstdDecompressor().stream_reader(stream, closefd=False) as reader:
+        yield cast(BinaryIO, reader)
+
+
+def _raise_if_zstandard_missing() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstd compression requires the zstandard package. Install it with `pip install zstandard`")
+
+
+def _add_directory(tar: tarfile.TarFile, source_fs: fs.base.FS, source: str, target: str) -> None:
+    tar.addfile(_member(source_fs, source, target))
+    for directory in source_fs.walk.dirs(source):
+        tar.addfile(_member(source_fs, directory, fs.path.join(target, fs.path.relativefrom(source, directory))))
+
+    for file in source_fs.walk.files(source):
+        _add_file(tar, source_fs, file, fs.path.join(target, fs.path.relativefrom(source, file)))
+
+
+def _add_file(tar: tarfile.TarFile, source_fs: fs.base.FS, source: str, target: str) -> None:
+    with source_fs.openbin(source) as content:
+        tar.addfile(_member(source_fs, source, target), content)
+
+
+def _member(source_fs: fs.base.FS, source: str, target: str) -> tarfile.TarInfo:
+    info = source_fs.getinfo(source, namespaces=["details", "access"])
+    member = tarfile.TarInfo(_member_name(target))
+    member.mtime = int(info.modified.timestamp()) if info.modified else 0
+    permissions = info.permissions if info.has_namespace("access") else None
+    if info.is_dir:
+        member.type = tarfile.DIRTYPE
+        member.mode = permissions.mode if permissions else 0o755
+    else:
+        member.size = info.size
+        member.mode = permissions.mode if permissions else 0o644
+
+    return member
+
+
+def _member_target(name: str, targets: Dict[str, str]) -> Optional[str]:
+    """
+    Returns where a member is unpacked to. Members inside an archived directory are placed below its target.
+    """
+    if name in targets:
+        return targets[name]
+
+    directory = fs.path.dirname(name)
+    while directory:
+        if directory in targets:
+            return fs.path.join(targets[directory], fs.path.relativefrom(directory, name))
+
+        directory = fs.path.dirname(directory)
+
+    return None
+
+
+def _member_name(path: str) -> str:
+    return fs.path.relpath(fs.path.abspath(path))
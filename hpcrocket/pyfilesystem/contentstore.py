@@ -0,0 +1,306 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+import fs.base
+import fs.copy as fscp
+import fs.errors
+import fs.path
+from fs.permissions import Permissions
+
+from hpcrocket.pyfilesystem.rootfs import resolve_root
+
+try:
+    from typing import Protocol, TypedDict, runtime_checkable
+except ImportError:  # pragma: no cover
+    from typing_extensions import Protocol, TypedDict, runtime_checkable  # type: ignore
+
+
+_LOCK_TIMEOUT = 120.0
+"""The number of seconds to wait for another run to release the index"""
+
+_LOCK_POLL_INTERVAL = 0.5
+
+_STALE_LOCK_AGE = 600.0
+"""Locks older than this many seconds were left behind by a run that died and are removed"""
+
+_WRITE_PERMISSIONS = 0o222
+
+
+@runtime_checkable
+class LinkingFS(Protocol):
+    """
+    A PyFilesystem that can create and read hard and symbolic links
+    """
+
+    def hardlink(self, src_path: str, dst_path: str) -> None:
+        ...
+
+    def symlink(self, src_path: str, dst_path: str) -> None:
+        ...
+
+    def readlink(self, path: str) -> str:
+        ...
+
+
+class _IndexEntryBase(TypedDict):
+    size: int
+    last_used: float
+
+
+class IndexEntry(_IndexEntryBase, total=False):
+    symlinks: List[str]
+
+
+class ContentStore:
+    """
+    A content-addressed store for uploaded files.
+    Every file is uploaded to `<directory>/<sha256>` once and then linked to its target paths.
+    The store's size is capped by evicting the least recently used files, which are tracked in `<directory>/index.json`.
+    Changes to the index are collected in memory and written by `save` once per copy, while holding a lock
+    directory, so concurrent runs do not overwrite each other's changes.
+    Stored files are read-only, so a job cannot change the content of a hard linked file under its hash
+    by writing to it in place. Links whose permissions are changed are replaced with copies first, see `pop_links`.
+    """
+
+    INDEX = "index.json"
+    LOCK = "index.lock"
+
+    def __init__(self, directory: str, max_size: int = 0) -> None:
+        """
+        Args:
+            directory (str): The absolute path of the store
+            max_size (int): The maximum size of the store in bytes. 0 means unlimited.
+        """
+        self._dir = directory
+        self._max_size = max_size
+        self._index: Dict[str, IndexEntry] = {}
+        self._index_loaded = False
+        self._changes: Dict[str, IndexEntry] = {}
+        self._used_digests: Set[str] = set()
+        self._linked: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._dir
+
+    def copy_file(self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> None:
+        """
+        Copies a file to the target through the store.
+        The file is only uploaded if its content is not in the store yet. The index is not written, see `save`.
+        """
+        root_fs, root_target = resolve_root(target_fs, target)
+        digest = source_fs.hash(source, "sha256")
+        blob = fs.path.join(self._dir, digest)
+        size = source_fs.getsize(source)
+
+        with self._lock:
+            if not self._index_loaded:
+                self._index = _read_index(root_fs, self._dir)
+                self._index_loaded = True
+
+            is_stored = digest in self._index and _has_size(root_fs, blob, size)
+            self._used_digests.add(digest)
+
+        if not is_stored:
+            self._store(source_fs, source, root_fs, blob)
+
+        is_symlink = _place(root_fs, blob, root_target)
+        with self._lock:
+            if isinstance(root_fs, LinkingFS):
+                self._linked[root_target] = blob
+
+            entry = self._changes.get(digest) or self._index.get(digest) or IndexEntry(size=size, last_used=0.0)
+            entry = IndexEntry(size=size, last_used=time.time(), symlinks=list(entry.get("symlinks", [])))
+            if is_symlink and root_target not in entry["symlinks"]:
+                entry["symlinks"].append(root_target)
+
+            self._index[digest] = self._changes[digest] = entry
+
+    def save(self, filesystem: fs.base.FS) -> None:
+        """
+        Merges the changes since the last save into the index on the remote machine
+        and evicts the least recently used files if the store is too large.
+
+        Args:
+            filesystem (fs.base.FS): A filesystem containing the store
+        """
+        root_fs, _ = resolve_root(filesystem, "/")
+        with self._lock:
+            changes, self._changes = self._changes, {}
+            if not changes:
+                return
+
+            with self._locked_index(root_fs):
+                index = _read_index(root_fs, self._dir)
+                index.update(changes)
+                self._index = index
+                self._evict_least_recently_used(root_fs)
+                _write_index(root_fs, self._dir, self._index)
+
+    def pop_links(self, paths: Sequence[str]) -> List[Tuple[str, str]]:
+        """
+        Returns the links to stored files that were placed at the paths and forgets them.
+        A link shares its permissions with the stored file, so it must be replaced with a copy
+        before its permissions are changed.
+
+        Args:
+            paths (Sequence[str]): Absolute paths on the filesystem containing the store
+
+        Returns:
+            list[tuple[str, str]]: Pairs of the stored file and the path linked to it
+        """
+        with self._lock:
+            return [(self._linked.pop(path), path) for path in paths if path in self._linked]
+
+    def _store(self, source_fs: fs.base.FS, source: str, root_fs: fs.base.FS, blob: str) -> None:
+        root_fs.makedirs(self._dir, recreate=True)
+        if root_fs.exists(blob):
+            # A blob with a different size was changed after it was stored
+            root_fs.remove(blob)
+
+        fscp.copy_file(source_fs, source, root_fs, blob)
+        _remove_write_permissions(root_fs, blob)
+
+    @contextmanager
+    def _locked_index(self, root_fs: fs.base.FS) -> Iterator[None]:
+        lock = fs.path.join(self._dir, self.LOCK)
+        root_fs.makedirs(self._dir, recreate=True)
+        deadline = time.monotonic() + _LOCK_TIMEOUT
+        while not _try_lock(root_fs, lock):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"The content store index is locked by another run: {lock}")
+
+            time.sleep(_LOCK_POLL_INTERVAL)
+
+        try:
+            yield
+        finally:
+            _unlock(root_fs, lock)
+
+    def _evict_least_recently_used(self, root_fs: fs.base.FS) -> None:
+        if not self._max_size:
+            return
+
+        by_last_use = sorted(self._index.items(), key=lambda item: item[1]["last_used"])
+        total = sum(entry["size"] for _, entry in by_last_use)
+        for digest, entry in by_last_use:
+            if total <= self._max_size:
+                break
+
+            if digest in self._used_digests or self._is_symlinked(root_fs, digest, entry):
+                continue
+
+            self._remove_blob(root_fs, digest)
+            total -= entry["size"]
+
+    def _is_symlinked(self, root_fs: fs.base.FS, digest: str, entry: IndexEntry) -> bool:
+        """
+        Checks whether symlinks placed by earlier runs still point to the blob, and forgets those that do not
+        """
+        if not isinstance(root_fs, LinkingFS) or not entry.get("symlinks"):
+            return False
+
+        blob = fs.path.join(self._dir, digest)
+        entry["symlinks"] = [link for link in entry["symlinks"] if _links_to(root_fs, link, blob)]
+        return bool(entry["symlinks"])
+
+    def _remove_blob(self, root_fs: fs.base.FS, digest: str) -> None:
+        blob = fs.path.join(self._dir, digest)
+        if root_fs.exists(blob):
+            root_fs.remove(blob)
+
+        del self._index[digest]
+
+
+def _read_index(root_fs: fs.base.FS, directory: str) -> Dict[str, IndexEntry]:
+    index_path = fs.path.join(directory, ContentStore.INDEX)
+    if not root_fs.exists(index_path):
+        return {}
+
+    index: Dict[str, IndexEntry] = json.loads(root_fs.readtext(index_path))
+    return index
+
+
+def _write_index(root_fs: fs.base.FS, directory: str, index: Dict[str, IndexEntry]) -> None:
+    # The index is replaced at once, so a run that is interrupted while writing it does not leave half an index
+    index_path = fs.path.join(directory, ContentStore.INDEX)
+    tmp_path = index_path + ".tmp"
+    root_fs.writetext(tmp_path, json.dumps(index))
+    root_fs.move(tmp_path, index_path, overwrite=True)
+
+
+def _try_lock(root_fs: fs.base.FS, lock: str) -> bool:
+    # NOTE:
+    # Creating a directory is atomic on the remote machine, unlike checking for a file and creating it
+    try:
+        root_fs.makedir(lock)
+        return True
+    except (fs.errors.DirectoryExists, fs.errors.OperationFailed):
+        if not root_fs.exists(lock):
+            raise
+
+    modified = root_fs.getinfo(lock, namespaces=["details"]).modified
+    if modified and time.time() - modified.timestamp() > _STALE_LOCK_AGE:
+        _unlock(root_fs, lock)
+
+    return False
+
+
+def _unlock(root_fs: fs.base.FS, lock: str) -> None:
+    try:
+        root_fs.removedir(lock)
+    except fs.errors.ResourceNotFound:
+        pass
+
+
+def _has_size(root_fs: fs.base.FS, blob: str, size: int) -> bool:
+    try:
+        return bool(root_fs.getsize(blob) == size)
+    except fs.errors.ResourceNotFound:
+        return False
+
+
+def _remove_write_permissions(root_fs: fs.base.FS, blob: str) -> None:
+    info = root_fs.getinfo(blob, namespaces=["access"])
+    permissions = info.permissions if info.has_namespace("access") else None
+    if permissions is None:
+        # E.g. a filesystem without permissions
+        return
+
+    mode = permissions.mode & ~_WRITE_PERMISSIONS
+    root_fs.setinfo(blob, {"access": {"permissions": Permissions(mode=mode)}})
+
+
+def _links_to(root_fs: LinkingFS, link: str, blob: str) -> bool:
+    try:
+        return root_fs.readlink(link) == blob
+    except (fs.errors.FSError, OSError):
+        return False
+
+
+def _place(root_fs: fs.base.FS, blob: str, target: str) -> bool:
+    """
+    Places the blob at the target, preferably as a hard link.
+
+    Returns:
+        bool: True if the target is a symlink to the blob
+    """
+    if root_fs.exists(target):
+        root_fs.remove(target)
+
+    if not isinstance(root_fs, LinkingFS):
+        root_fs.copy(blob, target)
+        return False
+
+    try:
+        root_fs.hardlink(blob, target)
+        return False
+    except OSError:
+        # NOTE:
+        # Hard links fail if the target is on a different device than the store
+        root_fs.symlink(blob, target)
+        return True
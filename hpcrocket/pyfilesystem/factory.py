@@ -15,4 +15,15 @@ class PyFilesystemFactory(FilesystemFactory):
     def create_ssh_filesystem(self) -> Filesystem:
         connection = self._options.connection
         proxyjumps = self._options.proxyjumps
-        return sshfilesystem(connection, proxyjumps)
+        content_store = getattr(self._options, "content_store", None)
+        resumable_transfers = getattr(self._options, "resumable_transfers", None)
+        sftp = getattr(self._options, "sftp", None)
+        shared_paths = getattr(self._options, "shared_paths", [])
+        return sshfilesystem(
+            connection,
+            proxyjumps,
+            content_store=content_store,
+            resumable_transfers=resumable_transfers,
+            sftp=sftp,
+            shared_paths=shared_paths,
+        )
@@ -4,12 +4,14 @@ import fs.osfs
 from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
 
 
-def localfilesystem(workdir: str) -> PyFilesystemBased:
+def localfilesystem(workdir: str, hardlinks: bool = False) -> PyFilesystemBased:
     """
-    A PyFilesystem2 based filesystem that uses the computer's local filesystem
+    A PyFilesystem2 based filesystem that uses the computer's local filesystem.
+    Files copied between local filesystems are copied by the operating system.
 
     Args:
         workdir (str): The path the filesystem should be opened in
+        hardlinks (bool): Hard link files copied to this filesystem from the same disk instead of copying them
     """
 
-    return PyFilesystemBased(fs.osfs.OSFS("/"), workdir)
+    return PyFilesystemBased(fs.osfs.OSFS("/"), workdir, hardlinks=hardlinks)
@@ -0,0 +1,223 @@
+import errno
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import fs.base
+import fs.copy as fscp
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# NOTE:
+# The ioctl request number of FICLONE from linux/fs.h, which clones a whole file on copy-on-write filesystems
+_FICLONE = 0x40049409
+
+_DIRECTORY_WORKERS = 8
+"""The number of files of a directory that are copied at the same time"""
+
+_FALLBACK_CHUNK_SIZE = 1024**2
+
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.ENOTTY,
+}
+
+FileCopier = Callable[[fs.base.FS, str, fs.base.FS, str], None]
+
+RangeCopier = Callable[[int, int, int, int], int]
+"""
+Copies up to `count` bytes from the source file at `offset` to the target file's position.
+The arguments are (source fd, target fd, offset, count).
+"""
+
+
+def native_paths(source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> Optional[Tuple[str, str]]:
+    """
+    Returns the paths of source and target on the local disk, if both filesystems are local
+    """
+    if source_fs.hassyspath(source) and target_fs.hassyspath(target):
+        return source_fs.getsyspath(source), target_fs.getsyspath(target)
+
+    return None
+
+
+class NativeCopy:
+    """
+    Copies files between filesystems on the local disk with the operating system instead of streaming them
+    through Python. A file is cloned if the filesystem supports reflinks, and otherwise copied in the kernel
+    with `copy_file_range` or `sendfile`. With `hardlinks` files on the same device are linked instead,
+    so the copy shares its content with the source.
+    Files on other filesystems are copied with the `fallback`.
+    """
+
+    def __init__(
+        self, fallback: FileCopier = fscp.copy_file, hardlinks: bool = False, workers: int = _DIRECTORY_WORKERS
+    ) -> None:
+        self._fallback = fallback
+        self._hardlinks = hardlinks
+        self._workers = workers
+
+    def copy_file(self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> None:
+        paths = native_paths(source_fs, source, target_fs, target)
+        if paths is None:
+            self._fallback(source_fs, source, target_fs, target)
+            return
+
+        self._copy_native(*paths)
+
+    def copy_dir(self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> None:
+        """
+        Copies the contents of a directory into the target directory, copying several files at the same time
+        """
+        paths = native_paths(source_fs, source, target_fs, target)
+        if paths is None:
+            fscp.copy_dir(source_fs, source, target_fs, target)
+            return
+
+        files = list(_create_directories(*paths))
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            for _ in pool.map(lambda paths: self._copy_native(*paths), files):
+                pass
+
+    def _copy_native(self, source: str, target: str) -> None:
+        if _is_same_file(source, target):
+            # E.g. a linked copy of an earlier run
+            return
+
+        if self._hardlinks and _try_hardlink(source, target):
+            return
+
+        source_fd = os.open(source, os.O_RDONLY)
+        try:
+            if _is_linked(target):
+                # Writing to a linked file would change all its links, e.g. the source of an earlier linked copy
+                os.unlink(target)
+
+            source_info = os.fstat(source_fd)
+            target_fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                if not _try_clone(source_fd, target_fd):
+                    _copy_contents(source_fd, target_fd, source_info.st_size)
+            finally:
+                os.close(target_fd)
+
+            # Like shutil.copy2, the copy gets the permissions of the source regardless of the umask
+            os.chmod(target, stat.S_IMODE(source_info.st_mode))
+        finally:
+            os.close(source_fd)
+
+
+def _create_directories(source: str, target: str) -> Iterator[Tuple[str, str]]:
+    """
+    Creates the directory tree of the source in the target and yields the files to copy
+    """
+    os.makedirs(target, exist_ok=True)
+    for directory, subdirectories, files in os.walk(source, followlinks=True):
+        relative_dir = os.path.relpath(directory, source)
+        for subdirectory in subdirectories:
+            os.makedirs(os.path.join(target, relative_dir, subdirectory), exist_ok=True)
+
+        for file in files:
+            yield os.path.join(directory, file), os.path.normpath(os.path.join(target, relative_dir, file))
+
+
+def _is_same_file(source: str, target: str) -> bool:
+    try:
+        return os.path.samefile(source, target)
+    except OSError:
+        return False
+
+
+def _try_hardlink(source: str, target: str) -> bool:
+    try:
+        if os.path.lexists(target):
+            os.unlink(target)
+
+        os.link(source, target)
+        return True
+    except OSError:
+        # E.g. a different device or a filesystem without hard links
+        return False
+
+
+def _is_linked(path: str) -> bool:
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return False
+
+    return stat.S_ISREG(info.st_mode) and info.st_nlink > 1
+
+
+def _try_clone(source_fd: int, target_fd: int) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+
+    try:
+        fcntl.ioctl(target_fd, _FICLONE, source_fd)
+        return True
+    except OSError as err:
+        if err.errno in _UNSUPPORTED_ERRNOS:
+            return False
+
+        raise
+
+
+def _copy_contents(source_fd: int, target_fd: int, size: int) -> None:
+    """
+    Copies with the fastest method the operating system supports.
+    A method that fails because it is not supported hands over to the next one where it stopped.
+    """
+    copied = 0
+    for copy_range in _range_copiers():
+        try:
+            while copied < size:
+                count = copy_range(source_fd, target_fd, copied, size - copied)
+                if not count:
+                    # The source was truncated while it was copied
+                    return
+
+                copied += count
+
+            return
+        except OSError as err:
+            if err.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+
+
+def _range_copiers() -> List[RangeCopier]:
+    copiers: List[RangeCopier] = []
+    if hasattr(os, "copy_file_range"):
+        copiers.append(_copy_file_range)
+
+    if hasattr(os, "sendfile"):
+        copiers.append(_sendfile)
+
+    copiers.append(_read_and_write)
+    return copiers
+
+
+def _copy_file_range(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(source_fd, target_fd, count, offset)
+
+
+def _sendfile(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(target_fd, source_fd, offset, count)
+
+
+def _read_and_write(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    data = memoryview(os.pread(source_fd, min(count, _FALLBACK_CHUNK_SIZE), offset))
+    written = 0
+    while written < len(data):
+        written += os.write(target_fd, data[written:])
+
+    return written
@@ -1,18 +1,119 @@
 import os
 from io import TextIOWrapper
 from pathlib import PurePath
-from typing import Generator, List, Optional, cast
+from typing import ContextManager, Dict, Generator, Iterator, List, Optional, Sequence, Tuple, cast
 
 import fs.base
 import fs.copy as fscp
 import fs.errors as fserr
+import fs.info
+import fs.path
 
-from hpcrocket.core.filesystem import Filesystem
+from hpcrocket.core.filesystem import FileStat, Filesystem, VerificationError
 from hpcrocket.core.filesystem.glob import (
+    GlobMatcher,
+    compile_glob,
     is_glob,
+    outermost,
     path_after_wildcard,
     split_at_first_wildcard,
 )
+from hpcrocket.pyfilesystem.archive import ArchivingFS, download_archive, upload_archive
+from hpcrocket.pyfilesystem.contentstore import ContentStore
+from hpcrocket.pyfilesystem.nativecopy import FileCopier, NativeCopy, native_paths
+from hpcrocket.pyfilesystem.resumable import ResumableTransfer
+from hpcrocket.pyfilesystem.rootfs import resolve_root
+
+try:
+    from typing import Protocol, runtime_checkable
+except ImportError:  # pragma: no cover
+    from typing_extensions import Protocol, runtime_checkable  # type: ignore
+
+_CHECKSUM_ALGORITHM = "blake2b"
+
+
+@runtime_checkable
+class MultiChannelFS(Protocol):
+    """
+    A PyFilesystem that can open additional channels for concurrent transfers
+    """
+
+    def open_channel(self) -> fs.base.FS:
+        ...
+
+
+@runtime_checkable
+class PermissionSettingFS(Protocol):
+    """
+    A PyFilesystem that can set the permissions of many files at once
+    """
+
+    def set_permissions(self, paths: Sequence[str], permissions: int) -> None:
+        ...
+
+
+@runtime_checkable
+class BulkRemovingFS(Protocol):
+    """
+    A PyFilesystem that can remove many files and directories at once
+    """
+
+    def remove_all(self, paths: Sequence[str], detach: bool = False) -> None:
+        ...
+
+
+@runtime_checkable
+class FindingFS(Protocol):
+    """
+    A PyFilesystem that can list all entries below a directory at once
+    """
+
+    def find(self, path: str, max_depth: Optional[int] = None) -> Iterator[Tuple[str, fs.info.Info]]:
+        ...
+
+
+@runtime_checkable
+class HostCopyingFS(Protocol):
+    """
+    A PyFilesystem that can copy files on the machine that holds them
+    """
+
+    def copy_on_host(self, files: Sequence[Tuple[str, str]], method: str = "copy") -> None:
+        ...
+
+
+@runtime_checkable
+class DigestingFS(Protocol):
+    """
+    A PyFilesystem that hashes files while they are transferred and can hash many files at once
+    """
+
+    def recording_digests(self) -> ContextManager[Dict[str, str]]:
+        ...
+
+    def hash_many(self, paths: Sequence[str], name: str) -> Dict[str, str]:
+        ...
+
+
+@runtime_checkable
+class RequestCountingFS(Protocol):
+    """
+    A PyFilesystem that counts the requests it sends to another machine
+    """
+
+    @property
+    def request_count(self) -> int:
+        ...
+
+
+@runtime_checkable
+class CachingFS(Protocol):
+    """
+    A PyFilesystem that caches the metadata of files
+    """
+
+    def clear_cache(self) -> None:
+        ...
 
 
 class PyFilesystemBased(Filesystem):
@@ -20,10 +121,26 @@ class PyFilesystemBased(Filesystem):
     A Filesystem based on PyFilesystem2
     """
 
-    def __init__(self, internal_fs: fs.base.FS, dir: str = "/", home: str = "/") -> None:
+    def __init__(
+        self,
+        internal_fs: fs.base.FS,
+        dir: str = "/",
+        home: str = "/",
+        content_store: Optional[ContentStore] = None,
+        resumable_transfer: Optional[ResumableTransfer] = None,
+        hardlinks: bool = False,
+    ) -> None:
+        """
+        Args:
+            hardlinks (bool): Files copied to this filesystem from the same local disk are hard linked,
+                so they share their content with the source instead of being copied
+        """
         self._internal_fs = internal_fs
         self._curdir = PurePath(dir)
         self._homedir = PurePath(home)
+        self._content_store = content_store
+        self._resumable_transfer = resumable_transfer
+        self._hardlinks = hardlinks
 
     @property
     def current_dir(self) -> PurePath:
@@ -42,10 +159,53 @@ class PyFilesystemBased(Filesystem):
         """
         return self._internal_fs
 
+    @property
+    def content_store(self) -> Optional[ContentStore]:
+        """Returns the store that files copied to this filesystem are placed through, if any"""
+        return self._content_store
+
+    @property
+    def resumable_transfer(self) -> Optional[ResumableTransfer]:
+        """Returns the transfer that large files copied from or to this filesystem are copied with, if any"""
+        return self._resumable_transfer
+
+    def fork(self) -> "PyFilesystemBased":
+        if isinstance(self._internal_fs, MultiChannelFS):
+            channel = self._internal_fs.open_channel()
+            return PyFilesystemBased(
+                channel,
+                str(self._curdir),
+                str(self._homedir),
+                self._content_store,
+                self._resumable_transfer,
+                self._hardlinks,
+            )
+
+        return self
+
+    def close(self) -> None:
+        self._internal_fs.close()
+
+    def flush(self) -> None:
+        if self._content_store:
+            self._content_store.save(self._internal_fs)
+
+    def refresh(self) -> None:
+        root_fs, _ = resolve_root(self._internal_fs, "/")
+        if isinstance(root_fs, CachingFS):
+            root_fs.clear_cache()
+
+    def request_count(self) -> int:
+        root_fs, _ = resolve_root(self._internal_fs, "/")
+        return root_fs.request_count if isinstance(root_fs, RequestCountingFS) else 0
+
     def glob(self, pattern: str) -> List[str]:
+        return list(self.iglob(pattern))
+
+    def iglob(self, pattern: str) -> Iterator[str]:
         pattern = self._expandhome(pattern, self)
         sub_fs = self._open_fs(self, pattern)
-        return list(self._glob_with_pyfs(sub_fs, pattern))
+        return self._glob_with_pyfs(sub_fs, pattern)
 
     def _expandhome(self, path: str, filesystem: "PyFilesystemBased") -> str:
         return path.replace("~", str(filesystem.home))
@@ -65,6 +225,7 @@ class PyFilesystemBased(Filesystem):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         self._raise_if_no_pyfilesystem(filesystem)
         other_pyfs_based = cast(PyFilesystemBased, filesystem) or self
@@ -72,12 +233,142 @@ class PyFilesystemBased(Filesystem):
         target = self._expandhome(target, other_pyfs_based)
         source_fs = self._open_fs(self, source)
         target_fs = self._open_fs(other_pyfs_based, target)
+        copier = NativeCopy(self._file_copier(other_pyfs_based), other_pyfs_based._hardlinks)
 
-        if is_glob(source):
-            self._copy_glob(source_fs, source, target_fs, target, overwrite)
+        if is_glob(source) and not literal:
+            self._copy_glob(source_fs, source, target_fs, target, overwrite, copier)
+            return
+
+        self._copy_single_file(source_fs, source, target_fs, target, copier, overwrite)
+
+    def copy_verified(
+        self,
+        source: str,
+        target: str,
+        overwrite: bool = False,
+        filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
+    ) -> None:
+        other_pyfs_based = cast(PyFilesystemBased, filesystem) or self
+        digesting_fs = next(
+            (pyfs.internal_fs for pyfs in (other_pyfs_based, self) if isinstance(pyfs.internal_fs, DigestingFS)),
+            None,
+        )
+        if digesting_fs is None:
+            self.copy(source, target, overwrite, filesystem, literal)
+            return
+
+        with digesting_fs.recording_digests() as digests:
+            self.copy(source, target, overwrite, filesystem, literal)
+
+        # Files that were not transferred, e.g. because both sides are on the local disk, have no digest
+        hashed = digesting_fs.hash_many(list(digests), _CHECKSUM_ALGORITHM)
+        differing = [path for path, digest in digests.items() if hashed.get(path) != digest]
+        if differing:
+            raise VerificationError(f"The copies of {source} differ from their source: {', '.join(differing)}")
+
+    def _file_copier(self, other: "PyFilesystemBased") -> FileCopier:
+        """Returns how files are copied if they are not both on the local disk"""
+        if other is self:
+            return fscp.copy_file
+
+        if other.content_store:
+            return other.content_store.copy_file
+
+        resumable_transfer = other.resumable_transfer or self.resumable_transfer
+        if resumable_transfer:
+            return resumable_transfer.copy_file
+
+        return fscp.copy_file
+
+    def copy_archive(
+        self,
+        files: Sequence[Tuple[str, str]],
+        overwrite: bool = False,
+        filesystem: Optional["Filesystem"] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        self._raise_if_no_pyfilesystem(filesystem)
+        other_pyfs_based = cast(PyFilesystemBased, filesystem) or self
+        source_root, _ = resolve_root(self.internal_fs, "/")
+        target_root, _ = resolve_root(other_pyfs_based.internal_fs, "/")
+        archived_files: List[Tuple[str, str]] = []
+        for source, target in files:
+            source = self._expandhome(source, self)
+            target = self._expandhome(target, other_pyfs_based)
+            source_fs = self._open_fs(self, source)
+            target_fs = self._open_fs(other_pyfs_based, target)
+            self._raise_if_does_not_exist(source, source_fs)
+            self._raise_if_target_exists(target, overwrite, target_fs)
+            if not source_fs.isdir(source):
+                target = self._append_filename_if_target_is_dir(target_fs, source, target)
+
+            archived_files.append((resolve_root(source_fs, source)[1], resolve_root(target_fs, target)[1]))
+
+        copier = NativeCopy(hardlinks=other_pyfs_based._hardlinks)
+        self._copy_archived_files(source_root, target_root, archived_files, compression, copier)
+
+    def _copy_archived_files(
+        self,
+        source_root: fs.base.FS,
+        target_root: fs.base.FS,
+        files: List[Tuple[str, str]],
+        compression: Optional[str],
+        copier: NativeCopy,
+    ) -> None:
+        # NOTE:
+        # Directories are part of the archive as well, so their files are not transferred one by one.
+        # Files on the local disk of both sides, e.g. in a directory that is mounted on both machines, are not archived
+        local_files: List[Tuple[str, str]] = []
+        archived_files: List[Tuple[str, str]] = []
+        for source, target in files:
+            is_local = native_paths(source_root, source, target_root, target) is not None
+            (local_files if is_local else archived_files).append((source, target))
+
+        if archived_files and isinstance(target_root, ArchivingFS):
+            upload_archive(source_root, target_root, archived_files, compression)
+        elif archived_files and isinstance(source_root, ArchivingFS):
+            download_archive(source_root, target_root, archived_files, compression)
+        else:
+            local_files.extend(archived_files)
+
+        for source, target in local_files:
+            if source_root.isdir(source):
+                copier.copy_dir(source_root, source, target_root, target)
+                continue
+
+            self._create_missing_target_dirs(target, target_root)
+            copier.copy_file(source_root, source, target_root, target)
+
+    def set_permissions(self, paths: Sequence[str], mode: int) -> None:
+        root_fs, _ = resolve_root(self.internal_fs, "/")
+        root_paths = [resolve_root(self.internal_fs, self._absolute_path(path))[1] for path in paths]
+        self._replace_store_links(root_fs, root_paths)
+        if isinstance(root_fs, PermissionSettingFS):
+            root_fs.set_permissions(root_paths, mode)
+            return
+
+        for path in root_paths:
+            if not root_fs.exists(path):
+                raise FileNotFoundError(path)
+
+            if root_fs.hassyspath(path):
+                os.chmod(root_fs.getsyspath(path), mode)
+
+    def _replace_store_links(self, root_fs: fs.base.FS, paths: List[str]) -> None:
+        # The stored files stay read-only, so other runs that link to them are not changed
+        links = self._content_store.pop_links(paths) if self._content_store else []
+        if links and isinstance(root_fs, HostCopyingFS):
+            root_fs.copy_on_host(links)
             return
 
-        self._copy_single_file(source_fs, source, target_fs, target, overwrite)
+        for stored_file, path in links:
+            root_fs.remove(path)
+            root_fs.copy(stored_file, path)
+
+    def _absolute_path(self, path: str) -> str:
+        path = self._expandhome(path, self)
+        return path if os.path.isabs(path) else str(self.current_dir / path)
 
     def _open_fs(self, fs: "PyFilesystemBased", path: str) -> fs.base.FS:
         if os.path.isabs(path):
@@ -87,16 +378,29 @@ class PyFilesystemBased(Filesystem):
 
     def _glob_with_pyfs(self, fs: fs.base.FS, pattern: str) -> Generator[str, None, None]:
         dir, pattern = split_at_first_wildcard(pattern)
+        self._raise_if_does_not_exist(dir, fs)
 
-        if pattern.endswith("*"):
-            pattern += "*"
+        for match in self._glob_matches(fs, dir, compile_glob(pattern)):
+            yield os.path.join(dir, match)
 
-        self._raise_if_does_not_exist(dir, fs)
+    def _glob_matches(self, _fs: fs.base.FS, dir: str, matcher: GlobMatcher) -> Iterator[str]:
+        root_fs, root_dir = resolve_root(_fs, dir)
+        if isinstance(root_fs, FindingFS):
+            found_any = False
+            try:
+                for match in _find_matches(root_fs, root_dir, matcher):
+                    found_any = True
+                    yield match
+
+                return
+            except OSError:
+                # E.g. the remote find does not support -printf.
+                # Matches that were already yielded cannot be taken back, so only a failed start falls back.
+                if found_any:
+                    raise
 
-        fs = fs.opendir(dir)
-        for match in fs.glob(pattern):
-            joined_path = os.path.join(dir, match.path.lstrip(os.path.sep))
-            yield joined_path
+        glob_fs = _fs.opendir(dir)
+        yield from matcher.walk(lambda path: ((info.name, info.is_dir) for info in glob_fs.scandir(path)))
 
     def _copy_glob(
         self,
@@ -105,15 +409,53 @@ class PyFilesystemBased(Filesystem):
         target_fs: fs.base.FS,
         target: str,
         overwrite: bool,
+        copier: NativeCopy,
     ) -> None:
-        glob = self._glob_with_pyfs(source_fs, source)
-        for match in glob:
-            if source_fs.isdir(match):
-                continue
-
+        # Matched directories are copied with their contents
+        for match in outermost(self._glob_with_pyfs(source_fs, source)):
             filename = path_after_wildcard(source, match)
             target_path = os.path.join(target, filename)
-            self._copy_single_file(source_fs, match, target_fs, target_path, overwrite)
+            self._copy_single_file(source_fs, match, target_fs, target_path, copier, overwrite)
+
+    def copy_within(self, files: Sequence[Tuple[str, str]], overwrite: bool = False, method: str = "copy") -> List[str]:
+        root_fs, _ = resolve_root(self.internal_fs, "/")
+        if not isinstance(root_fs, HostCopyingFS):
+            return super().copy_within(files, overwrite, method)
+
+        copied: List[str] = []
+        root_files: List[Tuple[str, str]] = []
+        for source, target in files:
+            source_fs, source_path = self._resolve_fs_and_path(source)
+            target_fs, target_path = self._resolve_fs_and_path(target)
+            # Absolute paths are resolved without their leading separator
+            prefix = os.path.sep if os.path.isabs(self._expandhome(target, self)) else ""
+            for match, destination in self._copy_pairs(source_fs, source_path, target_fs, target_path):
+                self._raise_if_target_exists(destination, overwrite, target_fs)
+                root_files.append((resolve_root(source_fs, match)[1], resolve_root(target_fs, destination)[1]))
+                copied.append(prefix + destination)
+
+        if root_files:
+            root_fs.copy_on_host(root_files, method)
+
+        return copied
+
+    def _copy_pairs(
+        self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yields the files and directories a copy consists of, with their final target paths
+        """
+        if is_glob(source):
+            for match in outermost(self._glob_with_pyfs(source_fs, source)):
+                yield match, os.path.join(target, path_after_wildcard(source, match))
+
+            return
+
+        self._raise_if_does_not_exist(source, source_fs)
+        if not source_fs.isdir(source):
+            target = self._append_filename_if_target_is_dir(target_fs, source, target)
+
+        yield source, target
 
     def _copy_single_file(
         self,
@@ -121,28 +463,56 @@ class PyFilesystemBased(Filesystem):
         source: str,
         target_fs: fs.base.FS,
         target: str,
+        copier: NativeCopy,
         overwrite: bool = False,
     ) -> None:
         self._raise_if_does_not_exist(source, source_fs)
         self._raise_if_target_exists(target, overwrite, target_fs)
         self._create_missing_target_dirs(target, target_fs)
-        self._try_copy_to_filesystem(source_fs, source, target_fs, target)
+        self._try_copy_to_filesystem(source_fs, source, target_fs, target, copier)
 
     def _create_missing_target_dirs(self, target: str, target_fs: fs.base.FS) -> None:
         target_parent_dir = os.path.dirname(target)
         if not target_fs.exists(target_parent_dir):
             target_fs.makedirs(target_parent_dir, recreate=True)
 
-    def delete(self, path: str) -> None:
+    def delete(self, path: str, literal: bool = False) -> None:
         fs, norm_path = self._resolve_fs_and_path(path)
-        if is_glob(path):
+        if is_glob(path) and not literal:
             self._delete_glob(norm_path, fs)
             return
         self._delete_path(norm_path, fs)
 
+    def delete_many(self, paths: Sequence[str], detach: bool = False, literal: bool = False) -> List[FileNotFoundError]:
+        root_fs, _ = resolve_root(self.internal_fs, "/")
+        if not isinstance(root_fs, BulkRemovingFS):
+            return super().delete_many(paths, detach, literal)
+
+        errors: List[FileNotFoundError] = []
+        root_paths: List[str] = []
+        for path in paths:
+            fs, norm_path = self._resolve_fs_and_path(path)
+            try:
+                matches = self._paths_to_delete(norm_path, fs, literal)
+            except FileNotFoundError as err:
+                errors.append(err)
+                continue
+
+            root_paths.extend(resolve_root(fs, match)[1] for match in matches)
+
+        root_fs.remove_all(root_paths, detach)
+        return errors
+
+    def _paths_to_delete(self, path: str, fs: fs.base.FS, literal: bool) -> List[str]:
+        if is_glob(path) and not literal:
+            return list(outermost(self._glob_with_pyfs(fs, path)))
+
+        self._raise_if_does_not_exist(path, fs)
+        return [path]
+
     def _delete_glob(self, path: str, fs: fs.base.FS) -> None:
-        glob = self._glob_with_pyfs(fs, path)
-        for match in glob:
+        # The matches are found before deleting, so no deleted directory is searched
+        for match in list(outermost(self._glob_with_pyfs(fs, path))):
             self._delete_path(match, fs)
 
     def _delete_path(self, path: str, _fs: fs.base.FS) -> None:
@@ -168,6 +538,26 @@ class PyFilesystemBased(Filesystem):
         fs, norm_path = self._resolve_fs_and_path(path)
         return fs.exists(norm_path)
 
+    def stat(self, path: str) -> FileStat:
+        fs, norm_path = self._resolve_fs_and_path(path)
+        try:
+            info = fs.getinfo(norm_path, namespaces=["details"])
+        except fserr.ResourceNotFound:
+            raise FileNotFoundError(path)
+
+        modified = info.modified.timestamp() if info.modified else 0.0
+        if info.is_dir:
+            return FileStat(0, modified, is_dir=True)
+
+        return FileStat(info.size, modified)
+
+    def checksum(self, path: str) -> str:
+        fs, norm_path = self._resolve_fs_and_path(path)
+        try:
+            return fs.hash(norm_path, _CHECKSUM_ALGORITHM)
+        except (fserr.ResourceNotFound, fserr.FileExpected):
+            raise FileNotFoundError(path)
+
     def _resolve_fs_and_path(self, path: str) -> tuple[fs.base.FS, str]:
         """
         Returns the correct fs and normalized path for a given path.
@@ -184,13 +574,20 @@ class PyFilesystemBased(Filesystem):
 
         return fs, norm_path
 
-    def _try_copy_to_filesystem(self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> None:
+    def _try_copy_to_filesystem(
+        self,
+        source_fs: fs.base.FS,
+        source: str,
+        target_fs: fs.base.FS,
+        target: str,
+        copier: NativeCopy,
+    ) -> None:
         if source_fs.isdir(source):
-            fscp.copy_dir(source_fs, source, target_fs, target)
+            copier.copy_dir(source_fs, source, target_fs, target)
             return
 
         target = self._append_filename_if_target_is_dir(target_fs, source, target)
-        fscp.copy_file(source_fs, source, target_fs, target)
+        copier.copy_file(source_fs, source, target_fs, target)
 
     def _append_filename_if_target_is_dir(self, fs: fs.base.FS, source: str, target: str) -> str:
         if fs.isdir(target):
@@ -212,3 +609,13 @@ class PyFilesystemBased(Filesystem):
     def _raise_if_no_pyfilesystem(self, filesystem: Optional[Filesystem]) -> None:
         if filesystem and not isinstance(filesystem, PyFilesystemBased):
             raise RuntimeError(f"{str(type(self))} currently only works with PyFilesystem2 based Filesystems")
+
+
+def _find_matches(finding_fs: FindingFS, dir: str, matcher: GlobMatcher) -> Iterator[str]:
+    """
+    Matches the pattern against all entries found below the directory, down to the deepest level it can match
+    """
+    for path, info in finding_fs.find(dir, matcher.max_depth):
+        path = path.lstrip("/")
+        if matcher.match(path, info.is_dir):
+            yield path
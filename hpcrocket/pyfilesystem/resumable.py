@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from typing import List, Optional, TypedDict
+
+import fs.base
+import fs.copy as fscp
+
+from hpcrocket.pyfilesystem.rootfs import resolve_root
+
+
+class TransferState(TypedDict):
+    size: int
+    modified: float
+    chunk_size: int
+    offset: int
+    chunk_digests: List[str]
+
+
+class ResumableTransfer:
+    """
+    Copies large files in chunks to a temporary file next to the target, which is renamed once the copy is complete.
+    The progress is saved to a local state file after every chunk, so an interrupted copy continues
+    where it stopped, even in a later run. Before resuming, the last chunk of the temporary file is checked
+    against its recorded checksum. Files smaller than `min_size` are copied as usual.
+    """
+
+    PART_SUFFIX = ".hpc-rocket-part"
+
+    def __init__(self, state_dir: str, min_size: int = 1024**3, chunk_size: int = 64 * 1024**2) -> None:
+        """
+        Args:
+            state_dir (str): The local directory to save the state of unfinished copies in
+            min_size (int): The minimum size in bytes of files that are copied in chunks
+            chunk_size (int): The size of a chunk in bytes
+        """
+        self._state_dir = state_dir
+        self._min_size = min_size
+        self._chunk_size = chunk_size
+
+    def copy_file(self, source_fs: fs.base.FS, source: str, target_fs: fs.base.FS, target: str) -> None:
+        source_fs, source = resolve_root(source_fs, source)
+        target_fs, target = resolve_root(target_fs, target)
+        info = source_fs.getinfo(source, namespaces=["details"])
+        if info.size < self._min_size:
+            fscp.copy_file(source_fs, source, target_fs, target)
+            return
+
+        modified = info.modified.timestamp() if info.modified else 0.0
+        state_file = self._state_file(source, target)
+        state = self._load_state(state_file, info.size, modified)
+        part = target + self.PART_SUFFIX
+        offset = self._verified_offset(state, target_fs, part)
+        if not offset:
+            state["offset"], state["chunk_digests"] = 0, []
+
+        with source_fs.openbin(source) as src, target_fs.openbin(part, "r+b" if offset else "wb") as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            while chunk := src.read(self._chunk_size):
+                dst.write(chunk)
+                dst.flush()
+                state["offset"] += len(chunk)
+                state["chunk_digests"].append(hashlib.sha256(chunk).hexdigest())
+                self._save_state(state_file, state)
+
+        target_fs.move(part, target, overwrite=True)
+        if os.path.exists(state_file):
+            os.remove(state_file)
+
+    def _state_file(self, source: str, target: str) -> str:
+        key = hashlib.sha256(f"{source}\0{target}".encode()).hexdigest()
+        return os.path.join(self._state_dir, f"{key}.json")
+
+    def _load_state(self, state_file: str, size: int, modified: float) -> TransferState:
+        new_state = TransferState(size=size, modified=modified, chunk_size=self._chunk_size, offset=0, chunk_digests=[])
+        state = _read_state(state_file)
+        if not state:
+            return new_state
+
+        # NOTE:
+        # A changed source or chunk size invalidates all chunks copied so far
+        is_same_transfer = (state["size"], state["modified"], state["chunk_size"]) == (
+            size,
+            modified,
+            self._chunk_size,
+        )
+        return state if is_same_transfer else new_state
+
+    def _verified_offset(self, state: TransferState, target_fs: fs.base.FS, part: str) -> int:
+        offset = state["offset"]
+        if not offset or not state["chunk_digests"] or not target_fs.exists(part):
+            return 0
+
+        part_size = target_fs.getsize(part)
+        if part_size < offset or part_size > state["size"]:
+            return 0
+
+        last_chunk_start = (len(state["chunk_digests"]) - 1) * state["chunk_size"]
+        with target_fs.openbin(part) as file:
+            file.seek(last_chunk_start)
+            last_chunk = file.read(offset - last_chunk_start)
+
+        if hashlib.sha256(last_chunk).hexdigest() != state["chunk_digests"][-1]:
+            return 0
+
+        return offset
+
+    def _save_state(self, state_file: str, state: TransferState) -> None:
+        os.makedirs(self._state_dir, exist_ok=True)
+        tmp_file = state_file + ".tmp"
+        with open(tmp_file, "w") as file:
+            json.dump(state, file)
+
+        os.replace(tmp_file, state_file)
+
+
+def _read_state(state_file: str) -> Optional[TransferState]:
+    try:
+        with open(state_file) as file:
+            state: TransferState = json.load(file)
+            return state
+    except (OSError, ValueError):
+        return None
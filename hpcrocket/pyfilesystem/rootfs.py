@@ -0,0 +1,18 @@
+from typing import Tuple
+
+import fs.base
+import fs.path
+from fs.wrapfs import WrapFS
+
+
+def resolve_root(_fs: fs.base.FS, path: str) -> Tuple[fs.base.FS, str]:
+    """
+    Unwraps sub filesystems, e.g. those opened with `opendir`.
+
+    Returns:
+        tuple[fs.base.FS, str]: The innermost filesystem and the absolute path within it
+    """
+    while isinstance(_fs, WrapFS):
+        _fs, path = _fs.delegate_path(path)
+
+    return _fs, fs.path.abspath(path)
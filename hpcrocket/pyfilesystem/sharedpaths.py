@@ -0,0 +1,61 @@
+import os
+import uuid
+from typing import Dict, Sequence
+
+import fs.base
+import fs.errors
+import fs.path
+
+from hpcrocket.core.launchoptions import SharedPathOptions
+
+_MARKER_PREFIX = ".hpc-rocket-shared-"
+
+
+def verify_shared_paths(remote_fs: fs.base.FS, shared_paths: Sequence[SharedPathOptions], home: str) -> Dict[str, str]:
+    """
+    Checks which remote directories are mounted on the local machine as well.
+    A marker file is written to every remote directory and looked for in its local directory,
+    so a wrong mapping never makes files end up on the wrong machine.
+
+    Args:
+        remote_fs (fs.base.FS): The root filesystem of the remote machine
+        shared_paths (Sequence[SharedPathOptions]): The directories that may be shared
+        home (str): The home directory on the remote machine, which `~` stands for in remote paths
+
+    Returns:
+        Dict[str, str]: The local directory of every remote directory that is shared
+    """
+    shared: Dict[str, str] = {}
+    for shared_path in shared_paths:
+        remote = home + shared_path.remote[1:] if shared_path.remote.startswith("~") else shared_path.remote
+        local = os.path.expanduser(shared_path.local) if shared_path.local else remote
+        if _is_shared(remote_fs, remote, local):
+            shared[remote] = local
+
+    return shared
+
+
+def _is_shared(remote_fs: fs.base.FS, remote: str, local: str) -> bool:
+    token = uuid.uuid4().hex
+    marker = _MARKER_PREFIX + token
+    remote_marker = fs.path.join(remote, marker)
+    try:
+        remote_fs.writetext(remote_marker, token)
+    except fs.errors.FSError:
+        # E.g. the directory does not exist or is not writable
+        return False
+
+    try:
+        with open(os.path.join(local, marker)) as file:
+            return file.read() == token
+    except OSError:
+        return False
+    finally:
+        _remove_quietly(remote_fs, remote_marker)
+
+
+def _remove_quietly(remote_fs: fs.base.FS, path: str) -> None:
+    try:
+        remote_fs.remove(path)
+    except fs.errors.FSError:
+        pass
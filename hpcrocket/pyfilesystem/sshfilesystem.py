@@ -1,9 +1,18 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 import hpcrocket.ssh.chmodsshfs as sshfs
 from fs.errors import CreateFailed
 from hpcrocket.core.filesystem import Filesystem
+from hpcrocket.core.launchoptions import (
+    ContentStoreOptions,
+    ResumableTransferOptions,
+    SFTPOptions,
+    SharedPathOptions,
+)
+from hpcrocket.pyfilesystem.contentstore import ContentStore
 from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.pyfilesystem.resumable import ResumableTransfer
+from hpcrocket.pyfilesystem.sharedpaths import verify_shared_paths
 from hpcrocket.ssh.connectiondata import ConnectionData
 from hpcrocket.ssh.errors import SSHError
 from hpcrocket.ssh.sshexecutor import build_channel_with_proxyjumps
@@ -13,6 +22,10 @@ def sshfilesystem(
     connection_data: ConnectionData,
     proxyjumps: Optional[List[ConnectionData]] = None,
     dir: Optional[str] = None,
+    content_store: Optional[ContentStoreOptions] = None,
+    resumable_transfers: Optional[ResumableTransferOptions] = None,
+    sftp: Optional[SFTPOptions] = None,
+    shared_paths: Sequence[SharedPathOptions] = (),
 ) -> Filesystem:
     """
     A PyFilesystem2 based Filesystem that connects to a remote machine via SSH
@@ -22,7 +35,13 @@ def sshfilesystem(
         host (str): The address of the remote machine
         password (str): The user's password on the remote machine. Alternative to `private_key`.
         private_key (str): The user's private SSH key. Alternative to `password`.
+        content_store (ContentStoreOptions): Upload files through a content-addressed store on the remote machine
+        resumable_transfers (ResumableTransferOptions): Copy large files in resumable chunks
+        sftp (SFTPOptions): The size and number of concurrent SFTP requests per transfer
+        shared_paths (Sequence[SharedPathOptions]): Remote directories that may be mounted on the local machine.
+            Files in the directories that are verified to be shared are copied locally.
     """
+    sftp = sftp or SFTPOptions()
     try:
         channel = build_channel_with_proxyjumps(connection_data, proxyjumps or [])
         fs = sshfs.PermissionChangingSSHFSDecorator(
@@ -32,9 +51,26 @@ def sshfilesystem(
             pkey=connection_data.key or connection_data.keyfile,
             port=connection_data.port,
             sock=channel,
+            request_size=sftp.request_size,
+            max_requests=sftp.max_requests,
         )
 
-        dir = dir or fs.homedir()
-        return PyFilesystemBased(fs, dir, fs.homedir())
+        home = fs.homedir()
+        dir = dir or home
+        if shared_paths:
+            fs.share_paths(verify_shared_paths(fs, shared_paths, home))
+
+        store = _make_content_store(content_store, home) if content_store else None
+        resumable = _make_resumable_transfer(resumable_transfers) if resumable_transfers else None
+        return PyFilesystemBased(fs, dir, home, store, resumable)
     except CreateFailed as err:
         raise SSHError(f"Could not connect to {connection_data.hostname}") from err
+
+
+def _make_content_store(options: ContentStoreOptions, home: str) -> ContentStore:
+    directory = options.directory.replace("~", home, 1)
+    return ContentStore(directory, options.max_size)
+
+
+def _make_resumable_transfer(options: ResumableTransferOptions) -> ResumableTransfer:
+    return ResumableTransfer(options.state_dir, options.min_size, options.chunk_size)
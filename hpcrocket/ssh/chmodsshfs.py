@@ -1,41 +1,221 @@
+import hashlib
+import os
+import shlex
 import stat
+import threading
+from collections import deque
+from contextlib import contextmanager
 from typing import (
     TYPE_CHECKING,
     Any,
     BinaryIO,
+    Callable,
     Collection,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
     Iterator,
     List,
     Mapping,
     Optional,
+    Sequence,
     Text,
     Tuple,
     cast,
 )
 
 import fs.sshfs.sshfs as sshfs
+import paramiko
+from paramiko.sftp import CMD_DATA, CMD_EXTENDED, CMD_FSETSTAT, CMD_READ, CMD_STATUS, SFTPError, int64
 from fs.base import FS
+from fs.enums import ResourceType
+from fs.errors import FileExpected, NoSysPath, ResourceNotFound
+from fs.sshfs.error_tools import convert_sshfs_errors
 from fs.info import Info
+from fs.path import abspath, basename, dirname, join, normpath, relpath
 from fs.permissions import Permissions
 from fs.subfs import SubFS
 
+from hpcrocket.core.filesystem.buffers import preallocate
+from hpcrocket.ssh.statcache import StatCache
+
 if TYPE_CHECKING:
     from fs.base import _OpendirFactory
 
 
+_REMOTE_HASH_COMMANDS = {
+    "md5": "md5sum",
+    "sha1": "sha1sum",
+    "sha256": "sha256sum",
+    "sha512": "sha512sum",
+    "blake2b": "b2sum",
+}
+
+_TAR_COMPRESSION_FLAGS = {None: "", "gzip": "-z", "zstd": "-I zstd"}
+
+_CACHED_NAMESPACES = {"basic", "details"}
+
+_FIND_RESOURCE_TYPES = {
+    "b": ResourceType.block_special_file,
+    "c": ResourceType.character,
+    "d": ResourceType.directory,
+    "f": ResourceType.file,
+    "l": ResourceType.symlink,
+    "p": ResourceType.fifo,
+    "s": ResourceType.socket,
+}
+
+
+class _SSHFSChannel(sshfs.SSHFS):
+    """
+    An SSHFS with its own SFTP session on the SSH client of another SSHFS.
+    Closing it only closes its session, the client stays open for the other filesystem.
+    """
+
+    def close(self) -> None:
+        if not self.isclosed():
+            self._sftp.close()
+
+        FS.close(self)
+
+
+class _RequestCounter:
+    """
+    Counts the SFTP requests and commands a filesystem and its channels sent to the remote machine.
+    The counter is thread safe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+    def add(self) -> None:
+        with self._lock:
+            self._count += 1
+
+    def count_sftp_requests(self, sftp: paramiko.SFTPClient) -> None:
+        # NOTE:
+        # Paramiko sends every SFTP request through `_async_request`, including the ones that wait for a response.
+        # The method is looked up on every call, so it can still be replaced on the class afterwards.
+        def async_request(*args: Any) -> Any:
+            self.add()
+            return type(sftp)._async_request(sftp, *args)  # type: ignore[attr-defined]
+
+        setattr(sftp, "_async_request", async_request)
+
+    def count_commands(self, client: paramiko.SSHClient) -> None:
+        def exec_command(*args: Any, **kwargs: Any) -> Any:
+            self.add()
+            return type(client).exec_command(client, *args, **kwargs)
+
+        setattr(client, "exec_command", exec_command)
+
+
 class PermissionChangingSSHFSDecorator(FS):
     """
-    A subclass of SSHFS that changes the permissions of the remote file after upload.
+    A subclass of SSHFS that keeps the permissions of uploaded files.
+    Transfers are pipelined: up to `max_requests` SFTP read or write requests of `request_size` bytes
+    are in flight at the same time, so transfers do not wait a full round trip for every request.
+    The basic and detail infos of paths are cached, and paths changed through this filesystem are invalidated.
+    While `recording_digests` is active, every transferred file is hashed with BLAKE2b as its bytes stream.
+    Every SFTP request and command sent to the remote machine is counted, see `request_count`.
     """
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    def __init__(self, *args: Any, request_size: int = 32768, max_requests: int = 64, **kwargs: Any) -> None:
+        """
+        Args:
+            request_size (int): The size in bytes of a single SFTP read or write request
+            max_requests (int): The maximum number of unacknowledged requests per transfer
+        """
         super().__init__()
-        self._internal_fs: FS = sshfs.SSHFS(*args, **kwargs)  # type: ignore
+        internal_sshfs = sshfs.SSHFS(*args, **kwargs)  # type: ignore
+        self._internal_fs: FS = internal_sshfs
+        self._request_size = request_size
+        self._max_requests = max_requests
+        self._stat_cache = StatCache()
+        self._shared_paths: Dict[str, str] = {}
+        self._digests: Optional[Dict[str, str]] = None
+        self._requests = _RequestCounter()
+        self._requests.count_sftp_requests(internal_sshfs._sftp)
+        self._requests.count_commands(internal_sshfs._client)
+
+    @property
+    def request_count(self) -> int:
+        """The number of SFTP requests and commands this filesystem and its channels sent so far"""
+        return self._requests.count
 
     def homedir(self) -> Text:
         internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
         return internal_sshfs._sftp.normalize(".")
 
+    def open_channel(self) -> "PermissionChangingSSHFSDecorator":
+        """
+        Returns a decorator with its own SFTP session on the same SSH transport.
+        The returned filesystem can transfer files concurrently with this one.
+        It must be closed once it is no longer needed, which only closes its SFTP session.
+        """
+        channel = PermissionChangingSSHFSDecorator.__new__(PermissionChangingSSHFSDecorator)
+        FS.__init__(channel)
+
+        # NOTE:
+        # The copy shares the SSH client with this filesystem, so closing the copy must not close the client.
+        # It gets its own lock and SFTP session so it does not wait on transfers of this filesystem.
+        internal_sshfs = _SSHFSChannel.__new__(_SSHFSChannel)
+        internal_sshfs.__dict__.update(self._internal_fs.__dict__)
+        internal_sshfs._lock = threading.RLock()
+        internal_sshfs._sftp = internal_sshfs._client.open_sftp()
+        self._requests.count_sftp_requests(internal_sshfs._sftp)
+        channel._internal_fs = internal_sshfs
+        channel._request_size = self._request_size
+        channel._max_requests = self._max_requests
+        channel._stat_cache = self._stat_cache
+        channel._shared_paths = self._shared_paths
+        channel._digests = None
+        channel._requests = self._requests
+        return channel
+
+    def close(self) -> None:
+        if isinstance(self._internal_fs, _SSHFSChannel):
+            # Servers limit the number of sessions per connection, so every opened channel must be closed again
+            self._internal_fs.close()
+
+        super().close()
+
+    def share_paths(self, shared_paths: Mapping[str, str]) -> None:
+        """
+        Declares remote directories that are mounted on the local machine as well.
+        Files in these directories have a local path, so they are copied on the local machine instead of over SFTP.
+
+        Args:
+            shared_paths (Mapping[str, str]): The local directory of every shared remote directory
+        """
+        # Nested directories are resolved by the longest matching remote directory
+        normalized = {abspath(normpath(remote)): local for remote, local in shared_paths.items()}
+        self._shared_paths = dict(sorted(normalized.items(), key=lambda item: len(item[0]), reverse=True))
+
+    def getsyspath(self, path: Text) -> Text:
+        """
+        Returns the local path of a file in a shared directory (see `share_paths`).
+        The file may be changed on the local machine afterwards, so its cached info is forgotten.
+
+        Raises:
+            NoSysPath: The file is not in a shared directory
+        """
+        path = abspath(normpath(path))
+        for remote, local in self._shared_paths.items():
+            if path == remote or path.startswith(remote.rstrip("/") + "/"):
+                self._stat_cache.invalidate([path])
+                relative = relpath(path[len(remote) :])
+                return os.path.join(local, relative) if relative else local
+
+        raise NoSysPath(path=path)
+
     def upload(
         self,
         path: str,
@@ -43,18 +223,45 @@ class PermissionChangingSSHFSDecorator(FS):
         chunk_size: Optional[int] = None,
         **options: Any
     ) -> None:
-        self._internal_fs.upload(path, file, **options)
+        """
+        Uploads the file with the permissions given as `permissions` option or the permissions of the local file.
+        The permissions are set while the file is written, so they do not cost an extra round trip.
+        """
         internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
-        internal_sshfs._sftp.chmod(
-            path,
-            stat.ST_MODE
-            | stat.S_IRUSR
-            | stat.S_IWUSR
-            | stat.S_IXUSR
-            | stat.S_IREAD
-            | stat.S_IWRITE
-            | stat.S_IEXEC,
-        )
+        sftp: paramiko.SFTPClient = internal_sshfs._sftp
+        _path = internal_sshfs.validatepath(path)
+        permissions = options.get("permissions", _local_permissions(file))
+        hasher = hashlib.blake2b() if self._digests is not None else None
+        with internal_sshfs._lock, _converted_errors("upload", path), self._invalidating(path):
+            remote_file = self._open_for_upload(sftp, _path)
+            with remote_file:
+                remote_file.set_pipelined(True)
+                remote_file.MAX_REQUEST_SIZE = self._request_size
+                if permissions is not None:
+                    _set_permissions_pipelined(remote_file, permissions)
+
+                while data := file.read(self._request_size):
+                    remote_file.write(data)
+                    if hasher:
+                        hasher.update(data)
+
+                    self._wait_for_acknowledgements(remote_file, self._max_requests - 1)
+
+                # NOTE:
+                # paramiko ignores errors of pipelined requests that are still pending when the file is closed
+                self._wait_for_acknowledgements(remote_file, 0)
+
+        self._record_digest(_path, hasher)
+
+    def _open_for_upload(self, sftp: paramiko.SFTPClient, path: str) -> paramiko.SFTPFile:
+        try:
+            return sftp.open(path, "wb", bufsize=0)
+        except IOError:
+            # Checking afterwards saves a round trip for every successful upload
+            if self._internal_fs.isdir(path):
+                raise FileExpected(path)
+
+            raise
 
     def download(
         self,
@@ -63,7 +270,298 @@ class PermissionChangingSSHFSDecorator(FS):
         chunk_size: Optional[int] = None,
         **options: Any
     ) -> None:
-        self._internal_fs.download(path, file, chunk_size, **options)
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        sftp: paramiko.SFTPClient = internal_sshfs._sftp
+        _path = internal_sshfs.validatepath(path)
+        with internal_sshfs._lock, _converted_errors("download", path):
+            attributes = sftp.stat(_path)
+            if stat.S_ISDIR(attributes.st_mode or 0):
+                raise FileExpected(path)
+
+            size = attributes.st_size or 0
+            preallocated = preallocate(file, size)
+            hasher = hashlib.blake2b() if self._digests is not None else None
+            try:
+                with sftp.open(_path, "rb") as remote_file:
+                    for data in _read_ahead(remote_file, size, self._request_size, self._max_requests):
+                        file.write(data)
+                        if hasher:
+                            hasher.update(data)
+            finally:
+                if preallocated:
+                    # Less data is written if the download fails or the remote file is truncated while it is read
+                    file.truncate()
+
+        self._record_digest(_path, hasher)
+
+    @contextmanager
+    def recording_digests(self) -> Iterator[Dict[str, str]]:
+        """
+        Records the BLAKE2b digest of the bytes of every file that is uploaded or downloaded through this filesystem
+        while the context is active. The digests are computed while the bytes are transferred,
+        so the files are not read a second time.
+
+        Returns:
+            Iterator[Dict[str, str]]: The digests of the transferred files by their remote path,
+                filled while files are transferred
+        """
+        digests: Dict[str, str] = {}
+        self._digests = digests
+        try:
+            yield digests
+        finally:
+            self._digests = None
+
+    def _record_digest(self, path: str, hasher: Optional["hashlib.blake2b"]) -> None:
+        if hasher and self._digests is not None:
+            self._digests[path] = hasher.hexdigest()
+
+    def _wait_for_acknowledgements(self, remote_file: paramiko.SFTPFile, max_pending: int) -> None:
+        # NOTE:
+        # paramiko only collects the acknowledgements of pipelined requests once more than 100 are pending,
+        # and only if a response has already arrived. This keeps the number of pending requests bounded.
+        pending = remote_file._reqs  # type: ignore[attr-defined]
+        while len(pending) > max_pending:
+            response_type, _ = remote_file.sftp._read_response(pending.popleft())  # type: ignore[attr-defined]
+            if response_type != CMD_STATUS:
+                raise SFTPError("Expected status")
+
+    def hash(self, path: Text, name: Text) -> Text:
+        """
+        Computes the hash on the remote machine if a matching command is available,
+        so the file does not need to be downloaded. Hashes are cached until the file is changed.
+        """
+        cached = self._stat_cache.getdigest(path, name)
+        if cached:
+            return cached
+
+        command = _REMOTE_HASH_COMMANDS.get(name)
+        digest = None
+        if command and self.isfile(path):
+            output = self._exec_command(f"{command} {shlex.quote(path)}")
+            if output:
+                digest = output.split()[0].decode()
+
+        digest = digest or self._internal_fs.hash(path, name)
+        self._stat_cache.setdigest(path, name, digest)
+        return digest
+
+    def hash_many(self, paths: Sequence[str], name: Text) -> Dict[str, str]:
+        """
+        Computes the hashes of many files with as few commands on the remote machine as possible.
+        Files the command could not hash, e.g. because it is not available, are hashed one by one with `hash`.
+
+        Returns:
+            Dict[str, str]: The hex digest of every file by its path. Files that do not exist are left out.
+        """
+        digests: Dict[str, str] = {}
+        command = _REMOTE_HASH_COMMANDS.get(name)
+        if command:
+            client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+            for batch in _command_batches(f"{command} --", paths):
+                # Missing files only fail their own line, so the output is read whatever the exit status
+                _, stdout, _ = client.exec_command(batch)
+                digests.update(_parse_hash_output(stdout.read()))
+
+        for path in paths:
+            if path in digests:
+                self._stat_cache.setdigest(path, name, digests[path])
+                continue
+
+            try:
+                digests[path] = self.hash(path, name)
+            except (ResourceNotFound, FileExpected):
+                pass
+
+        return digests
+
+    def hardlink(self, src_path: Text, dst_path: Text) -> None:
+        """
+        Creates a hard link using the hardlink@openssh.com SFTP extension.
+
+        Raises:
+            OSError: The server does not support the extension or the link could not be created
+        """
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        sftp: paramiko.SFTPClient = internal_sshfs._sftp
+        with self._invalidating(dst_path):
+            sftp._request(CMD_EXTENDED, "hardlink@openssh.com", src_path, dst_path)  # type: ignore[attr-defined]
+
+    def symlink(self, src_path: Text, dst_path: Text) -> None:
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        sftp: paramiko.SFTPClient = internal_sshfs._sftp
+        with self._invalidating(dst_path):
+            sftp.symlink(src_path, dst_path)
+
+    def readlink(self, path: Text) -> Text:
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        sftp: paramiko.SFTPClient = internal_sshfs._sftp
+        with _converted_errors("readlink", path):
+            return sftp.readlink(path) or ""
+
+    def set_permissions(self, paths: Sequence[str], permissions: int) -> None:
+        """
+        Sets the permissions of many files with as few `chmod` calls on the remote machine as possible.
+
+        Raises:
+            OSError: The permissions could not be changed
+        """
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        with self._invalidating(*paths):
+            for batch in _command_batches(f"chmod {permissions:o} --", paths):
+                _, stdout, stderr = client.exec_command(batch)
+                _raise_if_command_failed(batch, stdout, stderr)
+
+    def remove_all(self, paths: Sequence[str], detach: bool = False) -> None:
+        """
+        Removes files and directories with their contents using as few `rm -rf` calls as possible.
+        Links are removed without touching their targets.
+
+        Args:
+            paths (Sequence[str]): The paths to remove
+            detach (bool): Run `rm` in the background on the remote machine and return immediately
+
+        Raises:
+            OSError: The paths could not be removed
+        """
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        with self._invalidating(*paths):
+            for batch in _command_batches("rm -rf --", paths):
+                if detach:
+                    batch = f"nohup {batch} </dev/null >/dev/null 2>&1 &"
+
+                _, stdout, stderr = client.exec_command(batch)
+                _raise_if_command_failed(batch, stdout, stderr)
+
+        for path in paths:
+            self._stat_cache.set_missing(path)
+
+    def copy_on_host(self, files: Sequence[Tuple[str, str]], method: str = "copy") -> None:
+        """
+        Copies files and directories on the remote machine with as few commands as possible,
+        so their contents never leave it. A directory is copied into its target like `fs.copy.copy_dir` does.
+        Existing targets are replaced instead of written to, so files that are linked to them stay unchanged.
+
+        Args:
+            files (Sequence[Tuple[str, str]]): Pairs of source and target paths
+            method (str): "copy" uses `cp --reflink=auto`, "link" creates hard links with `cp --link`
+                and "rsync" only copies changed files with `rsync -a`
+
+        Raises:
+            OSError: The files could not be copied
+        """
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        targets = [target for _, target in files]
+        parents = sorted({dirname(target) for target in targets})
+        commands = [f"mkdir -p -- {' '.join(map(shlex.quote, parents))}"]
+        commands.extend(_host_copy_command(method, source, target, self.isdir(source)) for source, target in files)
+        with self._invalidating(*parents, *targets):
+            for batch in _chained_batches(commands):
+                _, stdout, stderr = client.exec_command(batch)
+                _raise_if_command_failed(batch, stdout, stderr)
+
+    def find(self, path: Text, max_depth: Optional[int] = None) -> Iterator[Tuple[str, Info]]:
+        """
+        Lists all entries below a directory with a single `find` on the remote machine.
+        Entries are yielded while `find` is still running. Links are not followed. The infos of the entries are cached.
+
+        Args:
+            path (str): The directory to search
+            max_depth (Optional[int]): The maximum depth of entries below the directory
+
+        Returns:
+            Iterator[Tuple[str, Info]]: The paths relative to the directory and their infos
+
+        Raises:
+            OSError: The directory could not be searched
+        """
+        root = cast(sshfs.SSHFS, self._internal_fs).validatepath(path)
+        depth_option = "" if max_depth is None else f" -maxdepth {max_depth}"
+        command = f"find {shlex.quote(root)} -mindepth 1{depth_option} -printf '%y %s %T@ %P\\0'"
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        _, stdout, stderr = client.exec_command(command)
+        complete_directories = [root]
+        try:
+            with self._stat_cache.scan() as scan:
+                for relative, info in _parse_find_output(stdout.channel.recv):
+                    scan.add(join(root, relative), info)
+                    if info.is_dir and (max_depth is None or _depth(relative) < max_depth):
+                        complete_directories.append(join(root, relative))
+
+                    yield "/" + relative, info
+
+                _raise_if_command_failed(command, stdout, stderr)
+                scan.add_listed(complete_directories)
+        finally:
+            stdout.channel.close()
+
+    @contextmanager
+    def extract_archive(self, compression: Optional[str] = None) -> Iterator[BinaryIO]:
+        """
+        Yields a stream that is piped into `tar -x` on the remote machine.
+        Member names are relative to the root directory.
+
+        Raises:
+            OSError: The archive could not be extracted
+        """
+        command = f"tar -x {_TAR_COMPRESSION_FLAGS[compression]} -f - -C /"
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        stdin, stdout, stderr = client.exec_command(command)
+        # The archive may contain any path
+        with self._invalidating("/"):
+            try:
+                yield cast(BinaryIO, stdin)
+            except BaseException:
+                stdin.channel.close()
+                raise
+
+            stdin.channel.shutdown_write()
+            _raise_if_command_failed(command, stdout, stderr)
+
+    @contextmanager
+    def create_archive(self, paths: List[str], compression: Optional[str] = None) -> Iterator[BinaryIO]:
+        """
+        Yields the output of `tar -c` for the given absolute paths on the remote machine.
+        Member names are relative to the root directory.
+
+        Raises:
+            OSError: The archive could not be created
+        """
+        command = f"tar -c {_TAR_COMPRESSION_FLAGS[compression]} -f - -C / --null -T -"
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        stdin, stdout, stderr = client.exec_command(command)
+
+        # NOTE:
+        # The file list is written from another thread, because tar starts writing
+        # the archive before it has read all names. Writing all names first could block forever.
+        names = (path.lstrip("/").encode() + b"\0" for path in paths)
+        writer = threading.Thread(target=_write_and_close, args=(stdin, names), daemon=True)
+        writer.start()
+        try:
+            yield cast(BinaryIO, stdout)
+        except BaseException:
+            stdout.channel.close()
+            raise
+        finally:
+            writer.join()
+
+        stdout.read()
+        _raise_if_command_failed(command, stdout, stderr)
+
+    def _exec_command(self, command: str) -> Optional[bytes]:
+        """
+        Runs a command on the remote machine.
+
+        Returns:
+            bytes: The command's output or None if the command failed
+        """
+        client: paramiko.SSHClient = cast(sshfs.SSHFS, self._internal_fs)._client
+        _, stdout, _ = client.exec_command(command)
+        output = stdout.read().strip()
+        if stdout.channel.recv_exit_status() != 0:
+            return None
+
+        return output
 
     def listdir(self, path: Text) -> List[Text]:
         return self._internal_fs.listdir(path)
@@ -71,26 +569,96 @@ class PermissionChangingSSHFSDecorator(FS):
     def openbin(
         self, path: Text, mode: Text = "r", buffering: int = -1, **options: Any
     ) -> BinaryIO:
-        return self._internal_fs.openbin(path, mode, buffering, **options)
+        if set(mode) & set("wax+"):
+            # NOTE:
+            # Infos loaded while the file is open may be outdated once it is closed.
+            # Writes through open files are rare, so this is accepted.
+            self._stat_cache.invalidate([path])
+
+        file = self._internal_fs.openbin(path, mode, buffering, **{**options, "prefetch": False})
+        remote_file: paramiko.SFTPFile = file._f  # type: ignore[attr-defined]
+        remote_file.MAX_REQUEST_SIZE = self._request_size
+        if options.get("prefetch", True) and "r" in mode and "+" not in mode:
+            # NOTE:
+            # paramiko's prefetch with a limited number of requests ends too early,
+            # so files opened for reading prefetch their whole content like SSHFS does
+            remote_file.prefetch(self._internal_fs.getsize(path))
+
+        return file
 
     def opendir(
         self, path: Text, factory: Optional["_OpendirFactory[FS]"] = None
     ) -> SubFS[FS]:
-        return self._internal_fs.opendir(path, factory)
+        # NOTE:
+        # The sub filesystem must wrap this decorator instead of the internal SSHFS,
+        # otherwise transfers through it would bypass the methods of this class
+        return super().opendir(path, factory)
 
     def remove(self, path: Text) -> None:
-        self._internal_fs.remove(path)
+        # The type check uses the cache instead of the stat request of SSHFS
+        if self.getinfo(path).is_dir:
+            raise FileExpected(path)
+
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        with internal_sshfs._lock, _converted_errors("remove", path):
+            internal_sshfs._sftp.remove(internal_sshfs.validatepath(path))
+
+        self._stat_cache.set_missing(path)
 
     def removedir(self, path: Text) -> None:
         self._internal_fs.removedir(path)
+        self._stat_cache.set_missing(path)
 
     def getinfo(
         self, path: Text, namespaces: Optional[Collection[Text]] = None
     ) -> Info:
-        return self._internal_fs.getinfo(path, namespaces=namespaces)
+        if not set(namespaces or ()) <= _CACHED_NAMESPACES:
+            return self._internal_fs.getinfo(path, namespaces=namespaces)
+
+        info = self._stat_cache.getinfo(path, self._load_info, self._list_directory)
+        if info is None:
+            raise ResourceNotFound(path)
+
+        return info
+
+    def _load_info(self, path: str) -> Optional[Info]:
+        try:
+            return self._internal_fs.getinfo(path, namespaces=["details"])
+        except ResourceNotFound:
+            return None
+
+    def _list_directory(self, path: str) -> Optional[List[Info]]:
+        internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+        try:
+            with _converted_errors("scandir", path):
+                listing = internal_sshfs._sftp.listdir_attr(internal_sshfs.validatepath(path))
+        except ResourceNotFound:
+            # SFTP servers do not tell missing directories and files apart. Neither has entries.
+            return None
+
+        make_info = internal_sshfs._make_raw_info
+        return [Info(make_info(attributes.filename, attributes, ["details"])) for attributes in listing]  # type: ignore
+
+    def clear_cache(self) -> None:
+        """
+        Forgets the cached metadata of all remote files, so changes made by others become visible.
+        The cache is shared by all channels.
+        """
+        self._stat_cache.clear()
+
+    @contextmanager
+    def _invalidating(self, *paths: str) -> Iterator[None]:
+        """
+        Invalidates the cached infos of the paths after the paths were changed, even if the change failed
+        """
+        try:
+            yield
+        finally:
+            self._stat_cache.invalidate(paths)
 
     def setinfo(self, path: Text, info: Mapping[str, Mapping[str, object]]) -> None:
-        self._internal_fs.setinfo(path, info)
+        with self._invalidating(path):
+            self._internal_fs.setinfo(path, info)
 
     def geturl(self, path: Text, purpose: Text = "download") -> Text:
         return self._internal_fs.geturl(path, purpose)
@@ -104,15 +672,24 @@ class PermissionChangingSSHFSDecorator(FS):
         namespaces: Optional[Collection[Text]] = None,
         page: Optional[Tuple[int, int]] = None,
     ) -> Iterator[Info]:
+        if page is None and set(namespaces or ()) <= _CACHED_NAMESPACES:
+            return iter(self._stat_cache.scandir(path, self._list_existing_directory))
+
         return self._internal_fs.scandir(path, namespaces, page)
 
+    def _list_existing_directory(self, path: str) -> List[Info]:
+        return list(self._internal_fs.scandir(path, namespaces=["details"]))
+
     def makedir(
         self,
         path: Text,
         permissions: Optional[Permissions] = None,
         recreate: bool = False,
     ) -> SubFS[FS]:
-        return self._internal_fs.makedir(path, permissions, recreate)
+        with self._invalidating(path):
+            self._internal_fs.makedir(path, permissions, recreate)
+
+        return SubFS(self, path)
 
     def move(
         self,
@@ -121,4 +698,203 @@ class PermissionChangingSSHFSDecorator(FS):
         overwrite: bool = False,
         preserve_time: bool = False,
     ) -> None:
-        self._internal_fs.move(src_path, dst_path, overwrite)
+        with self._invalidating(dst_path):
+            if overwrite and self.isfile(src_path):
+                # NOTE:
+                # posix-rename@openssh.com replaces the target atomically,
+                # while the generic move removes the target before renaming
+                internal_sshfs = cast(sshfs.SSHFS, self._internal_fs)
+                sftp: paramiko.SFTPClient = internal_sshfs._sftp
+                sftp.posix_rename(src_path, dst_path)
+            else:
+                self._internal_fs.move(src_path, dst_path, overwrite)
+
+        self._stat_cache.set_missing(src_path)
+
+
+class _ReadResponses:
+    """
+    Collects the responses to read requests that arrive while waiting for an earlier one
+    """
+
+    def __init__(self) -> None:
+        self.responses: Dict[int, Tuple[int, paramiko.Message]] = {}
+
+    def _async_response(self, response_type: int, msg: paramiko.Message, num: int) -> None:
+        self.responses[num] = (response_type, msg)
+
+
+def _read_ahead(remote_file: paramiko.SFTPFile, size: int, request_size: int, max_requests: int) -> Iterator[bytes]:
+    """
+    Reads a file in order with up to `max_requests` read requests of `request_size` bytes in flight.
+    """
+    sftp = remote_file.sftp
+    collector = _ReadResponses()
+    pending: Deque[Tuple[int, int, int]] = deque()
+    offset = 0
+    while offset < size or pending:
+        while offset < size and len(pending) < max_requests:
+            length = min(request_size, size - offset)
+            num = sftp._async_request(collector, CMD_READ, remote_file.handle, int64(offset), length)  # type: ignore
+            pending.append((num, offset, length))
+            offset += length
+
+        num, chunk_offset, length = pending.popleft()
+        try:
+            response = collector.responses.pop(num, None) or sftp._read_response(num)  # type: ignore[attr-defined]
+            response_type, msg = response
+            if response_type == CMD_STATUS:
+                sftp._convert_status(msg)  # type: ignore[attr-defined]
+        except EOFError:
+            # The file was truncated after it was opened
+            return
+
+        if response_type != CMD_DATA:
+            raise SFTPError("Expected data")
+
+        data: bytes = msg.get_string()
+        if len(data) < length:
+            # NOTE:
+            # Servers may send less data than requested, so the rest is read synchronously
+            remote_file.seek(chunk_offset + len(data))
+            data += remote_file.read(length - len(data))
+
+        yield data
+
+
+def _parse_hash_output(output: bytes) -> Iterator[Tuple[str, str]]:
+    """
+    Parses lines of the form `<digest>  <path>` written by the coreutils hash commands.
+    Paths with a newline or backslash are escaped and their line starts with a backslash.
+    """
+    for line in output.decode(errors="surrogateescape").split("\n"):
+        digest, separator, path = line.partition("  ")
+        if not separator:
+            continue
+
+        if digest.startswith("\\"):
+            digest = digest[1:]
+            path = path.replace("\\\\", "\0").replace("\\n", "\n").replace("\0", "\\")
+
+        yield path, digest
+
+
+def _parse_find_output(read: Callable[[int], bytes]) -> Iterator[Tuple[str, Info]]:
+    """
+    Parses entries of the form `<type> <size> <modification time> <relative path>`, separated by null bytes,
+    as soon as they are read
+    """
+    remainder = b""
+    while chunk := read(65536):
+        *entries, remainder = (remainder + chunk).split(b"\0")
+        for entry in entries:
+            yield _parse_find_entry(entry)
+
+
+def _parse_find_entry(entry: bytes) -> Tuple[str, Info]:
+    type_letter, size, modified, relative = entry.decode(errors="surrogateescape").split(" ", 3)
+    resource_type = _FIND_RESOURCE_TYPES.get(type_letter, ResourceType.unknown)
+    raw_info: Dict[str, Dict[str, object]] = {
+        "basic": {"name": basename(relative), "is_dir": resource_type == ResourceType.directory},
+        "details": {"type": int(resource_type), "size": int(size), "modified": float(modified)},
+    }
+    return relative, Info(raw_info)
+
+
+def _depth(relative_path: str) -> int:
+    return relative_path.count("/") + 1
+
+
+def _local_permissions(file: BinaryIO) -> Optional[int]:
+    try:
+        return stat.S_IMODE(os.fstat(file.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _set_permissions_pipelined(remote_file: paramiko.SFTPFile, permissions: int) -> None:
+    """
+    Sends a request to change the permissions of an open file without waiting for the response.
+    The response is checked together with the responses to the file's writes.
+    """
+    attributes = paramiko.SFTPAttributes()
+    attributes.st_mode = permissions
+    num = remote_file.sftp._async_request(type(None), CMD_FSETSTAT, remote_file.handle, attributes)  # type: ignore
+    remote_file._reqs.append(num)  # type: ignore[attr-defined]
+
+
+def _converted_errors(operation: str, path: str) -> ContextManager[object]:
+    """
+    Converts OSErrors raised by paramiko into FSErrors, like SSHFS does
+    """
+    return cast(ContextManager[object], convert_sshfs_errors(operation, path))  # type: ignore[no-untyped-call]
+
+
+_MAX_COMMAND_LENGTH = 64 * 1024
+
+
+def _command_batches(command: str, paths: Sequence[str]) -> Iterator[str]:
+    """
+    Splits the paths into commands that stay below the maximum command line length of the remote machine.
+    """
+    batch = command
+    for path in paths:
+        argument = " " + shlex.quote(path)
+        if len(batch) + len(argument) > _MAX_COMMAND_LENGTH and batch != command:
+            yield batch
+            batch = command
+
+        batch += argument
+
+    if batch != command:
+        yield batch
+
+
+_HOST_COPY_COMMANDS = {
+    "copy": "cp -R -T --reflink=auto --remove-destination --",
+    "link": "cp -R -T --link --remove-destination --",
+    "rsync": "rsync -a --",
+}
+
+
+def _host_copy_command(method: str, source: str, target: str, is_dir: bool) -> str:
+    if method not in _HOST_COPY_COMMANDS:
+        raise ValueError(f"Unknown copy method '{method}'")
+
+    if method == "rsync" and is_dir:
+        # rsync copies the contents of a directory if its path ends with a slash
+        source = source.rstrip("/") + "/"
+
+    return f"{_HOST_COPY_COMMANDS[method]} {shlex.quote(source)} {shlex.quote(target)}"
+
+
+def _chained_batches(commands: Sequence[str]) -> Iterator[str]:
+    """
+    Chains the commands with `&&` into batches that stay below the maximum command line length of the remote machine.
+    """
+    batch = ""
+    for command in commands:
+        if batch and len(batch) + len(command) + 4 > _MAX_COMMAND_LENGTH:
+            yield batch
+            batch = ""
+
+        batch = f"{batch} && {command}" if batch else command
+
+    if batch:
+        yield batch
+
+
+def _write_and_close(stdin: paramiko.ChannelFile, lines: Iterable[bytes]) -> None:
+    try:
+        for line in lines:
+            stdin.write(line)
+    except OSError:
+        # The reading side already reports why the command stopped
+        pass
+    finally:
+        stdin.channel.shutdown_write()
+
+
+def _raise_if_command_failed(command: str, stdout: paramiko.ChannelFile, stderr: paramiko.ChannelFile) -> None:
+    if stdout.channel.recv_exit_status() != 0:
+        raise OSError(f"Remote command '{command}' failed: {stderr.read().decode(errors='replace').strip()}")
@@ -1,5 +1,5 @@
 from socket import socket
-from typing import List, Optional, cast
+from typing import Iterator, List, Optional, cast
 
 import paramiko as pm
 import paramiko.channel as channel
@@ -40,6 +40,13 @@ class RemoteCommand(RunningCommand):
     def stderr(self) -> List[str]:
         return self._stderr_lines
 
+    def iter_stdout(self) -> Iterator[str]:
+        return iter(self._stdout)
+
+    def stop(self) -> None:
+        # Closing the channel ends commands that would run forever, like tail -F
+        self._stdout.channel.close()
+
 
 class SSHExecutor(CommandExecutor):
     def __init__(
@@ -0,0 +1,311 @@
+import threading
+from contextlib import contextmanager
+from itertools import count
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fs.enums import ResourceType
+from fs.errors import FSError
+from fs.info import Info
+from fs.path import abspath, basename, dirname, join, normpath, split
+
+InfoLoader = Callable[[str], Optional[Info]]
+"""Returns the info of a path or None if the path does not exist"""
+
+DirectoryLister = Callable[[str], Optional[List[Info]]]
+"""
+Returns the infos of a directory's entries or None if the path is not a directory.
+Raises an FSError if the directory cannot be listed.
+"""
+
+
+class _Directory:
+    """
+    The cached entries of a single directory, by name
+    """
+
+    def __init__(self) -> None:
+        self.infos: Dict[str, Optional[Info]] = {}
+        self.unknown: Set[str] = set()
+        self.digests: Dict[str, Dict[str, str]] = {}
+        self.listed = False
+        self.unlistable = False
+        self.subdirectories: Set[str] = set()
+        """The names of the entries that have cached entries of their own"""
+
+
+class StatCache:
+    """
+    Caches the metadata of remote paths for the lifetime of a filesystem.
+    The first lookup of a path lists its parent directory, so lookups of its siblings need no further request.
+    Digests of file contents are cached alongside, until the file is invalidated.
+    Paths that are changed through the filesystem must be invalidated.
+    The cache is thread safe, so it can be shared by all channels to the same remote machine.
+
+    Entries are kept by their parent directory, so invalidating a path only touches its directory
+    and the cached directories below it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._directories: Dict[str, _Directory] = {}
+        self._loads: Dict[int, Set[str]] = {}
+        self._tokens = count()
+
+    def getinfo(self, path: str, load_info: InfoLoader, list_dir: DirectoryLister) -> Optional[Info]:
+        """
+        Returns the cached info of a path and loads it on a cache miss.
+
+        Args:
+            path (str): The path to look up
+            load_info (InfoLoader): Loads the info of a single path
+            list_dir (DirectoryLister): Loads the infos of all entries of a directory
+
+        Returns:
+            Optional[Info]: The info of the path or None if it does not exist
+        """
+        path = _normalized(path)
+        parent, name = split(path)
+        with self._lock:
+            found, info = self._lookup(path)
+            directory = self._directories.get(parent)
+            should_list = path != "/" and not (directory and (name in directory.unknown or directory.unlistable))
+
+        if found:
+            return info
+
+        if should_list:
+            with self._loading() as changed:
+                try:
+                    entries = list_dir(parent) or []
+                except FSError:
+                    entries = None
+
+            with self._lock:
+                if entries is None:
+                    self._directory(parent).unlistable = True
+                else:
+                    self._store_listing(parent, entries, changed)
+
+                found, info = self._lookup(path)
+
+            if found:
+                return info
+
+        with self._loading() as changed:
+            info = load_info(path)
+
+        with self._lock:
+            self._store(path, info, changed)
+
+        return info
+
+    def scandir(self, path: str, list_dir: Callable[[str], List[Info]]) -> List[Info]:
+        """
+        Lists a directory and caches the infos of its entries.
+
+        Returns:
+            List[Info]: The infos of the directory's entries
+        """
+        with self._loading() as changed:
+            entries = list_dir(path)
+
+        with self._lock:
+            self._store_listing(_normalized(path), entries, changed)
+
+        return entries
+
+    @contextmanager
+    def scan(self) -> Iterator["TreeScan"]:
+        """
+        Caches the entries of a directory tree while it is being listed.
+        """
+        with self._loading() as changed:
+            yield TreeScan(self, changed)
+
+    def getdigest(self, path: str, name: str) -> Optional[str]:
+        """
+        Returns the cached digest of a file computed with the hash algorithm `name`, or None if it is unknown
+        """
+        parent, filename = split(_normalized(path))
+        with self._lock:
+            directory = self._directories.get(parent)
+            return directory.digests.get(filename, {}).get(name) if directory else None
+
+    def setdigest(self, path: str, name: str, digest: str) -> None:
+        """
+        Caches the digest of a file computed with the hash algorithm `name`
+        """
+        parent, filename = split(_normalized(path))
+        with self._lock:
+            self._directory(parent).digests.setdefault(filename, {})[name] = digest
+
+    def invalidate(self, paths: Iterable[str]) -> None:
+        """
+        Forgets the given paths and their contents.
+        The next lookup of one of the paths asks the remote machine directly.
+        """
+        with self._lock:
+            for path in map(_normalized, paths):
+                self._record_change(path)
+                self._forget(path)
+
+    def clear(self) -> None:
+        """
+        Forgets all cached paths, e.g. because they may have been changed by someone else.
+        """
+        with self._lock:
+            self._record_change("/")
+            self._directories.clear()
+
+    def set_missing(self, path: str) -> None:
+        """
+        Records that a path and its contents no longer exist.
+        """
+        path = _normalized(path)
+        with self._lock:
+            self._record_change(path)
+            directory = self._forget(path)
+            name = basename(path)
+            directory.unknown.discard(name)
+            directory.infos[name] = None
+
+    def _lookup(self, path: str) -> Tuple[bool, Optional[Info]]:
+        parent, name = split(path)
+        directory = self._directories.get(parent)
+        if directory is None:
+            return False, None
+
+        if name in directory.infos:
+            return True, directory.infos[name]
+
+        if directory.listed and name not in directory.unknown:
+            return True, None
+
+        return False, None
+
+    def _directory(self, path: str) -> _Directory:
+        """
+        Returns the cached entries of a directory and registers it with its parent,
+        so it can be found when the parent is forgotten.
+        """
+        directory = self._directories.get(path)
+        if directory is None:
+            directory = self._directories[path] = _Directory()
+            if path != "/":
+                parent, name = split(path)
+                self._directory(parent).subdirectories.add(name)
+
+        return directory
+
+    def _store_listing(self, path: str, entries: List[Info], changed: Set[str]) -> None:
+        """
+        Caches the entries of a directory. An empty listing of a path that is not a directory
+        means that none of its children exist.
+        """
+        self._store_tree([(join(path, entry.name), entry) for entry in entries], [path], changed)
+
+    def _store_tree(self, entries: List[Tuple[str, Info]], listed: List[str], changed: Set[str]) -> None:
+        for path, info in entries:
+            if info.type == ResourceType.symlink:
+                # Listings describe links themselves, while lookups follow them
+                parent, name = split(path)
+                self._directory(parent).unknown.add(name)
+            else:
+                self._store(path, info, changed)
+
+        for path in map(_normalized, listed):
+            if not _was_changed(path, changed):
+                self._directory(path).listed = True
+
+    def _store(self, path: str, info: Optional[Info], changed: Set[str]) -> None:
+        if not _was_changed(path, changed):
+            parent, name = split(path)
+            directory = self._directory(parent)
+            directory.infos[name] = info
+            directory.unknown.discard(name)
+
+    def _forget(self, path: str) -> _Directory:
+        """
+        Forgets a path and everything cached below it.
+
+        Returns:
+            _Directory: The cached entries of the path's parent
+        """
+        self._forget_tree(path)
+        parent, name = split(path)
+        directory = self._directory(parent)
+        directory.infos.pop(name, None)
+        directory.digests.pop(name, None)
+        directory.subdirectories.discard(name)
+        directory.unknown.add(name)
+        return directory
+
+    def _forget_tree(self, path: str) -> None:
+        directory = self._directories.pop(path, None)
+        if directory is None:
+            return
+
+        for name in directory.subdirectories:
+            self._forget_tree(join(path, name))
+
+    @contextmanager
+    def _loading(self) -> Iterator[Set[str]]:
+        """
+        Records the paths that are changed while a load from the remote machine is in progress,
+        so possibly outdated results are not cached for them.
+        """
+        token = next(self._tokens)
+        changed: Set[str] = set()
+        with self._lock:
+            self._loads[token] = changed
+
+        try:
+            yield changed
+        finally:
+            with self._lock:
+                del self._loads[token]
+
+    def _record_change(self, path: str) -> None:
+        for changed in self._loads.values():
+            changed.add(path)
+
+
+class TreeScan:
+    """
+    Caches the entries of a directory tree one by one, so the tree does not need to be held in memory
+    """
+
+    def __init__(self, cache: StatCache, changed: Set[str]) -> None:
+        self._cache = cache
+        self._changed = changed
+
+    def add(self, path: str, info: Info) -> None:
+        with self._cache._lock:
+            self._cache._store_tree([(_normalized(path), info)], [], self._changed)
+
+    def add_listed(self, directories: List[str]) -> None:
+        """
+        Records that all entries of the directories were added
+        """
+        with self._cache._lock:
+            self._cache._store_tree([], directories, self._changed)
+
+
+def _was_changed(path: str, changed: Set[str]) -> bool:
+    """
+    Checks whether the path or one of its ancestors was changed
+    """
+    while changed:
+        if path in changed:
+            return True
+
+        if path == "/":
+            return False
+
+        path = dirname(path)
+
+    return False
+
+
+def _normalized(path: str) -> str:
+    return abspath(normpath(path))
@@ -1,11 +1,23 @@
-from typing import Any
+from typing import Any, Dict, List, Optional
 
 from rich import box
-from rich.console import RenderableType
+from rich.console import Group, RenderableType
 from rich.live import Live
+from rich.panel import Panel
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TaskID,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
 from rich.spinner import Spinner
 from rich.table import Table
+from rich.text import Text
 
+from hpcrocket.core.filesystem.transfermonitor import TransferProgress
 from hpcrocket.core.slurmbatchjob import SlurmJobStatus
 
 try:
@@ -55,6 +67,22 @@ class UI(Protocol):  # pragma: no cover
             text (str): The message
         """
 
+    def transfer(self, progress: TransferProgress) -> None:
+        """
+        Displays the progress of file transfers
+
+        Args:
+            progress (TransferProgress): The current state of the transfers
+        """
+
+    def output(self, lines: List[str]) -> None:
+        """
+        Displays the latest output of a running job
+
+        Args:
+            lines (List[str]): The last lines the job wrote to its output files
+        """
+
 
 class NullUI(UI):  # pragma: no cover
     """
@@ -76,6 +104,12 @@ class NullUI(UI):  # pragma: no cover
     def launch(self, text: str) -> None:  # pragma: no cover
         pass
 
+    def transfer(self, progress: TransferProgress) -> None:  # pragma: no cover
+        pass
+
+    def output(self, lines: List[str]) -> None:  # pragma: no cover
+        pass
+
 
 class RichUI(UI):
     """
@@ -84,6 +118,10 @@ class RichUI(UI):
 
     def __init__(self) -> None:
         self._rich_live: Live
+        self._progress: Optional[Progress] = None
+        self._transfer_tasks: Dict[str, TaskID] = {}
+        self._job_table: Optional[Table] = None
+        self._output: List[str] = []
 
     def __enter__(self) -> "RichUI":
         self._rich_live = Live(Spinner("bouncingBar", ""), refresh_per_second=16)
@@ -95,7 +133,20 @@ class RichUI(UI):
         self._rich_live.stop()
 
     def update(self, job: SlurmJobStatus) -> None:
-        self._rich_live.update(self._make_table(job))
+        self._job_table = self._make_table(job)
+        self._rich_live.update(self._render_job())
+
+    def output(self, lines: List[str]) -> None:
+        self._output = lines
+        self._rich_live.update(self._render_job())
+
+    def _render_job(self) -> RenderableType:
+        table = self._job_table or Spinner("bouncingBar", "")
+        if not self._output:
+            return table
+
+        output = Panel(Text("\n".join(self._output)), title="Job output", title_align="left", style="grey70")
+        return Group(table, output)
 
     def error(self, text: str) -> None:
         self._rich_live.console.print(
@@ -117,6 +168,31 @@ class RichUI(UI):
             ":rocket: ", text, style="bold yellow", emoji=True
         )
 
+    def transfer(self, progress: TransferProgress) -> None:
+        if self._progress is None:
+            self._progress = self._make_progress()
+
+        if progress.description not in self._transfer_tasks:
+            self._transfer_tasks[progress.description] = self._progress.add_task(progress.description)
+            self._rich_live.update(self._progress)
+
+        self._progress.update(
+            self._transfer_tasks[progress.description],
+            completed=progress.bytes_done,
+            total=max(progress.bytes_found, progress.bytes_done),
+            details=_transfer_details(progress),
+        )
+
+    def _make_progress(self) -> Progress:
+        return Progress(
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            TextColumn("{task.fields[details]}"),
+        )
+
     def _make_table(self, job: SlurmJobStatus) -> Table:
         table = Table(style="bold", box=box.MINIMAL)
         table.add_column("ID")
@@ -139,3 +215,15 @@ class RichUI(UI):
             table.add_row(str(task.id), task.name, last_column, style=color)
 
         return table
+
+
+def _transfer_details(progress: TransferProgress) -> str:
+    details = f"{progress.files_done}/{progress.files_found} files"
+    if progress.queue_depth:
+        details += f", {progress.queue_depth} queued"
+
+    if progress.operations and progress.files_done:
+        details += f", {progress.operations_per_file:.1f} requests/file"
+
+    return details
+
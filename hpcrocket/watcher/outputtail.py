@@ -0,0 +1,79 @@
+import threading
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional, TextIO
+
+if TYPE_CHECKING:
+    from hpcrocket.core.executor import RunningCommand
+    from hpcrocket.core.slurmbatchjob import SlurmBatchJob
+
+
+OutputCallback = Callable[[List[str]], None]
+
+
+class OutputTail:
+    """
+    Follows the output files of a job in the background.
+    Only the last `max_lines` lines are kept and passed to the callback after every new line.
+    If a local file is given, all lines are written to it as well.
+    """
+
+    def __init__(
+        self,
+        batch_job: "SlurmBatchJob",
+        max_lines: int,
+        callback: OutputCallback,
+        local_file: Optional[Path] = None,
+    ) -> None:
+        self._batch_job = batch_job
+        self._lines: Deque[str] = deque(maxlen=max_lines)
+        self._callback = callback
+        self._local_file = local_file
+        self._command: Optional["RunningCommand"] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def lines(self) -> List[str]:
+        return list(self._lines)
+
+    def start(self) -> None:
+        """
+        Starts following the output.
+
+        Raises:
+            SlurmError: The output files of the job could not be resolved
+        """
+        self._command = self._batch_job.tail_output()
+        self._thread = threading.Thread(target=self._follow, args=(self._command,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops following the output and waits until all received lines are processed
+        """
+        if self._command:
+            self._command.stop()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _follow(self, command: "RunningCommand") -> None:
+        local_file = self._local_file.open("w") if self._local_file else None
+        try:
+            for line in command.iter_stdout():
+                self._add(line, local_file)
+        except (OSError, EOFError):
+            # The connection was closed while waiting for output
+            pass
+        finally:
+            if local_file:
+                local_file.close()
+
+    def _add(self, line: str, local_file: Optional[TextIO]) -> None:
+        if local_file:
+            local_file.write(line if line.endswith("\n") else line + "\n")
+            local_file.flush()
+
+        self._lines.append(line.rstrip("\n"))
+        self._callback(list(self._lines))
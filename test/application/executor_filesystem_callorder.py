@@ -5,7 +5,7 @@ from typing import Any, List, Optional
 from unittest.mock import Mock
 
 from hpcrocket.core.executor import RunningCommand
-from hpcrocket.core.filesystem import Filesystem, FilesystemFactory
+from hpcrocket.core.filesystem import FileStat, Filesystem, FilesystemFactory
 
 
 class CallOrderVerification(SlurmJobExecutorSpy, Filesystem):
@@ -40,15 +40,22 @@ class CallOrderVerification(SlurmJobExecutorSpy, Filesystem):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         self.log.append(f"copy {source} {target}")
 
-    def delete(self, path: str) -> None:
+    def delete(self, path: str, literal: bool = False) -> None:
         self.log.append(f"delete {path}")
 
     def exists(self, path: str) -> bool:
         return False
 
+    def stat(self, path: str) -> FileStat:
+        return FileStat(0, 0.0)
+
+    def checksum(self, path: str) -> str:
+        return ""
+
     def __call__(self) -> None:
         assert (
             self.log == self.expected
@@ -1,3 +1,5 @@
+import dataclasses
+
 from hpcrocket.core.filesystem.progressive import CopyInstruction
 from hpcrocket.core.launchoptions import FinalizeOptions
 from hpcrocket.ssh.connectiondata import ConnectionData
@@ -25,3 +27,17 @@ def test__given_finalize_options__when_running__collects_and_cleans_files() -> N
 
     remote_fs = factory.ssh_filesystem
     assert not remote_fs.exists("remote_file")
+
+
+def test__given_dry_run__when_running__neither_collects_nor_cleans_files() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("remote_file")
+    options = dataclasses.replace(OPTIONS, dry_run=True)
+
+    sut = make_application(filesystem_factory=factory)
+
+    exit_code = sut.run(options)
+
+    assert exit_code == 0
+    assert not factory.local_filesystem.exists("local_file")
+    assert factory.ssh_filesystem.exists("remote_file")
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 from pathlib import Path
 from test.application import make_application
@@ -29,6 +30,7 @@ from test.slurmoutput import DEFAULT_JOB_ID, completed_slurm_job
 from test.testdoubles.executor import (
     LoggingCommandExecutorSpy,
     SlurmJobExecutorSpy,
+    WaitingSubmissionExecutorSpy,
     failed_slurm_job_command_stub,
     successful_slurm_job_command_stub,
 )
@@ -42,6 +44,7 @@ from unittest.mock import Mock
 from hpcrocket.core.application import Application
 from hpcrocket.core.executor import RunningCommand
 from hpcrocket.core.filesystem.progressive import CopyInstruction
+from hpcrocket.core.launchoptions import EarlySubmitOptions
 from hpcrocket.ssh.errors import SSHError
 
 
@@ -56,6 +59,15 @@ class ConnectionFailingCommandExecutor(LoggingCommandExecutorSpy):
         raise NotImplementedError()
 
 
+class EarlySubmissionCallOrderVerification(CallOrderVerification):
+    def exec_command(self, command: str) -> RunningCommand:
+        if command.startswith(("dir=", "rm ", "touch ")):
+            self.log.append(command.split()[0])
+            return WaitingSubmissionExecutorSpy().exec_command(command)
+
+        return super().exec_command(command)
+
+
 def memory_fs_factory_with_default_local_file() -> MemoryFilesystemFactoryStub:
     local_fs = MemoryFilesystemFake([LOCAL_FILE])
     remote_fs = MemoryFilesystemFake()
@@ -139,6 +151,27 @@ class Application_With_Options_To_Copy(unittest.TestCase):
         self.fs_factory = MemoryFilesystemFactoryStub()
         self.sut = make_application(filesystem_factory=self.fs_factory)
 
+    def test__given_dry_run__when_running__neither_copies_files_nor_submits_job(self) -> None:
+        self.fs_factory.create_local_files(LOCAL_FILE)
+        options = launch_options_with_copy()
+        options.dry_run = True
+        executor = SlurmJobExecutorSpy()
+        sut = make_application(executor, self.fs_factory)
+
+        exit_code = sut.run(options)
+
+        assert exit_code == 0
+        assert_does_not_exist_on_remote(self.fs_factory, REMOTE_FILE)
+        assert executor.command_log == []
+
+    def test__given_dry_run_with_missing_file__when_running__exits_with_error_code(self) -> None:
+        options = launch_options_with_copy()
+        options.dry_run = True
+
+        exit_code = self.sut.run(options)
+
+        assert exit_code == 1
+
     def test__when_running__copies_files_to_remote(self) -> None:
         self.fs_factory.create_local_files(LOCAL_FILE)
         options = launch_options_with_copy()
@@ -278,3 +311,67 @@ class Application_With_Options_To_Copy_Collect_Clean(unittest.TestCase):
         actual = self.sut.run(self.options)
 
         assert actual == 1
+
+
+class Application_With_Early_Submission(unittest.TestCase):
+    def test__when_running__submits_once_script_is_copied_and_starts_job_once_all_files_are_copied(self) -> None:
+        options = launch_options(
+            copy=[CopyInstruction(LOCAL_FILE, REMOTE_FILE), CopyInstruction("test.job", "test.job")]
+        )
+        options.submit_early = EarlySubmitOptions()
+        verifier = EarlySubmissionCallOrderVerification(
+            [
+                "copy test.job test.job",
+                "dir=$(mktemp",
+                "sbatch",
+                "rm",
+                f"copy {LOCAL_FILE} {REMOTE_FILE}",
+                "touch",
+            ]
+        )
+        sut = Application(verifier, VerifierReturningFilesystemFactory(verifier), Mock())
+
+        sut.run(options)
+
+        verifier()
+
+
+class Application_With_State_File(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.directory.name, "state")
+        self.job_id_file = os.path.join(self.directory.name, "logs", "jobid")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test__given_interrupted_launch__when_resuming__watches_job_without_copying_or_submitting_again(self) -> None:
+        options = launch_options(copy=[CopyInstruction(LOCAL_FILE, REMOTE_FILE)], watch=True)
+        options.state_file = self.state_file
+        options.job_id_file = self.job_id_file
+        factory = memory_fs_factory_with_default_local_file()
+        # NOTE:
+        # Writing the job ID fails because its directory is missing, which interrupts the launch after submitting
+        make_application(SlurmJobExecutorSpy(), factory).run(options)
+
+        os.mkdir(os.path.dirname(self.job_id_file))
+        options.resume = True
+        executor = SlurmJobExecutorSpy()
+        actual = make_application(executor, factory).run(options)
+
+        assert actual == 0
+        assert not any(command.cmd == "sbatch" for command in executor.command_log)
+        assert Path(self.job_id_file).read_text() == DEFAULT_JOB_ID
+        assert not os.path.exists(self.state_file)
+
+    def test__given_interrupted_launch__when_launching_without_resume__starts_over(self) -> None:
+        options = launch_options(watch=True)
+        options.state_file = self.state_file
+        options.job_id_file = self.job_id_file
+        make_application(SlurmJobExecutorSpy()).run(options)
+
+        os.mkdir(os.path.dirname(self.job_id_file))
+        executor = SlurmJobExecutorSpy()
+        make_application(executor).run(options)
+
+        assert str(executor.command_log[0]) == f"sbatch {options.sbatch}"
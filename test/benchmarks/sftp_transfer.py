@@ -0,0 +1,79 @@
+"""
+Measures the SFTP transfer speed of SSHFS and the PermissionChangingSSHFSDecorator
+against a local SFTP server with injected latency.
+
+Usage: python -m test.benchmarks.sftp_transfer [--size-mb 8] [--rtt-ms 30] [--request-size 32K] [--max-requests 64]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+import fs.sshfs.sshfs as sshfs
+from fs.base import FS
+
+from hpcrocket.cli._builders import parse_size
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+from test.testdoubles.sftpserver import SFTPStandIn
+
+
+def connect(server: SFTPStandIn, factory: Callable[..., FS], **options: Any) -> FS:
+    return factory(
+        host="localhost",
+        user="user",
+        passwd="1234",
+        sock=server.connect(),
+        look_for_keys=False,
+        allow_agent=False,
+        **options,
+    )
+
+
+def measure(remote_fs: FS, directory: str, content: bytes) -> Dict[str, float]:
+    path = os.path.join(directory, "benchmark.bin")
+
+    start = time.perf_counter()
+    remote_fs.upload(path, io.BytesIO(content))
+    upload_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    remote_fs.download(path, io.BytesIO())
+    download_time = time.perf_counter() - start
+
+    os.remove(path)
+    megabytes = len(content) / 1024**2
+    return {"upload": megabytes / upload_time, "download": megabytes / download_time}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--request-size", default="32K")
+    parser.add_argument("--max-requests", type=int, default=64)
+    args = parser.parse_args()
+
+    content = os.urandom(args.size_mb * 1024**2)
+    candidates: Dict[str, Dict[str, Any]] = {
+        "sshfs": {"factory": sshfs.SSHFS},
+        "decorator": {
+            "factory": PermissionChangingSSHFSDecorator,
+            "request_size": parse_size(args.request_size),
+            "max_requests": args.max_requests,
+        },
+    }
+
+    print(f"{args.size_mb} MB at {args.rtt_ms} ms round trip time")
+    with tempfile.TemporaryDirectory() as directory, SFTPStandIn(latency=args.rtt_ms / 2000) as server:
+        for name, options in candidates.items():
+            remote_fs = connect(server, **options)
+            with remote_fs:
+                result = measure(remote_fs, directory, content)
+
+            print(f"{name:>10}: upload {result['upload']:8.2f} MB/s, download {result['download']:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
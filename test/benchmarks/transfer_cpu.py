@@ -0,0 +1,63 @@
+"""
+Measures the CPU time per GB spent on the local side of transfers.
+The CPU time of uploads and downloads with the PermissionChangingSSHFSDecorator is measured
+against a local SFTP server. The server runs in the same process, so its CPU time is included.
+
+Usage: python -m test.benchmarks.transfer_cpu [--size-mb 256] [--request-size 32K]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from hpcrocket.cli._builders import parse_size
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+from test.benchmarks.sftp_transfer import connect
+from test.testdoubles.sftpserver import SFTPStandIn
+
+
+def cpu_seconds_per_gb(size: int, action: Callable[[], None]) -> float:
+    start = time.process_time()
+    action()
+    return (time.process_time() - start) / (size / 1024**3)
+
+
+def measure_transfers(directory: str, path: str, size: int, request_size: int) -> Dict[str, float]:
+    remote_path = os.path.join(directory, "remote.bin")
+    local_copy = os.path.join(directory, "local.bin")
+    with SFTPStandIn() as server:
+        remote_fs = connect(server, PermissionChangingSSHFSDecorator, request_size=request_size)
+        with remote_fs:
+
+            def upload() -> None:
+                with open(path, "rb") as file:
+                    remote_fs.upload(remote_path, file)
+
+            def download() -> None:
+                with open(local_copy, "wb") as file:
+                    remote_fs.download(remote_path, file)
+
+            return {"upload": cpu_seconds_per_gb(size, upload), "download": cpu_seconds_per_gb(size, download)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--request-size", default="32K")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024**2
+    request_size = parse_size(args.request_size)
+    print(f"{args.size_mb} MB in requests of {args.request_size}, CPU seconds per GB")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.bin")
+        with open(path, "wb") as file:
+            file.write(os.urandom(size))
+
+        for name, seconds in measure_transfers(directory, path, size, request_size).items():
+            print(f"{name:>10}: {seconds:8.3f} s/GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Iterator, List
+
+import paramiko
+import pytest
+
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+from test.testdoubles.sftpserver import SFTPStandIn
+
+
+@pytest.fixture
+def sftp_options() -> Dict[str, Any]:
+    """
+    Additional arguments of the `sftp_fs` fixture. Override it in a test module to configure the filesystem.
+    """
+    return {}
+
+
+@pytest.fixture
+def sftp_fs(sftp_options: Dict[str, Any]) -> Iterator[PermissionChangingSSHFSDecorator]:
+    with SFTPStandIn() as server:
+        fs = PermissionChangingSSHFSDecorator(
+            host="localhost",
+            user="user",
+            passwd="1234",
+            sock=server.connect(),
+            look_for_keys=False,
+            allow_agent=False,
+            **sftp_options,
+        )
+        yield fs
+        fs.close()
+
+
+@pytest.fixture
+def commands(sftp_fs: PermissionChangingSSHFSDecorator, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """
+    Records all commands run on the remote machine
+    """
+    recorded: List[str] = []
+    client = sftp_fs._internal_fs._client  # type: ignore[attr-defined]
+    original_exec_command = client.exec_command
+
+    def exec_command(command: str, **kwargs: Any) -> Any:
+        recorded.append(command)
+        return original_exec_command(command, **kwargs)
+
+    monkeypatch.setattr(client, "exec_command", exec_command)
+    return recorded
+
+
+@pytest.fixture
+def request_types(monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    """
+    Records the types of all SFTP requests
+    """
+    recorded: List[int] = []
+    original_request = paramiko.SFTPClient._async_request  # type: ignore[attr-defined]
+
+    def async_request(client: paramiko.SFTPClient, fileobj: Any, t: int, *args: Any) -> Any:
+        recorded.append(t)
+        return original_request(client, fileobj, t, *args)
+
+    monkeypatch.setattr(paramiko.SFTPClient, "_async_request", async_request)
+    return recorded
@@ -1,5 +1,8 @@
+from hpcrocket.core.launchoptions import SFTPOptions
 from hpcrocket.ssh.connectiondata import ConnectionData
 
+SFTP_DEFAULTS = SFTPOptions()
+
 
 def assert_sshfs_connected_with_connection_data(
     sshfs_type_mock, connection_data: ConnectionData, channel=None
@@ -11,6 +14,8 @@ def assert_sshfs_connected_with_connection_data(
         pkey=connection_data.key,
         port=connection_data.port,
         sock=channel,
+        request_size=SFTP_DEFAULTS.request_size,
+        max_requests=SFTP_DEFAULTS.max_requests,
     )
 
 
@@ -24,6 +29,8 @@ def assert_sshfs_connected_with_password_from_connection_data(
         pkey=None,
         port=connection_data.port,
         sock=None,
+        request_size=SFTP_DEFAULTS.request_size,
+        max_requests=SFTP_DEFAULTS.max_requests,
     )
 
 
@@ -37,6 +44,8 @@ def assert_sshfs_connected_with_private_key_from_connection_data(
         pkey=connection_data.key,
         port=connection_data.port,
         sock=None,
+        request_size=SFTP_DEFAULTS.request_size,
+        max_requests=SFTP_DEFAULTS.max_requests,
     )
 
 
@@ -50,4 +59,6 @@ def assert_sshfs_connected_with_keyfile_from_connection_data(
         pkey=connection_data.keyfile,
         port=connection_data.port,
         sock=None,
+        request_size=SFTP_DEFAULTS.request_size,
+        max_requests=SFTP_DEFAULTS.max_requests,
     )
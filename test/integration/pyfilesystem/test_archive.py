@@ -0,0 +1,166 @@
+import io
+import tarfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, cast
+
+import fs.path
+import pytest
+from fs.memoryfs import MemoryFS
+
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+WORKDIR = "/home/user/work"
+
+requires_zstandard = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+
+class ArchivingMemoryFS(MemoryFS):
+    """
+    Mimics a filesystem that runs `tar` itself by packing and unpacking archives in memory
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.extracted: List[Optional[str]] = []
+        self.created: List[List[str]] = []
+
+    @contextmanager
+    def extract_archive(self, compression: Optional[str] = None) -> Iterator[BinaryIO]:
+        buffer = io.BytesIO()
+        yield buffer
+
+        buffer.seek(0)
+        if compression == "zstd":
+            buffer = io.BytesIO(zstandard.ZstdDecompressor().decompressobj().decompress(buffer.read()))
+
+        with tarfile.open(fileobj=buffer, mode="r:*") as tar:
+            for member in tar:
+                path = fs.path.abspath(member.name)
+                if member.isdir():
+                    self.makedirs(path, recreate=True)
+                    continue
+
+                self.makedirs(fs.path.dirname(path), recreate=True)
+                self.upload(path, cast(BinaryIO, tar.extractfile(member)))
+
+        self.extracted.append(compression)
+
+    @contextmanager
+    def create_archive(self, paths: List[str], compression: Optional[str] = None) -> Iterator[BinaryIO]:
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz" if compression == "gzip" else "w") as tar:
+            for path in paths:
+                member = tarfile.TarInfo(fs.path.relpath(path))
+                member.size = self.getsize(path)
+                with self.openbin(path) as content:
+                    tar.addfile(member, content)
+
+        self.created.append(paths)
+        if compression == "zstd":
+            buffer = io.BytesIO(zstandard.ZstdCompressor().compress(buffer.getvalue()))
+
+        buffer.seek(0)
+        yield buffer
+
+
+def make_filesystems() -> "tuple[PyFilesystemBased, PyFilesystemBased]":
+    remote_fs = ArchivingMemoryFS()
+    remote_fs.makedirs(WORKDIR)
+    return PyFilesystemBased(MemoryFS()), PyFilesystemBased(remote_fs, WORKDIR, "/home/user")
+
+
+def test__when_copying_archive_to_archiving_filesystem__extracts_all_files_from_one_archive() -> None:
+    local, remote = make_filesystems()
+    local.internal_fs.writetext("/first.txt", "first")
+    local.internal_fs.makedir("/dir")
+    local.internal_fs.writetext("/dir/second.txt", "second")
+
+    local.copy_archive([("/first.txt", "out/first.txt"), ("/dir/second.txt", "~/second.txt")], filesystem=remote)
+
+    remote_fs = cast(ArchivingMemoryFS, remote.internal_fs)
+    assert remote_fs.extracted == [None]
+    assert remote_fs.readtext(f"{WORKDIR}/out/first.txt") == "first"
+    assert remote_fs.readtext("/home/user/second.txt") == "second"
+
+
+def test__when_copying_directory_as_archive__extracts_its_contents_into_target_from_the_same_archive() -> None:
+    local, remote = make_filesystems()
+    local.internal_fs.makedirs("/output/sub/empty")
+    local.internal_fs.writetext("/output/a.txt", "a")
+    local.internal_fs.writetext("/output/sub/b.txt", "b")
+    local.internal_fs.writetext("/single.txt", "single")
+
+    local.copy_archive([("/output", "results"), ("/single.txt", "single.txt")], filesystem=remote)
+
+    remote_fs = cast(ArchivingMemoryFS, remote.internal_fs)
+    assert remote_fs.extracted == [None]
+    assert remote_fs.readtext(f"{WORKDIR}/results/a.txt") == "a"
+    assert remote_fs.readtext(f"{WORKDIR}/results/sub/b.txt") == "b"
+    assert remote_fs.isdir(f"{WORKDIR}/results/sub/empty")
+    assert remote_fs.readtext(f"{WORKDIR}/single.txt") == "single"
+
+
+def test__when_copying_compressed_archive_to_archiving_filesystem__extracts_with_compression() -> None:
+    local, remote = make_filesystems()
+    local.internal_fs.writetext("/first.txt", "first")
+
+    local.copy_archive([("/first.txt", "first.txt")], filesystem=remote, compression="gzip")
+
+    remote_fs = cast(ArchivingMemoryFS, remote.internal_fs)
+    assert remote_fs.extracted == ["gzip"]
+    assert remote_fs.readtext(f"{WORKDIR}/first.txt") == "first"
+
+
+def test__when_copying_archive_from_archiving_filesystem__unpacks_files_to_target_paths() -> None:
+    local, remote = make_filesystems()
+    remote_fs = cast(ArchivingMemoryFS, remote.internal_fs)
+    remote_fs.makedirs(f"{WORKDIR}/results")
+    remote_fs.writetext(f"{WORKDIR}/results/rank0.log", "rank 0")
+    remote_fs.writetext(f"{WORKDIR}/results/rank1.log", "rank 1")
+
+    remote.copy_archive(
+        [("results/rank0.log", "/logs/0.log"), ("results/rank1.log", "/logs/1.log")],
+        filesystem=local,
+        compression="gzip",
+    )
+
+    assert remote_fs.created == [[f"{WORKDIR}/results/rank0.log", f"{WORKDIR}/results/rank1.log"]]
+    assert local.internal_fs.readtext("/logs/0.log") == "rank 0"
+    assert local.internal_fs.readtext("/logs/1.log") == "rank 1"
+
+
+def test__when_copying_archive_to_existing_dir__places_file_inside_dir() -> None:
+    local, remote = make_filesystems()
+    local.internal_fs.writetext("/first.txt", "first")
+    remote.internal_fs.makedir(f"{WORKDIR}/out")
+
+    local.copy_archive([("/first.txt", "out")], filesystem=remote)
+
+    assert remote.internal_fs.readtext(f"{WORKDIR}/out/first.txt") == "first"
+
+
+@requires_zstandard
+def test__when_copying_zstd_archive_to_archiving_filesystem__extracts_with_compression() -> None:
+    local, remote = make_filesystems()
+    local.internal_fs.writetext("/first.txt", "first")
+
+    local.copy_archive([("/first.txt", "first.txt")], filesystem=remote, compression="zstd")
+
+    remote_fs = cast(ArchivingMemoryFS, remote.internal_fs)
+    assert remote_fs.extracted == ["zstd"]
+    assert remote_fs.readtext(f"{WORKDIR}/first.txt") == "first"
+
+
+@requires_zstandard
+def test__when_copying_zstd_archive_from_archiving_filesystem__unpacks_files_to_target_paths() -> None:
+    local, remote = make_filesystems()
+    remote.internal_fs.writetext(f"{WORKDIR}/output.log", "log " * 1000)
+
+    remote.copy_archive([("output.log", "/output.log")], filesystem=local, compression="zstd")
+
+    assert local.internal_fs.readtext("/output.log") == "log " * 1000
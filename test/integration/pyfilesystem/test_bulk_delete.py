@@ -0,0 +1,91 @@
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+
+@pytest.fixture
+def scratch(tmp_path: Path) -> Path:
+    for i in range(50):
+        (tmp_path / "scratch" / f"rank{i}").mkdir(parents=True)
+        (tmp_path / "scratch" / f"rank{i}" / "out.dat").write_text(str(i))
+
+    (tmp_path / "result.txt").write_text("result")
+    return tmp_path
+
+
+def test__when_deleting_many__removes_directories_and_files_with_one_rm_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, scratch: Path, commands: List[str]
+) -> None:
+    filesystem = PyFilesystemBased(sftp_fs, str(scratch))
+
+    errors = filesystem.delete_many(["scratch", "result.txt"])
+
+    assert errors == []
+    assert list(scratch.iterdir()) == []
+    assert len([command for command in commands if command.startswith("rm")]) == 1
+
+
+def test__when_deleting_many_with_missing_path__reports_missing_path_and_deletes_others(
+    sftp_fs: PermissionChangingSSHFSDecorator, scratch: Path
+) -> None:
+    filesystem = PyFilesystemBased(sftp_fs, str(scratch))
+
+    errors = filesystem.delete_many(["missing.txt", "result.txt"])
+
+    assert [str(error) for error in errors] == ["missing.txt"]
+    assert not (scratch / "result.txt").exists()
+    assert not filesystem.exists("result.txt")
+
+
+def test__when_deleting_glob__removes_matches(sftp_fs: PermissionChangingSSHFSDecorator, scratch: Path) -> None:
+    filesystem = PyFilesystemBased(sftp_fs, str(scratch))
+
+    filesystem.delete_many(["scratch/*/out.dat"])
+
+    assert list((scratch / "scratch").glob("*/out.dat")) == []
+    assert (scratch / "scratch" / "rank0").is_dir()
+
+
+def test__when_deleting_literal_paths__removes_files_with_wildcard_characters_in_their_names(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    for name in ["a[1].txt", "a1.txt"]:
+        (tmp_path / name).write_text(name)
+
+    filesystem = PyFilesystemBased(sftp_fs, str(tmp_path))
+
+    errors = filesystem.delete_many(["a[1].txt"], literal=True)
+
+    assert errors == []
+    assert [path.name for path in tmp_path.iterdir()] == ["a1.txt"]
+
+
+def test__when_deleting_detached__removes_files_in_background(
+    sftp_fs: PermissionChangingSSHFSDecorator, scratch: Path
+) -> None:
+    filesystem = PyFilesystemBased(sftp_fs, str(scratch))
+
+    filesystem.delete_many(["scratch"], detach=True)
+
+    deadline = time.monotonic() + 5
+    while (scratch / "scratch").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not (scratch / "scratch").exists()
+
+
+def test__when_deleting_link_to_directory__keeps_link_target(
+    sftp_fs: PermissionChangingSSHFSDecorator, scratch: Path
+) -> None:
+    (scratch / "link").symlink_to(scratch / "scratch")
+    filesystem = PyFilesystemBased(sftp_fs, str(scratch))
+
+    filesystem.delete_many(["link"])
+
+    assert not (scratch / "link").exists()
+    assert (scratch / "scratch" / "rank0" / "out.dat").exists()
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import os
+import stat
+import time
+from pathlib import Path
+from typing import List, Mapping, Tuple
+
+import fs.base
+import pytest
+from fs.memoryfs import MemoryFS
+from fs.osfs import OSFS
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction, progressive_copy
+from hpcrocket.pyfilesystem import contentstore
+from hpcrocket.pyfilesystem.contentstore import ContentStore
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+STORE_DIR = "/home/user/.hpc-rocket/cas"
+
+
+class HardlinkRecordingMemoryFS(MemoryFS):
+    def __init__(self) -> None:
+        super().__init__()
+        self.hardlinks: List[Tuple[str, str]] = []
+
+    def hardlink(self, src_path: str, dst_path: str) -> None:
+        self.hardlinks.append((src_path, dst_path))
+        self.copy(src_path, dst_path)
+
+    def symlink(self, src_path: str, dst_path: str) -> None:
+        raise AssertionError("Should prefer hard links")
+
+    def readlink(self, path: str) -> str:
+        raise AssertionError("Should not read links")
+
+
+class LinkingOSFS(OSFS):
+    """
+    Creates links and changes permissions on the local disk like the SSH filesystem does on the remote machine
+    """
+
+    def __init__(self, root: Path, hardlinks: bool = True) -> None:
+        super().__init__(str(root))
+        self._hardlinks = hardlinks
+
+    def hardlink(self, src_path: str, dst_path: str) -> None:
+        if not self._hardlinks:
+            raise OSError("Invalid cross-device link")
+
+        os.link(self.getsyspath(src_path), self.getsyspath(dst_path))
+
+    def symlink(self, src_path: str, dst_path: str) -> None:
+        os.symlink(self.getsyspath(src_path), self.getsyspath(dst_path))
+
+    def readlink(self, path: str) -> str:
+        target = os.readlink(self.getsyspath(path))
+        return "/" + os.path.relpath(target, self.getsyspath("/"))
+
+    def setinfo(self, path: str, info: Mapping[str, Mapping[str, object]]) -> None:
+        permissions = info.get("access", {}).get("permissions")
+        if permissions is not None:
+            os.chmod(self.getsyspath(path), permissions.mode)  # type: ignore[attr-defined]
+
+        super().setinfo(path, info)
+
+
+def digest(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def make_filesystems(
+    remote_fs: fs.base.FS, max_size: int = 0
+) -> Tuple[PyFilesystemBased, PyFilesystemBased, ContentStore]:
+    local_fs = MemoryFS()
+    store = ContentStore(STORE_DIR, max_size)
+    remote_fs.makedirs("/home/user/work", recreate=True)
+    local = PyFilesystemBased(local_fs)
+    remote = PyFilesystemBased(remote_fs, "/home/user/work", "/home/user", store)
+    return local, remote, store
+
+
+def test__when_copying_with_content_store__places_file_at_target_and_stores_blob() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+
+    assert remote_fs.readtext("/home/user/work/image.sif") == "container"
+    assert remote_fs.readtext(f"{STORE_DIR}/{digest('container')}") == "container"
+
+
+def test__when_copying_same_content_twice__uploads_blob_once_and_indexes_it() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/a.bin", "binary")
+    local.internal_fs.writetext("/b.bin", "binary")
+
+    local.copy("/a.bin", "a/a.bin", filesystem=remote)
+    local.copy("/b.bin", "b/b.bin", filesystem=remote)
+    remote.flush()
+
+    index = json.loads(remote_fs.readtext(f"{STORE_DIR}/index.json"))
+    assert list(index) == [digest("binary")]
+    assert remote_fs.readtext("/home/user/work/a/a.bin") == "binary"
+    assert remote_fs.readtext("/home/user/work/b/b.bin") == "binary"
+
+
+def test__when_store_exceeds_max_size__evicts_least_recently_used_blobs() -> None:
+    remote_fs = MemoryFS()
+    old_digest = digest("old")
+    remote_fs.makedirs(STORE_DIR)
+    remote_fs.writetext(f"{STORE_DIR}/{old_digest}", "old")
+    remote_fs.writetext(
+        f"{STORE_DIR}/index.json",
+        json.dumps({old_digest: {"size": 3, "last_used": 0.0}}),
+    )
+
+    local, remote, _ = make_filesystems(remote_fs, max_size=4)
+    local.internal_fs.writetext("/new.bin", "new")
+
+    local.copy("/new.bin", "new.bin", filesystem=remote)
+    remote.flush()
+
+    index = json.loads(remote_fs.readtext(f"{STORE_DIR}/index.json"))
+    assert list(index) == [digest("new")]
+    assert not remote_fs.exists(f"{STORE_DIR}/{old_digest}")
+
+
+def test__when_store_exceeds_max_size__keeps_blobs_used_in_current_run() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs, max_size=1)
+    local.internal_fs.writetext("/first.bin", "first")
+    local.internal_fs.writetext("/second.bin", "second")
+
+    local.copy("/first.bin", "first.bin", filesystem=remote)
+    local.copy("/second.bin", "second.bin", filesystem=remote)
+    remote.flush()
+
+    assert remote_fs.exists(f"{STORE_DIR}/{digest('first')}")
+    assert remote_fs.exists(f"{STORE_DIR}/{digest('second')}")
+
+
+def test__when_filesystem_supports_links__hardlinks_blob_to_target() -> None:
+    remote_fs = HardlinkRecordingMemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+
+    assert remote_fs.hardlinks == [
+        (f"{STORE_DIR}/{digest('container')}", "/home/user/work/image.sif")
+    ]
+
+
+def test__when_overwriting_existing_target__replaces_target_with_stored_content() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    remote_fs.writetext("/home/user/work/image.sif", "outdated")
+    local.internal_fs.writetext("/image.sif", "container")
+
+    local.copy("/image.sif", "image.sif", overwrite=True, filesystem=remote)
+
+    assert remote_fs.readtext("/home/user/work/image.sif") == "container"
+
+
+def test__when_copying__writes_index_only_when_flushed() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+    written_before_flush = remote_fs.exists(f"{STORE_DIR}/index.json")
+    remote.flush()
+
+    assert written_before_flush is False
+    assert list(json.loads(remote_fs.readtext(f"{STORE_DIR}/index.json"))) == [digest("container")]
+    assert not remote_fs.exists(f"{STORE_DIR}/index.lock")
+
+
+def test__given_index_changed_by_other_run__when_flushing__keeps_entries_of_other_run() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+    other_entry = {"size": 5, "last_used": 1.0}
+    remote_fs.writetext(f"{STORE_DIR}/index.json", json.dumps({"other": other_entry}))
+
+    remote.flush()
+
+    index = json.loads(remote_fs.readtext(f"{STORE_DIR}/index.json"))
+    assert index["other"] == other_entry
+    assert digest("container") in index
+
+
+def test__given_index_locked_by_other_run__when_flushing__raises_timeout_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(contentstore, "_LOCK_TIMEOUT", 0.0)
+    monkeypatch.setattr(contentstore, "_LOCK_POLL_INTERVAL", 0.0)
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+    remote_fs.makedir(f"{STORE_DIR}/index.lock")
+
+    with pytest.raises(TimeoutError):
+        remote.flush()
+
+    assert not remote_fs.exists(f"{STORE_DIR}/index.json")
+
+
+def test__given_stale_lock__when_flushing__removes_lock_and_writes_index(tmp_path: Path) -> None:
+    remote_fs = LinkingOSFS(tmp_path)
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+    lock = tmp_path / STORE_DIR.lstrip("/") / "index.lock"
+    lock.mkdir()
+    an_hour_ago = time.time() - 3600
+    os.utime(lock, (an_hour_ago, an_hour_ago))
+
+    remote.flush()
+
+    assert remote_fs.exists(f"{STORE_DIR}/index.json")
+    assert not lock.exists()
+
+
+def test__when_storing_file__makes_blob_read_only(tmp_path: Path) -> None:
+    remote_fs = LinkingOSFS(tmp_path)
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+
+    target = tmp_path / "home/user/work/image.sif"
+    assert stat.S_IMODE(target.stat().st_mode) & 0o222 == 0
+    assert target.samefile(tmp_path / STORE_DIR.lstrip("/") / digest("container"))
+
+
+def test__given_stored_blob_was_changed__when_copying_same_content__uploads_blob_again() -> None:
+    remote_fs = MemoryFS()
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/image.sif", "container")
+    local.copy("/image.sif", "image.sif", filesystem=remote)
+    remote_fs.writetext(f"{STORE_DIR}/{digest('container')}", "container changed in place")
+
+    local.copy("/image.sif", "again.sif", filesystem=remote)
+
+    assert remote_fs.readtext("/home/user/work/again.sif") == "container"
+
+
+def test__given_blob_with_symlinks__when_store_exceeds_max_size__keeps_blob_while_a_symlink_points_to_it(
+    tmp_path: Path,
+) -> None:
+    remote_fs = LinkingOSFS(tmp_path, hardlinks=False)
+    local, remote, _ = make_filesystems(remote_fs, max_size=1)
+    local.internal_fs.writetext("/old.bin", "old")
+    local.internal_fs.writetext("/new.bin", "new")
+    local.copy("/old.bin", "old.bin", filesystem=remote)
+    remote.flush()
+
+    _, next_run, _ = make_filesystems(remote_fs, max_size=1)
+    local.copy("/new.bin", "new.bin", filesystem=next_run)
+    next_run.flush()
+    kept = remote_fs.exists(f"{STORE_DIR}/{digest('old')}")
+
+    remote_fs.remove("/home/user/work/old.bin")
+    _, last_run, _ = make_filesystems(remote_fs, max_size=1)
+    local.copy("/new.bin", "newer.bin", filesystem=last_run)
+    last_run.flush()
+
+    assert kept is True
+    assert remote_fs.readtext("/home/user/work/new.bin") == "new"
+    assert not remote_fs.exists(f"{STORE_DIR}/{digest('old')}")
+
+
+@pytest.mark.parametrize("hardlinks", [True, False])
+def test__when_copying_with_mode__changes_mode_of_a_copy_and_keeps_blob_read_only(
+    tmp_path: Path, hardlinks: bool
+) -> None:
+    remote_fs = LinkingOSFS(tmp_path, hardlinks)
+    local, remote, _ = make_filesystems(remote_fs)
+    local.internal_fs.writetext("/run.sh", "#!/bin/sh")
+
+    results = list(progressive_copy(local, remote, [CopyInstruction("/run.sh", "run.sh", mode=0o750)]))
+
+    target = tmp_path / "home/user/work/run.sh"
+    blob = tmp_path / STORE_DIR.lstrip("/") / digest("#!/bin/sh")
+    assert [error for result in results for error in result.errors] == []
+    assert stat.S_IMODE(target.stat().st_mode) == 0o750
+    assert stat.S_IMODE(blob.stat().st_mode) & 0o222 == 0
+    assert not target.is_symlink() and not target.samefile(blob)
+    assert target.read_text() == "#!/bin/sh"
+
+
+def test__when_uploading_with_mode__copies_blob_on_remote_machine_and_keeps_it_read_only(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, commands: List[str]
+) -> None:
+    (tmp_path / "local").mkdir()
+    (tmp_path / "local" / "run.sh").write_text("#!/bin/sh")
+    (tmp_path / "work").mkdir()
+    store_dir = tmp_path / "store"
+    local = localfilesystem(str(tmp_path / "local"))
+    remote = PyFilesystemBased(sftp_fs, str(tmp_path / "work"), content_store=ContentStore(str(store_dir)))
+
+    results = list(progressive_copy(local, remote, [CopyInstruction("run.sh", "run.sh", mode=0o750)]))
+
+    target = tmp_path / "work" / "run.sh"
+    blob = store_dir / digest("#!/bin/sh")
+    assert [error for result in results for error in result.errors] == []
+    assert stat.S_IMODE(target.stat().st_mode) == 0o750
+    assert stat.S_IMODE(blob.stat().st_mode) & 0o222 == 0
+    assert not target.samefile(blob)
+    assert len([command for command in commands if command.startswith("mkdir -p") and "cp " in command]) == 1
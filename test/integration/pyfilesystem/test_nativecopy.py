@@ -0,0 +1,138 @@
+import errno
+import os
+import stat
+from pathlib import Path
+from typing import Any, NoReturn
+
+import pytest
+from fs.memoryfs import MemoryFS
+from fs.osfs import OSFS
+
+from hpcrocket.pyfilesystem import nativecopy
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.nativecopy import NativeCopy
+
+CONTENT = bytes(range(256)) * 4096
+
+
+def unsupported(*args: Any) -> NoReturn:
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+def streaming_copy(*args: Any) -> NoReturn:
+    raise AssertionError("Local files must not be streamed")
+
+
+def test__given_local_filesystems__when_copying__copies_file_without_streaming(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    monkeypatch.setattr("fs.copy.copy_file", streaming_copy)
+    source_fs = localfilesystem(str(tmp_path))
+    target_fs = localfilesystem(str(tmp_path))
+
+    source_fs.copy("source.bin", "dir/target.bin", filesystem=target_fs)
+
+    assert (tmp_path / "dir" / "target.bin").read_bytes() == CONTENT
+
+
+def test__given_copy_file_range_is_unsupported__when_copying__falls_back_to_other_method(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    monkeypatch.setattr(nativecopy, "_try_clone", lambda *args: False)
+    monkeypatch.setattr(nativecopy, "_copy_file_range", unsupported)
+    monkeypatch.setattr(nativecopy, "_sendfile", unsupported)
+
+    copy_file(NativeCopy(), tmp_path, "source.bin", "target.bin")
+
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+
+
+def test__given_method_fails_midway__when_copying__next_method_continues_where_it_stopped(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    calls = []
+
+    def copy_once_then_fail(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+        calls.append(offset)
+        if len(calls) > 1:
+            unsupported()
+
+        return os.write(target_fd, os.pread(source_fd, 1000, offset))
+
+    monkeypatch.setattr(nativecopy, "_try_clone", lambda *args: False)
+    monkeypatch.setattr(nativecopy, "_copy_file_range", copy_once_then_fail)
+
+    copy_file(NativeCopy(), tmp_path, "source.bin", "target.bin")
+
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+
+
+def test__given_hardlinks__when_copying__links_target_to_source(tmp_path: Path) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+
+    copy_file(NativeCopy(hardlinks=True), tmp_path, "source.bin", "target.bin")
+
+    assert os.path.samefile(tmp_path / "source.bin", tmp_path / "target.bin")
+
+
+def test__given_target_linked_to_other_file__when_copying__leaves_other_file_unchanged(tmp_path: Path) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    (tmp_path / "other.bin").write_bytes(b"other")
+    os.link(tmp_path / "other.bin", tmp_path / "target.bin")
+
+    copy_file(NativeCopy(), tmp_path, "source.bin", "target.bin")
+
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+    assert (tmp_path / "other.bin").read_bytes() == b"other"
+
+
+def test__given_target_linked_to_source__when_copying__keeps_content(tmp_path: Path) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    os.link(tmp_path / "source.bin", tmp_path / "target.bin")
+
+    copy_file(NativeCopy(), tmp_path, "source.bin", "target.bin")
+
+    assert (tmp_path / "source.bin").read_bytes() == CONTENT
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize("mode", (0o755, 0o600, 0o444))
+def test__when_copying__target_gets_mode_of_source(tmp_path: Path, mode: int) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    (tmp_path / "source.bin").chmod(mode)
+
+    copy_file(NativeCopy(), tmp_path, "source.bin", "target.bin")
+
+    assert stat.S_IMODE((tmp_path / "target.bin").stat().st_mode) == mode
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+
+
+def test__when_copying_directory__copies_all_files_into_target(tmp_path: Path) -> None:
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    (tmp_path / "dir" / "a.txt").write_text("a")
+    (tmp_path / "dir" / "sub" / "b.txt").write_text("b")
+    (tmp_path / "dir" / "empty").mkdir()
+    osfs = OSFS(str(tmp_path))
+
+    NativeCopy(workers=2).copy_dir(osfs, "dir", osfs, "copy")
+
+    assert (tmp_path / "copy" / "a.txt").read_text() == "a"
+    assert (tmp_path / "copy" / "sub" / "b.txt").read_text() == "b"
+    assert (tmp_path / "copy" / "empty").is_dir()
+
+
+def test__given_filesystem_without_local_paths__when_copying__uses_fallback(tmp_path: Path) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    target_fs = MemoryFS()
+
+    NativeCopy().copy_file(OSFS(str(tmp_path)), "source.bin", target_fs, "target.bin")
+
+    assert target_fs.readbytes("target.bin") == CONTENT
+
+
+def copy_file(copier: NativeCopy, directory: Path, source: str, target: str) -> None:
+    osfs = OSFS(str(directory))
+    copier.copy_file(osfs, source, osfs, target)
@@ -0,0 +1,348 @@
+import io
+import os
+import stat
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import paramiko
+import pytest
+from fs.errors import FileExpected, OperationFailed, ResourceNotFound
+from paramiko.sftp import CMD_FSETSTAT, CMD_READ, CMD_SETSTAT
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction, progressive_copy
+from hpcrocket.core.filesystem.transfermonitor import TransferMonitor
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh import chmodsshfs
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+from test.testdoubles.sftpserver import SFTPStandIn
+
+REQUEST_SIZE = 1024
+MAX_REQUESTS = 4
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def sftp_options() -> Dict[str, Any]:
+    return {"request_size": REQUEST_SIZE, "max_requests": MAX_REQUESTS}
+
+
+@pytest.fixture
+def pending_writes(monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    """
+    Records the number of unacknowledged write requests after every write request
+    """
+    recorded: List[int] = []
+    original_write = paramiko.SFTPFile._write  # type: ignore[attr-defined]
+
+    def write(file: paramiko.SFTPFile, data: bytes) -> Any:
+        written = original_write(file, data)
+        recorded.append(len(file._reqs))  # type: ignore[attr-defined]
+        return written
+
+    monkeypatch.setattr(paramiko.SFTPFile, "_write", write)
+    return recorded
+
+
+def test__when_uploading__writes_file_content(sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path) -> None:
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BytesIO(CONTENT))
+
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+
+
+def test__when_uploading_local_file__keeps_its_permissions_without_extra_request(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    (tmp_path / "local.sh").write_bytes(CONTENT)
+    os.chmod(tmp_path / "local.sh", 0o750)
+
+    with open(tmp_path / "local.sh", "rb") as file:
+        sftp_fs.upload(str(tmp_path / "remote.sh"), file)
+
+    assert stat.S_IMODE((tmp_path / "remote.sh").stat().st_mode) == 0o750
+    assert CMD_FSETSTAT in request_types
+    assert CMD_SETSTAT not in request_types
+
+
+def test__when_uploading_with_permissions__sets_permissions(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.bin").write_bytes(b"old")
+    os.chmod(tmp_path / "file.bin", 0o600)
+
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BytesIO(CONTENT), permissions=0o644)
+
+    assert stat.S_IMODE((tmp_path / "file.bin").stat().st_mode) == 0o644
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+
+
+def test__when_setting_permissions_of_many_files__changes_all_with_one_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    paths = [tmp_path / f"file {i}.txt" for i in range(3)]
+    for path in paths:
+        path.write_text("")
+
+    commands: List[str] = []
+    client = sftp_fs._internal_fs._client  # type: ignore[attr-defined]
+    original_exec_command = client.exec_command
+
+    def exec_command(command: str) -> Any:
+        commands.append(command)
+        return original_exec_command(command)
+
+    monkeypatch.setattr(client, "exec_command", exec_command)
+
+    sftp_fs.set_permissions([str(path) for path in paths], 0o751)
+
+    assert [stat.S_IMODE(path.stat().st_mode) for path in paths] == [0o751] * 3
+    assert len(commands) == 1
+
+
+def test__when_setting_permissions_of_missing_file__raises_os_error(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with pytest.raises(OSError):
+        sftp_fs.set_permissions([str(tmp_path / "missing.txt")], 0o644)
+
+
+def test__when_uploading__sends_requests_of_request_size_and_limits_pending_requests(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, pending_writes: List[int]
+) -> None:
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BytesIO(CONTENT))
+
+    assert len(pending_writes) == len(CONTENT) // REQUEST_SIZE
+    assert max(pending_writes) == MAX_REQUESTS
+
+
+def test__when_uploading_to_directory__raises_file_expected(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with pytest.raises(FileExpected):
+        sftp_fs.upload(str(tmp_path), io.BytesIO(CONTENT))
+
+
+def test__when_uploading_to_missing_directory__raises_resource_not_found(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with pytest.raises(ResourceNotFound):
+        sftp_fs.upload(str(tmp_path / "missing" / "file.bin"), io.BytesIO(CONTENT))
+
+
+def test__when_downloading__writes_file_content(sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path) -> None:
+    (tmp_path / "file.bin").write_bytes(CONTENT)
+    target = io.BytesIO()
+
+    sftp_fs.download(str(tmp_path / "file.bin"), target)
+
+    assert target.getvalue() == CONTENT
+
+
+def test__when_downloading_to_local_file__writes_file_with_exact_size(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.bin").write_bytes(CONTENT)
+
+    with open(tmp_path / "local.bin", "wb") as target:
+        sftp_fs.download(str(tmp_path / "file.bin"), target)
+
+    assert (tmp_path / "local.bin").read_bytes() == CONTENT
+
+
+def test__when_download_to_local_file_fails__keeps_only_downloaded_content(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "file.bin").write_bytes(CONTENT)
+    monkeypatch.setattr(chmodsshfs, "_read_ahead", _failing_read_ahead)
+
+    with open(tmp_path / "local.bin", "wb") as target, pytest.raises(OperationFailed):
+        sftp_fs.download(str(tmp_path / "file.bin"), target)
+
+    assert (tmp_path / "local.bin").read_bytes() == CONTENT[:REQUEST_SIZE]
+
+
+def _failing_read_ahead(*args: Any) -> Iterator[bytes]:
+    yield CONTENT[:REQUEST_SIZE]
+    raise OSError("Connection lost")
+
+
+def test__when_uploading_from_file_with_short_reads__sends_requests_of_request_size(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, pending_writes: List[int]
+) -> None:
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BufferedReader(ShortReadingFile(CONTENT)))
+
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+    assert len(pending_writes) == len(CONTENT) // REQUEST_SIZE
+
+
+class ShortReadingFile(io.RawIOBase):
+    def __init__(self, content: bytes) -> None:
+        self._content = io.BytesIO(content)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        return self._content.readinto(memoryview(buffer)[: REQUEST_SIZE // 3])
+
+
+def test__when_downloading__sends_read_requests_of_request_size(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "file.bin").write_bytes(CONTENT)
+    read_lengths: List[int] = []
+    original_request = paramiko.SFTPClient._async_request  # type: ignore[attr-defined]
+
+    def async_request(client: paramiko.SFTPClient, fileobj: Any, t: int, *args: Any) -> Any:
+        if t == CMD_READ:
+            read_lengths.append(args[-1])
+
+        return original_request(client, fileobj, t, *args)
+
+    monkeypatch.setattr(paramiko.SFTPClient, "_async_request", async_request)
+
+    sftp_fs.download(str(tmp_path / "file.bin"), io.BytesIO())
+
+    assert read_lengths == [REQUEST_SIZE] * (len(CONTENT) // REQUEST_SIZE)
+
+
+def test__when_downloading_directory__raises_file_expected(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with pytest.raises(FileExpected):
+        sftp_fs.download(str(tmp_path), io.BytesIO())
+
+
+def test__when_downloading_missing_file__raises_resource_not_found(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with pytest.raises(ResourceNotFound):
+        sftp_fs.download(str(tmp_path / "missing.bin"), io.BytesIO())
+
+
+def test__when_reading_opened_file__reads_file_content(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.bin").write_bytes(CONTENT)
+
+    with sftp_fs.openbin(str(tmp_path / "file.bin")) as file:
+        content = file.read()
+
+    assert content == CONTENT
+
+
+def test__when_writing_opened_file__writes_file_content(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    with sftp_fs.openbin(str(tmp_path / "file.bin"), "w") as file:
+        file.write(CONTENT)
+
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+
+
+def test__when_transferring_over_slow_connection__transfers_file_content(tmp_path: Path) -> None:
+    (tmp_path / "source.bin").write_bytes(CONTENT)
+    with SFTPStandIn(latency=0.005) as server:
+        fs = PermissionChangingSSHFSDecorator(
+            host="localhost", user="user", passwd="1234", sock=server.connect(), look_for_keys=False, allow_agent=False
+        )
+        with fs:
+            buffer = io.BytesIO()
+            fs.download(str(tmp_path / "source.bin"), buffer)
+            buffer.seek(0)
+            fs.upload(str(tmp_path / "target.bin"), buffer)
+
+    assert (tmp_path / "target.bin").read_bytes() == CONTENT
+
+
+def test__when_uploading_through_sub_filesystem__uses_pipelined_upload(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, pending_writes: List[int]
+) -> None:
+    sub_fs = sftp_fs.opendir(str(tmp_path))
+
+    sub_fs.upload("file.bin", io.BytesIO(CONTENT))
+
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+    assert max(pending_writes) == MAX_REQUESTS
+
+
+def open_sessions(fs: PermissionChangingSSHFSDecorator) -> int:
+    client: paramiko.SSHClient = fs._internal_fs._client  # type: ignore[attr-defined]
+    transport = client.get_transport()
+    assert transport is not None
+    return sum(1 for channel in transport._channels.values() if not channel.closed)  # type: ignore[attr-defined]
+
+
+def test__when_closing_channel__closes_its_sftp_session_but_keeps_connection(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    sessions = open_sessions(sftp_fs)
+    channel = sftp_fs.open_channel()
+
+    channel.close()
+
+    assert open_sessions(sftp_fs) == sessions
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BytesIO(CONTENT))
+    assert (tmp_path / "file.bin").read_bytes() == CONTENT
+
+
+def test__when_copying_with_many_workers_repeatedly__keeps_connection_and_closes_worker_sessions(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    for index in range(8):
+        (tmp_path / f"file{index}.bin").write_bytes(CONTENT)
+
+    local_fs = localfilesystem(str(tmp_path))
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path), str(tmp_path))
+    sessions = open_sessions(sftp_fs)
+    for target in ("first", "second", "third"):
+        (tmp_path / target).mkdir()
+        instructions = [CopyInstruction("file*.bin", target)]
+        results = list(progressive_copy(local_fs, remote_fs, instructions, workers=4))
+
+        assert not [error for result in results for error in result.errors]
+
+    assert open_sessions(sftp_fs) == sessions
+
+
+def test__when_uploading__counts_every_sent_request(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    before = sftp_fs.request_count
+
+    sftp_fs.upload(str(tmp_path / "file.bin"), io.BytesIO(CONTENT))
+
+    assert sftp_fs.request_count - before == len(request_types) > len(CONTENT) // REQUEST_SIZE
+
+
+def test__when_running_commands_on_channels__counts_them_on_the_filesystem(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int], commands: List[str]
+) -> None:
+    (tmp_path / "run.sh").write_bytes(CONTENT)
+    before = sftp_fs.request_count
+    channel = sftp_fs.open_channel()
+
+    channel.getinfo(str(tmp_path / "run.sh"))
+    channel.set_permissions([str(tmp_path / "run.sh")], 0o750)
+    channel.close()
+
+    assert sftp_fs.request_count - before == len(request_types) + len(commands)
+    assert commands[-1].startswith("chmod 750")
+
+
+def test__when_copying_with_many_workers__reports_requests_of_all_workers(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int], commands: List[str]
+) -> None:
+    for index in range(4):
+        (tmp_path / f"file{index}.bin").write_bytes(CONTENT)
+
+    (tmp_path / "target").mkdir()
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path), str(tmp_path))
+    monitor = TransferMonitor("Copying files", operations=remote_fs.request_count)
+    instructions = [CopyInstruction("file*.bin", "target")]
+    local_fs = localfilesystem(str(tmp_path))
+    results = list(progressive_copy(local_fs, remote_fs, instructions, workers=4, monitor=monitor))
+
+    assert not [error for result in results for error in result.errors]
+    assert monitor.progress.operations == len(request_types) + len(commands)
+    assert monitor.progress.operations_per_file > len(CONTENT) // REQUEST_SIZE
@@ -1,6 +1,8 @@
 from io import TextIOWrapper
 import os.path
-from typing import List, Optional, cast
+import stat
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, cast
 import unittest
 from unittest.mock import MagicMock
 
@@ -8,8 +10,10 @@ import pytest
 from test.test_filesystem_abc import FilesystemTest
 
 from fs.memoryfs import MemoryFS
+from fs.osfs import OSFS
 
-from hpcrocket.core.filesystem import Filesystem
+from hpcrocket.core.filesystem import FileStat, Filesystem
+from hpcrocket.core.filesystem.progressive import CopyInstruction, plan_copy, progressive_clean, progressive_copy
 from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
 
 
@@ -32,15 +36,22 @@ class NonPyFilesystemBasedFilesystem(Filesystem):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         pass
 
-    def delete(self, path: str) -> None:
+    def delete(self, path: str, literal: bool = False) -> None:
         ...
 
     def exists(self, path: str) -> bool:
         ...
 
+    def stat(self, path: str) -> FileStat:
+        ...
+
+    def checksum(self, path: str) -> str:
+        ...
+
     def openread(self, path: str) -> TextIOWrapper:
         ...
 
@@ -106,3 +117,158 @@ class PyFilesystemBasedTest(FilesystemTest, unittest.TestCase):
 
         with pytest.raises(RuntimeError):
             sut.copy(self.SOURCE, self.TARGET, filesystem=target_fs)
+
+
+class PermissionRecordingMemoryFS(MemoryFS):
+    def __init__(self) -> None:
+        super().__init__()
+        self.permission_calls: List[Tuple[List[str], int]] = []
+
+    def set_permissions(self, paths: Sequence[str], permissions: int) -> None:
+        self.permission_calls.append((list(paths), permissions))
+
+
+def test__given_filesystem_that_sets_permissions__when_setting_permissions__sets_all_at_once() -> None:
+    mem_fs = PermissionRecordingMemoryFS()
+    filesystem = PyFilesystemBased(mem_fs, "/home/user/work", "/home/user")
+
+    filesystem.set_permissions(["run.sh", "~/bin/tool", "/opt/data.bin"], 0o755)
+
+    assert mem_fs.permission_calls == [(["/home/user/work/run.sh", "/home/user/bin/tool", "/opt/data.bin"], 0o755)]
+
+
+def test__given_local_filesystem__when_setting_permissions__changes_file_modes(tmp_path: Path) -> None:
+    (tmp_path / "run.sh").write_text("")
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    filesystem.set_permissions(["run.sh"], 0o750)
+
+    assert stat.S_IMODE((tmp_path / "run.sh").stat().st_mode) == 0o750
+
+
+def test__given_local_filesystem__when_setting_permissions_of_missing_file__raises_file_not_found(
+    tmp_path: Path,
+) -> None:
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    with pytest.raises(FileNotFoundError):
+        filesystem.set_permissions(["missing.sh"], 0o750)
+
+
+def test__given_nested_directory__when_planning_copy__plans_files_of_all_subdirectories(tmp_path: Path) -> None:
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    (tmp_path / "dir" / "a.txt").write_text("123")
+    (tmp_path / "dir" / "sub" / "b.txt").write_text("12")
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    plan = plan_copy(filesystem, PyFilesystemBased(MemoryFS()), [CopyInstruction("dir", "copy")])
+
+    assert sorted((file.destination, file.size) for file in plan.files) == [("copy/a.txt", 3), ("copy/sub/b.txt", 2)]
+
+
+def test__when_globbing_single_level__returns_directories_instead_of_their_contents(tmp_path: Path) -> None:
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    (tmp_path / "dir" / "a.txt").write_text("a")
+    (tmp_path / "dir" / "sub" / "b.txt").write_text("b")
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    assert sorted(filesystem.glob("dir/*")) == ["dir/a.txt", "dir/sub"]
+    assert sorted(filesystem.glob("dir/**/*.txt")) == ["dir/a.txt", "dir/sub/b.txt"]
+
+
+def test__when_deleting_recursive_glob__deletes_directories_with_their_contents(tmp_path: Path) -> None:
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    (tmp_path / "dir" / "sub" / "b.txt").write_text("b")
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    filesystem.delete("dir/**")
+
+    assert os.listdir(tmp_path / "dir") == []
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test__given_file_names_with_wildcard_characters__when_copying_glob__copies_them_as_they_are(
+    tmp_path: Path, workers: int
+) -> None:
+    (tmp_path / "src").mkdir()
+    for name in ["a[1].txt", "{b,c}.txt", "d.txt"]:
+        (tmp_path / "src" / name).write_text(name)
+
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    results = list(progressive_copy(filesystem, filesystem, [CopyInstruction("src/*.txt", "dst")], workers=workers))
+
+    assert [error for result in results for error in result.errors] == []
+    assert sorted(file for result in results for file in result.copied_files) == [
+        "dst/a[1].txt",
+        "dst/d.txt",
+        "dst/{b,c}.txt",
+    ]
+    assert sorted(os.listdir(tmp_path / "dst")) == ["a[1].txt", "d.txt", "{b,c}.txt"]
+    assert (tmp_path / "dst" / "a[1].txt").read_text() == "a[1].txt"
+
+
+def test__given_copied_files_with_wildcard_characters__when_cleaning_literally__deletes_exactly_them(
+    tmp_path: Path,
+) -> None:
+    for name in ["a[1].txt", "a1.txt", "{b,c}.txt", "b.txt"]:
+        (tmp_path / name).write_text(name)
+
+    filesystem = PyFilesystemBased(OSFS(str(tmp_path)))
+
+    errors = list(progressive_clean(filesystem, ["a[1].txt", "{b,c}.txt"], literal=True))
+
+    assert errors == []
+    assert sorted(os.listdir(tmp_path)) == ["a1.txt", "b.txt"]
+
+
+class BulkRemovingMemoryFS(MemoryFS):
+    def __init__(self) -> None:
+        super().__init__()
+        self.remove_calls: List[Tuple[List[str], bool]] = []
+
+    def remove_all(self, paths: Sequence[str], detach: bool = False) -> None:
+        self.remove_calls.append((list(paths), detach))
+
+
+def test__given_filesystem_that_removes_in_bulk__when_deleting_many__removes_all_matches_at_once() -> None:
+    mem_fs = BulkRemovingMemoryFS()
+    mem_fs.makedirs("/home/user/work/out")
+    mem_fs.writetext("/home/user/work/out/a.log", "")
+    mem_fs.writetext("/home/user/work/out/b.log", "")
+    mem_fs.writetext("/home/user/work/run.sh", "")
+    filesystem = PyFilesystemBased(mem_fs, "/home/user/work", "/home/user")
+
+    errors = filesystem.delete_many(["run.sh", "out/*.log"], detach=True)
+
+    assert errors == []
+    assert len(mem_fs.remove_calls) == 1
+    paths, detach = mem_fs.remove_calls[0]
+    assert sorted(paths) == ["/home/user/work/out/a.log", "/home/user/work/out/b.log", "/home/user/work/run.sh"]
+    assert detach is True
+
+
+def test__given_filesystem_that_removes_in_bulk__when_deleting_missing_paths__returns_file_not_found_errors() -> None:
+    mem_fs = BulkRemovingMemoryFS()
+    mem_fs.makedirs("/work")
+    mem_fs.writetext("/work/run.sh", "")
+    filesystem = PyFilesystemBased(mem_fs, "/work")
+
+    errors = filesystem.delete_many(["missing.txt", "missing_dir/*.log", "run.sh"])
+
+    assert [type(error) for error in errors] == [FileNotFoundError, FileNotFoundError]
+    assert mem_fs.remove_calls == [(["/work/run.sh"], False)]
+
+
+def test__given_filesystem_without_bulk_removal__when_deleting_many__deletes_one_by_one() -> None:
+    mem_fs = MemoryFS()
+    mem_fs.makedirs("/work/out")
+    mem_fs.writetext("/work/out/a.log", "")
+    mem_fs.writetext("/work/run.sh", "")
+    filesystem = PyFilesystemBased(mem_fs, "/work")
+
+    errors = filesystem.delete_many(["run.sh", "out", "missing.txt"])
+
+    assert [type(error) for error in errors] == [FileNotFoundError]
+    assert not mem_fs.exists("/work/run.sh")
+    assert not mem_fs.exists("/work/out")
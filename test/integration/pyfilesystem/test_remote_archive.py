@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import List
+
+from paramiko.sftp import CMD_OPEN
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction, archive_copy
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+FILES = ["output/a.txt", "output/sub/b.txt", "output/sub/deep/c.txt"]
+
+
+def test__when_copying_directory_as_archive__uploads_its_files_without_opening_them_over_sftp(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    for file in FILES:
+        (tmp_path / "local" / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "local" / file).write_text(file)
+
+    (tmp_path / "remote").mkdir()
+    local_fs = localfilesystem(str(tmp_path / "local"))
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path / "remote"))
+
+    result = archive_copy(local_fs, remote_fs, [CopyInstruction("output", "results")])
+
+    assert result.errors == []
+    assert CMD_OPEN not in request_types
+    for file in FILES:
+        assert (tmp_path / "remote" / "results" / file.removeprefix("output/")).read_text() == file
+
+
+def test__when_collecting_directory_as_archive__downloads_its_files_with_one_tar_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int], commands: List[str]
+) -> None:
+    for file in FILES:
+        (tmp_path / "remote" / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "remote" / file).write_text(file)
+
+    (tmp_path / "remote" / "output" / "empty").mkdir()
+    (tmp_path / "local").mkdir()
+    local_fs = localfilesystem(str(tmp_path / "local"))
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path / "remote"))
+
+    result = archive_copy(remote_fs, local_fs, [CopyInstruction("output", "collected")], "gzip")
+
+    assert result.errors == []
+    assert CMD_OPEN not in request_types
+    assert len([command for command in commands if command.startswith("tar")]) == 1
+    assert (tmp_path / "local" / "collected" / "empty").is_dir()
+    for file in FILES:
+        assert (tmp_path / "local" / "collected" / file.removeprefix("output/")).read_text() == file
+
+
+def test__when_remote_tar_fails__returns_error_instead_of_raising(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "local" / "output").mkdir(parents=True)
+    (tmp_path / "local" / "output" / "a.txt").write_text("a")
+    (tmp_path / "remote").mkdir()
+    (tmp_path / "remote" / "blocker").write_text("not a directory")
+    local_fs = localfilesystem(str(tmp_path / "local"))
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path / "remote"))
+
+    result = archive_copy(local_fs, remote_fs, [CopyInstruction("output", "blocker/results")])
+
+    assert result.copied_files == []
+    assert [type(error) for error in result.errors] == [OSError]
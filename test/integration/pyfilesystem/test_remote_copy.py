@@ -0,0 +1,105 @@
+import os
+import shutil
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+
+@pytest.fixture
+def shared(tmp_path: Path) -> Path:
+    shared = tmp_path / "shared"
+    (shared / "dataset" / "sub").mkdir(parents=True)
+    (shared / "dataset" / "a.dat").write_text("a")
+    (shared / "dataset" / "sub" / "b.dat").write_text("b")
+    (shared / "model.pt").write_text("model")
+    return shared
+
+
+@pytest.fixture
+def jobdir(tmp_path: Path) -> Path:
+    jobdir = tmp_path / "job"
+    jobdir.mkdir()
+    return jobdir
+
+
+def test__when_copying_within_remote__copies_files_and_directories_with_single_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path, commands: List[str]
+) -> None:
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    copied = sut.copy_within([(str(shared / "dataset"), "data"), (str(shared / "model.pt"), "models/model.pt")])
+
+    assert copied == ["data", "models/model.pt"]
+    assert (jobdir / "data" / "sub" / "b.dat").read_text() == "b"
+    assert (jobdir / "models" / "model.pt").read_text() == "model"
+    assert len([command for command in commands if "cp -R" in command]) == 1
+
+
+def test__when_copying_glob_within_remote__copies_matches_into_target(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path
+) -> None:
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    copied = sut.copy_within([(str(shared / "dataset" / "*"), "data")])
+
+    assert sorted(copied) == ["data/a.dat", "data/sub"]
+    assert (jobdir / "data" / "sub" / "b.dat").read_text() == "b"
+
+
+def test__when_linking_within_remote__creates_hard_links(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path
+) -> None:
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    sut.copy_within([(str(shared / "dataset"), "data")], method="link")
+
+    assert os.path.samefile(shared / "dataset" / "sub" / "b.dat", jobdir / "data" / "sub" / "b.dat")
+
+
+def test__given_target_linked_to_source__when_overwriting__leaves_source_unchanged(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path
+) -> None:
+    os.link(shared / "model.pt", jobdir / "model.pt")
+    (jobdir / "other.pt").write_text("other")
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    sut.copy_within([("other.pt", "model.pt")], overwrite=True)
+
+    assert (jobdir / "model.pt").read_text() == "other"
+    assert (shared / "model.pt").read_text() == "model"
+
+
+def test__given_existing_target__when_copying_without_overwrite__raises_file_exists_error(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path, commands: List[str]
+) -> None:
+    (jobdir / "model.pt").write_text("existing")
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    with pytest.raises(FileExistsError):
+        sut.copy_within([(str(shared / "model.pt"), "model.pt")])
+
+    assert not [command for command in commands if "cp -R" in command]
+
+
+def test__given_missing_source__when_copying_within_remote__raises_file_not_found_error(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path
+) -> None:
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    with pytest.raises(FileNotFoundError):
+        sut.copy_within([(str(shared / "missing"), "data")])
+
+
+@pytest.mark.skipif(shutil.which("rsync") is None, reason="rsync is not installed")
+def test__when_syncing_within_remote__copies_directory_contents_into_target(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path, jobdir: Path
+) -> None:
+    sut = PyFilesystemBased(sftp_fs, str(jobdir))
+
+    sut.copy_within([(str(shared / "dataset"), "data")], method="rsync")
+
+    assert (jobdir / "data" / "sub" / "b.dat").read_text() == "b"
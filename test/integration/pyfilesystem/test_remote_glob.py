@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from paramiko.sftp import CMD_OPENDIR, CMD_STAT
+
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+FILES = ["a.txt", "res1.txt", "sub/b.txt", "sub/deep/c.txt", "sub/d.log", "other/e.txt"]
+
+
+@pytest.fixture
+def workdir(tmp_path: Path) -> Path:
+    for file in FILES:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text(file)
+
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "*",
+        "*.txt",
+        "sub/*",
+        "sub/*.txt",
+        "**/*.txt",
+        "*/*.txt",
+        "sub/**/*.log",
+        "~/*.txt",
+        "res?.txt",
+        "sub/[bd].*",
+        "{sub,other}/*.txt",
+        "*/",
+    ],
+)
+def test__when_globbing_remote_filesystem__finds_same_paths_as_local_glob(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path, commands: List[str], pattern: str
+) -> None:
+    remote_fs = PyFilesystemBased(sftp_fs, str(workdir), str(workdir))
+    local_fs = localfilesystem(str(workdir))
+    local_fs._homedir = workdir  # type: ignore[attr-defined]
+
+    actual = remote_fs.glob(pattern)
+
+    assert sorted(actual) == sorted(local_fs.glob(pattern))
+    assert len([command for command in commands if command.startswith("find")]) == 1
+
+
+def test__when_globbing_remote_filesystem__does_not_list_directories_below_glob_directory_over_sftp(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path, request_types: List[int]
+) -> None:
+    remote_fs = PyFilesystemBased(sftp_fs, str(workdir))
+
+    remote_fs.glob("**/*.txt")
+
+    # Only the parent of the glob directory is listed to check that the directory exists
+    assert request_types.count(CMD_OPENDIR) == 1
+
+
+def test__when_deleting_glob__uses_found_entries_instead_of_stat_requests(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path, request_types: List[int]
+) -> None:
+    remote_fs = PyFilesystemBased(sftp_fs, str(workdir))
+
+    remote_fs.delete("sub/*.log")
+
+    assert not (workdir / "sub" / "d.log").exists()
+    assert (workdir / "sub" / "b.txt").exists()
+    assert CMD_STAT not in request_types
+
+
+def test__when_remote_find_fails__globs_over_sftp(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def failing_find(*args: Any, **kwargs: Any) -> Any:
+        raise OSError("find: unknown predicate '-printf'")
+
+    monkeypatch.setattr(sftp_fs, "find", failing_find)
+    remote_fs = PyFilesystemBased(sftp_fs, str(workdir))
+
+    assert sorted(remote_fs.glob("sub/*.txt")) == ["sub/b.txt"]
+
+
+def test__when_finding_entries__returns_relative_paths_with_sizes(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path
+) -> None:
+    entries = list(sftp_fs.find(str(workdir / "sub")))
+
+    sizes = {path: info.size for path, info in entries if not info.is_dir}
+    assert sizes == {"/b.txt": len("sub/b.txt"), "/d.log": len("sub/d.log"), "/deep/c.txt": len("sub/deep/c.txt")}
+
+
+def test__given_unfinished_find__does_not_treat_unlisted_entries_as_missing(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path
+) -> None:
+    entries = sftp_fs.find(str(workdir))
+
+    next(entries)
+    entries.close()
+
+    assert all(sftp_fs.exists(str(workdir / file)) for file in FILES)
+
+
+def test__when_iterating_remote_glob__yields_same_paths_as_glob(
+    sftp_fs: PermissionChangingSSHFSDecorator, workdir: Path
+) -> None:
+    remote_fs = PyFilesystemBased(sftp_fs, str(workdir))
+
+    assert sorted(remote_fs.iglob("**/*.txt")) == sorted(remote_fs.glob("**/*.txt"))
@@ -0,0 +1,164 @@
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, List
+
+import pytest
+from fs.memoryfs import MemoryFS
+
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.pyfilesystem.resumable import ResumableTransfer
+
+CHUNK_SIZE = 4
+CONTENT = b"0123456789abcdefghij"
+
+
+class WriteRecordingFile:
+    def __init__(self, file: BinaryIO, writes: List[bytes], max_writes: int) -> None:
+        self._file = file
+        self._writes = writes
+        self._max_writes = max_writes
+
+    def write(self, data: bytes) -> int:
+        if len(self._writes) >= self._max_writes:
+            raise ConnectionError("Connection lost")
+
+        self._writes.append(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+    def __enter__(self) -> "WriteRecordingFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._file.close()
+
+
+class WriteRecordingMemoryFS(MemoryFS):
+    """
+    Records the data written to files opened for writing and drops the connection after `max_writes` writes
+    """
+
+    def __init__(self, max_writes: int = 1000) -> None:
+        super().__init__()
+        self.writes: List[bytes] = []
+        self.max_writes = max_writes
+
+    def openbin(self, path: str, mode: str = "r", buffering: int = -1, **options: Any) -> BinaryIO:
+        file = super().openbin(path, mode, buffering, **options)
+        if "r" in mode and "+" not in mode:
+            return file
+
+        return WriteRecordingFile(file, self.writes, self.max_writes)  # type: ignore
+
+
+def make_transfer(state_dir: Path, min_size: int = 1) -> ResumableTransfer:
+    return ResumableTransfer(str(state_dir), min_size=min_size, chunk_size=CHUNK_SIZE)
+
+
+def make_source(content: bytes = CONTENT) -> MemoryFS:
+    source_fs = MemoryFS()
+    source_fs.writebytes("/large.bin", content)
+    return source_fs
+
+
+def interrupt_after(transfer: ResumableTransfer, source_fs: MemoryFS, chunks: int) -> WriteRecordingMemoryFS:
+    target_fs = WriteRecordingMemoryFS(max_writes=chunks)
+    with pytest.raises(ConnectionError):
+        transfer.copy_file(source_fs, "/large.bin", target_fs, "/large.bin")
+
+    return target_fs
+
+
+def resume(transfer: ResumableTransfer, source_fs: MemoryFS, interrupted_fs: MemoryFS) -> WriteRecordingMemoryFS:
+    target_fs = WriteRecordingMemoryFS()
+    part = "/large.bin" + ResumableTransfer.PART_SUFFIX
+    target_fs.writebytes(part, interrupted_fs.readbytes(part))
+    target_fs.writes.clear()
+    transfer.copy_file(source_fs, "/large.bin", target_fs, "/large.bin")
+    return target_fs
+
+
+def test__when_copying_large_file__copies_file_in_chunks(tmp_path: Path) -> None:
+    target_fs = WriteRecordingMemoryFS()
+
+    make_transfer(tmp_path).copy_file(make_source(), "/large.bin", target_fs, "/large.bin")
+
+    assert target_fs.readbytes("/large.bin") == CONTENT
+    assert target_fs.writes == [b"0123", b"4567", b"89ab", b"cdef", b"ghij"]
+    assert not target_fs.exists("/large.bin" + ResumableTransfer.PART_SUFFIX)
+    assert os.listdir(tmp_path) == []
+
+
+def test__when_copying_file_smaller_than_min_size__copies_file_at_once(tmp_path: Path) -> None:
+    target_fs = WriteRecordingMemoryFS()
+
+    make_transfer(tmp_path, min_size=1024).copy_file(make_source(), "/large.bin", target_fs, "/large.bin")
+
+    assert target_fs.readbytes("/large.bin") == CONTENT
+    assert os.listdir(tmp_path) == []
+
+
+def test__when_copy_is_interrupted__keeps_target_untouched_and_saves_progress(tmp_path: Path) -> None:
+    transfer = make_transfer(tmp_path)
+
+    target_fs = interrupt_after(transfer, make_source(), chunks=2)
+
+    assert not target_fs.exists("/large.bin")
+    assert target_fs.readbytes("/large.bin" + ResumableTransfer.PART_SUFFIX) == b"01234567"
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test__when_resuming_interrupted_copy__copies_only_remaining_chunks(tmp_path: Path) -> None:
+    source_fs = make_source()
+    interrupted_fs = interrupt_after(make_transfer(tmp_path), source_fs, chunks=2)
+
+    target_fs = resume(make_transfer(tmp_path), source_fs, interrupted_fs)
+
+    assert target_fs.writes == [b"89ab", b"cdef", b"ghij"]
+    assert target_fs.readbytes("/large.bin") == CONTENT
+    assert os.listdir(tmp_path) == []
+
+
+def test__when_last_chunk_of_partial_file_is_corrupted__restarts_copy(tmp_path: Path) -> None:
+    source_fs = make_source()
+    interrupted_fs = interrupt_after(make_transfer(tmp_path), source_fs, chunks=2)
+    interrupted_fs.writes.clear()
+    interrupted_fs.writebytes("/large.bin" + ResumableTransfer.PART_SUFFIX, b"0123XXXX")
+
+    target_fs = resume(make_transfer(tmp_path), source_fs, interrupted_fs)
+
+    assert target_fs.writes[0] == b"0123"
+    assert target_fs.readbytes("/large.bin") == CONTENT
+
+
+def test__when_source_changed_since_interruption__restarts_copy(tmp_path: Path) -> None:
+    interrupted_fs = interrupt_after(make_transfer(tmp_path), make_source(), chunks=2)
+    changed_content = CONTENT + b"klmn"
+
+    target_fs = resume(make_transfer(tmp_path), make_source(changed_content), interrupted_fs)
+
+    assert target_fs.writes[0] == b"0123"
+    assert target_fs.readbytes("/large.bin") == changed_content
+
+
+def test__when_target_exists__replaces_it_after_copy(tmp_path: Path) -> None:
+    target_fs = WriteRecordingMemoryFS()
+    target_fs.writebytes("/large.bin", b"old")
+
+    make_transfer(tmp_path).copy_file(make_source(), "/large.bin", target_fs, "/large.bin")
+
+    assert target_fs.readbytes("/large.bin") == CONTENT
+
+
+def test__when_copying_between_filesystems_with_resumable_transfer__copies_in_chunks(tmp_path: Path) -> None:
+    target_fs = WriteRecordingMemoryFS()
+    target_fs.makedirs("/home/user")
+    local = PyFilesystemBased(make_source())
+    remote = PyFilesystemBased(target_fs, "/home/user", "/home/user", resumable_transfer=make_transfer(tmp_path))
+
+    local.copy("/large.bin", "data/large.bin", filesystem=remote)
+
+    assert target_fs.readbytes("/home/user/data/large.bin") == CONTENT
+    assert len(target_fs.writes) == 5
@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+from hpcrocket.core.launchoptions import SharedPathOptions
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.pyfilesystem.sharedpaths import verify_shared_paths
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+
+@pytest.fixture
+def shared(tmp_path: Path) -> Path:
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    return shared
+
+
+@pytest.fixture
+def no_sftp_transfers(sftp_fs: PermissionChangingSSHFSDecorator, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args: Any, **kwargs: Any) -> None:
+        pytest.fail("transferred over SFTP")
+
+    monkeypatch.setattr(sftp_fs, "upload", fail)
+    monkeypatch.setattr(sftp_fs, "download", fail)
+
+
+def test__when_verifying_directory_mounted_on_both_sides__maps_remote_to_local_directory(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path
+) -> None:
+    shared_paths = verify_shared_paths(sftp_fs, [SharedPathOptions(str(shared))], home="/")
+
+    assert shared_paths == {str(shared): str(shared)}
+    assert os.listdir(shared) == []
+
+
+def test__when_verifying_with_home_directory__expands_tilde_on_remote_side(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, shared: Path
+) -> None:
+    shared_paths = verify_shared_paths(sftp_fs, [SharedPathOptions("~/shared", str(shared))], home=str(tmp_path))
+
+    assert shared_paths == {str(shared): str(shared)}
+
+
+def test__when_verifying_with_local_directory_that_is_not_mounted__skips_directory(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, shared: Path
+) -> None:
+    other = tmp_path / "other"
+    other.mkdir()
+
+    shared_paths = verify_shared_paths(sftp_fs, [SharedPathOptions(str(shared), str(other))], home="/")
+
+    assert shared_paths == {}
+    assert os.listdir(shared) == []
+
+
+def test__when_verifying_missing_remote_directory__skips_directory(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    shared_paths = verify_shared_paths(sftp_fs, [SharedPathOptions(str(tmp_path / "missing"))], home="/")
+
+    assert shared_paths == {}
+
+
+@pytest.mark.usefixtures("no_sftp_transfers")
+def test__when_uploading_to_shared_directory__copies_on_local_machine(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, shared: Path
+) -> None:
+    (tmp_path / "input.txt").write_text("input")
+    sftp_fs.share_paths({str(shared): str(shared)})
+    local = localfilesystem(str(tmp_path))
+    sut = PyFilesystemBased(sftp_fs, str(shared))
+
+    local.copy("input.txt", "job/input.txt", filesystem=sut)
+
+    assert (shared / "job" / "input.txt").read_text() == "input"
+
+
+@pytest.mark.usefixtures("no_sftp_transfers")
+def test__when_downloading_from_shared_directory__copies_on_local_machine(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, shared: Path
+) -> None:
+    (shared / "results").mkdir()
+    (shared / "results" / "a.out").write_text("a")
+    (shared / "results" / "b.out").write_text("b")
+    sftp_fs.share_paths({str(shared): str(shared)})
+    local = localfilesystem(str(tmp_path))
+    sut = PyFilesystemBased(sftp_fs, str(shared))
+
+    sut.copy("results", str(tmp_path / "collected"), filesystem=local)
+
+    assert sorted(os.listdir(tmp_path / "collected")) == ["a.out", "b.out"]
+
+
+def test__when_archiving_files_for_shared_directory__only_archives_files_outside_of_it(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, shared: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    archived: List[Tuple[str, str]] = []
+    monkeypatch.setattr(
+        "hpcrocket.pyfilesystem.pyfilesystembased.upload_archive",
+        lambda source_fs, target_fs, files, compression: archived.extend(files),
+    )
+    (tmp_path / "input.txt").write_text("input")
+    sftp_fs.share_paths({str(shared): str(shared)})
+    local = localfilesystem(str(tmp_path))
+    sut = PyFilesystemBased(sftp_fs, "/")
+
+    local.copy_archive(
+        [("input.txt", str(shared / "input.txt")), ("input.txt", str(tmp_path / "elsewhere.txt"))], filesystem=sut
+    )
+
+    assert (shared / "input.txt").read_text() == "input"
+    assert [target for _, target in archived] == [str(tmp_path / "elsewhere.txt")]
+
+
+def test__when_file_in_shared_directory_is_copied_onto_itself__leaves_it_unchanged(
+    sftp_fs: PermissionChangingSSHFSDecorator, shared: Path
+) -> None:
+    (shared / "data.bin").write_bytes(b"data")
+    sftp_fs.share_paths({str(shared): str(shared)})
+    local = localfilesystem(str(shared))
+    sut = PyFilesystemBased(sftp_fs, str(shared))
+
+    local.copy("data.bin", "data.bin", overwrite=True, filesystem=sut)
+
+    assert (shared / "data.bin").read_bytes() == b"data"
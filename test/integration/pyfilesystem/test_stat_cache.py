@@ -0,0 +1,154 @@
+import io
+import os
+from pathlib import Path
+from typing import List
+
+from paramiko.sftp import CMD_LSTAT, CMD_OPENDIR, CMD_STAT
+
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+METADATA_REQUESTS = (CMD_STAT, CMD_LSTAT, CMD_OPENDIR)
+
+
+def metadata_requests(request_types: List[int]) -> int:
+    return sum(1 for request_type in request_types if request_type in METADATA_REQUESTS)
+
+
+def test__when_copying_many_files__sends_less_than_one_metadata_request_per_file(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    file_count = 20
+    (tmp_path / "local").mkdir()
+    (tmp_path / "remote").mkdir()
+    for i in range(file_count):
+        (tmp_path / "local" / f"file{i}.txt").write_text(str(i))
+
+    local_fs = localfilesystem(str(tmp_path / "local"))
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path / "remote"))
+    request_types.clear()
+
+    for i in range(file_count):
+        local_fs.copy(f"file{i}.txt", f"file{i}.txt", filesystem=remote_fs)
+
+    assert sorted(os.listdir(tmp_path / "remote")) == sorted(os.listdir(tmp_path / "local"))
+    assert metadata_requests(request_types) < file_count
+
+
+def test__when_looking_up_siblings__lists_parent_directory_once(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    for name in ("a.txt", "b.txt", "c"):
+        (tmp_path / name).touch()
+
+    results = [sftp_fs.exists(str(tmp_path / name)) for name in ("a.txt", "b.txt", "c", "missing.txt")]
+
+    assert results == [True, True, True, False]
+    assert request_types.count(CMD_OPENDIR) == 1
+    assert metadata_requests(request_types) == 1
+
+
+def test__given_cached_file__when_uploading__returns_new_size(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.txt").write_text("old")
+    sftp_fs.getsize(str(tmp_path / "file.txt"))
+
+    sftp_fs.upload(str(tmp_path / "file.txt"), io.BytesIO(b"new content"))
+
+    assert sftp_fs.getsize(str(tmp_path / "file.txt")) == len(b"new content")
+
+
+def test__given_cached_missing_file__when_uploading_through_other_channel__file_exists(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    channel = sftp_fs.open_channel()
+    assert not sftp_fs.exists(str(tmp_path / "file.txt"))
+
+    channel.upload(str(tmp_path / "file.txt"), io.BytesIO(b"content"))
+
+    assert sftp_fs.isfile(str(tmp_path / "file.txt"))
+
+
+def test__given_cached_directory__when_removing_tree__nothing_exists(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "dir" / "sub").mkdir(parents=True)
+    (tmp_path / "dir" / "sub" / "file.txt").touch()
+    assert sftp_fs.isfile(str(tmp_path / "dir" / "sub" / "file.txt"))
+
+    sftp_fs.removetree(str(tmp_path / "dir"))
+
+    assert not sftp_fs.exists(str(tmp_path / "dir"))
+    assert not sftp_fs.exists(str(tmp_path / "dir" / "sub" / "file.txt"))
+
+
+def test__given_cached_missing_directory__when_making_dirs__directories_exist(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    assert not sftp_fs.exists(str(tmp_path / "a" / "b"))
+
+    sftp_fs.makedirs(str(tmp_path / "a" / "b"))
+
+    assert sftp_fs.isdir(str(tmp_path / "a"))
+    assert sftp_fs.isdir(str(tmp_path / "a" / "b"))
+
+
+def test__given_cached_file__when_moving__source_is_missing_and_target_exists(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "source.txt").touch()
+    assert not sftp_fs.exists(str(tmp_path / "target.txt"))
+
+    sftp_fs.move(str(tmp_path / "source.txt"), str(tmp_path / "target.txt"))
+
+    assert not sftp_fs.exists(str(tmp_path / "source.txt"))
+    assert sftp_fs.isfile(str(tmp_path / "target.txt"))
+
+
+def test__when_looking_up_symlink_to_directory__follows_link(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "link").symlink_to(tmp_path / "dir")
+
+    assert sftp_fs.isdir(str(tmp_path / "link"))
+
+
+def test__when_looking_up_child_of_file__does_not_exist(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.txt").touch()
+
+    assert not sftp_fs.exists(str(tmp_path / "file.txt" / "child"))
+    assert sftp_fs.isfile(str(tmp_path / "file.txt"))
+
+
+def test__given_cached_file__when_changed_remotely_and_refreshed__returns_new_size(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path
+) -> None:
+    (tmp_path / "file.txt").write_text("old")
+    remote_fs = PyFilesystemBased(sftp_fs, str(tmp_path))
+    assert remote_fs.size("file.txt") == len("old")
+
+    (tmp_path / "file.txt").write_text("changed by the job")
+    remote_fs.refresh()
+
+    assert remote_fs.size("file.txt") == len("changed by the job")
+
+
+def test__given_cached_directories__when_uploading_file__keeps_siblings_and_other_directories_cached(
+    sftp_fs: PermissionChangingSSHFSDecorator, tmp_path: Path, request_types: List[int]
+) -> None:
+    for directory in ("a", "b"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "file.txt").touch()
+        assert sftp_fs.isfile(str(tmp_path / directory / "file.txt"))
+
+    sftp_fs.writetext(str(tmp_path / "a" / "new.txt"), "new")
+    request_types.clear()
+
+    assert sftp_fs.isfile(str(tmp_path / "a" / "file.txt"))
+    assert sftp_fs.isfile(str(tmp_path / "b" / "file.txt"))
+    assert metadata_requests(request_types) == 0
@@ -0,0 +1,120 @@
+import hashlib
+from pathlib import Path
+from typing import Any, BinaryIO, List
+
+import pytest
+
+from hpcrocket.core.filesystem import VerificationError
+from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
+from hpcrocket.pyfilesystem.pyfilesystembased import PyFilesystemBased
+from hpcrocket.ssh.chmodsshfs import PermissionChangingSSHFSDecorator
+
+
+@pytest.fixture
+def remote_dir(tmp_path: Path) -> Path:
+    remote_dir = tmp_path / "remote"
+    remote_dir.mkdir()
+    return remote_dir
+
+
+@pytest.fixture
+def local_dir(tmp_path: Path) -> Path:
+    local_dir = tmp_path / "local"
+    local_dir.mkdir()
+    return local_dir
+
+
+def hash_commands(commands: List[str]) -> List[str]:
+    return [command for command in commands if command.startswith("b2sum")]
+
+
+def test__when_uploading_verified__copies_file_and_checks_it_with_single_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, local_dir: Path, commands: List[str]
+) -> None:
+    (local_dir / "input.bin").write_bytes(b"input" * 10000)
+    local = localfilesystem(str(local_dir))
+    sut = PyFilesystemBased(sftp_fs, str(remote_dir))
+
+    local.copy_verified("input.bin", "input.bin", filesystem=sut)
+
+    assert (remote_dir / "input.bin").read_bytes() == b"input" * 10000
+    assert len(hash_commands(commands)) == 1
+
+
+def test__when_downloading_directory_verified__checks_all_files_with_single_command(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, local_dir: Path, commands: List[str]
+) -> None:
+    (remote_dir / "results").mkdir()
+    for name in ["a.out", "b.out", "c.out"]:
+        (remote_dir / "results" / name).write_text(name)
+
+    local = localfilesystem(str(local_dir))
+    sut = PyFilesystemBased(sftp_fs, str(remote_dir))
+
+    sut.copy_verified("results", "results", filesystem=local)
+
+    assert sorted(path.name for path in (local_dir / "results").iterdir()) == ["a.out", "b.out", "c.out"]
+    assert len(hash_commands(commands)) == 1
+
+
+def test__given_upload_that_is_cut_short__when_uploading_verified__raises_verification_error(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, local_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    original_upload = sftp_fs.upload
+
+    def truncating_upload(path: str, file: BinaryIO, *args: Any, **kwargs: Any) -> None:
+        original_upload(path, file, *args, **kwargs)
+        with open(path, "r+b") as uploaded:
+            uploaded.truncate(10)
+
+    monkeypatch.setattr(sftp_fs, "upload", truncating_upload)
+    (local_dir / "input.bin").write_bytes(b"input" * 10000)
+    local = localfilesystem(str(local_dir))
+    sut = PyFilesystemBased(sftp_fs, str(remote_dir))
+
+    with pytest.raises(VerificationError):
+        local.copy_verified("input.bin", "input.bin", filesystem=sut)
+
+
+def test__given_verified_upload__when_computing_checksum__reuses_digest_of_transfer(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, local_dir: Path, commands: List[str]
+) -> None:
+    (local_dir / "input.bin").write_bytes(b"input")
+    local = localfilesystem(str(local_dir))
+    sut = PyFilesystemBased(sftp_fs, str(remote_dir))
+    local.copy_verified("input.bin", "input.bin", filesystem=sut)
+
+    checksum = sut.checksum("input.bin")
+
+    assert checksum == hashlib.blake2b(b"input").hexdigest()
+    assert len(hash_commands(commands)) == 1
+
+
+def test__given_verified_upload__when_file_is_uploaded_again__computes_new_checksum(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, local_dir: Path
+) -> None:
+    (local_dir / "input.bin").write_bytes(b"input")
+    local = localfilesystem(str(local_dir))
+    sut = PyFilesystemBased(sftp_fs, str(remote_dir))
+    local.copy_verified("input.bin", "input.bin", filesystem=sut)
+    (local_dir / "input.bin").write_bytes(b"changed")
+
+    local.copy("input.bin", "input.bin", overwrite=True, filesystem=sut)
+
+    assert sut.checksum("input.bin") == hashlib.blake2b(b"changed").hexdigest()
+
+
+def test__when_hashing_many_files__leaves_out_missing_files_and_parses_escaped_names(
+    sftp_fs: PermissionChangingSSHFSDecorator, remote_dir: Path, commands: List[str]
+) -> None:
+    (remote_dir / "plain.txt").write_text("plain")
+    (remote_dir / "odd\nname\\.txt").write_text("odd")
+    paths = [str(remote_dir / "plain.txt"), str(remote_dir / "odd\nname\\.txt"), str(remote_dir / "missing.txt")]
+
+    digests = sftp_fs.hash_many(paths, "blake2b")
+
+    assert digests == {
+        paths[0]: hashlib.blake2b(b"plain").hexdigest(),
+        paths[1]: hashlib.blake2b(b"odd").hexdigest(),
+    }
+    assert len(hash_commands(commands)) == 1
@@ -0,0 +1,22 @@
+import io
+from pathlib import Path
+
+from hpcrocket.core.filesystem.buffers import preallocate
+
+
+def test__given_in_memory_file__when_preallocating__leaves_file_unchanged() -> None:
+    file = io.BytesIO()
+
+    preallocated = preallocate(file, 100)
+
+    assert preallocated is False
+    assert file.getvalue() == b""
+
+
+def test__given_local_file__when_preallocating_and_truncating__keeps_written_content(tmp_path: Path) -> None:
+    with open(tmp_path / "file.bin", "wb") as file:
+        preallocate(file, 100)
+        file.write(b"abc")
+        file.truncate()
+
+    assert (tmp_path / "file.bin").read_bytes() == b"abc"
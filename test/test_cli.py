@@ -6,12 +6,20 @@ from unittest.mock import patch
 import pytest
 
 from hpcrocket.cli import ParseError, parse_cli_args
-from hpcrocket.core.filesystem.progressive import CopyInstruction
+from hpcrocket.cli._builders import archive_compression, early_submit_options, file_mode, overwrite_mode, parse_size
+from hpcrocket.core.filesystem.progressive import CopyInstruction, OverwriteMode
 from hpcrocket.core.launchoptions import (
+    ContentStoreOptions,
+    EarlySubmitOptions,
     FinalizeOptions,
     ImmediateCommandOptions,
     LaunchOptions,
     Options,
+    IncrementalCollectOptions,
+    OutputTailOptions,
+    ResumableTransferOptions,
+    SFTPOptions,
+    SharedPathOptions,
     WatchOptions,
 )
 from hpcrocket.pyfilesystem.localfilesystem import localfilesystem
@@ -213,3 +221,255 @@ def test__given_copy_information_in_sbatch__creates_options_with_copy_instructio
             overwrite=True,
         )
     ]
+
+
+def test__given_sbatch_candidates__creates_options_with_sbatch_args() -> None:
+    config = run_parser(["launch", "test/testconfig/candidates.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.sbatch_candidates == [
+        ["--partition=short", "--time=01:00:00"],
+        ["--partition=long", "--nodes=2"],
+    ]
+
+
+def test__given_if_changed_overwrite__creates_copy_instructions_with_sync_mode() -> None:
+    config = run_parser(["launch", "test/testconfig/sync.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.copy_files == [
+        CopyInstruction("mesh.bin", "mesh.bin", OverwriteMode.if_changed),
+        CopyInstruction("input.txt", "input.txt", OverwriteMode.if_changed, checksum=True),
+    ]
+    assert config.collect_files == [
+        CopyInstruction("result.txt", "result.txt", OverwriteMode.never)
+    ]
+
+
+def test__given_verify_config__creates_copy_instructions_with_verify() -> None:
+    config = run_parser(["launch", "test/testconfig/verify.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.copy_files == [CopyInstruction("mesh.bin", "mesh.bin", verify=True)]
+    assert config.collect_files == [CopyInstruction("result.txt", "result.txt", verify=True)]
+
+
+def test__given_submit_early_config__creates_options_with_early_submission() -> None:
+    config = run_parser(["launch", "test/testconfig/submit_early.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.submit_early == EarlySubmitOptions(poll_interval=30, timeout=7200)
+
+
+def test__given_submit_early_set_to_true__creates_options_with_default_early_submission() -> None:
+    assert early_submit_options(True) == EarlySubmitOptions()
+    assert early_submit_options(None) is None
+
+
+def test__given_invalid_overwrite_value__raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        overwrite_mode("sometimes")
+
+
+def test__given_content_store_config__creates_options_with_content_store() -> None:
+    config = run_parser(["launch", "test/testconfig/contentstore.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.content_store == ContentStoreOptions(
+        directory="/scratch/cas", max_size=50 * 1024**3
+    )
+
+
+def test__given_no_content_store_config__creates_options_without_content_store() -> None:
+    config = run_parser(["launch", "test/testconfig/config.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.content_store is None
+
+
+@pytest.mark.parametrize(
+    ["size", "expected"],
+    [(1024, 1024), ("512", 512), ("10K", 10 * 1024), ("1.5G", int(1.5 * 1024**3)), ("2TB", 2 * 1024**4)],
+)
+def test__when_parsing_size__returns_number_of_bytes(size: Union[int, str], expected: int) -> None:
+    assert parse_size(size) == expected
+
+
+def test__given_archive_config__creates_copy_instructions_with_archive() -> None:
+    config = run_parser(["launch", "test/testconfig/archive.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.copy_files == [CopyInstruction("inputs/*.dat", "inputs", archive=True)]
+    assert config.collect_files == [
+        CopyInstruction("output/*.log", "logs", archive=True, compression="gzip")
+    ]
+
+
+def test__given_invalid_compression__raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        archive_compression("rar")
+
+
+def test__given_remote_copy_config__creates_copy_instructions_with_remote_method() -> None:
+    config = run_parser(["launch", "test/testconfig/remote_copy.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.copy_files == [
+        CopyInstruction("/project/shared/dataset", "dataset", remote_method="copy"),
+        CopyInstruction("/project/shared/models/*.pt", "models", remote_method="link"),
+    ]
+
+
+def test__given_invalid_remote_copy_method__raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        run_parser(["launch", "test/testconfig/remote_copy_invalid.yml"])
+
+
+def test__given_shared_paths_config__creates_shared_path_options() -> None:
+    config = run_parser(["launch", "test/testconfig/shared_paths.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.shared_paths == [
+        SharedPathOptions("/scratch"),
+        SharedPathOptions("~/projects", "/mnt/cluster/projects"),
+    ]
+
+
+def test__given_mode_config__creates_copy_instructions_with_mode() -> None:
+    config = run_parser(["launch", "test/testconfig/mode.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.copy_files == [
+        CopyInstruction("bin/solver", "solver", mode=0o755),
+        CopyInstruction("inputs/*.dat", "inputs", mode=0o640),
+    ]
+
+
+@pytest.mark.parametrize("mode", ["999", "rwx", "17777", -1])
+def test__given_invalid_mode__raises_value_error(mode: Union[int, str]) -> None:
+    with pytest.raises(ValueError):
+        file_mode(mode)
+
+
+def test__given_collect_archive_config__creates_options_with_collect_archive() -> None:
+    config = run_parser(["launch", "test/testconfig/collect_archive.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.collect_archive is True
+    assert config.collect_compression == "zstd"
+
+
+def test__given_collect_archive_config__when_finalizing__creates_options_with_collect_archive() -> None:
+    config = run_parser(["finalize", "test/testconfig/collect_archive.yml"])
+
+    config = cast(FinalizeOptions, config)
+    assert config.collect_archive is True
+    assert config.collect_compression == "zstd"
+
+
+def test__given_clean_in_background_config__creates_options_with_clean_in_background() -> None:
+    config = run_parser(["launch", "test/testconfig/clean_in_background.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.clean_in_background is True
+
+
+def test__given_clean_in_background_config__when_finalizing__creates_options_with_clean_in_background() -> None:
+    config = run_parser(["finalize", "test/testconfig/clean_in_background.yml"])
+
+    config = cast(FinalizeOptions, config)
+    assert config.clean_in_background is True
+
+
+def test__given_collect_while_running_config__creates_options_with_incremental_collection() -> None:
+    config = run_parser(["launch", "test/testconfig/collect_while_running.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.collect_while_running == IncrementalCollectOptions(stable_time=120, interval=15)
+
+
+@pytest.mark.parametrize("command", ("launch", "finalize"))
+def test__given_dry_run_flag__when_parsing__creates_options_with_dry_run(command: str) -> None:
+    config = run_parser([command, "test/testconfig/config.yml", "--dry-run"])
+
+    config = cast(Union[LaunchOptions, FinalizeOptions], config)
+    assert config.dry_run is True
+
+
+@pytest.mark.parametrize("command", ("launch", "finalize"))
+def test__given_save_transfers_arg__when_parsing__creates_options_with_transfers_file(command: str) -> None:
+    config = run_parser([command, "test/testconfig/config.yml", "--save-transfers", "transfers.jsonl"])
+
+    config = cast(Union[LaunchOptions, FinalizeOptions], config)
+    assert config.transfers_file == "transfers.jsonl"
+
+
+def test__given_state_file_and_resume_flag__when_parsing__creates_options_with_resume() -> None:
+    config = run_parser(["launch", "test/testconfig/config.yml", "--state-file", "launch.state", "--resume"])
+
+    config = cast(LaunchOptions, config)
+    assert config.state_file == "launch.state"
+    assert config.resume is True
+
+
+def test__given_save_estimates_arg__when_parsing__creates_options_with_estimates_file() -> None:
+    config = run_parser(["launch", "test/testconfig/config.yml", "--save-estimates", "estimates.json"])
+
+    config = cast(LaunchOptions, config)
+    assert config.estimates_file == "estimates.json"
+
+
+def test__given_resume_flag_without_state_file__when_parsing__raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        run_parser(["launch", "test/testconfig/config.yml", "--resume"])
+
+
+def test__given_tail_output_config__creates_options_with_output_tail() -> None:
+    config = run_parser(["launch", "test/testconfig/tail_output.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.tail_output == OutputTailOptions(lines=50, file="job.log")
+
+
+def test__given_tail_output_config__when_watching__creates_options_with_output_tail() -> None:
+    config = run_parser(["watch", "test/testconfig/tail_output.yml", "--jobid", "1234"])
+
+    config = cast(WatchOptions, config)
+    assert config.tail_output == OutputTailOptions(lines=50, file="job.log")
+
+
+def test__given_resumable_transfers_config__creates_options_with_resumable_transfers() -> None:
+    config = run_parser(["launch", "test/testconfig/resumable.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.resumable_transfers == ResumableTransferOptions(
+        state_dir="/tmp/hpc-rocket-transfers", min_size=2 * 1024**3, chunk_size=128 * 1024**2
+    )
+
+
+def test__given_resumable_transfers_config__when_finalizing__creates_options_with_resumable_transfers() -> None:
+    config = run_parser(["finalize", "test/testconfig/resumable.yml"])
+
+    config = cast(FinalizeOptions, config)
+    assert config.resumable_transfers is not None
+
+
+def test__given_sftp_config__creates_options_with_sftp_settings() -> None:
+    config = run_parser(["launch", "test/testconfig/sftp.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.sftp == SFTPOptions(request_size=64 * 1024, max_requests=128)
+
+
+def test__given_sftp_config__when_finalizing__creates_options_with_sftp_settings() -> None:
+    config = run_parser(["finalize", "test/testconfig/sftp.yml"])
+
+    config = cast(FinalizeOptions, config)
+    assert config.sftp == SFTPOptions(request_size=64 * 1024, max_requests=128)
+
+
+def test__given_config_without_sftp__creates_options_with_default_sftp_settings() -> None:
+    config = run_parser(["launch", "test/testconfig/config.yml"])
+
+    config = cast(LaunchOptions, config)
+    assert config.sftp == SFTPOptions()
@@ -1,3 +1,4 @@
+import hashlib
 import os.path
 from abc import ABC, abstractmethod
 from typing import Collection
@@ -510,3 +511,110 @@ class FilesystemTest(ABC):
 
         assert not sut.exists(rel_file_path)
         assert not sut.exists(abs_path_to_delete)
+
+    def test__when_getting_size_of_file__returns_number_of_bytes(self) -> None:
+        sut = self.create_filesystem()
+        self.create_file(sut, self.SOURCE, "content")
+
+        assert sut.size(self.SOURCE) == len("content")
+
+    def test__when_getting_size_of_directory__returns_zero(self) -> None:
+        sut = self.create_filesystem()
+        self.create_dir(sut, "dir")
+
+        assert sut.size("dir") == 0
+
+    def test__when_getting_size_of_non_existing_file__raises_file_not_found_error(self) -> None:
+        sut = self.create_filesystem()
+
+        with pytest.raises(FileNotFoundError):
+            sut.size(self.SOURCE)
+
+    def test__when_getting_stat_of_file__returns_size_and_modification_time(self) -> None:
+        sut = self.create_filesystem()
+        self.create_file(sut, self.SOURCE, "content")
+
+        actual = sut.stat(self.SOURCE)
+
+        assert actual.size == len("content")
+        assert actual.modified > 0
+        assert actual.is_dir is False
+
+    def test__when_getting_stat_of_directory__returns_is_dir(self) -> None:
+        sut = self.create_filesystem()
+        self.create_dir(sut, "dir")
+
+        assert sut.stat("dir").is_dir is True
+
+    def test__when_computing_checksum__returns_blake2b_of_content(self) -> None:
+        sut = self.create_filesystem()
+        self.create_file(sut, self.SOURCE, "content")
+
+        assert sut.checksum(self.SOURCE) == hashlib.blake2b(b"content").hexdigest()
+
+    def test__when_computing_checksum_of_non_existing_file__raises_file_not_found_error(self) -> None:
+        sut = self.create_filesystem()
+
+        with pytest.raises(FileNotFoundError):
+            sut.checksum(self.SOURCE)
+
+    def test__when_copying_archive_to_other_filesystem__copies_all_files_to_target_paths(self) -> None:
+        target_fs = self.create_filesystem()
+        sut = self.create_filesystem()
+        self.create_file(sut, "first.txt", "first")
+        self.create_file(sut, "dir/second.txt", "second")
+
+        sut.copy_archive(
+            [("first.txt", "out/first.txt"), ("dir/second.txt", "out/nested/second.txt")],
+            filesystem=target_fs,
+        )
+
+        self.assert_file_content_equals(target_fs, "out/first.txt", "first")
+        self.assert_file_content_equals(target_fs, "out/nested/second.txt", "second")
+
+    def test__when_copying_compressed_archive_to_other_filesystem__copies_all_files_to_target_paths(self) -> None:
+        target_fs = self.create_filesystem()
+        sut = self.create_filesystem()
+        self.create_file(sut, "first.txt", "first")
+        self.create_file(sut, "second.txt", "second")
+
+        sut.copy_archive(
+            [("first.txt", "out/first.txt"), ("second.txt", "out/second.txt")],
+            filesystem=target_fs,
+            compression="gzip",
+        )
+
+        self.assert_file_content_equals(target_fs, "out/first.txt", "first")
+        self.assert_file_content_equals(target_fs, "out/second.txt", "second")
+
+    def test__when_copying_archive__but_one_target_exists__raises_file_exists_error_without_copying(self) -> None:
+        target_fs = self.create_filesystem()
+        self.create_file(target_fs, "out/second.txt", "old")
+        sut = self.create_filesystem()
+        self.create_file(sut, "first.txt", "first")
+        self.create_file(sut, "second.txt", "second")
+
+        with pytest.raises(FileExistsError):
+            sut.copy_archive(
+                [("first.txt", "out/first.txt"), ("second.txt", "out/second.txt")],
+                filesystem=target_fs,
+            )
+
+        assert not target_fs.exists("out/first.txt")
+
+    def test__when_copying_archive_with_overwrite_enabled__replaces_existing_files(self) -> None:
+        target_fs = self.create_filesystem()
+        self.create_file(target_fs, "out/first.txt", "old")
+        sut = self.create_filesystem()
+        self.create_file(sut, "first.txt", "new")
+
+        sut.copy_archive([("first.txt", "out/first.txt")], overwrite=True, filesystem=target_fs)
+
+        self.assert_file_content_equals(target_fs, "out/first.txt", "new")
+
+    def test__when_copying_archive__but_source_does_not_exist__raises_file_not_found_error(self) -> None:
+        target_fs = self.create_filesystem()
+        sut = self.create_filesystem()
+
+        with pytest.raises(FileNotFoundError):
+            sut.copy_archive([("missing.txt", "out/missing.txt")], filesystem=target_fs)
@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, Tuple
+
+import pytest
+
+from hpcrocket.core.filesystem.glob import (
+    compile_glob,
+    expand_braces,
+    is_glob,
+    outermost,
+    path_after_wildcard,
+    split_at_first_wildcard,
+)
+
+TREE: Dict[str, List[Tuple[str, bool]]] = {
+    "": [("a.txt", False), ("sub", True), ("other", True)],
+    "sub": [("b.txt", False), ("d.log", False), ("deep", True)],
+    "sub/deep": [("c.txt", False)],
+    "other": [("e.txt", False)],
+}
+
+
+class RecordingLister:
+    def __init__(self) -> None:
+        self.listed: List[str] = []
+
+    def __call__(self, directory: str) -> Iterable[Tuple[str, bool]]:
+        self.listed.append(directory)
+        return TREE[directory]
+
+
+@pytest.mark.parametrize("path", ["*.txt", "file?.txt", "file[0-9].txt", "{a,b}.txt"])
+def test__given_wildcard__is_glob(path: str) -> None:
+    assert is_glob(path)
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("*.txt", "a.txt", True),
+        ("*.txt", "sub/b.txt", False),
+        ("?.txt", "a.txt", True),
+        ("?.txt", "ab.txt", False),
+        ("[a-c].txt", "b.txt", True),
+        ("[!a-c].txt", "b.txt", False),
+        ("{a,b}.txt", "b.txt", True),
+        ("sub/{*.log,deep/*}", "sub/deep/c.txt", True),
+        ("**/*.txt", "a.txt", True),
+        ("**/*.txt", "sub/deep/c.txt", True),
+        ("sub/**/c.txt", "sub/c.txt", True),
+        ("sub/**/c.txt", "other/c.txt", False),
+        ("sub/**", "sub/deep/c.txt", True),
+    ],
+)
+def test__when_matching_path__matches_like_shell_glob(pattern: str, path: str, expected: bool) -> None:
+    assert compile_glob(pattern).match(path) is expected
+
+
+def test__given_pattern_with_trailing_separator__matches_only_directories() -> None:
+    sut = compile_glob("*/")
+
+    assert sut.match("sub", is_dir=True)
+    assert not sut.match("a.txt")
+
+
+def test__when_compiling_same_pattern_twice__returns_same_matcher() -> None:
+    assert compile_glob("sub/*.txt") is compile_glob("sub/*.txt")
+
+
+@pytest.mark.parametrize("pattern, expected", [("*/*.txt", 2), ("{*,*/*}.txt", 2), ("sub/**/*.txt", None)])
+def test__when_getting_max_depth__returns_deepest_matchable_level(pattern: str, expected: int) -> None:
+    assert compile_glob(pattern).max_depth == expected
+
+
+def test__when_expanding_nested_braces__returns_every_alternative() -> None:
+    assert expand_braces("a{b,c{d,e}}f{g}") == ["abf{g}", "acdf{g}", "acef{g}"]
+
+
+def test__when_walking__yields_matches_of_all_levels() -> None:
+    actual = list(compile_glob("**/*.txt").walk(RecordingLister()))
+
+    assert sorted(actual) == ["a.txt", "other/e.txt", "sub/b.txt", "sub/deep/c.txt"]
+
+
+def test__when_walking__yields_directories_before_their_contents() -> None:
+    actual = list(compile_glob("**").walk(RecordingLister()))
+
+    assert actual.index("sub") < actual.index("sub/deep") < actual.index("sub/deep/c.txt")
+
+
+def test__when_walking__only_lists_directories_that_can_contain_matches() -> None:
+    lister = RecordingLister()
+
+    actual = list(compile_glob("s*/*.txt").walk(lister))
+
+    assert actual == ["sub/b.txt"]
+    assert lister.listed == ["", "sub"]
+
+
+def test__when_walking_single_level_pattern__does_not_list_subdirectories() -> None:
+    lister = RecordingLister()
+
+    actual = list(compile_glob("*").walk(lister))
+
+    assert actual == ["a.txt", "sub", "other"]
+    assert lister.listed == [""]
+
+
+def test__when_splitting_pattern__splits_before_name_with_wildcard() -> None:
+    assert split_at_first_wildcard("results/res*.dat") == ("results/", "res*.dat")
+
+
+def test__when_getting_path_after_wildcard__keeps_whole_name() -> None:
+    assert path_after_wildcard("results/res*.dat", "results/res1.dat") == "res1.dat"
+
+
+def test__when_getting_outermost_paths__skips_contents_of_earlier_paths() -> None:
+    actual = list(outermost(["sub", "sub/b.txt", "subfile", "other/e.txt", "other"]))
+
+    assert actual == ["sub", "subfile", "other/e.txt", "other"]
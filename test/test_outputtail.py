@@ -0,0 +1,44 @@
+from pathlib import Path
+from typing import List
+from unittest.mock import Mock
+
+from hpcrocket.core.slurmbatchjob import SlurmBatchJob
+from hpcrocket.watcher.outputtail import OutputTail
+from test.testdoubles.executor import RunningCommandStub
+
+
+def batch_job_writing(lines: List[str]) -> SlurmBatchJob:
+    command = RunningCommandStub()
+    command.stdout_lines = lines
+    batch_job = Mock(spec=SlurmBatchJob)
+    batch_job.tail_output.return_value = command
+    return batch_job
+
+
+def test__when_following_output__keeps_only_last_lines() -> None:
+    sut = OutputTail(batch_job_writing([f"line {i}\n" for i in range(10)]), 3, Mock())
+
+    sut.start()
+    sut.stop()
+
+    assert sut.lines == ["line 7", "line 8", "line 9"]
+
+
+def test__when_following_output__passes_last_lines_to_callback_after_every_line() -> None:
+    received: List[List[str]] = []
+    sut = OutputTail(batch_job_writing(["first\n", "second\n", "third\n"]), 2, received.append)
+
+    sut.start()
+    sut.stop()
+
+    assert received == [["first"], ["first", "second"], ["second", "third"]]
+
+
+def test__given_local_file__when_following_output__writes_all_lines_to_file(tmp_path: Path) -> None:
+    lines = [f"line {i}\n" for i in range(10)]
+    sut = OutputTail(batch_job_writing(lines), 3, Mock(), tmp_path / "job.log")
+
+    sut.start()
+    sut.stop()
+
+    assert (tmp_path / "job.log").read_text() == "".join(lines)
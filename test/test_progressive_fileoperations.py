@@ -1,13 +1,21 @@
-from test.testdoubles.filesystem import MemoryFilesystemFake
-from typing import List, Optional, Generator, Tuple, Type
+import copy
+from test.testdoubles.filesystem import FileStub, MemoryFilesystemFake
+from typing import Iterator, List, Optional, Generator, Sequence, Tuple, Type, cast
+from unittest.mock import Mock
+
+import pytest
 
 from hpcrocket.core.filesystem.progressive import (
     CopyInstruction,
     CopyResult,
+    OverwriteMode,
+    _SCHEDULING_WINDOW,
+    archive_copy,
     progressive_clean,
     progressive_copy,
 )
-from hpcrocket.core.filesystem import Filesystem
+from hpcrocket.core.filesystem import Filesystem, VerificationError
+from hpcrocket.core.filesystem.transfermonitor import TransferMonitor, TransferProgress
 
 
 def new_filesystem(files: Optional[List[str]] = None) -> Filesystem:
@@ -156,3 +164,594 @@ def test__given_files_to_clean_with_non_existing_files__when_cleaning__should_st
 
     assert target_fs.exists("funny.gif") is False
     assert_error_types_equal(errors, [FileNotFoundError])
+
+
+class ForkCountingFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.forks = 0
+
+    def fork(self) -> Filesystem:
+        self.forks += 1
+        return self
+
+
+class ClosingForkFilesystem(MemoryFilesystemFake):
+    """
+    Returns a fork that shares the files of this filesystem and records when it is closed
+    """
+
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.opened_forks: List[Filesystem] = []
+        self.closed_forks: List[Filesystem] = []
+
+    def fork(self) -> Filesystem:
+        fork = copy.copy(self)
+        fork.close = lambda: self.closed_forks.append(fork)  # type: ignore[method-assign]
+        self.opened_forks.append(fork)
+        return fork
+
+
+def test__given_multiple_workers__when_copying__copies_all_files() -> None:
+    source_fs = new_filesystem(["file.txt", "funny.gif", "other.gif"])
+    target_fs = new_filesystem()
+
+    copy_instructions = [
+        CopyInstruction("file.txt", "filecopy.txt"),
+        CopyInstruction("*.gif", "gifs"),
+    ]
+
+    result = copied_files(
+        progressive_copy(source_fs, target_fs, copy_instructions, workers=2)
+    )
+
+    assert sorted(result) == ["filecopy.txt", "gifs/funny.gif", "gifs/other.gif"]
+    assert target_fs.exists("filecopy.txt")
+    assert target_fs.exists("gifs/funny.gif")
+    assert target_fs.exists("gifs/other.gif")
+
+
+def test__given_multiple_workers__when_copying__each_worker_forks_both_filesystems() -> None:
+    source_fs = ForkCountingFilesystem(["file.txt", "funny.gif", "other.gif"])
+    target_fs = ForkCountingFilesystem([])
+
+    _ = list(
+        progressive_copy(
+            source_fs, target_fs, [CopyInstruction("*.gif", "copies")], workers=2
+        )
+    )
+
+    assert 1 <= source_fs.forks <= 2
+    assert source_fs.forks == target_fs.forks
+
+
+@pytest.mark.parametrize("files", (["funny.gif", "other.gif"], ["funny.gif", "missing.gif"]))
+def test__given_multiple_workers__when_copy_ends__closes_all_forks(files: List[str]) -> None:
+    source_fs = ClosingForkFilesystem(["funny.gif"])
+    target_fs = ClosingForkFilesystem([])
+    instructions = [CopyInstruction(file, file) for file in files]
+
+    _ = list(progressive_copy(source_fs, target_fs, instructions, workers=2))
+
+    assert source_fs.opened_forks
+    assert sorted(map(id, source_fs.closed_forks)) == sorted(map(id, source_fs.opened_forks))
+    assert sorted(map(id, target_fs.closed_forks)) == sorted(map(id, target_fs.opened_forks))
+
+
+def test__given_filesystem_that_is_its_own_fork__when_copy_ends__does_not_close_it() -> None:
+    source_fs = ForkCountingFilesystem(["funny.gif"])
+    source_fs.close = Mock()  # type: ignore[method-assign]
+
+    _ = list(progressive_copy(source_fs, new_filesystem(), [CopyInstruction("funny.gif", "copy.gif")], workers=2))
+
+    source_fs.close.assert_not_called()
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test__when_copy_ends__flushes_target_filesystem_once(workers: int) -> None:
+    target_fs = new_filesystem()
+    target_fs.flush = Mock()  # type: ignore[method-assign]
+    instructions = [CopyInstruction("funny.gif", "copy.gif"), CopyInstruction("missing.gif", "missing.gif")]
+
+    _ = list(progressive_copy(new_filesystem(["funny.gif"]), target_fs, instructions, workers=workers))
+
+    target_fs.flush.assert_called_once_with()
+
+
+def test__given_multiple_workers__when_error_occurs__yields_error_with_all_copied_files() -> None:
+    source_fs = new_filesystem(["file.txt", "funny.gif"])
+    target_fs = new_filesystem(["funny.gif"])
+
+    copy_instructions = [
+        CopyInstruction("file.txt", "filecopy.txt"),
+        CopyInstruction("funny.gif", "funny.gif"),
+    ]
+
+    results = list(
+        progressive_copy(source_fs, target_fs, copy_instructions, workers=2)
+    )
+    files, errors = copied_files_and_errors(r for r in results)
+
+    assert results[-1].errors
+    assert_error_types_equal(errors, [FileExistsError])
+    assert all(target_fs.exists(file) for file in files)
+
+
+def test__given_multiple_workers__when_glob_directory_does_not_exist__yields_error_without_copying() -> None:
+    source_fs = new_filesystem(["file.txt"])
+    target_fs = new_filesystem()
+
+    copy_instructions = [
+        CopyInstruction("missing/*.txt", "texts"),
+        CopyInstruction("file.txt", "filecopy.txt"),
+    ]
+
+    files, errors = copied_files_and_errors(
+        progressive_copy(source_fs, target_fs, copy_instructions, workers=2)
+    )
+
+    assert files == []
+    assert_error_types_equal(errors, [FileNotFoundError])
+
+
+class CorruptingFilesystem(MemoryFilesystemFake):
+    """
+    Copies files like the memory filesystem, but every verified copy differs from its source
+    """
+
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.verified: List[str] = []
+
+    def copy_verified(
+        self,
+        source: str,
+        target: str,
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        literal: bool = False,
+    ) -> None:
+        self.copy(source, target, overwrite, filesystem, literal)
+        self.verified.append(source)
+        raise VerificationError(source)
+
+
+def test__given_verified_instruction__when_copying__verifies_only_its_files() -> None:
+    source_fs = CorruptingFilesystem(["file.txt", "funny.gif"])
+
+    files, errors = copied_files_and_errors(
+        progressive_copy(
+            source_fs,
+            new_filesystem(),
+            [CopyInstruction("file.txt", "file.txt"), CopyInstruction("funny.gif", "funny.gif", verify=True)],
+        )
+    )
+
+    assert source_fs.verified == ["funny.gif"]
+    assert_error_types_equal(errors, [VerificationError])
+    assert files == ["file.txt", "funny.gif"]
+
+
+class StreamingGlobFilesystem(MemoryFilesystemFake):
+    """
+    Records when files are found by a glob and when they are copied
+    """
+
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.events: List[str] = []
+
+    def iglob(self, pattern: str) -> Iterator[str]:
+        for file in self.glob(pattern):
+            self.events.append("found")
+            yield file
+
+    def copy(
+        self,
+        source: str,
+        target: str,
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        literal: bool = False,
+    ) -> None:
+        super().copy(source, target, overwrite, filesystem, literal)
+        self.events.append("copied")
+
+    def copied_before_all_found(self) -> bool:
+        last_found = max(i for i, event in enumerate(self.events) if event == "found")
+        return self.events.index("copied") < last_found
+
+
+def test__given_glob__when_copying__starts_copying_before_all_files_are_found() -> None:
+    source_fs = StreamingGlobFilesystem([f"file{i}.txt" for i in range(5)])
+
+    files = copied_files(
+        progressive_copy(source_fs, new_filesystem(), [CopyInstruction("*.txt", "texts")])
+    )
+
+    assert len(files) == 5
+    assert source_fs.copied_before_all_found()
+
+
+def test__given_multiple_workers__when_copying_large_glob__starts_copying_before_all_files_are_found() -> None:
+    file_count = _SCHEDULING_WINDOW + 10
+    source_fs = StreamingGlobFilesystem([f"file{i}.txt" for i in range(file_count)])
+
+    files = copied_files(
+        progressive_copy(source_fs, new_filesystem(), [CopyInstruction("*.txt", "texts")], workers=2)
+    )
+
+    assert len(files) == file_count
+    assert source_fs.copied_before_all_found()
+
+
+def test__when_copying__reports_size_and_duration_of_each_file_to_monitor() -> None:
+    source_fs = new_filesystem(["file.txt", "funny.gif"])
+    received: List[TransferProgress] = []
+    monitor = TransferMonitor("Copying files", received.append)
+
+    _ = list(progressive_copy(source_fs, new_filesystem(), [CopyInstruction("*.*", "copies")], monitor=monitor))
+
+    transfers = [progress.file for progress in received if progress.file]
+    assert sorted(transfer.path for transfer in transfers) == ["copies/file.txt", "copies/funny.gif"]
+    assert all(transfer.duration >= 0 for transfer in transfers)
+    assert monitor.progress.files_done == monitor.progress.files_found == 2
+    assert monitor.progress.bytes_done == monitor.progress.bytes_found
+
+
+def test__given_multiple_workers__when_copying__reports_all_files_and_bounded_queue_depth() -> None:
+    source_fs = new_filesystem([f"file{i}.txt" for i in range(20)])
+    received: List[TransferProgress] = []
+    monitor = TransferMonitor("Copying files", received.append)
+
+    _ = list(
+        progressive_copy(source_fs, new_filesystem(), [CopyInstruction("*.txt", "copies")], workers=2, monitor=monitor)
+    )
+
+    assert monitor.progress.files_done == monitor.progress.files_found == 20
+    assert 0 < max(progress.queue_depth for progress in received) <= 4
+
+
+def test__given_if_changed__when_target_is_unchanged__does_not_count_file_as_found() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "content")
+    set_modified(source_fs, "file.txt", 100.0)
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "content")
+    set_modified(target_fs, "copy.txt", 200.0)
+    instruction = CopyInstruction("file.txt", "copy.txt", OverwriteMode.if_changed)
+    monitor = TransferMonitor("Copying files")
+
+    _ = list(progressive_copy(source_fs, target_fs, [instruction], monitor=monitor))
+
+    assert monitor.progress.files_found == 0
+
+
+def set_modified(fs: MemoryFilesystemFake, path: str, modified: float) -> None:
+    file = cast(FileStub, fs._find_matching_item(path))
+    file.modified = modified
+
+
+def copy_if_changed(
+    source_fs: MemoryFilesystemFake, target_fs: MemoryFilesystemFake, checksum: bool = False
+) -> CopyResult:
+    instruction = CopyInstruction("file.txt", "copy.txt", OverwriteMode.if_changed, checksum)
+    results = list(progressive_copy(source_fs, target_fs, [instruction]))
+    return results[0]
+
+
+def test__given_if_changed__when_target_is_unchanged__skips_file() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "content")
+    set_modified(source_fs, "file.txt", 100.0)
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "content")
+    set_modified(target_fs, "copy.txt", 200.0)
+
+    actual = copy_if_changed(source_fs, target_fs)
+
+    assert actual.copied_files == []
+    assert actual.skipped_files == ["copy.txt"]
+
+
+def test__given_if_changed__when_sizes_differ__copies_file() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "new content")
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "content")
+
+    actual = copy_if_changed(source_fs, target_fs)
+
+    assert actual.copied_files == ["copy.txt"]
+    assert target_fs.get_content_of_file_stub("copy.txt") == "new content"
+
+
+def test__given_if_changed__when_source_is_newer__copies_file() -> None:
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "old")
+    set_modified(target_fs, "copy.txt", 100.0)
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "new")
+    set_modified(source_fs, "file.txt", 200.0)
+
+    actual = copy_if_changed(source_fs, target_fs)
+
+    assert actual.copied_files == ["copy.txt"]
+    assert target_fs.get_content_of_file_stub("copy.txt") == "new"
+
+
+def test__given_if_changed_with_checksum__when_content_differs__copies_file_despite_older_source() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "new")
+    set_modified(source_fs, "file.txt", 100.0)
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "old")
+    set_modified(target_fs, "copy.txt", 200.0)
+
+    actual = copy_if_changed(source_fs, target_fs, checksum=True)
+
+    assert actual.copied_files == ["copy.txt"]
+
+
+def test__given_if_changed_with_checksum__when_content_is_equal__skips_file_despite_newer_source() -> None:
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "content")
+    set_modified(target_fs, "copy.txt", 100.0)
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "content")
+    set_modified(source_fs, "file.txt", 200.0)
+
+    actual = copy_if_changed(source_fs, target_fs, checksum=True)
+
+    assert actual.skipped_files == ["copy.txt"]
+
+
+def test__given_if_changed__when_target_does_not_exist__copies_file() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "content")
+    target_fs = MemoryFilesystemFake()
+
+    actual = copy_if_changed(source_fs, target_fs)
+
+    assert actual.copied_files == ["copy.txt"]
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test__when_copying__reports_every_copied_file_before_yielding_its_result(workers: int) -> None:
+    source_fs = new_filesystem(["file.txt", "funny.gif", "other.gif"])
+    reported: List[str] = []
+    instructions = [CopyInstruction("*.gif", "gifs"), CopyInstruction("file.txt", "copy.txt", archive=True)]
+
+    results = progressive_copy(source_fs, new_filesystem(), instructions, workers=workers, on_copied=reported.append)
+    yielded = [(file, file in reported) for result in results for file in result.copied_files]
+
+    assert sorted(reported) == ["copy.txt", "gifs/funny.gif", "gifs/other.gif"]
+    assert all(was_reported for _, was_reported in yielded)
+
+
+class ArchiveRecordingFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.archives: List[List[Tuple[str, str]]] = []
+
+    def copy_archive(
+        self,
+        files: Sequence[Tuple[str, str]],
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        self.archives.append(list(files))
+        super().copy_archive(files, overwrite, filesystem, compression)
+
+
+def test__given_archive_instruction_with_glob__when_copying__copies_all_matches_as_one_archive() -> None:
+    source_fs = ArchiveRecordingFilesystem(["funny.gif", "other.gif"])
+    target_fs = new_filesystem()
+
+    result = copied_files(
+        progressive_copy(source_fs, target_fs, [CopyInstruction("*.gif", "gifs", archive=True)])
+    )
+
+    assert result == ["gifs/funny.gif", "gifs/other.gif"]
+    assert source_fs.archives == [[("funny.gif", "gifs/funny.gif"), ("other.gif", "gifs/other.gif")]]
+    assert target_fs.exists("gifs/funny.gif")
+    assert target_fs.exists("gifs/other.gif")
+
+
+def test__given_archive_instruction_with_existing_target__when_copying__returns_error_without_copied_files() -> None:
+    source_fs = new_filesystem(["funny.gif", "other.gif"])
+    target_fs = new_filesystem(["gifs/other.gif"])
+
+    files, errors = copied_files_and_errors(
+        progressive_copy(source_fs, target_fs, [CopyInstruction("*.gif", "gifs", archive=True)])
+    )
+
+    assert files == []
+    assert_error_types_equal(errors, [FileExistsError])
+    assert not target_fs.exists("gifs/funny.gif")
+
+
+def test__given_archive_instruction_with_if_changed__when_copying__leaves_unchanged_files_out_of_archive() -> None:
+    source_fs = ArchiveRecordingFilesystem([])
+    source_fs.create_file_stub("same.txt", "same")
+    source_fs.create_file_stub("new.txt", "new")
+    set_modified(source_fs, "same.txt", 100.0)
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("out/same.txt", "same")
+    set_modified(target_fs, "out/same.txt", 200.0)
+
+    instruction = CopyInstruction("*.txt", "out", OverwriteMode.if_changed, archive=True)
+    results = list(progressive_copy(source_fs, target_fs, [instruction]))
+
+    assert results[0].copied_files == ["out/new.txt"]
+    assert results[0].skipped_files == ["out/same.txt"]
+    assert source_fs.archives == [[("new.txt", "out/new.txt")]]
+
+
+def test__given_multiple_workers__when_copying_archive_instruction__copies_matches_as_one_archive() -> None:
+    source_fs = ArchiveRecordingFilesystem(["file.txt", "funny.gif", "other.gif"])
+    target_fs = new_filesystem()
+
+    copy_instructions = [
+        CopyInstruction("file.txt", "filecopy.txt"),
+        CopyInstruction("*.gif", "gifs", archive=True),
+    ]
+
+    result = copied_files(progressive_copy(source_fs, target_fs, copy_instructions, workers=2))
+
+    assert sorted(result) == ["filecopy.txt", "gifs/funny.gif", "gifs/other.gif"]
+    assert source_fs.archives == [[("funny.gif", "gifs/funny.gif"), ("other.gif", "gifs/other.gif")]]
+
+
+def test__given_multiple_instructions__when_copying_as_archive__copies_all_files_as_one_archive() -> None:
+    source_fs = ArchiveRecordingFilesystem(["file.txt", "funny.gif", "other.gif"])
+    target_fs = new_filesystem()
+
+    copy_instructions = [
+        CopyInstruction("file.txt", "filecopy.txt"),
+        CopyInstruction("*.gif", "gifs"),
+    ]
+
+    result = archive_copy(source_fs, target_fs, copy_instructions, "gzip")
+
+    assert result.copied_files == ["filecopy.txt", "gifs/funny.gif", "gifs/other.gif"]
+    assert source_fs.archives == [
+        [("file.txt", "filecopy.txt"), ("funny.gif", "gifs/funny.gif"), ("other.gif", "gifs/other.gif")]
+    ]
+
+
+def test__given_missing_file__when_copying_as_archive__returns_error_without_copying() -> None:
+    source_fs = new_filesystem(["file.txt"])
+    target_fs = new_filesystem()
+
+    copy_instructions = [
+        CopyInstruction("file.txt", "filecopy.txt"),
+        CopyInstruction("missing.txt", "missing.txt"),
+    ]
+
+    result = archive_copy(source_fs, target_fs, copy_instructions)
+
+    assert result.copied_files == []
+    assert_error_types_equal(result.errors, [FileNotFoundError])
+    assert not target_fs.exists("filecopy.txt")
+
+
+def test__given_missing_file__when_copying_as_archive_without_abort_on_error__copies_remaining_files() -> None:
+    source_fs = new_filesystem(["file.txt"])
+    target_fs = new_filesystem(["existing.txt"])
+
+    copy_instructions = [
+        CopyInstruction("missing.txt", "missing.txt"),
+        CopyInstruction("file.txt", "existing.txt"),
+        CopyInstruction("file.txt", "filecopy.txt"),
+    ]
+
+    result = archive_copy(source_fs, target_fs, copy_instructions, abort_on_error=False)
+
+    assert result.copied_files == ["filecopy.txt"]
+    assert_error_types_equal(result.errors, [FileNotFoundError, FileExistsError])
+
+
+class FailingArchiveFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: List[str], error: Exception) -> None:
+        super().__init__(files)
+        self._error = error
+
+    def copy_archive(
+        self,
+        files: Sequence[Tuple[str, str]],
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        raise self._error
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        OSError("Command failed with exit code 2: tar -x -f - -C /"),
+        RuntimeError("zstd compression requires the zstandard package"),
+    ],
+)
+def test__given_failing_archive_transfer__when_copying_as_archive__returns_error(error: Exception) -> None:
+    source_fs = FailingArchiveFilesystem(["file.txt"], error)
+
+    files, errors = copied_files_and_errors(
+        progressive_copy(source_fs, new_filesystem(), [CopyInstruction("file.txt", "file.txt", archive=True)])
+    )
+
+    assert files == []
+    assert errors == [error]
+
+
+class PermissionRecordingFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: Optional[List[str]] = None) -> None:
+        super().__init__(files or [])
+        self.permission_calls: List[Tuple[List[str], int]] = []
+
+    def set_permissions(self, paths: Sequence[str], mode: int) -> None:
+        self.permission_calls.append((sorted(paths), mode))
+
+    def fork(self) -> Filesystem:
+        return self
+
+
+def test__given_instruction_with_mode__when_copying__sets_permissions_of_all_matches_at_once() -> None:
+    source_fs = new_filesystem(["run.sh", "funny.gif", "other.gif"])
+    target_fs = PermissionRecordingFilesystem()
+
+    copy_instructions = [
+        CopyInstruction("run.sh", "run.sh", mode=0o755),
+        CopyInstruction("*.gif", "gifs", mode=0o600),
+    ]
+
+    _ = list(progressive_copy(source_fs, target_fs, copy_instructions))
+
+    assert target_fs.permission_calls == [
+        (["run.sh"], 0o755),
+        (["gifs/funny.gif", "gifs/other.gif"], 0o600),
+    ]
+
+
+def test__given_instruction_with_mode__when_copying_into_directory__sets_permissions_of_file_in_directory() -> None:
+    source_fs = new_filesystem(["run.sh"])
+    target_fs = PermissionRecordingFilesystem(["bin/other.sh"])
+
+    _ = list(progressive_copy(source_fs, target_fs, [CopyInstruction("run.sh", "bin", mode=0o755)]))
+
+    assert target_fs.permission_calls == [(["bin/run.sh"], 0o755)]
+
+
+def test__given_instruction_without_mode__when_copying__does_not_set_permissions() -> None:
+    source_fs = new_filesystem(["run.sh"])
+    target_fs = PermissionRecordingFilesystem()
+
+    _ = list(progressive_copy(source_fs, target_fs, [CopyInstruction("run.sh", "run.sh")]))
+
+    assert target_fs.permission_calls == []
+
+
+def test__given_multiple_workers__when_copying_instructions_with_mode__sets_permissions_once_per_mode() -> None:
+    source_fs = new_filesystem(["run.sh", "funny.gif", "other.gif"])
+    target_fs = PermissionRecordingFilesystem()
+
+    copy_instructions = [
+        CopyInstruction("run.sh", "run.sh", mode=0o755),
+        CopyInstruction("*.gif", "gifs", mode=0o755),
+    ]
+
+    _ = list(progressive_copy(source_fs, target_fs, copy_instructions, workers=2))
+
+    assert target_fs.permission_calls == [(["gifs/funny.gif", "gifs/other.gif", "run.sh"], 0o755)]
+
+
+def test__given_archive_instruction_with_mode__when_copying__sets_permissions_of_all_matches_at_once() -> None:
+    source_fs = new_filesystem(["funny.gif", "other.gif"])
+    target_fs = PermissionRecordingFilesystem()
+
+    _ = list(progressive_copy(source_fs, target_fs, [CopyInstruction("*.gif", "gifs", archive=True, mode=0o644)]))
+
+    assert target_fs.permission_calls == [(["gifs/funny.gif", "gifs/other.gif"], 0o644)]
@@ -6,13 +6,22 @@ from test.slurm_assertions import (
 from test.slurmoutput import completed_slurm_job
 from test.testdoubles.executor import (
     CommandExecutorStub,
+    LoggingCommandExecutorSpy,
     RunningCommandStub,
+    SbatchTestOnlyExecutorSpy,
+    ShellCommandExecutor,
     SlurmJobExecutorSpy,
+    scontrol_show_job_command_stub,
 )
+import os
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import List
 from unittest.mock import Mock
 
 import pytest
-from hpcrocket.core.executor import CommandExecutor
+from hpcrocket.core.executor import CommandExecutor, RunningCommand
 from hpcrocket.core.slurmbatchjob import SlurmBatchJob, SlurmError
 from hpcrocket.core.slurmcontroller import SlurmController
 from hpcrocket.watcher.jobwatcher import JobWatcher, JobWatcherFactory
@@ -120,6 +129,18 @@ def test__given_watcher_factory__when_submitting_job__should_pass_factory_to_slu
     assert actual is watcher_dummy
 
 
+def test__given_watcher_factory__when_getting_submitted_job__should_pass_factory_to_slurm_job():
+    executor = SlurmJobExecutorSpy()
+    watcher_dummy = Mock(spec=JobWatcher)
+    sut = make_sut(executor, lambda job: watcher_dummy)
+
+    job = sut.batch_job("4321")
+
+    assert job.jobid == "4321"
+    assert job.get_watcher() is watcher_dummy
+    assert executor.command_log == []
+
+
 def test__when_canceling_job_fails__should_raise_slurmerror():
     executor = CommandExecutorStub(RunningCommandStub(exit_code=1))
     sut = make_sut(executor)
@@ -127,3 +148,193 @@ def test__when_canceling_job_fails__should_raise_slurmerror():
     jobid = "1234"
     with pytest.raises(SlurmError):
         sut.cancel(jobid)
+
+
+def test__when_estimating_start__should_call_sbatch_test_only_with_args():
+    executor = SbatchTestOnlyExecutorSpy({"--partition=short": "2024-05-01T12:00:00"})
+    sut = make_sut(executor)
+
+    sut.estimate_start("jobfile.job", ["--partition=short"])
+
+    assert str(executor.command_log[0]) == "sbatch --test-only --partition=short jobfile.job"
+
+
+def test__when_estimating_start__should_return_reported_start_time():
+    executor = SbatchTestOnlyExecutorSpy({"--partition=short": "2024-05-01T12:00:00"})
+    sut = make_sut(executor)
+
+    actual = sut.estimate_start("jobfile.job", ["--partition=short"])
+
+    assert actual == datetime(2024, 5, 1, 12, 0, 0)
+
+
+def test__when_estimating_start_fails__should_raise_slurmerror():
+    executor = SbatchTestOnlyExecutorSpy({})
+    sut = make_sut(executor)
+
+    with pytest.raises(SlurmError):
+        sut.estimate_start("jobfile.job", ["--partition=invalid"])
+
+
+def test__when_estimating_start_without_start_time_in_output__should_raise_slurmerror():
+    executor = CommandExecutorStub(RunningCommandStub(exit_code=0))
+    sut = make_sut(executor)
+
+    with pytest.raises(SlurmError):
+        sut.estimate_start("jobfile.job")
+
+
+def test__when_submitting_job_with_args__should_pass_args_to_sbatch():
+    executor = SlurmJobExecutorSpy()
+    sut = make_sut(executor)
+
+    sut.submit("jobfile.job", ["--partition=short", "--nodes=2"])
+
+    assert str(executor.command_log[0]) == "sbatch --partition=short --nodes=2 jobfile.job"
+
+
+class ScontrolExecutorSpy(LoggingCommandExecutorSpy):
+    def __init__(self, scontrol_cmd: RunningCommandStub) -> None:
+        super().__init__()
+        self.scontrol_cmd = scontrol_cmd
+        self.commands: List[str] = []
+
+    def exec_command(self, cmd: str) -> RunningCommand:
+        self.commands.append(cmd)
+        if cmd.startswith("scontrol"):
+            return self.scontrol_cmd
+
+        return RunningCommandStub()
+
+
+def test__when_resolving_output_files__returns_stdout_and_stderr_files():
+    executor = ScontrolExecutorSpy(scontrol_show_job_command_stub("/home/u/job.out", "/home/u/job.err"))
+    sut = make_sut(executor)
+
+    actual = sut.output_files("1234")
+
+    assert actual == ["/home/u/job.out", "/home/u/job.err"]
+    assert executor.commands == ["scontrol show job 1234"]
+
+
+def test__given_stderr_written_to_stdout_file__when_resolving_output_files__returns_file_once():
+    executor = ScontrolExecutorSpy(scontrol_show_job_command_stub("/home/u/job.out", "/home/u/job.out"))
+    sut = make_sut(executor)
+
+    assert sut.output_files("1234") == ["/home/u/job.out"]
+
+
+def test__given_no_output_file_in_scontrol_output__when_resolving_output_files__should_raise_slurmerror():
+    executor = ScontrolExecutorSpy(RunningCommandStub())
+    sut = make_sut(executor)
+
+    with pytest.raises(SlurmError):
+        sut.output_files("1234")
+
+
+def test__when_tailing_output__follows_all_output_files_from_the_start():
+    executor = ScontrolExecutorSpy(scontrol_show_job_command_stub("/home/u/my job.out", "/home/u/job.err"))
+    sut = make_sut(executor)
+
+    sut.tail_output("1234")
+
+    assert executor.commands[-1] == "tail -n +1 -F -- '/home/u/my job.out' /home/u/job.err"
+
+
+BATCH_SCRIPT = """#!/bin/bash
+#SBATCH --job-name=example
+
+# Comments belong to the header as well
+#SBATCH --time=00:01:00
+echo "running"
+"""
+
+FAKE_SBATCH = """#!/bin/sh
+for script; do :; done
+cp "$script" "$SUBMITTED"
+echo "Submitted batch job 1234"
+"""
+
+
+@pytest.fixture
+def shell_executor(tmp_path: Path) -> ShellCommandExecutor:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "sbatch").write_text(FAKE_SBATCH)
+    (bin_dir / "sbatch").chmod(0o755)
+    (tmp_path / "home").mkdir()
+    (tmp_path / "home" / "job.sh").write_text(BATCH_SCRIPT)
+    return ShellCommandExecutor(str(tmp_path / "home"), str(bin_dir), {"SUBMITTED": str(tmp_path / "submitted.sh")})
+
+
+def run_submitted(tmp_path: Path) -> "subprocess.CompletedProcess[str]":
+    env = {**os.environ, "SLURM_SUBMIT_DIR": str(tmp_path / "home")}
+    return subprocess.run(
+        ["/bin/sh", str(tmp_path / "submitted.sh")], env=env, capture_output=True, text=True, timeout=10
+    )
+
+
+def test__when_submitting_waiting_job__submits_copy_with_name_of_script_and_waiting_preamble(
+    shell_executor: ShellCommandExecutor, tmp_path: Path
+):
+    sut = make_sut(shell_executor)
+
+    job = sut.submit_waiting("job.sh", ".ready", ["--partition=short"])
+
+    submit_command = shell_executor.command_log[1]
+    submitted = (tmp_path / "submitted.sh").read_text()
+    header, _, body = submitted.partition("# Inserted by hpc-rocket")
+    assert job.jobid == "1234"
+    assert str(submit_command).startswith("sbatch --partition=short")
+    assert str(submit_command).endswith("/job.sh")
+    assert header.strip() == BATCH_SCRIPT.rsplit("\n", 2)[0].strip()
+    assert body.rstrip().endswith('echo "running"')
+
+
+def test__when_submitting_waiting_job__removes_copy_after_submitting(
+    shell_executor: ShellCommandExecutor, tmp_path: Path
+):
+    sut = make_sut(shell_executor)
+
+    sut.submit_waiting("job.sh", ".ready")
+
+    copy_directory = str(shell_executor.command_log[1]).split()[-1].rsplit("/", 1)[0]
+    assert not os.path.exists(copy_directory)
+
+
+def test__given_marker_was_created__when_running_waiting_job__runs_commands_and_removes_marker(
+    shell_executor: ShellCommandExecutor, tmp_path: Path
+):
+    sut = make_sut(shell_executor)
+    sut.submit_waiting("job.sh", ".ready", poll_interval=1)
+
+    sut.mark_ready(".ready")
+    result = run_submitted(tmp_path)
+
+    assert result.returncode == 0
+    assert result.stdout == "running\n"
+    assert not (tmp_path / "home" / ".ready").exists()
+
+
+def test__given_marker_is_never_created__when_running_waiting_job__fails_after_timeout(
+    shell_executor: ShellCommandExecutor, tmp_path: Path
+):
+    sut = make_sut(shell_executor)
+    sut.submit_waiting("job.sh", ".ready", poll_interval=1, timeout=1)
+
+    result = run_submitted(tmp_path)
+
+    assert result.returncode == 1
+    assert "running" not in result.stdout
+
+
+def test__given_script_that_is_not_a_shell_script__when_submitting_waiting_job__should_raise_slurmerror(
+    shell_executor: ShellCommandExecutor, tmp_path: Path
+):
+    (tmp_path / "home" / "job.sh").write_text("#!/usr/bin/env python3\nprint('running')\n")
+    sut = make_sut(shell_executor)
+
+    with pytest.raises(SlurmError):
+        sut.submit_waiting("job.sh", ".ready")
+
+    assert not (tmp_path / "submitted.sh").exists()
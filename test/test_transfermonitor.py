@@ -0,0 +1,83 @@
+from typing import List
+
+from hpcrocket.core.filesystem.transfermonitor import FileTransfer, TransferMonitor, TransferProgress
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test__when_files_finish__reports_totals_and_throughput() -> None:
+    clock = FakeClock()
+    sut = TransferMonitor("Copying files", clock=clock)
+
+    sut.found(100)
+    sut.found(300)
+    sut.finished(FileTransfer("a.txt", 100, 1.0))
+    sut.finished(FileTransfer("b.txt", 300, 1.0))
+    clock.now = 2.0
+
+    progress = sut.progress
+    assert (progress.files_found, progress.files_done) == (2, 2)
+    assert (progress.bytes_found, progress.bytes_done) == (400, 400)
+    assert progress.throughput == 200
+
+
+def test__when_file_is_skipped__no_longer_counts_it_as_found() -> None:
+    sut = TransferMonitor("Copying files")
+
+    sut.found(100)
+    sut.found(50)
+    sut.skipped(50)
+
+    assert (sut.progress.files_found, sut.progress.bytes_found) == (1, 100)
+
+
+def test__when_file_finishes__notifies_listener_with_file() -> None:
+    received: List[TransferProgress] = []
+    sut = TransferMonitor("Collecting files", received.append)
+    transfer = FileTransfer("a.txt", 10, 0.5)
+
+    sut.found(10)
+    sut.queued(1)
+    sut.finished(transfer)
+
+    assert [progress.file for progress in received] == [None, None, transfer]
+    assert received[1].queue_depth == 1
+    assert transfer.throughput == 20
+
+
+def test__when_summarizing__returns_machine_readable_totals() -> None:
+    clock = FakeClock()
+    sut = TransferMonitor("Copying files", clock=clock)
+    sut.finished(FileTransfer("a.txt", 10, 1.0))
+    clock.now = 1.0
+
+    assert sut.progress.as_dict() == {
+        "description": "Copying files",
+        "files": 1,
+        "bytes": 10,
+        "seconds": 1.0,
+        "bytes_per_second": 10.0,
+        "operations": 0,
+        "operations_per_file": 0.0,
+    }
+
+
+def test__given_request_counter__when_files_finish__reports_requests_since_start_per_file() -> None:
+    requests = [5]
+    sut = TransferMonitor("Copying files", operations=lambda: requests[0])
+
+    requests[0] = 8
+    sut.finished(FileTransfer("a.txt", 10, 1.0))
+    requests[0] = 12
+    sut.finished(FileTransfer("b.txt", 10, 1.0))
+
+    progress = sut.progress
+    assert progress.operations == 7
+    assert progress.operations_per_file == 3.5
+    assert progress.as_dict()["operations_per_file"] == 3.5
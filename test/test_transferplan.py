@@ -0,0 +1,125 @@
+from typing import cast
+
+from hpcrocket.core.filesystem.planner import PlannedFile, TransferGroup, TransferPlan, TransferStrategy
+from hpcrocket.core.filesystem.progressive import CopyInstruction, OverwriteMode, plan_copy
+from test.testdoubles.filesystem import FileStub, MemoryFilesystemFake
+
+
+def test__when_planning__finds_all_files_and_their_sizes_without_copying() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("data/a.csv", "12345")
+    source_fs.create_file_stub("data/b.csv", "123")
+    source_fs.create_file_stub("run.sh", "12")
+    target_fs = MemoryFilesystemFake()
+
+    plan = plan_copy(
+        source_fs,
+        target_fs,
+        [CopyInstruction("data/*.csv", "results"), CopyInstruction("run.sh", "run.sh")],
+    )
+
+    assert (plan.file_count, plan.size) == (3, 10)
+    assert [group.strategy for group in plan.groups] == [TransferStrategy.files, TransferStrategy.files]
+    assert sorted(file.destination for file in plan.files) == ["results/a.csv", "results/b.csv", "run.sh"]
+    assert not target_fs.exists("run.sh")
+
+
+def test__given_unchanged_file__when_planning__marks_file_as_skipped() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("file.txt", "content")
+    set_modified(source_fs, "file.txt", 100.0)
+    target_fs = MemoryFilesystemFake()
+    target_fs.create_file_stub("copy.txt", "content")
+    set_modified(target_fs, "copy.txt", 200.0)
+
+    plan = plan_copy(source_fs, target_fs, [CopyInstruction("file.txt", "copy.txt", OverwriteMode.if_changed)])
+
+    assert (plan.file_count, plan.skipped_count, plan.size) == (0, 1, 0)
+
+
+def test__given_missing_source_and_existing_target__when_planning__reports_errors() -> None:
+    source_fs = MemoryFilesystemFake(["file.txt"])
+    target_fs = MemoryFilesystemFake(["copy.txt"])
+
+    plan = plan_copy(
+        source_fs,
+        target_fs,
+        [CopyInstruction("missing.txt", "missing.txt"), CopyInstruction("file.txt", "copy.txt")],
+    )
+
+    assert [type(error) for error in plan.errors] == [FileNotFoundError, FileExistsError]
+    assert plan.file_count == 0
+
+
+def test__given_directory__when_planning__plans_its_files() -> None:
+    source_fs = MemoryFilesystemFake()
+    source_fs.create_file_stub("dir/a.txt", "123")
+    source_fs.create_file_stub("dir/b.txt", "12")
+
+    plan = plan_copy(source_fs, MemoryFilesystemFake(), [CopyInstruction("dir", "copy")])
+
+    assert sorted((file.destination, file.size) for file in plan.files) == [("copy/a.txt", 3), ("copy/b.txt", 2)]
+
+
+def test__given_archive_copy__when_planning__plans_all_instructions_as_one_archive() -> None:
+    source_fs = MemoryFilesystemFake(["a.txt", "b.txt"])
+
+    plan = plan_copy(
+        source_fs,
+        MemoryFilesystemFake(),
+        [CopyInstruction("a.txt", "a.txt"), CopyInstruction("b.txt", "b.txt")],
+        archive=True,
+    )
+
+    assert len(plan.groups) == 1
+    assert plan.groups[0].strategy == TransferStrategy.archive
+    assert plan.file_count == 2
+
+
+def test__given_files_with_same_destination__when_planning__reports_conflict() -> None:
+    source_fs = MemoryFilesystemFake(["a/file.txt", "b/file.txt"])
+
+    plan = plan_copy(
+        source_fs,
+        MemoryFilesystemFake(),
+        [CopyInstruction("a/*.txt", "results", True), CopyInstruction("b/*.txt", "results", True)],
+    )
+
+    assert plan.conflicts() == ["results/file.txt is copied from a/file.txt, b/file.txt"]
+
+
+def test__given_destination_copied_as_file_and_directory__finds_conflict() -> None:
+    plan = TransferPlan(
+        [
+            TransferGroup("a", "out", TransferStrategy.files, [PlannedFile("a", "out", 1)]),
+            TransferGroup("b", "out/b", TransferStrategy.files, [PlannedFile("b", "out/b", 1)]),
+        ]
+    )
+
+    assert plan.conflicts() == ["out is copied as a file and as the directory of out/b"]
+
+
+def test__when_ordering_work__puts_largest_units_first_and_archives_as_one_unit() -> None:
+    plan = TransferPlan(
+        [
+            TransferGroup("*.txt", "", TransferStrategy.files, [PlannedFile("a", "a", 1), PlannedFile("b", "b", 5)]),
+            TransferGroup(
+                "src", "", TransferStrategy.archive, [PlannedFile("c", "c", 2), PlannedFile("d", "d", 2)]
+            ),
+        ]
+    )
+
+    assert plan.work_units() == [("b", 5), ("archive of src", 4), ("a", 1)]
+
+
+def test__when_assigning_work_to_workers__balances_loads() -> None:
+    sizes = [7, 5, 4, 3, 3, 2]
+    files = [PlannedFile(str(i), str(i), size) for i, size in enumerate(sizes)]
+    plan = TransferPlan([TransferGroup("*", "", TransferStrategy.files, files)])
+
+    assert plan.worker_loads(2) == [12, 12]
+
+
+def set_modified(fs: MemoryFilesystemFake, path: str, modified: float) -> None:
+    file = cast(FileStub, fs._find_matching_item(path))
+    file.modified = modified
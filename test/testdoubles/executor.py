@@ -1,3 +1,6 @@
+import os
+import shlex
+import subprocess
 from dataclasses import dataclass, field
 from test.slurmoutput import (
     DEFAULT_JOB_ID,
@@ -5,11 +8,12 @@ from test.slurmoutput import (
     get_running_lines,
     get_success_lines,
 )
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from hpcrocket.core.executor import CommandExecutor, RunningCommand
 
 SLURM_SBATCH_COMMAND = "sbatch"
+SLURM_SBATCH_TEST_ONLY_COMMAND = "sbatch --test-only"
 SLURM_SACCT_COMMAND = "sacct -j %s"
 SLURM_SCANCEL_COMMAND = "scancel %s"
 
@@ -18,6 +22,10 @@ def is_sbatch(cmd: str) -> bool:
     return cmd.startswith(SLURM_SBATCH_COMMAND)
 
 
+def is_sbatch_test_only(cmd: str) -> bool:
+    return cmd.startswith(SLURM_SBATCH_TEST_ONLY_COMMAND)
+
+
 def is_sacct(cmd: str, jobid: str) -> bool:
     return cmd.startswith(SLURM_SACCT_COMMAND % jobid)
 
@@ -93,6 +101,43 @@ class SlurmJobExecutorSpy(LoggingCommandExecutorSpy):
         raise ValueError(cmd)
 
 
+class WaitingSubmissionExecutorSpy(SlurmJobExecutorSpy):
+    """
+    Answers the commands that write, submit and start a job submitted to wait for its input files
+    """
+
+    def exec_command(self, cmd: str) -> RunningCommand:
+        if not cmd.startswith(("dir=", "rm ", "touch ")):
+            return super().exec_command(cmd)
+
+        self.log_command(cmd.split())
+        command_stub = RunningCommandStub()
+        command_stub.stdout_lines = ["/tmp/hpc-rocket"]
+        return command_stub
+
+
+class SbatchTestOnlyExecutorSpy(SlurmJobExecutorSpy):
+    """
+    Answers sbatch --test-only probes with the start time registered for the probe's arguments.
+    Probes without a registered start time fail.
+    """
+
+    def __init__(self, start_times: Dict[str, str], jobid: str = DEFAULT_JOB_ID) -> None:
+        super().__init__(jobid=jobid)
+        self.start_times = start_times
+
+    def exec_command(self, cmd: str) -> RunningCommand:
+        if not is_sbatch_test_only(cmd):
+            return super().exec_command(cmd)
+
+        self.log_command(cmd.split())
+        args = " ".join(shlex.split(cmd)[2:-1])
+        if args not in self.start_times:
+            return RunningCommandStub(exit_code=1)
+
+        return sbatch_test_only_command_stub(self.start_times[args])
+
+
 class InfiniteSlurmJobExecutor(LoggingCommandExecutorSpy):
     def exec_command(self, cmd: str) -> RunningCommand:
         super().exec_command(cmd)
@@ -131,6 +176,25 @@ class LongRunningSlurmJobExecutorSpy(SlurmJobExecutorSpy):
         return next(self.running_commands, super_command)
 
 
+class ShellCommandExecutor(LoggingCommandExecutorSpy):
+    """
+    Runs commands with the local shell in `cwd`, with the directory `bin_dir` first on the PATH
+    """
+
+    def __init__(self, cwd: str, bin_dir: str, env: Optional[Dict[str, str]] = None) -> None:
+        super().__init__()
+        self.cwd = cwd
+        self.env = {**os.environ, **(env or {}), "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+
+    def exec_command(self, cmd: str) -> RunningCommand:
+        super().exec_command(cmd)
+        completed = subprocess.run(cmd, shell=True, cwd=self.cwd, env=self.env, capture_output=True, text=True)
+        command = RunningCommandStub(exit_code=completed.returncode)
+        command.stdout_lines = completed.stdout.splitlines()
+        command.stderr_lines = completed.stderr.splitlines()
+        return command
+
+
 class RunningCommandStub(RunningCommand):
     def __init__(self, exit_code: int = 0) -> None:
         self.exit_code = exit_code
@@ -181,3 +245,23 @@ def slurm_job_submitted_command_stub(jobid: str) -> RunningCommandStub:
     command_stub = RunningCommandStub(exit_code=0)
     command_stub.stdout_lines = [f"Submitted Job {jobid}"]
     return command_stub
+
+
+def scontrol_show_job_command_stub(stdout: str, stderr: str) -> RunningCommandStub:
+    command_stub = RunningCommandStub(exit_code=0)
+    command_stub.stdout_lines = [
+        f"JobId={DEFAULT_JOB_ID} JobName=example",
+        "   JobState=RUNNING Reason=None Dependency=(null)",
+        f"   StdErr={stderr}",
+        "   StdIn=/dev/null",
+        f"   StdOut={stdout}",
+    ]
+    return command_stub
+
+
+def sbatch_test_only_command_stub(start: str) -> RunningCommandStub:
+    command_stub = RunningCommandStub(exit_code=0)
+    command_stub.stderr_lines = [
+        f"sbatch: Job 1234 to start at {start} using 4 processors on nodes node01 in partition debug"
+    ]
+    return command_stub
@@ -1,14 +1,16 @@
 import fnmatch
+import hashlib
 from io import TextIOWrapper
 import io
 import os.path
+import time
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import PurePath
 from typing import Any, Dict, Generator, List, Optional, Tuple, Union, cast
 from unittest.mock import DEFAULT, Mock, patch
 
-from hpcrocket.core.filesystem import Filesystem, FilesystemFactory
+from hpcrocket.core.filesystem import FileStat, Filesystem, FilesystemFactory
 
 
 class DummyFilesystemFactory(FilesystemFactory):
@@ -32,12 +34,19 @@ class DummyFilesystem(Filesystem):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         pass
 
-    def delete(self, path: str) -> None:
+    def delete(self, path: str, literal: bool = False) -> None:
         pass
 
+    def stat(self, path: str) -> FileStat:
+        return FileStat(0, 0.0)
+
+    def checksum(self, path: str) -> str:
+        return ""
+
     def openread(self, path: str) -> TextIOWrapper:
         return TextIOWrapper(io.BytesIO())
 
@@ -74,6 +83,7 @@ class MemoryFilesystemFactoryStub(FilesystemFactory):
 class FileStub:
     path: str
     content: str = ""
+    modified: float = field(default_factory=time.time)
 
     def is_dir(self) -> bool:
         return False
@@ -174,16 +184,17 @@ class MemoryFilesystemFake(Filesystem):
         target: str,
         overwrite: bool = False,
         filesystem: Optional["Filesystem"] = None,
+        literal: bool = False,
     ) -> None:
         assert filesystem is None or isinstance(
             filesystem, (MemoryFilesystemFake, Mock)
         )
         other = cast(MemoryFilesystemFake, filesystem) or self
         self._raise_if_target_file_exists(other, target, overwrite)
-        self._perform_copy(other, source, target, overwrite)
+        self._perform_copy(other, source, target, overwrite, literal)
 
-    def delete(self, path: str) -> None:
-        items = self._get_matching_items(path)
+    def delete(self, path: str, literal: bool = False) -> None:
+        items = self._get_matching_items(path, literal)
 
         if not items:
             raise FileNotFoundError(path)
@@ -204,6 +215,24 @@ class MemoryFilesystemFake(Filesystem):
 
         return all_children
 
+    def stat(self, path: str) -> FileStat:
+        item = self._find_matching_item(path)
+        if item is None:
+            raise FileNotFoundError(path)
+
+        if item.is_dir():
+            return FileStat(0, 0.0, is_dir=True)
+
+        file = cast(FileStub, item)
+        return FileStat(len(file.content), file.modified)
+
+    def checksum(self, path: str) -> str:
+        item = self._find_matching_item(path)
+        if item is None or item.is_dir():
+            raise FileNotFoundError(path)
+
+        return hashlib.blake2b(cast(FileStub, item).content.encode()).hexdigest()
+
     def openread(self, path: str) -> TextIOWrapper:
         file = self._find_matching_item(path)
         if file is None or file.is_dir():
@@ -216,11 +245,11 @@ class MemoryFilesystemFake(Filesystem):
         return TextIOWrapper(content_as_bytes)
 
     def _perform_copy(
-        self, other: "MemoryFilesystemFake", source: str, target: str, overwrite: bool
+        self, other: "MemoryFilesystemFake", source: str, target: str, overwrite: bool, literal: bool
     ) -> None:
         source = self._expandhome(source, self)
         target = self._expandhome(target, other)
-        matches = self._get_matching_items(source)
+        matches = self._get_matching_items(source, literal)
         if not matches:
             raise FileNotFoundError(source)
 
@@ -264,6 +293,7 @@ class MemoryFilesystemFake(Filesystem):
 
         if existing_file and overwrite:
             existing_file.content = file_to_copy.content
+            existing_file.modified = time.time()
             return
 
         self._raise_if_target_file_exists(target_fs, target_path, overwrite)
@@ -321,8 +351,8 @@ class MemoryFilesystemFake(Filesystem):
 
             yield walked_path
 
-    def _get_matching_items(self, path: str) -> List[FilesystemItem]:
-        if "*" in path:
+    def _get_matching_items(self, path: str, literal: bool = False) -> List[FilesystemItem]:
+        if "*" in path and not literal:
             return self._get_items_by_glob(path)
 
         item = self._find_matching_item(path)
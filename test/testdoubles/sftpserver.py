@@ -0,0 +1,272 @@
+import heapq
+import os
+import socket
+import subprocess
+import threading
+import time
+from types import TracebackType
+from typing import Any, List, Optional, Tuple, Type, Union
+
+import paramiko
+from paramiko.sftp_attr import SFTPAttributes
+from paramiko.sftp_handle import SFTPHandle
+from paramiko.sftp_server import SFTPServer
+from paramiko.sftp_si import SFTPServerInterface
+
+_HOST_KEY: Optional[paramiko.RSAKey] = None
+
+
+def _host_key() -> paramiko.RSAKey:
+    global _HOST_KEY
+    if _HOST_KEY is None:
+        _HOST_KEY = paramiko.RSAKey.generate(2048)
+
+    return _HOST_KEY
+
+
+class _LocalHandle(SFTPHandle):
+    def stat(self) -> Union[SFTPAttributes, int]:
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as err:
+            return SFTPServer.convert_errno(err.errno)
+
+    def chattr(self, attr: SFTPAttributes) -> int:
+        try:
+            SFTPServer.set_file_attr(self.filename, attr)
+            return paramiko.SFTP_OK
+        except OSError as err:
+            return SFTPServer.convert_errno(err.errno)
+
+
+class LocalSFTPServer(SFTPServerInterface):
+    """
+    Serves the local filesystem over SFTP. Paths on the server are the same as local paths.
+    """
+
+    def open(self, path: str, flags: int, attr: SFTPAttributes) -> Union[SFTPHandle, int]:
+        try:
+            mode = getattr(attr, "st_mode", None) or 0o666
+            fd = os.open(path, flags, mode & 0o7777)
+        except OSError as err:
+            return SFTPServer.convert_errno(err.errno)
+
+        if flags & os.O_CREAT and attr is not None:
+            attr._flags &= ~attr.FLAG_PERMISSIONS
+            SFTPServer.set_file_attr(path, attr)
+
+        if flags & os.O_WRONLY:
+            fmode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            fmode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            fmode = "rb"
+
+        handle = _LocalHandle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, fmode)
+        return handle
+
+    def list_folder(self, path: str) -> Union[List[SFTPAttributes], int]:
+        try:
+            entries = []
+            for name in os.listdir(path):
+                attr = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as err:
+            return SFTPServer.convert_errno(err.errno)
+
+    def stat(self, path: str) -> Union[SFTPAttributes, int]:
+        return self._call(lambda: SFTPAttributes.from_stat(os.stat(path)))
+
+    def lstat(self, path: str) -> Union[SFTPAttributes, int]:
+        return self._call(lambda: SFTPAttributes.from_stat(os.lstat(path)))
+
+    def remove(self, path: str) -> int:
+        return self._call_ok(lambda: os.remove(path))
+
+    def rename(self, oldpath: str, newpath: str) -> int:
+        if os.path.exists(newpath):
+            return paramiko.SFTP_FAILURE
+
+        return self._call_ok(lambda: os.rename(oldpath, newpath))
+
+    def posix_rename(self, oldpath: str, newpath: str) -> int:
+        return self._call_ok(lambda: os.replace(oldpath, newpath))
+
+    def mkdir(self, path: str, attr: SFTPAttributes) -> int:
+        return self._call_ok(lambda: os.mkdir(path))
+
+    def rmdir(self, path: str) -> int:
+        return self._call_ok(lambda: os.rmdir(path))
+
+    def chattr(self, path: str, attr: SFTPAttributes) -> int:
+        return self._call_ok(lambda: SFTPServer.set_file_attr(path, attr))
+
+    def symlink(self, target_path: str, path: str) -> int:
+        return self._call_ok(lambda: os.symlink(target_path, path))
+
+    def readlink(self, path: str) -> Union[str, int]:
+        return self._call(lambda: os.readlink(path))
+
+    def _call(self, function: Any) -> Any:
+        try:
+            return function()
+        except OSError as err:
+            return SFTPServer.convert_errno(err.errno)
+
+    def _call_ok(self, function: Any) -> int:
+        result = self._call(function)
+        return paramiko.SFTP_OK if result is None else int(result)
+
+
+class _Server(paramiko.ServerInterface):
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        threading.Thread(target=_run_command, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+def _run_command(channel: paramiko.Channel, command: str) -> None:
+    process = subprocess.Popen(
+        ["/bin/sh", "-c", command], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    assert process.stdin and process.stdout and process.stderr
+    pumps = [
+        threading.Thread(target=_pump_channel_to_stdin, args=(channel, process.stdin), daemon=True),
+        threading.Thread(target=_pump, args=(process.stdout.read1, channel.sendall)),
+        threading.Thread(target=_pump, args=(process.stderr.read1, channel.sendall_stderr)),
+    ]
+    for pump in pumps:
+        pump.start()
+
+    for pump in pumps[1:]:
+        pump.join()
+
+    try:
+        channel.send_exit_status(process.wait())
+        channel.close()
+    except (OSError, EOFError):
+        # The client closed the connection without waiting for the exit status
+        pass
+
+
+def _pump_channel_to_stdin(channel: paramiko.Channel, stdin: Any) -> None:
+    try:
+        while data := channel.recv(65536):
+            stdin.write(data)
+            stdin.flush()
+    except (OSError, EOFError):
+        pass
+    finally:
+        stdin.close()
+
+
+def _pump(read: Any, write: Any) -> None:
+    try:
+        while data := read(65536):
+            write(data)
+    except (OSError, EOFError):
+        pass
+
+
+class _LatencyRelay:
+    """
+    Forwards data between two sockets and delays every chunk by `delay` seconds in each direction
+    """
+
+    def __init__(self, a: socket.socket, b: socket.socket, delay: float) -> None:
+        self._delay = delay
+        for source, target in ((a, b), (b, a)):
+            queue: List[Tuple[float, int, bytes]] = []
+            condition = threading.Condition()
+            threading.Thread(target=self._receive, args=(source, queue, condition), daemon=True).start()
+            threading.Thread(target=self._send, args=(target, queue, condition), daemon=True).start()
+
+    def _receive(self, source: socket.socket, queue: List[Tuple[float, int, bytes]], condition: Any) -> None:
+        counter = 0
+        while True:
+            try:
+                data = source.recv(65536)
+            except OSError:
+                data = b""
+
+            with condition:
+                heapq.heappush(queue, (time.monotonic() + self._delay, counter, data))
+                condition.notify()
+
+            counter += 1
+            if not data:
+                return
+
+    def _send(self, target: socket.socket, queue: List[Tuple[float, int, bytes]], condition: Any) -> None:
+        while True:
+            with condition:
+                while not queue:
+                    condition.wait()
+
+                due, _, data = heapq.heappop(queue)
+
+            time.sleep(max(0.0, due - time.monotonic()))
+            if not data:
+                target.shutdown(socket.SHUT_WR)
+                return
+
+            try:
+                target.sendall(data)
+            except OSError:
+                return
+
+
+class SFTPStandIn:
+    """
+    An in-process SSH server with SFTP and command execution on the local machine.
+    `latency` adds a one-way delay in seconds to all traffic, so the round trip time is twice the latency.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._latency = latency
+        self._transports: List[paramiko.Transport] = []
+
+    def connect(self) -> socket.socket:
+        """
+        Returns:
+            socket.socket: A socket to pass to an SSH client as `sock`
+        """
+        client_sock, server_sock = socket.socketpair()
+        if self._latency:
+            client_sock, relay_client_side = socket.socketpair()
+            relay_server_side, server_sock = socket.socketpair()
+            _LatencyRelay(relay_client_side, relay_server_side, self._latency)
+
+        transport = paramiko.Transport(server_sock)
+        transport.add_server_key(_host_key())
+        transport.set_subsystem_handler("sftp", SFTPServer, LocalSFTPServer)
+        transport.start_server(event=threading.Event(), server=_Server())
+        self._transports.append(transport)
+        return client_sock
+
+    def close(self) -> None:
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self) -> "SFTPStandIn":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -1,5 +1,7 @@
-from typing import List
-from hpcrocket.core.filesystem import FilesystemFactory
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from hpcrocket.core.filesystem import Filesystem, FilesystemFactory
 from test.testdoubles.filesystem import (
     DummyFilesystemFactory,
     MemoryFilesystemFactoryStub,
@@ -87,3 +89,98 @@ def test__given_collect_instructions_with_glob__when_file_exists_locally__still_
     run_finalize_stage(factory, files_to_collect, [])
 
     assert local_fs.exists("existing.txt") is True
+
+
+class ArchiveRecordingFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.archives: List[Tuple[List[Tuple[str, str]], Optional[str]]] = []
+
+    def copy_archive(
+        self,
+        files: Sequence[Tuple[str, str]],
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        self.archives.append((list(files), compression))
+        super().copy_archive(files, overwrite, filesystem, compression)
+
+
+def test__given_collect_archive__when_running__should_collect_all_files_as_one_archive() -> None:
+    ssh_fs = ArchiveRecordingFilesystem(files=["rank0.log", "rank1.log", "result.txt"])
+    factory = MemoryFilesystemFactoryStub(ssh_fs=ssh_fs)
+    files_to_collect = [
+        CopyInstruction("*.log", "logs"),
+        CopyInstruction("result.txt", "collected.txt"),
+    ]
+
+    sut = FinalizeStage(factory, files_to_collect, [], archive=True, compression="zstd")
+    sut(Mock())
+
+    assert ssh_fs.archives == [
+        (
+            [("rank0.log", "logs/rank0.log"), ("rank1.log", "logs/rank1.log"), ("result.txt", "collected.txt")],
+            "zstd",
+        )
+    ]
+    local_fs = factory.local_filesystem
+    assert local_fs.exists("logs/rank0.log") is True
+    assert local_fs.exists("collected.txt") is True
+
+
+def test__given_collect_archive__when_running__reports_archive_as_single_transfer() -> None:
+    ssh_fs = ArchiveRecordingFilesystem(files=["rank0.log", "rank1.log"])
+    factory = MemoryFilesystemFactoryStub(ssh_fs=ssh_fs)
+
+    sut = FinalizeStage(factory, [CopyInstruction("*.log", "logs")], [], archive=True)
+    sut(Mock())
+
+    assert sut.transfers.files_done == 1
+    assert sut.transfers.description == "Collecting files"
+
+def test__given_transfers_file__when_running__writes_summary_as_json_line(tmp_path: Path) -> None:
+    factory = MemoryFilesystemFactoryStub(ssh_fs=MemoryFilesystemFake(files=["rank0.log", "rank1.log"]))
+    transfers_file = tmp_path / "transfers.jsonl"
+
+    sut = FinalizeStage(factory, [CopyInstruction("*.log", "logs")], [], transfers_file=transfers_file)
+    sut(Mock())
+
+    assert json.loads(transfers_file.read_text()) == sut.transfers.as_dict()
+    assert sut.transfers.as_dict()["files"] == 2
+
+
+def test__given_collect_archive__when_file_not_found__should_still_collect_remaining_files() -> None:
+    ssh_fs = MemoryFilesystemFake(files=["myfile.txt"])
+    factory = MemoryFilesystemFactoryStub(ssh_fs=ssh_fs)
+    files_to_collect = [
+        CopyInstruction("invalid", "_"),
+        CopyInstruction("myfile.txt", "collected.txt"),
+    ]
+
+    sut = FinalizeStage(factory, files_to_collect, [], archive=True)
+    sut(Mock())
+
+    local_fs = factory.local_filesystem
+    assert local_fs.exists("collected.txt") is True
+
+
+class DeleteRecordingFilesystem(MemoryFilesystemFake):
+    def __init__(self, files: List[str]) -> None:
+        super().__init__(files)
+        self.deletions: List[Tuple[List[str], bool]] = []
+
+    def delete_many(self, paths: Sequence[str], detach: bool = False, literal: bool = False) -> List[FileNotFoundError]:
+        self.deletions.append((list(paths), detach))
+        return super().delete_many(paths, detach, literal)
+
+
+def test__given_clean_in_background__when_running__should_clean_all_files_at_once_without_waiting() -> None:
+    ssh_fs = DeleteRecordingFilesystem(files=["myfile.txt", "output/result.txt"])
+    factory = MemoryFilesystemFactoryStub(ssh_fs=ssh_fs)
+
+    sut = FinalizeStage(factory, [], ["myfile.txt", "output/*.txt"], clean_in_background=True)
+    sut(Mock())
+
+    assert ssh_fs.deletions == [(["myfile.txt", "output/*.txt"], True)]
+    assert ssh_fs.exists("myfile.txt") is False
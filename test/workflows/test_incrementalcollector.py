@@ -0,0 +1,107 @@
+from typing import cast
+from unittest.mock import Mock
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction, OverwriteMode
+from hpcrocket.core.workflows.incremental import IncrementalCollector
+from hpcrocket.ui import UI
+from test.testdoubles.filesystem import FileStub, MemoryFilesystemFactoryStub
+
+STABLE_TIME = 60
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_collector(factory: MemoryFilesystemFactoryStub, clock: FakeClock) -> IncrementalCollector:
+    return IncrementalCollector(
+        factory, [CopyInstruction("results/*.dat", "collected")], STABLE_TIME, interval=10, clock=clock
+    )
+
+
+def change_remote_file(factory: MemoryFilesystemFactoryStub, path: str, content: str) -> None:
+    file = cast(FileStub, factory.ssh_filesystem._find_matching_item(path))
+    file.content = content
+    file.modified += 1
+
+
+def test__given_new_file__when_collecting__does_not_collect_until_file_is_stable() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("results/step1.dat")
+    clock = FakeClock()
+    sut = make_collector(factory, clock)
+
+    sut.collect_stable_files(Mock(spec=UI))
+    clock.now = STABLE_TIME - 1
+    sut.collect_stable_files(Mock(spec=UI))
+
+    assert not factory.local_filesystem.exists("collected/step1.dat")
+
+
+def test__given_file_unchanged_for_stable_time__when_collecting__collects_file() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("results/step1.dat")
+    clock = FakeClock()
+    sut = make_collector(factory, clock)
+
+    sut.collect_stable_files(Mock(spec=UI))
+    clock.now = STABLE_TIME
+    sut.collect_stable_files(Mock(spec=UI))
+
+    assert factory.local_filesystem.exists("collected/step1.dat")
+
+
+def test__given_file_changed_in_between__when_collecting__waits_for_stable_time_again() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("results/step1.dat")
+    clock = FakeClock()
+    sut = make_collector(factory, clock)
+
+    sut.collect_stable_files(Mock(spec=UI))
+    clock.now = STABLE_TIME
+    change_remote_file(factory, "results/step1.dat", "more data")
+    sut.collect_stable_files(Mock(spec=UI))
+
+    assert not factory.local_filesystem.exists("collected/step1.dat")
+
+
+def test__given_glob_directory_does_not_exist_yet__when_collecting__does_not_report_error() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    ui = Mock(spec=UI)
+    sut = make_collector(factory, FakeClock())
+
+    sut.collect_stable_files(ui)
+
+    ui.error.assert_not_called()
+
+
+def test__given_collected_files__when_getting_remaining__leaves_out_unchanged_files() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("results/step1.dat", "results/step2.dat")
+    clock = FakeClock()
+    sut = make_collector(factory, clock)
+    sut.collect_stable_files(Mock(spec=UI))
+    clock.now = STABLE_TIME
+    sut.collect_stable_files(Mock(spec=UI))
+
+    change_remote_file(factory, "results/step2.dat", "final data")
+    factory.create_remote_files("results/step3.dat")
+    remaining = sut.remaining([CopyInstruction("results/*.dat", "collected")])
+
+    assert remaining == [
+        CopyInstruction("results/step2.dat", "collected/step2.dat", OverwriteMode.always, literal=True),
+        CopyInstruction("results/step3.dat", "collected/step3.dat", literal=True),
+    ]
+
+
+def test__given_nothing_collected__when_getting_remaining__returns_instructions_unchanged() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("results/step1.dat")
+    sut = make_collector(factory, FakeClock())
+    instructions = [CopyInstruction("results/*.dat", "collected")]
+
+    assert sut.remaining(instructions) == instructions
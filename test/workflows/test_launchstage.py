@@ -1,15 +1,24 @@
 from test.application.optionbuilders import launch_options
 from test.slurm_assertions import assert_job_canceled, assert_job_submitted
 from test.slurmoutput import DEFAULT_JOB_ID
-from test.testdoubles.executor import CommandExecutorStub, SlurmJobExecutorSpy
+from test.testdoubles.executor import (
+    CommandExecutorStub,
+    SbatchTestOnlyExecutorSpy,
+    SlurmJobExecutorSpy,
+)
+import json
+from datetime import datetime
+from pathlib import Path
 from typing import Optional
 from unittest.mock import Mock
 
 import pytest
 from hpcrocket.core.executor import CommandExecutor
 from hpcrocket.core.launchoptions import LaunchOptions
+from hpcrocket.core.slurmbatchjob import SlurmError
 from hpcrocket.core.slurmcontroller import SlurmController
 from hpcrocket.core.workflows.stages import LaunchStage, NoJobLaunchedError
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.ui import UI
 from hpcrocket.watcher.jobwatcher import JobWatcherFactory
 
@@ -73,3 +82,117 @@ def test__when_canceling_before_running__should_raise_no_job_launched_error() ->
 
     with pytest.raises(NoJobLaunchedError):
         sut.cancel(Mock())
+
+
+def test__given_candidates__when_running__should_submit_with_earliest_starting_candidate() -> None:
+    executor = SbatchTestOnlyExecutorSpy(
+        {
+            "--partition=long": "2024-05-01T18:00:00",
+            "--partition=short": "2024-05-01T12:00:00",
+        }
+    )
+    controller = SlurmController(executor)
+    sut = LaunchStage(controller, "test.job", [["--partition=long"], ["--partition=short"]])
+
+    sut(Mock(spec=UI))
+
+    assert str(executor.command_log[-1]) == "sbatch --partition=short test.job"
+
+
+def test__given_candidates__when_running__should_record_chosen_and_rejected_candidates() -> None:
+    executor = SbatchTestOnlyExecutorSpy({"--partition=short": "2024-05-01T12:00:00"})
+    controller = SlurmController(executor)
+    sut = LaunchStage(controller, "test.job", [["--partition=invalid"], ["--partition=short"]])
+
+    sut(Mock(spec=UI))
+
+    invalid, short = sut.estimates
+    assert invalid.start is None
+    assert isinstance(invalid.error, SlurmError)
+    assert short.start == datetime(2024, 5, 1, 12, 0, 0)
+
+
+def test__given_candidates__when_no_candidate_can_be_scheduled__should_return_false_without_submitting() -> None:
+    executor = SbatchTestOnlyExecutorSpy({})
+    controller = SlurmController(executor)
+    sut = LaunchStage(controller, "test.job", [["--partition=invalid"]])
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is False
+    assert all(command.args[0] == "--test-only" for command in executor.command_log)
+
+
+def test__given_state__when_running__should_save_launched_job(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.save()
+    sut = LaunchStage(SlurmController(SlurmJobExecutorSpy()), "test.job", state=state)
+
+    sut(Mock(spec=UI))
+
+    assert WorkflowState.resume(tmp_path / "state", "fingerprint").jobid == DEFAULT_JOB_ID
+
+
+def test__given_state_with_launched_job__when_running__should_provide_job_without_submitting(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.jobid = "4321"
+    executor = SlurmJobExecutorSpy()
+    sut = LaunchStage(SlurmController(executor), "test.job", state=state)
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is True
+    assert executor.command_log == []
+    assert sut.get_batch_job().jobid == "4321"
+
+
+def test__given_state_with_launched_job__when_running__should_provide_job_with_watcher_of_controller(
+    tmp_path: Path,
+) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.jobid = "4321"
+    watcher_dummy = Mock()
+    sut = LaunchStage(SlurmController(SlurmJobExecutorSpy(), lambda job: watcher_dummy), "test.job", state=state)
+
+    sut(Mock(spec=UI))
+
+    assert sut.get_batch_job().get_watcher() is watcher_dummy
+
+
+def test__given_candidates__when_no_candidate_can_be_scheduled__should_log_why_each_was_rejected() -> None:
+    executor = SbatchTestOnlyExecutorSpy({})
+    ui = Mock(spec=UI)
+    sut = LaunchStage(SlurmController(executor), "test.job", [["--partition=invalid"]])
+
+    sut(ui)
+
+    logged = [str(call.args[0]) for call in ui.error.call_args_list]
+    assert any(message.startswith("Rejected candidate --partition=invalid") for message in logged)
+
+
+def test__given_candidates_and_estimates_file__when_running__should_write_estimates(tmp_path: Path) -> None:
+    executor = SbatchTestOnlyExecutorSpy({"--partition=short": "2024-05-01T12:00:00"})
+    estimates_file = tmp_path / "estimates.json"
+    sut = LaunchStage(
+        SlurmController(executor),
+        "test.job",
+        [["--partition=invalid"], ["--partition=short"]],
+        estimates_file=estimates_file,
+    )
+
+    sut(Mock(spec=UI))
+
+    invalid, short = json.loads(estimates_file.read_text())
+    assert invalid["sbatch_args"] == ["--partition=invalid"]
+    assert invalid["start"] is None
+    assert invalid["error"]
+    assert short == {"sbatch_args": ["--partition=short"], "start": "2024-05-01T12:00:00", "error": None}
+
+
+def test__given_candidate_with_shell_characters__when_running__should_quote_sbatch_arguments() -> None:
+    executor = SbatchTestOnlyExecutorSpy({"--comment=a b; rm": "2024-05-01T12:00:00"})
+    sut = LaunchStage(SlurmController(executor), "test.job", [["--comment=a b; rm"]])
+
+    sut(Mock(spec=UI))
+
+    assert str(executor.command_log[-1]) == "sbatch '--comment=a b; rm' test.job"
@@ -0,0 +1,63 @@
+from unittest.mock import Mock
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction
+from hpcrocket.core.workflows.stages import PlanStage
+from hpcrocket.ui import UI
+from test.testdoubles.filesystem import MemoryFilesystemFactoryStub
+
+
+def test__given_copy_instructions__when_running__plans_files_without_copying() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("a.txt", "b.txt")
+    sut = PlanStage(factory, [CopyInstruction("*.txt", "remote")])
+
+    result = sut(Mock(spec=UI))
+
+    assert result is True
+    assert sut.plan.file_count == 2
+    assert not factory.ssh_filesystem.exists("remote/a.txt")
+
+
+def test__given_collect_instructions__when_running__plans_files_from_remote() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_remote_files("result.txt")
+    sut = PlanStage(factory, [CopyInstruction("result.txt", "local.txt")], collect=True)
+
+    sut(Mock(spec=UI))
+
+    assert [file.destination for file in sut.plan.files] == ["local.txt"]
+    assert not factory.local_filesystem.exists("local.txt")
+
+
+def test__given_conflicting_destinations__when_running__fails_and_reports_conflict() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("a.txt", "b.txt")
+    ui = Mock(spec=UI)
+    sut = PlanStage(factory, [CopyInstruction("a.txt", "c.txt"), CopyInstruction("b.txt", "c.txt")])
+
+    result = sut(ui)
+
+    assert result is False
+    ui.error.assert_called_once_with("Conflicting destination: c.txt is copied from a.txt, b.txt")
+
+
+def test__given_missing_file__when_running__fails_and_reports_error() -> None:
+    ui = Mock(spec=UI)
+    sut = PlanStage(MemoryFilesystemFactoryStub(), [CopyInstruction("missing.txt", "c.txt")])
+
+    result = sut(ui)
+
+    assert result is False
+    ui.error.assert_called_once()
+
+
+def test__given_remote_copy_instruction__when_running__lists_it_without_planning_local_files() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    ui = Mock(spec=UI)
+    sut = PlanStage(factory, [CopyInstruction("/project/shared/data", "data", remote_method="link")])
+
+    result = sut(ui)
+
+    assert result is True
+    assert sut.plan.files == []
+    ui.info.assert_any_call("link on remote: /project/shared/data -> data")
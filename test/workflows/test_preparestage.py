@@ -1,13 +1,19 @@
-from typing import List
-from hpcrocket.core.filesystem import FilesystemFactory
+import json
+from pathlib import Path
+from typing import List, Optional
+from hpcrocket.core.filesystem import Filesystem, FilesystemFactory
 from test.testdoubles.filesystem import (
     DummyFilesystemFactory,
     MemoryFilesystemFactoryStub,
+    MemoryFilesystemFake,
 )
 from unittest.mock import Mock
 
+import pytest
+
 from hpcrocket.core.filesystem.progressive import CopyInstruction
 from hpcrocket.core.workflows.stages import PrepareStage
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.ui import UI
 
 
@@ -79,3 +85,228 @@ def test__given_copy_instructions__when_error_during_copy__should_return_false()
     actual = run_prepare_stage(factory, copy_instructions)
 
     assert actual == False
+
+
+def test__given_multiple_workers__when_error_during_copy__should_rollback_copied_files() -> None:
+    copy_instructions = [
+        CopyInstruction("myfile.txt", "mycopy.txt"),
+        CopyInstruction("other.txt", "othercopy.txt"),
+        CopyInstruction("missing.txt", "missingcopy.txt"),
+    ]
+
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("myfile.txt", "other.txt")
+
+    sut = PrepareStage(factory, copy_instructions, workers=2)
+    actual = sut(Mock(spec=UI))
+
+    assert actual is False
+    assert factory.ssh_filesystem.exists("mycopy.txt") is False
+    assert factory.ssh_filesystem.exists("othercopy.txt") is False
+
+
+def test__given_copy_instructions__when_running__reports_transfer_progress_and_summary() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("funny.gif", "other.gif")
+    ui = Mock(spec=UI)
+
+    sut = PrepareStage(factory, [CopyInstruction("*.gif", "")])
+    sut(ui)
+
+    assert ui.transfer.call_args.args[0].files_done == 2
+    assert sut.transfers.as_dict()["files"] == 2
+
+
+class RequestCountingFilesystem(MemoryFilesystemFake):
+    """
+    Counts every existence check as a request to the remote machine
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests = 0
+
+    def exists(self, path: str) -> bool:
+        self.requests += 1
+        return super().exists(path)
+
+    def request_count(self) -> int:
+        return self.requests
+
+
+def test__given_transfers_file__when_running_twice__appends_summary_of_every_run(tmp_path: Path) -> None:
+    ssh_fs = RequestCountingFilesystem()
+    factory = MemoryFilesystemFactoryStub(ssh_fs=ssh_fs)
+    factory.create_local_files("funny.gif", "other.gif")
+    transfers_file = tmp_path / "transfers.jsonl"
+
+    for _ in range(2):
+        sut = PrepareStage(factory, [CopyInstruction("*.gif", "", overwrite=True)], transfers_file=transfers_file)
+        sut(Mock(spec=UI))
+
+    summaries = [json.loads(line) for line in transfers_file.read_text().splitlines()]
+    assert [summary["files"] for summary in summaries] == [2, 2]
+    assert summaries[0]["description"] == "Copying files"
+    assert summaries[0]["operations"] > 0
+    assert summaries[0]["operations_per_file"] == summaries[0]["operations"] / 2
+
+
+def test__given_remote_copy_instructions__when_running__should_copy_files_on_remote() -> None:
+    copy_instructions = [
+        CopyInstruction("myfile.txt", "mycopy.txt"),
+        CopyInstruction("shared/dataset.txt", "data.txt", remote_method="link"),
+    ]
+
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("myfile.txt")
+    factory.ssh_filesystem.create_file_stub("shared/dataset.txt", content="shared content")
+
+    actual = run_prepare_stage(factory, copy_instructions)
+
+    remotefs = factory.ssh_filesystem
+    assert actual is True
+    assert remotefs.get_content_of_file_stub("data.txt") == "shared content"
+    assert not factory.local_filesystem.exists("data.txt")
+
+
+def test__given_remote_copy_instruction__when_remote_copy_fails__should_rollback_copied_files() -> None:
+    copy_instructions = [
+        CopyInstruction("myfile.txt", "mycopy.txt"),
+        CopyInstruction("shared/missing.txt", "data.txt", remote_method="copy"),
+    ]
+
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("myfile.txt")
+
+    actual = run_prepare_stage(factory, copy_instructions)
+
+    assert actual is False
+    assert factory.ssh_filesystem.exists("mycopy.txt") is False
+
+
+def test__given_state__when_running__should_save_copied_files(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.save()
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("myfile.txt")
+    sut = PrepareStage(factory, [CopyInstruction("myfile.txt", "mycopy.txt")], state=state)
+
+    sut(Mock(spec=UI))
+
+    assert WorkflowState.resume(tmp_path / "state", "fingerprint").copied_files == ["mycopy.txt"]
+
+
+def test__given_state_with_copied_files__when_running__should_only_copy_remaining_files(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.copied_files = ["funny.gif"]
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("funny.gif", "other.gif")
+    factory.create_remote_files("funny.gif")
+    sut = PrepareStage(factory, [CopyInstruction("*.gif", "")], state=state)
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is True
+    assert factory.ssh_filesystem.exists("other.gif")
+
+
+def test__given_state_with_copied_files__when_error_during_copy__should_rollback_previously_copied_files(
+    tmp_path: Path,
+) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.copied_files = ["mycopy.txt"]
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("myfile.txt")
+    factory.create_remote_files("mycopy.txt")
+    copy_instructions = [
+        CopyInstruction("myfile.txt", "mycopy.txt"),
+        CopyInstruction("missing.txt", "missingcopy.txt"),
+    ]
+    sut = PrepareStage(factory, copy_instructions, state=state)
+
+    sut(Mock(spec=UI))
+
+    assert factory.ssh_filesystem.exists("mycopy.txt") is False
+
+
+class InterruptingFilesystem(MemoryFilesystemFake):
+    """
+    Is interrupted like a run that is stopped with Ctrl+C once it copied `copies` files
+    """
+
+    def __init__(self, copies: int) -> None:
+        super().__init__()
+        self._copies = copies
+
+    def copy(
+        self,
+        source: str,
+        target: str,
+        overwrite: bool = False,
+        filesystem: Optional[Filesystem] = None,
+        literal: bool = False,
+    ) -> None:
+        if not self._copies:
+            raise KeyboardInterrupt()
+
+        self._copies -= 1
+        super().copy(source, target, overwrite, filesystem, literal)
+
+
+def test__given_state__when_interrupted_while_copying_glob__should_have_saved_files_copied_so_far(
+    tmp_path: Path,
+) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.save()
+    factory = MemoryFilesystemFactoryStub(local_fs=InterruptingFilesystem(copies=2))
+    factory.create_local_files("a.gif", "b.gif", "c.gif")
+    sut = PrepareStage(factory, [CopyInstruction("*.gif", "")], state=state)
+
+    with pytest.raises(KeyboardInterrupt):
+        sut(Mock(spec=UI))
+
+    assert WorkflowState.resume(tmp_path / "state", "fingerprint").copied_files == ["a.gif", "b.gif"]
+
+
+def test__given_state_with_copied_files__when_unsaved_copy_is_at_destination__should_compare_and_keep_it(
+    tmp_path: Path,
+) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.copied_files = ["a.gif"]
+    factory = MemoryFilesystemFactoryStub()
+    for file in ("a.gif", "b.gif", "c.gif"):
+        factory.local_filesystem.create_file_stub(file, content=file)
+
+    factory.ssh_filesystem.create_file_stub("a.gif", content="a.gif")
+    factory.ssh_filesystem.create_file_stub("b.gif", content="b.gif")
+    sut = PrepareStage(factory, [CopyInstruction("*.gif", "")], state=state)
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is True
+    assert factory.ssh_filesystem.exists("c.gif")
+
+
+def test__given_state__when_partial_copy_is_at_destination__should_copy_it_again(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.completed_stages = 1
+    factory = MemoryFilesystemFactoryStub()
+    factory.local_filesystem.create_file_stub("image.sif", content="the whole image")
+    factory.ssh_filesystem.create_file_stub("image.sif", content="the who")
+    sut = PrepareStage(factory, [CopyInstruction("image.sif", "image.sif")], state=state)
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is True
+    with factory.ssh_filesystem.openread("image.sif") as file:
+        assert file.read() == "the whole image"
+
+
+def test__given_existing_file_without_state__when_running__should_not_overwrite_it() -> None:
+    factory = MemoryFilesystemFactoryStub()
+    factory.local_filesystem.create_file_stub("image.sif", content="the whole image")
+    factory.ssh_filesystem.create_file_stub("image.sif", content="other")
+
+    actual = run_prepare_stage(factory, [CopyInstruction("image.sif", "image.sif")])
+
+    assert actual is False
@@ -0,0 +1,69 @@
+from test.slurm_assertions import assert_job_canceled
+from test.slurmoutput import DEFAULT_JOB_ID
+from test.testdoubles.executor import WaitingSubmissionExecutorSpy
+from test.testdoubles.filesystem import MemoryFilesystemFactoryStub
+from typing import List
+from unittest.mock import Mock
+
+from hpcrocket.core.filesystem.progressive import CopyInstruction
+from hpcrocket.core.launchoptions import EarlySubmitOptions
+from hpcrocket.core.slurmcontroller import SlurmController
+from hpcrocket.core.workflows.stages import LaunchStage, PrepareStage, QueuedPrepareStage
+from hpcrocket.ui import UI
+
+
+def launched_stage(executor: WaitingSubmissionExecutorSpy) -> LaunchStage:
+    launch_stage = LaunchStage(SlurmController(executor), "test.job", wait_for_inputs=EarlySubmitOptions())
+    launch_stage(Mock(spec=UI))
+    return launch_stage
+
+
+def commands(executor: WaitingSubmissionExecutorSpy) -> List[str]:
+    return [command.cmd for command in executor.command_log]
+
+
+def test__when_launching_with_wait_for_inputs__submits_waiting_copy_of_script() -> None:
+    executor = WaitingSubmissionExecutorSpy()
+
+    launched_stage(executor)
+
+    assert commands(executor) == ["dir=$(mktemp", "sbatch", "rm"]
+    assert executor.command_log[1].args == ["/tmp/hpc-rocket/test.job"]
+
+
+def test__given_files_are_copied__when_running__allows_job_to_start() -> None:
+    executor = WaitingSubmissionExecutorSpy()
+    factory = MemoryFilesystemFactoryStub()
+    factory.create_local_files("input.txt")
+    sut = QueuedPrepareStage(
+        PrepareStage(factory, [CopyInstruction("input.txt", "input.txt")]), launched_stage(executor)
+    )
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is True
+    assert factory.ssh_filesystem.exists("input.txt")
+    assert commands(executor)[-1] == "touch"
+
+
+def test__given_files_cannot_be_copied__when_running__cancels_job() -> None:
+    executor = WaitingSubmissionExecutorSpy()
+    sut = QueuedPrepareStage(
+        PrepareStage(MemoryFilesystemFactoryStub(), [CopyInstruction("missing.txt", "missing.txt")]),
+        launched_stage(executor),
+    )
+
+    actual = sut(Mock(spec=UI))
+
+    assert actual is False
+    assert "touch" not in commands(executor)
+    assert_job_canceled(executor, DEFAULT_JOB_ID, command_index=-1)
+
+
+def test__when_canceling__cancels_job() -> None:
+    executor = WaitingSubmissionExecutorSpy()
+    sut = QueuedPrepareStage(PrepareStage(MemoryFilesystemFactoryStub(), []), launched_stage(executor))
+
+    sut.cancel(Mock(spec=UI))
+
+    assert_job_canceled(executor, DEFAULT_JOB_ID, command_index=-1)
@@ -6,15 +6,21 @@ from test.testdoubles.executor import (
     CommandExecutorStub,
     failed_slurm_job_command_stub,
     LongRunningSlurmJobExecutorSpy,
+    RunningCommandStub,
     SlurmJobExecutorSpy,
+    scontrol_show_job_command_stub,
 )
+from pathlib import Path
 from typing import List, Optional
 from unittest.mock import Mock, call
 
 import pytest
+from hpcrocket.core.launchoptions import OutputTailOptions
 from hpcrocket.core.slurmbatchjob import SlurmBatchJob
 from hpcrocket.core.slurmcontroller import SlurmController
+from hpcrocket.core.workflows.incremental import IncrementalCollector
 from hpcrocket.core.workflows.stages import WatchStage
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.ui import UI
 from hpcrocket.watcher.jobwatcher import (
     JobWatcher,
@@ -182,3 +188,67 @@ def test__when_canceling_before_running__should_raise_not_watching_error():
 
     with pytest.raises(NotWatchingError):
         sut.cancel(Mock(spec=UI))
+
+
+def test__given_collector__when_running__collects_while_job_is_watched():
+    executor = SlurmJobExecutorSpy()
+    provider = make_job_provider(executor)
+    collector = Mock(spec=IncrementalCollector)
+    ui = Mock(spec=UI)
+    sut = WatchStage(provider, launch_options().poll_interval, collector=collector)
+
+    sut(ui)
+
+    assert collector.mock_calls == [call.start(ui), call.stop()]
+
+
+def test__given_tail_options__when_running__shows_job_output():
+    executor = ScontrolSlurmJobExecutorSpy()
+    provider = make_job_provider(executor)
+    ui = Mock(spec=UI)
+    sut = WatchStage(provider, launch_options().poll_interval, tail_options=OutputTailOptions(lines=5))
+
+    sut(ui)
+
+    ui.output.assert_called_with(["job output"])
+
+
+def test__given_tail_options__when_output_files_cannot_be_resolved__still_watches_job():
+    executor = ScontrolSlurmJobExecutorSpy(scontrol_cmd=RunningCommandStub(exit_code=1))
+    provider = make_job_provider(executor)
+    ui = Mock(spec=UI)
+    sut = WatchStage(provider, launch_options().poll_interval, tail_options=OutputTailOptions())
+
+    result = sut(ui)
+
+    assert result is True
+    ui.error.assert_called_once()
+    ui.output.assert_not_called()
+
+
+class ScontrolSlurmJobExecutorSpy(SlurmJobExecutorSpy):
+    def __init__(self, scontrol_cmd=None):
+        super().__init__()
+        self.scontrol_cmd = scontrol_cmd or scontrol_show_job_command_stub("/home/u/job.out", "/home/u/job.out")
+
+    def exec_command(self, cmd):
+        if cmd.startswith("scontrol"):
+            return self.scontrol_cmd
+
+        if cmd.startswith("tail"):
+            command = RunningCommandStub()
+            command.stdout_lines = ["job output\n"]
+            return command
+
+        return super().exec_command(cmd)
+
+
+def test__given_state__when_running__should_save_job_status(tmp_path: Path):
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.save()
+    provider = make_job_provider(SlurmJobExecutorSpy())
+    sut = WatchStage(provider, launch_options().poll_interval, state=state)
+
+    sut(Mock(spec=UI))
+
+    assert WorkflowState.resume(tmp_path / "state", "fingerprint").job_status == "COMPLETED"
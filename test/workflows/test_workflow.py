@@ -1,7 +1,9 @@
+from pathlib import Path
 from typing import Callable, List, Optional
 from unittest.mock import Mock
 
 import pytest
+from hpcrocket.core.workflows.state import WorkflowState
 from hpcrocket.core.workflows.workflow import Stage, Workflow, WorkflowNotStartedError
 from hpcrocket.ui import UI
 
@@ -136,5 +138,62 @@ def test__given_a_failing_stage_that_is_allowed_to_fail__when_running__executes_
     assert second_stage.was_run is True
 
 
+def test__given_state__when_stage_completes__saves_completed_stages(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    first_stage = StageSpy()
+
+    def interrupt() -> None:
+        raise KeyboardInterrupt
+
+    second_stage = StageSpy()
+    second_stage.run_callback = interrupt
+    sut = Workflow([first_stage, second_stage], state)
+
+    with pytest.raises(KeyboardInterrupt):
+        sut.run(ui_dummy())
+
+    assert WorkflowState.resume(tmp_path / "state", "fingerprint").completed_stages == 1
+
+
+def test__given_resumed_state__when_running__skips_completed_stages(tmp_path: Path) -> None:
+    state = WorkflowState(tmp_path / "state", "fingerprint")
+    state.save()
+    state.complete_stage(1)
+    first_stage = StageSpy()
+    second_stage = StageSpy()
+    sut = Workflow([first_stage, second_stage], WorkflowState.resume(tmp_path / "state", "fingerprint"))
+
+    actual = sut.run(ui_dummy())
+
+    assert actual is True
+    assert first_stage.was_run is False
+    assert second_stage.was_run is True
+
+
+@pytest.mark.parametrize("stage", [StageSpy(), FailingStage()])
+def test__given_state__when_workflow_ends__removes_state(tmp_path: Path, stage: Stage) -> None:
+    sut = Workflow([stage], WorkflowState(tmp_path / "state", "fingerprint"))
+
+    sut.run(ui_dummy())
+
+    assert not (tmp_path / "state").exists()
+
+
+def test__given_state__when_canceling__removes_state(tmp_path: Path) -> None:
+    stage = StageSpy()
+    sut = Workflow([stage], WorkflowState(tmp_path / "state", "fingerprint"))
+    state_exists_after_cancel: List[bool] = []
+
+    def cancel() -> None:
+        sut.cancel(ui_dummy())
+        state_exists_after_cancel.append((tmp_path / "state").exists())
+
+    stage.run_callback = cancel
+
+    sut.run(ui_dummy())
+
+    assert state_exists_after_cancel == [False]
+
+
 def cancel_workflow(sut: Workflow) -> Callable[[], None]:
     return lambda: sut.cancel(ui_dummy())
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+from hpcrocket.core.workflows.state import WorkflowState
+
+FINGERPRINT = "fingerprint"
+
+
+def saved_state(path: Path) -> WorkflowState:
+    state = WorkflowState(path, FINGERPRINT)
+    state.save()
+    return state
+
+
+def test__given_saved_progress__when_resuming__restores_progress(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    state = saved_state(path)
+    state.complete_stage(1)
+    state.add_copied_files(["first.txt", "second.txt"])
+    state.set_job("1234", ".ready")
+    state.set_job_status("RUNNING")
+
+    actual = WorkflowState.resume(path, FINGERPRINT)
+
+    assert actual.resumed is True
+    assert actual.completed_stages == 1
+    assert actual.copied_files == ["first.txt", "second.txt"]
+    assert (actual.jobid, actual.ready_marker, actual.job_status) == ("1234", ".ready", "RUNNING")
+
+
+def test__given_completed_stage__when_resuming__forgets_files_copied_by_the_stage(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    state = saved_state(path)
+    state.add_copied_files(["first.txt"])
+    state.complete_stage(1)
+
+    actual = WorkflowState.resume(path, FINGERPRINT)
+
+    assert actual.completed_stages == 1
+    assert actual.copied_files == []
+
+
+def test__given_state_of_other_fingerprint__when_resuming__starts_over(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    saved_state(path).complete_stage(2)
+
+    actual = WorkflowState.resume(path, "other fingerprint")
+
+    assert actual.resumed is False
+    assert actual.completed_stages == 0
+
+
+def test__given_missing_file__when_resuming__starts_over(tmp_path: Path) -> None:
+    actual = WorkflowState.resume(tmp_path / "state", FINGERPRINT)
+
+    assert actual.resumed is False
+
+
+def test__given_incomplete_last_record__when_resuming__restores_complete_records(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    saved_state(path).complete_stage(1)
+    with path.open("a") as file:
+        file.write('{"stages": ')
+
+    actual = WorkflowState.resume(path, FINGERPRINT)
+
+    assert actual.completed_stages == 1
+
+
+def test__given_resumed_state__when_saving__writes_records_that_can_be_appended_to(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    state = saved_state(path)
+    state.add_copied_files(["first.txt"])
+    with path.open("a") as file:
+        file.write('{"copied": ')
+
+    resumed = WorkflowState.resume(path, FINGERPRINT)
+    resumed.save()
+    resumed.add_copied_files(["second.txt"])
+
+    assert WorkflowState.resume(path, FINGERPRINT).copied_files == ["first.txt", "second.txt"]
+
+
+def test__when_setting_same_job_status__does_not_record_it_again(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    state = saved_state(path)
+    state.set_job_status("RUNNING")
+    lines = len(path.read_text().splitlines())
+
+    state.set_job_status("RUNNING")
+
+    assert len(path.read_text().splitlines()) == lines
+
+
+def test__when_removing__deletes_file(tmp_path: Path) -> None:
+    path = tmp_path / "state"
+    state = saved_state(path)
+
+    state.remove()
+    state.remove()
+
+    assert not path.exists()